@@ -22,7 +22,11 @@ os.environ["PYTHONWARNINGS"] = f"{_pw},{_add}" if _pw else _add
 _root = os.path.dirname(os.path.abspath(__file__))
 if _root and _root not in sys.path:
     sys.path.insert(0, _root)
-import utils.sklearn_parallel_config  # noqa: F401 — вариант 1 до импорта sklearn
+# Профилирование запуска (--profile-startup): время импорта модулей и шагов инициализации
+from utils.startup_profiler import init_startup_profiler, defer_startup_task, report_startup_profile
+_startup_profiler = init_startup_profiler()
+with _startup_profiler.step('sklearn/joblib'):
+    import utils.sklearn_parallel_config  # noqa: F401 — вариант 1 до импорта sklearn
 
 
 def _get_total_ram_mb():
@@ -307,7 +311,10 @@ _apply_cpu_limit_if_configured()
 def _check_and_install_pytorch():
     """Проверяет наличие PyTorch и устанавливает его при необходимости"""
     try:
-        import torch
+        # Только проверка наличия пакета: сам torch импортируется модулями AI при первом использовании
+        import importlib.util
+        if importlib.util.find_spec('torch') is None:
+            raise ImportError('torch')
         # PyTorch уже установлен
         return True
     except ImportError:
@@ -415,7 +422,8 @@ def _run_rebuild_bot_history_from_exchange():
         pass
 
 
-_run_rebuild_bot_history_from_exchange()
+# Пересборка истории из биржи не нужна для запуска — выполняется в фоновом потоке
+defer_startup_task('rebuild_bot_history_from_exchange', _run_rebuild_bot_history_from_exchange)
 
 try:
     from utils.memory_utils import force_collect_full
@@ -459,7 +467,8 @@ except Exception as e:
         sys.stderr.write(f"❌ Ошибка настройки логирования: {setup_error}\n")
 
 from typing import TYPE_CHECKING, Any
-from bot_engine.ai import _infobot_ai_protected as _protected_module
+with _startup_profiler.step('импорт защищённого модуля AI'):
+    from bot_engine.ai import _infobot_ai_protected as _protected_module
 
 
 if TYPE_CHECKING:
@@ -541,4 +550,5 @@ if __name__ == '__main__':
             sys.stderr.write("[AI] 💾 Планировщик бэкапов AI БД (ai_data.db) запущен\n")
     except Exception:
         pass
+    report_startup_profile()
     _protected_module.main()
@@ -132,6 +132,7 @@ from app.config import *
 
 # Импортируем БД для app.py
 from bot_engine.app_database import get_app_database
+from bot_engine.closed_pnl_sync import get_closed_pnl_synchronizer
 
 # Конфигурация резервного копирования (значения по умолчанию)
 _DATABASE_BACKUP_DEFAULTS = {
@@ -144,6 +145,7 @@ _DATABASE_BACKUP_DEFAULTS = {
     'BACKUP_DIR': None,
     'MAX_RETRIES': 3,
     'KEEP_LAST_N': 5,
+    'FULL_EVERY_N': 6,
 }
 
 if 'DATABASE_BACKUP' not in globals() or not isinstance(globals().get('DATABASE_BACKUP'), dict):
@@ -688,64 +690,21 @@ def time_sync_loop():
 
 
 def background_closed_pnl_loader():
-    """Фоновый процесс для загрузки закрытых PnL из биржи в БД каждые 30 секунд"""
+    """Фоновый процесс для загрузки новых закрытых PnL из биржи в БД каждые 30 секунд (по курсору)"""
     app_logger = logging.getLogger('app')
     app_logger.info("[CLOSED_PNL_LOADER] Запуск фонового процесса загрузки closed_pnl...")
     
     while not closed_pnl_loader_stop_event.is_set():
         try:
-            db = get_app_db()
-            
-            # Получаем timestamp последней загруженной позиции
-            last_timestamp = db.get_latest_closed_pnl_timestamp(exchange=ACTIVE_EXCHANGE)
-            
-            pass
-            
-            # Загружаем новые закрытые позиции с биржи
-            # Если есть last_timestamp, загружаем только новые (после этого timestamp)
-            # Если нет, загружаем все данные (первая загрузка)
-            try:
-                if last_timestamp:
-                    # Загружаем только новые позиции (после last_timestamp)
-                    # Используем период 'custom' с start_date = last_timestamp
-                    closed_pnl = current_exchange.get_closed_pnl(
-                        sort_by='time',
-                        period='custom',
-                        start_date=last_timestamp + 1,  # +1 чтобы не дублировать последнюю (в миллисекундах)
-                        end_date=None
-                    )
-                else:
-                    # Первая загрузка - загружаем все данные
-                    app_logger.info("[CLOSED_PNL_LOADER] Первая загрузка - загружаем все закрытые позиции...")
-                    closed_pnl = current_exchange.get_closed_pnl(
-                        sort_by='time',
-                        period='all'
-                    )
-                
-                if closed_pnl:
-                    # Сохраняем в БД
-                    saved = db.save_closed_pnl(closed_pnl, exchange=ACTIVE_EXCHANGE)
-                    if saved:
-                        app_logger.info(f"[CLOSED_PNL_LOADER] Загружено {len(closed_pnl)} новых закрытых позиций в БД")
-                    else:
-                        app_logger.warning(f"[CLOSED_PNL_LOADER] Не удалось сохранить {len(closed_pnl)} позиций в БД")
-                else:
-                    pass
-                    
-            except Exception as e:
-                app_logger.error(f"[CLOSED_PNL_LOADER] Ошибка загрузки closed_pnl с биржи: {e}")
-                import traceback
-                pass
-            
-            # Ждем 30 секунд до следующей загрузки
-            closed_pnl_loader_stop_event.wait(30)
-            
+            # Запрашивается только окно после курсора аккаунта; в БД добавляются только новые записи
+            new_records = get_closed_pnl_synchronizer(current_exchange, ACTIVE_EXCHANGE).sync()
+            if new_records:
+                app_logger.info(f"[CLOSED_PNL_LOADER] Загружено {len(new_records)} новых закрытых позиций в БД")
         except Exception as e:
-            app_logger.error(f"[CLOSED_PNL_LOADER] Критическая ошибка в фоновом процессе: {e}")
-            import traceback
-            pass
-            # Ждем 30 секунд перед следующей попыткой
-            closed_pnl_loader_stop_event.wait(30)
+            app_logger.error(f"[CLOSED_PNL_LOADER] Ошибка загрузки closed_pnl с биржи: {e}")
+        
+        # Ждем 30 секунд до следующей загрузки
+        closed_pnl_loader_stop_event.wait(30)
     
     app_logger.info("[CLOSED_PNL_LOADER] Фоновый процесс загрузки closed_pnl остановлен")
 
@@ -2487,27 +2446,11 @@ if __name__ == '__main__':
     # Выполняем первичную загрузку closed_pnl при старте (не ждем 30 секунд)
     app_logger.info("[APP] 🔄 Выполняем первичную загрузку closed_pnl...")
     try:
-        db = get_app_db()
-        last_timestamp = db.get_latest_closed_pnl_timestamp(exchange=ACTIVE_EXCHANGE)
-        
-        if not last_timestamp:
-            # Первая загрузка - загружаем все данные
-            app_logger.info("[APP] Первая загрузка closed_pnl - загружаем все данные...")
-            closed_pnl = current_exchange.get_closed_pnl(sort_by='time', period='all')
-            if closed_pnl:
-                saved = db.save_closed_pnl(closed_pnl, exchange=ACTIVE_EXCHANGE)
-                if saved:
-                    app_logger.info(f"[APP] ✅ Первичная загрузка: сохранено {len(closed_pnl)} закрытых позиций в БД")
-                else:
-                    app_logger.warning(f"[APP] ⚠️ Не удалось сохранить {len(closed_pnl)} позиций при первичной загрузке")
-            else:
-                app_logger.info("[APP] ℹ️ Нет закрытых позиций для загрузки")
-        else:
-            app_logger.info(f"[APP] ✅ В БД уже есть данные closed_pnl (последний timestamp: {last_timestamp})")
+        # Без курсора и данных в БД — вся доступная история, иначе только новое после курсора
+        new_records = get_closed_pnl_synchronizer(current_exchange, ACTIVE_EXCHANGE).sync()
+        app_logger.info(f"[APP] ✅ Первичная загрузка closed_pnl: новых закрытых позиций {len(new_records)}")
     except Exception as e:
         app_logger.error(f"[APP] ❌ Ошибка первичной загрузки closed_pnl: {e}")
-        import traceback
-        pass
     try:
         from utils.memory_utils import force_collect_full
         force_collect_full()
@@ -20,6 +20,8 @@ from typing import Dict, Optional, Any, Tuple, List
 from contextlib import contextmanager
 import logging
 
+from bot_engine.recent_closures import notify_exchange_closures
+
 logger = logging.getLogger('App.Database')
 
 
@@ -204,7 +206,7 @@ class AppDatabase:
                 conn.commit()
                 
                 if saved_count > 0:
-                    pass
+                    notify_exchange_closures(pnl_records)
                 
                 return saved_count
                 
@@ -309,6 +311,42 @@ class AppDatabase:
             pass
             return []
     
+    def load_closed_pnl_after_id(self, last_id: int = 0) -> List[Dict]:
+        """
+        Записи closed_pnl_history с id больше last_id (инкрементальное чтение по курсору)
+        
+        Args:
+            last_id: Последний уже прочитанный id (0 — вся таблица)
+        
+        Returns:
+            Список записей PnL (с полем id) в порядке добавления
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT id, symbol, entry_price, exit_price, closed_pnl, close_time, close_timestamp
+                    FROM closed_pnl_history
+                    WHERE id > ?
+                    ORDER BY id
+                """, (int(last_id or 0),))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"❌ Ошибка инкрементальной загрузки истории PnL: {e}")
+            return []
+    
+    def get_max_closed_pnl_id(self) -> int:
+        """Наибольший id в closed_pnl_history (0 — таблица пуста)"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT MAX(id) FROM closed_pnl_history")
+                row = cursor.fetchone()
+                return int(row[0] or 0) if row else 0
+        except Exception as e:
+            logger.error(f"❌ Ошибка чтения максимального id истории PnL: {e}")
+            return 0
+    
     def get_latest_pnl_timestamp(self, exchange=None) -> Optional[int]:
         """
         Получает timestamp последней записи PnL в БД
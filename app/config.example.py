@@ -139,7 +139,8 @@ DATABASE_BACKUP = {
     'BOTS_ENABLED': True,        # Включить бэкап Bots БД
     'BACKUP_DIR': None,          # Кастомная директория (None = data/backups)
     'MAX_RETRIES': 3,            # Количество попыток при блокировках файлов
-    'KEEP_LAST_N': 5             # Хранить только 5 последних бэкапов для каждой системы
+    'KEEP_LAST_N': 5,            # Хранить только 5 последних бэкапов для каждой системы
+    'FULL_EVERY_N': 6            # Каждый 6-й бэкап полный, между ними — разностные
 }
 
 # Настройки синхронизации времени Windows (только для Windows)
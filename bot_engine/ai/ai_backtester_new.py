@@ -17,6 +17,7 @@ import pandas as pd
 
 from bot_engine.protections import ProtectionState, evaluate_protections
 from bot_engine.ai.filter_utils import apply_entry_filters
+from bot_engine.ai.backtest_cache import BACKTEST_ENGINE_VERSION, fingerprint_records, get_backtest_cache
 from bot_engine.utils.rsi_utils import calculate_rsi_history
 
 logger = logging.getLogger('AI.Backtester')
@@ -106,6 +107,31 @@ def _create_protection_state(direction: str, entry_price: float, notional_usdt:
     )
 
 
+def _filter_trades_by_period(trades: List[Dict[str, Any]], period_days: int) -> List[Dict[str, Any]]:
+    """Оставляет сделки за последние period_days дней."""
+    cutoff_date = datetime.now() - timedelta(days=period_days)
+    filtered_trades = []
+    for trade in trades:
+        try:
+            trade_time = datetime.fromisoformat(trade.get('timestamp', '').replace('Z', ''))
+            if trade_time >= cutoff_date:
+                filtered_trades.append(trade)
+        except:
+            continue
+    return filtered_trades
+
+
+def _lookup_cached_backtest(cache_params: Dict[str, Any], data_fingerprint: str):
+    """Возвращает (cache, key, cached_result); cache=None если кэш недоступен."""
+    try:
+        cache = get_backtest_cache()
+        key = cache.make_key(cache_params, None, None, data_fingerprint,
+                             engine_version=f"backtester-{BACKTEST_ENGINE_VERSION}")
+        return cache, key, cache.get(key)
+    except Exception:
+        return None, None, None
+
+
 def _determine_trend(closes: List[float], index: int, window: int) -> str:
     if not closes or index <= 0:
         return 'NEUTRAL'
@@ -140,45 +166,64 @@ class AIBacktester:
         """
         Загрузить рыночные данные
         
-        ВАЖНО: Использует ТОЛЬКО БД (таблица candles_history)
-        Свечи загружаются через пагинацию по 2000 свечей для каждой монеты
+        Источники: свечи, опубликованные bots.py в shared memory (без копирования
+        через БД), иначе БД (таблица candles_history).
         """
         try:
             market_data = {'latest': {'candles': {}}}
             candles_data = {}
+            candles_source = 'ai_data.db'
             
-            # Загружаем ТОЛЬКО из БД
+            # Ограничиваем загрузку (при AI_MEMORY_LIMIT_MB лимиты из AILauncherConfig)
+            from bot_engine.config_loader import get_current_timeframe
             try:
-                from bot_engine.ai.ai_database import get_ai_database
-                ai_db = get_ai_database()
-                if not ai_db:
-                    logger.warning("⚠️ AI Database не доступна")
-                    return market_data
-                
-                # Ограничиваем загрузку (при AI_MEMORY_LIMIT_MB лимиты из AILauncherConfig)
-                from bot_engine.config_loader import get_current_timeframe
+                from bot_engine.ai.ai_launcher_config import AILauncherConfig
+                _max_sym = min(30, AILauncherConfig.MAX_SYMBOLS_FOR_CANDLES)
+                _max_candles = AILauncherConfig.MAX_CANDLES_PER_SYMBOL
+            except Exception:
+                _max_sym, _max_candles = 30, 1000
+            
+            try:
+                from bot_engine.candles_shm import get_candles_reader
+                reader = get_candles_reader()
+                if reader is not None:
+                    candles_data = reader.get_all_candles(
+                        get_current_timeframe(),
+                        max_symbols=_max_sym,
+                        max_candles_per_symbol=_max_candles
+                    )
+                    if candles_data:
+                        candles_source = 'shared_memory'
+                        total_candles = sum(len(c) for c in candles_data.values())
+                        logger.info(f"✅ Загружено {len(candles_data)} монет из shared memory bots.py ({total_candles:,} свечей)")
+            except Exception:
+                candles_data = {}
+            
+            # Иначе из БД
+            if not candles_data:
                 try:
-                    from bot_engine.ai.ai_launcher_config import AILauncherConfig
-                    _max_sym = min(30, AILauncherConfig.MAX_SYMBOLS_FOR_CANDLES)
-                    _max_candles = AILauncherConfig.MAX_CANDLES_PER_SYMBOL
-                except Exception:
-                    _max_sym, _max_candles = 30, 1000
-                candles_data = ai_db.get_all_candles_dict(
-                    timeframe=get_current_timeframe(),
-                    max_symbols=_max_sym,
-                    max_candles_per_symbol=_max_candles
-                )
-                if candles_data:
-                    total_candles = sum(len(c) for c in candles_data.values())
-                    logger.info(f"✅ Загружено {len(candles_data)} монет из БД ({total_candles:,} свечей, ограничено для экономии памяти)")
-                else:
-                    logger.warning("⚠️ БД пуста, ожидаем загрузки свечей...")
+                    from bot_engine.ai.ai_database import get_ai_database
+                    ai_db = get_ai_database()
+                    if not ai_db:
+                        logger.warning("⚠️ AI Database не доступна")
+                        return market_data
+                    
+                    candles_data = ai_db.get_all_candles_dict(
+                        timeframe=get_current_timeframe(),
+                        max_symbols=_max_sym,
+                        max_candles_per_symbol=_max_candles
+                    )
+                    if candles_data:
+                        total_candles = sum(len(c) for c in candles_data.values())
+                        logger.info(f"✅ Загружено {len(candles_data)} монет из БД ({total_candles:,} свечей, ограничено для экономии памяти)")
+                    else:
+                        logger.warning("⚠️ БД пуста, ожидаем загрузки свечей...")
+                        return market_data
+                except Exception as db_error:
+                    logger.error(f"❌ Ошибка загрузки из БД: {db_error}")
+                    import traceback
+                    logger.error(traceback.format_exc())
                     return market_data
-            except Exception as db_error:
-                logger.error(f"❌ Ошибка загрузки из БД: {db_error}")
-                import traceback
-                logger.error(traceback.format_exc())
-                return market_data
             
             if candles_data:
                 logger.info(f"✅ Загружено полной истории для {len(candles_data)} монет")
@@ -200,7 +245,7 @@ class AIBacktester:
                             'timeframe': get_current_timeframe(),
                             'last_update': datetime.now().isoformat(),
                             'count': len(candles),
-                            'source': 'ai_data.db'
+                            'source': candles_source
                         }
                 
                 logger.info(f"✅ Обработано: {len(market_data['latest']['candles'])} монет")
@@ -418,13 +463,36 @@ class AIBacktester:
                 })
                 return None
             
-            processed_symbols = 0
+            # Конфиги монет считаем заранее: они нужны и для симуляции, и для ключа кэша
+            symbol_configs: Dict[str, Dict[str, Any]] = {}
+            window_summary: List[Dict[str, Any]] = []
             for symbol, candle_info in candles_data.items():
                 candles = candle_info.get('candles', [])
                 if len(candles) < rsi_period + 5:
                     continue
-                
-                symbol_config = _get_config_snapshot(symbol).get('merged', base_config)
+                symbol_configs[symbol] = _get_config_snapshot(symbol).get('merged', base_config)
+                window_summary.append({
+                    'symbol': symbol,
+                    'count': len(candles),
+                    'first': candles[0].get('time'),
+                    'last': candles[-1].get('time'),
+                    'last_close': candles[-1].get('close'),
+                })
+            
+            backtest_cache, cache_key, cached = _lookup_cached_backtest(
+                {'strategy': strategy_params, 'period_days': period_days, 'configs': symbol_configs},
+                fingerprint_records(window_summary, ('symbol', 'count', 'first', 'last', 'last_close')),
+            )
+            if cached is not None:
+                logger.info("♻️ Бэктест на свечах взят из кэша")
+                return cached
+            
+            processed_symbols = 0
+            for symbol, candle_info in candles_data.items():
+                if symbol not in symbol_configs:
+                    continue
+                candles = candle_info.get('candles', [])
+                symbol_config = symbol_configs[symbol]
                 position_size_pct = strategy_params.get('position_size_pct')
                 if position_size_pct is None:
                     if symbol_config.get('default_position_mode') == 'percent':
@@ -618,6 +686,9 @@ class AIBacktester:
                 f"Return={total_return:.2f}%, WinRate={win_rate:.2f}%"
             )
             
+            if backtest_cache is not None:
+                backtest_cache.put(cache_key, results)
+                backtest_cache.flush()
             return results
         
         except Exception as e:
@@ -652,16 +723,7 @@ class AIBacktester:
                 return self._backtest_on_candles(strategy_params, period_days)
             
             # Фильтруем сделки по периоду
-            cutoff_date = datetime.now() - timedelta(days=period_days)
-            filtered_trades = []
-            
-            for trade in trades:
-                try:
-                    trade_time = datetime.fromisoformat(trade.get('timestamp', '').replace('Z', ''))
-                    if trade_time >= cutoff_date:
-                        filtered_trades.append(trade)
-                except:
-                    continue
+            filtered_trades = _filter_trades_by_period(trades, period_days)
             
             logger.info(f"📊 Отфильтровано {len(filtered_trades)} сделок за последние {period_days} дней")
             
@@ -671,6 +733,18 @@ class AIBacktester:
             
             base_config = _get_config_snapshot().get('global', {})
 
+            # Те же параметры на тех же сделках уже считались — берём результат из кэша
+            backtest_cache, cache_key, cached = _lookup_cached_backtest(
+                {'strategy': strategy_params, 'period_days': period_days, 'base': base_config},
+                fingerprint_records(
+                    filtered_trades,
+                    ('id', 'symbol', 'timestamp', 'close_timestamp', 'entry_price', 'exit_price', 'rsi', 'entry_rsi'),
+                ),
+            )
+            if cached is not None:
+                logger.info(f"♻️ Бэктест '{strategy_name}' взят из кэша")
+                return cached
+
             # Симулируем торговлю с новыми параметрами
             initial_balance = 10000.0
             balance = initial_balance
@@ -925,6 +999,9 @@ class AIBacktester:
             
             logger.info(f"✅ Бэктест завершен: Return={total_return:.2f}%, Win Rate={win_rate:.2f}%")
             
+            if backtest_cache is not None:
+                backtest_cache.put(cache_key, results)
+                backtest_cache.flush()
             return results
             
         except Exception as e:
@@ -57,11 +57,23 @@ class AICandlesLoader:
 
     def _get_candles_from_preloaded_cache(self, symbol: str) -> Optional[tuple]:
         """
-        Берёт свечи прямо из уже загруженных данных (bots_data.db — кэш, который
-        заполняет процесс bots.py при загрузке свечей). Без запросов к API бота и к бирже.
+        Берёт свечи прямо из уже загруженных данных процесса bots.py: сначала из
+        shared memory (см. bot_engine/candles_shm.py), затем из bots_data.db.
+        Без запросов к API бота и к бирже.
         Returns:
             (candles_list, timeframe_str) или None.
         """
+        try:
+            from bot_engine.candles_shm import get_candles_reader
+            reader = get_candles_reader()
+            if reader is not None:
+                timeframe = get_current_timeframe()
+                candles = reader.get_candles(symbol, timeframe)
+                if candles:
+                    return candles, timeframe
+        except Exception:
+            pass
+        
         try:
             from bot_engine.storage import load_candles_cache
             cache = load_candles_cache(symbol=symbol)
@@ -29,7 +29,7 @@ import time
 import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Optional, Any, Tuple, Iterator
 from contextlib import contextmanager
 from functools import wraps
 import logging
@@ -55,11 +55,27 @@ def _get_project_root() -> Path:
         return current.parent
 
 
+def _configured_backup_dir() -> Optional[str]:
+    """BACKUP_DIR из DATABASE_BACKUP (configs/app_config.py, как у app.py); None — data/backups"""
+    try:
+        from configs.app_config import DATABASE_BACKUP
+        backup_dir = DATABASE_BACKUP.get('BACKUP_DIR') if isinstance(DATABASE_BACKUP, dict) else None
+        return str(backup_dir) if backup_dir else None
+    except Exception:
+        return None
+
+
 class AIDatabase:
     """
     Реляционная база данных для всех данных AI модуля
     """
     
+    # Свечей на символ в candles_history (1000 свечей 6h = ~250 дней истории)
+    MAX_CANDLES_PER_SYMBOL = 1000
+    # Обрезка candles_history: после стольких записанных строк или раз в интервал
+    CANDLES_TRIM_EVERY_ROWS = 50000
+    CANDLES_TRIM_INTERVAL_SEC = 3600
+    
     def __init__(self, db_path: str = None):
         """
         Инициализация базы данных
@@ -92,21 +108,12 @@ class AIDatabase:
                             os.remove(_p)
                         except OSError:
                             pass
-                backup_dir = _get_project_root() / 'data' / 'backups'
-                if backup_dir.exists():
-                    sql_backups = sorted(
-                        [f for f in backup_dir.glob("ai_data_*.sql") if f.is_file() and f.stat().st_size > 0],
-                        key=lambda f: f.stat().st_mtime,
-                        reverse=True
-                    )
-                    if sql_backups:
-                        latest_sql = str(sql_backups[0])
-                        with open(latest_sql, 'r', encoding='utf-8') as _f:
-                            _sql = _f.read()
-                        _conn = sqlite3.connect(self.db_path)
-                        _conn.executescript(_sql)
-                        _conn.close()
-                        logger.info(f"✅ AI БД восстановлена из SQL-бэкапа: {latest_sql}")
+                # Самый свежий целостный бэкап любого формата (.db.gz/.delta.gz, старые .sql/.db)
+                for _b in self.list_backups():
+                    if self._check_backup_integrity(_b['path']):
+                        self._get_backup_service().restore_to_file(_b['path'], self.db_path)
+                        logger.info(f"✅ AI БД восстановлена из резервной копии: {_b['path']}")
+                        break
             except Exception as _e:
                 logger.warning(f"⚠️ Ошибка отложенного ремонта AI БД: {_e}")
 
@@ -120,7 +127,7 @@ class AIDatabase:
                     valid_list = [b for b in self.list_backups() if self._check_backup_integrity(b['path'])]
                     chosen_path = _backup_path if self._check_backup_integrity(_backup_path) else (valid_list[0]['path'] if valid_list else _backup_path)
                     logger.info(f"📦 Автовосстановление AI БД из {chosen_path} (после перезапуска)...")
-                    shutil.copy2(chosen_path, self.db_path)
+                    self._get_backup_service().restore_to_file(chosen_path, self.db_path)
                     for _suffix in ('-wal', '-shm'):
                         _f = self.db_path + _suffix
                         if os.path.exists(_f):
@@ -132,7 +139,7 @@ class AIDatabase:
                         for b in valid_list:
                             if b['path'] == chosen_path:
                                 continue
-                            shutil.copy2(b['path'], self.db_path)
+                            self._get_backup_service().restore_to_file(b['path'], self.db_path)
                             for _s in ('-wal', '-shm'):
                                 _f2 = self.db_path + _s
                                 if os.path.exists(_f2):
@@ -162,6 +169,10 @@ class AIDatabase:
             logger.error(f"❌ Ошибка создания директории для БД: {e}")
             raise
         
+        # Обслуживание candles_history (обрезка старых свечей) — периодически, не на каждой записи
+        self._candles_written_since_trim = 0
+        self._candles_last_trim = time.time()
+        
         # Инициализируем базу данных
         self._init_database()
         
@@ -356,6 +367,13 @@ class AIDatabase:
                 conn.executescript(sql_dump)
                 conn.close()
                 logger.info(f"✅ Новая БД создана и загружена из SQL-бэкапа: {backup_path}")
+            else:
+                # Дамп повреждённой БД не получился — берём самый свежий целостный бэкап (.db.gz/.delta.gz и др.)
+                for _b in self.list_backups():
+                    if self._check_backup_integrity(_b['path']):
+                        self._get_backup_service().restore_to_file(_b['path'], self.db_path)
+                        logger.info(f"✅ Новая БД создана из резервной копии: {_b['path']}")
+                        break
             if has_data and backup_path:
                 logger.warning(f"💾 Данные сохранены в резервной копии - можно восстановить при необходимости")
         except Exception as e:
@@ -1371,6 +1389,17 @@ class AIDatabase:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_candles_time ON candles_history(candle_time)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_candles_symbol_time ON candles_history(symbol, candle_time)")
             
+            # Водяные знаки свечей: время последней сохранённой свечи по (символ, таймфрейм)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS candles_watermarks (
+                    symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    last_time INTEGER NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (symbol, timeframe)
+                )
+            """)
+            
             # ==================== ТАБЛИЦА: ВЕРСИИ МОДЕЛЕЙ ====================
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS model_versions (
@@ -2890,7 +2919,7 @@ class AIDatabase:
                                 config_params_json, filters_params_json, entry_conditions_json,
                                 exit_conditions_json, restrictions_json, extra_params_json,
                                 created_at
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                         """, (
                             trade.get('symbol'),
                             trade.get('direction'),
@@ -2942,6 +2971,158 @@ class AIDatabase:
         
         return saved_count
     
+    @staticmethod
+    def _restore_simulated_trade_params(trade: Dict[str, Any]) -> Dict[str, Any]:
+        """Восстанавливает rsi_params/risk_params симуляции из нормализованных столбцов"""
+        # Восстанавливаем rsi_params из нормализованных столбцов
+        rsi_params = {}
+        if trade.get('rsi_long_threshold') is not None:
+            rsi_params['oversold'] = trade['rsi_long_threshold']
+            rsi_params['rsi_long_threshold'] = trade['rsi_long_threshold']
+        if trade.get('rsi_short_threshold') is not None:
+            rsi_params['overbought'] = trade['rsi_short_threshold']
+            rsi_params['rsi_short_threshold'] = trade['rsi_short_threshold']
+        if trade.get('rsi_exit_long_with_trend') is not None:
+            rsi_params['exit_long_with_trend'] = trade['rsi_exit_long_with_trend']
+            rsi_params['rsi_exit_long_with_trend'] = trade['rsi_exit_long_with_trend']
+        if trade.get('rsi_exit_long_against_trend') is not None:
+            rsi_params['exit_long_against_trend'] = trade['rsi_exit_long_against_trend']
+            rsi_params['rsi_exit_long_against_trend'] = trade['rsi_exit_long_against_trend']
+        if trade.get('rsi_exit_short_with_trend') is not None:
+            rsi_params['exit_short_with_trend'] = trade['rsi_exit_short_with_trend']
+            rsi_params['rsi_exit_short_with_trend'] = trade['rsi_exit_short_with_trend']
+        if trade.get('rsi_exit_short_against_trend') is not None:
+            rsi_params['exit_short_against_trend'] = trade['rsi_exit_short_against_trend']
+            rsi_params['rsi_exit_short_against_trend'] = trade['rsi_exit_short_against_trend']
+        
+        # Загружаем extra_params_json если есть
+        if trade.get('extra_params_json'):
+            try:
+                extra_params = json.loads(trade['extra_params_json'])
+                rsi_params.update(extra_params)
+            except:
+                pass
+        
+        if rsi_params:
+            trade['rsi_params'] = rsi_params
+            trade['rsi_params_json'] = json.dumps(rsi_params, ensure_ascii=False)  # Для обратной совместимости
+        
+        # Восстанавливаем risk_params из нормализованных столбцов
+        risk_params = {}
+        if trade.get('max_loss_percent') is not None:
+            risk_params['max_loss_percent'] = trade['max_loss_percent']
+        if trade.get('take_profit_percent') is not None:
+            risk_params['take_profit_percent'] = trade['take_profit_percent']
+        if trade.get('trailing_stop_activation') is not None:
+            risk_params['trailing_stop_activation'] = trade['trailing_stop_activation']
+        if trade.get('trailing_stop_distance') is not None:
+            risk_params['trailing_stop_distance'] = trade['trailing_stop_distance']
+        if trade.get('trailing_take_distance') is not None:
+            risk_params['trailing_take_distance'] = trade['trailing_take_distance']
+        if trade.get('trailing_update_interval') is not None:
+            risk_params['trailing_update_interval'] = trade['trailing_update_interval']
+        if trade.get('break_even_trigger') is not None:
+            risk_params['break_even_trigger'] = trade['break_even_trigger']
+        if trade.get('break_even_protection') is not None:
+            risk_params['break_even_protection'] = trade['break_even_protection']
+        if trade.get('max_position_hours') is not None:
+            risk_params['max_position_hours'] = trade['max_position_hours']
+        
+        # Загружаем extra_params_json если есть (может содержать дополнительные risk параметры)
+        if trade.get('extra_params_json'):
+            try:
+                extra_params = json.loads(trade['extra_params_json'])
+                # Добавляем только risk параметры
+                known_risk_keys = {'max_loss_percent', 'take_profit_percent', 'trailing_stop_activation',
+                                 'trailing_stop_distance', 'trailing_take_distance', 'trailing_update_interval',
+                                 'break_even_trigger', 'break_even_protection', 'max_position_hours'}
+                for key, value in extra_params.items():
+                    if key not in known_risk_keys and key not in rsi_params:
+                        risk_params[key] = value
+            except:
+                pass
+        
+        if risk_params:
+            trade['risk_params'] = risk_params
+            trade['risk_params_json'] = json.dumps(risk_params, ensure_ascii=False)  # Для обратной совместимости
+        
+        return trade
+    
+    def _build_simulated_trades_query(self,
+                                      symbol: Optional[str] = None,
+                                      min_pnl: Optional[float] = None,
+                                      max_pnl: Optional[float] = None,
+                                      is_successful: Optional[bool] = None):
+        """Собирает WHERE-часть запроса к simulated_trades (общая для списка и потокового чтения)"""
+        query = "SELECT * FROM simulated_trades WHERE 1=1"
+        params = []
+        
+        if symbol:
+            query += " AND symbol = ?"
+            params.append(symbol)
+        
+        if min_pnl is not None:
+            query += " AND pnl >= ?"
+            params.append(min_pnl)
+        
+        if max_pnl is not None:
+            query += " AND pnl <= ?"
+            params.append(max_pnl)
+        
+        if is_successful is not None:
+            query += " AND is_successful = ?"
+            params.append(1 if is_successful else 0)
+        
+        return query, params
+    
+    def iter_simulated_trades(self,
+                              symbol: Optional[str] = None,
+                              min_pnl: Optional[float] = None,
+                              max_pnl: Optional[float] = None,
+                              is_successful: Optional[bool] = None,
+                              chunk_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Потоковое чтение симуляций пачками по chunk_size (страницы по курсору id, от новых к старым).
+        
+        В отличие от get_simulated_trades не держит в памяти всю таблицу —
+        одновременно живёт только одна пачка. Соединение с БД открывается на время
+        чтения страницы и не удерживается, пока вызывающий код обрабатывает пачку.
+        Формат сделок тот же.
+        """
+        query, params = self._build_simulated_trades_query(symbol, min_pnl, max_pnl, is_successful)
+        chunk_size = max(1, int(chunk_size))
+        last_id = None
+        
+        while True:
+            rows = self._fetch_page_by_id(query, params, last_id, chunk_size, descending=True)
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            yield [self._restore_simulated_trade_params(row) for row in rows]
+            if len(rows) < chunk_size:
+                break
+    
+    def _fetch_page_by_id(self, query: str, params: List[Any], last_id: Optional[int],
+                          chunk_size: int, descending: bool = False) -> List[Dict[str, Any]]:
+        """
+        Одна страница запроса (оканчивающегося WHERE-условием) после курсора id.
+        Соединение закрывается до возврата — между страницами БД не блокируется.
+        """
+        op, order = ('<', 'DESC') if descending else ('>', 'ASC')
+        query_params = list(params)
+        if last_id is not None:
+            query += f" AND id {op} ?"
+            query_params.append(last_id)
+        query += f" ORDER BY id {order} LIMIT ?"
+        query_params.append(chunk_size)
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, query_params)
+                return [dict(row) for row in cursor.fetchmany(chunk_size)]
+            finally:
+                cursor.close()
+    
     def get_simulated_trades(self, 
                             symbol: Optional[str] = None,
                             min_pnl: Optional[float] = None,
@@ -2966,25 +3147,7 @@ class AIDatabase:
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
-            query = "SELECT * FROM simulated_trades WHERE 1=1"
-            params = []
-            
-            if symbol:
-                query += " AND symbol = ?"
-                params.append(symbol)
-            
-            if min_pnl is not None:
-                query += " AND pnl >= ?"
-                params.append(min_pnl)
-            
-            if max_pnl is not None:
-                query += " AND pnl <= ?"
-                params.append(max_pnl)
-            
-            if is_successful is not None:
-                query += " AND is_successful = ?"
-                params.append(1 if is_successful else 0)
-            
+            query, params = self._build_simulated_trades_query(symbol, min_pnl, max_pnl, is_successful)
             query += " ORDER BY entry_time DESC"
             
             if limit:
@@ -2998,85 +3161,7 @@ class AIDatabase:
             cursor.execute(query, params)
             rows = cursor.fetchall()
             
-            result = []
-            for row in rows:
-                trade = dict(row)
-                
-                # Восстанавливаем rsi_params из нормализованных столбцов
-                rsi_params = {}
-                if trade.get('rsi_long_threshold') is not None:
-                    rsi_params['oversold'] = trade['rsi_long_threshold']
-                    rsi_params['rsi_long_threshold'] = trade['rsi_long_threshold']
-                if trade.get('rsi_short_threshold') is not None:
-                    rsi_params['overbought'] = trade['rsi_short_threshold']
-                    rsi_params['rsi_short_threshold'] = trade['rsi_short_threshold']
-                if trade.get('rsi_exit_long_with_trend') is not None:
-                    rsi_params['exit_long_with_trend'] = trade['rsi_exit_long_with_trend']
-                    rsi_params['rsi_exit_long_with_trend'] = trade['rsi_exit_long_with_trend']
-                if trade.get('rsi_exit_long_against_trend') is not None:
-                    rsi_params['exit_long_against_trend'] = trade['rsi_exit_long_against_trend']
-                    rsi_params['rsi_exit_long_against_trend'] = trade['rsi_exit_long_against_trend']
-                if trade.get('rsi_exit_short_with_trend') is not None:
-                    rsi_params['exit_short_with_trend'] = trade['rsi_exit_short_with_trend']
-                    rsi_params['rsi_exit_short_with_trend'] = trade['rsi_exit_short_with_trend']
-                if trade.get('rsi_exit_short_against_trend') is not None:
-                    rsi_params['exit_short_against_trend'] = trade['rsi_exit_short_against_trend']
-                    rsi_params['rsi_exit_short_against_trend'] = trade['rsi_exit_short_against_trend']
-                
-                # Загружаем extra_params_json если есть
-                if trade.get('extra_params_json'):
-                    try:
-                        extra_params = json.loads(trade['extra_params_json'])
-                        rsi_params.update(extra_params)
-                    except:
-                        pass
-                
-                if rsi_params:
-                    trade['rsi_params'] = rsi_params
-                    trade['rsi_params_json'] = json.dumps(rsi_params, ensure_ascii=False)  # Для обратной совместимости
-                
-                # Восстанавливаем risk_params из нормализованных столбцов
-                risk_params = {}
-                if trade.get('max_loss_percent') is not None:
-                    risk_params['max_loss_percent'] = trade['max_loss_percent']
-                if trade.get('take_profit_percent') is not None:
-                    risk_params['take_profit_percent'] = trade['take_profit_percent']
-                if trade.get('trailing_stop_activation') is not None:
-                    risk_params['trailing_stop_activation'] = trade['trailing_stop_activation']
-                if trade.get('trailing_stop_distance') is not None:
-                    risk_params['trailing_stop_distance'] = trade['trailing_stop_distance']
-                if trade.get('trailing_take_distance') is not None:
-                    risk_params['trailing_take_distance'] = trade['trailing_take_distance']
-                if trade.get('trailing_update_interval') is not None:
-                    risk_params['trailing_update_interval'] = trade['trailing_update_interval']
-                if trade.get('break_even_trigger') is not None:
-                    risk_params['break_even_trigger'] = trade['break_even_trigger']
-                if trade.get('break_even_protection') is not None:
-                    risk_params['break_even_protection'] = trade['break_even_protection']
-                if trade.get('max_position_hours') is not None:
-                    risk_params['max_position_hours'] = trade['max_position_hours']
-                
-                # Загружаем extra_params_json если есть (может содержать дополнительные risk параметры)
-                if trade.get('extra_params_json'):
-                    try:
-                        extra_params = json.loads(trade['extra_params_json'])
-                        # Добавляем только risk параметры
-                        known_risk_keys = {'max_loss_percent', 'take_profit_percent', 'trailing_stop_activation',
-                                         'trailing_stop_distance', 'trailing_take_distance', 'trailing_update_interval',
-                                         'break_even_trigger', 'break_even_protection', 'max_position_hours'}
-                        for key, value in extra_params.items():
-                            if key not in known_risk_keys and key not in rsi_params:
-                                risk_params[key] = value
-                    except:
-                        pass
-                
-                if risk_params:
-                    trade['risk_params'] = risk_params
-                    trade['risk_params_json'] = json.dumps(risk_params, ensure_ascii=False)  # Для обратной совместимости
-                
-                result.append(trade)
-            
-            return result
+            return [self._restore_simulated_trade_params(dict(row)) for row in rows]
     
     def count_simulated_trades(self, symbol: Optional[str] = None) -> int:
         """Подсчитывает количество симуляций"""
@@ -3850,6 +3935,94 @@ class AIDatabase:
                 }
             }
     
+    @staticmethod
+    def _build_training_union_query(include_simulated: bool,
+                                    include_real: bool,
+                                    include_exchange: bool) -> Optional[str]:
+        """UNION ALL по источникам сделок ai_data.db в едином формате для обучения"""
+        queries = AIDatabase._training_source_queries(include_simulated, include_real, include_exchange)
+        return " UNION ALL ".join(queries) if queries else None
+    
+    @staticmethod
+    def _training_source_queries(include_simulated: bool,
+                                 include_real: bool,
+                                 include_exchange: bool,
+                                 with_id: bool = False) -> List[str]:
+        """
+        Запросы к источникам сделок ai_data.db в едином формате для обучения
+        (каждый оканчивается WHERE-условием; with_id добавляет колонку id для постраничного чтения)
+        """
+        id_column = "id, " if with_id else ""
+        queries = []
+        
+        if include_simulated:
+            queries.append(f"""
+                SELECT {id_column}
+                    'SIMULATED' as source,
+                    symbol, direction, entry_price, exit_price,
+                    entry_rsi as rsi, entry_trend as trend,
+                    entry_volatility, entry_volume_ratio,
+                    pnl, pnl_pct as roi, is_successful,
+                    entry_time as timestamp, exit_time as close_timestamp,
+                    exit_reason as close_reason,
+                    NULL as ai_decision_id, NULL as ai_confidence
+                FROM simulated_trades
+                WHERE exit_price IS NOT NULL
+            """)
+        
+        if include_real:
+            queries.append(f"""
+                SELECT {id_column}
+                    'BOT' as source,
+                    symbol, direction, entry_price, exit_price,
+                    entry_rsi as rsi, entry_trend as trend,
+                    entry_volatility, entry_volume_ratio,
+                    pnl, roi, CASE WHEN pnl > 0 THEN 1 ELSE 0 END as is_successful,
+                    entry_time as timestamp, exit_time as close_timestamp,
+                    close_reason, ai_decision_id, ai_confidence
+                FROM bot_trades
+                WHERE is_simulated = 0 AND status = 'CLOSED' AND pnl IS NOT NULL
+            """)
+        
+        if include_exchange:
+            queries.append(f"""
+                SELECT {id_column}
+                    'EXCHANGE' as source,
+                    symbol, direction, entry_price, exit_price,
+                    NULL as rsi, NULL as trend,
+                    NULL as entry_volatility, NULL as entry_volume_ratio,
+                    pnl, roi, CASE WHEN pnl > 0 THEN 1 ELSE 0 END as is_successful,
+                    entry_time as timestamp, exit_time as close_timestamp,
+                    NULL as close_reason, NULL as ai_decision_id, NULL as ai_confidence
+                FROM exchange_trades
+                WHERE pnl IS NOT NULL
+            """)
+        
+        return queries
+    
+    @staticmethod
+    def _convert_bots_history_trade(trade: Dict[str, Any]) -> Dict[str, Any]:
+        """Запись bots_data.db -> bot_trades_history в формате get_trades_for_training"""
+        return {
+            'source': 'BOTS_HISTORY',
+            'symbol': trade.get('symbol', ''),
+            'direction': trade.get('direction', 'LONG'),
+            'entry_price': trade.get('entry_price', 0.0),
+            'exit_price': trade.get('exit_price'),
+            'rsi': trade.get('entry_rsi'),  # RSI на входе
+            'trend': trade.get('entry_trend'),  # Тренд на входе
+            'entry_volatility': trade.get('entry_volatility'),
+            'entry_volume_ratio': trade.get('entry_volume_ratio'),
+            'pnl': trade.get('pnl'),
+            'roi': trade.get('roi'),
+            'is_successful': 1 if trade.get('is_successful') else 0,
+            'timestamp': trade.get('entry_time') or trade.get('entry_timestamp'),
+            'close_timestamp': trade.get('exit_time') or trade.get('exit_timestamp'),
+            'close_reason': trade.get('close_reason'),
+            'ai_decision_id': trade.get('ai_decision_id'),
+            'ai_confidence': trade.get('ai_confidence')
+        }
+    
     def get_trades_for_training(self,
                                include_simulated: bool = True,
                                include_real: bool = True,
@@ -3888,58 +4061,12 @@ class AIDatabase:
             cursor = conn.cursor()
             
             # Объединяем все источники через UNION
-            queries = []
+            union_query = self._build_training_union_query(include_simulated, include_real, include_exchange)
             params = []
             
-            if include_simulated:
-                queries.append("""
-                    SELECT 
-                        'SIMULATED' as source,
-                        symbol, direction, entry_price, exit_price,
-                        entry_rsi as rsi, entry_trend as trend,
-                        entry_volatility, entry_volume_ratio,
-                        pnl, pnl_pct as roi, is_successful,
-                        entry_time as timestamp, exit_time as close_timestamp,
-                        exit_reason as close_reason,
-                        NULL as ai_decision_id, NULL as ai_confidence
-                    FROM simulated_trades
-                    WHERE exit_price IS NOT NULL
-                """)
-            
-            if include_real:
-                queries.append("""
-                    SELECT 
-                        'BOT' as source,
-                        symbol, direction, entry_price, exit_price,
-                        entry_rsi as rsi, entry_trend as trend,
-                        entry_volatility, entry_volume_ratio,
-                        pnl, roi, CASE WHEN pnl > 0 THEN 1 ELSE 0 END as is_successful,
-                        entry_time as timestamp, exit_time as close_timestamp,
-                        close_reason, ai_decision_id, ai_confidence
-                    FROM bot_trades
-                    WHERE is_simulated = 0 AND status = 'CLOSED' AND pnl IS NOT NULL
-                """)
-            
-            if include_exchange:
-                queries.append("""
-                    SELECT 
-                        'EXCHANGE' as source,
-                        symbol, direction, entry_price, exit_price,
-                        NULL as rsi, NULL as trend,
-                        NULL as entry_volatility, NULL as entry_volume_ratio,
-                        pnl, roi, CASE WHEN pnl > 0 THEN 1 ELSE 0 END as is_successful,
-                        entry_time as timestamp, exit_time as close_timestamp,
-                        NULL as close_reason, NULL as ai_decision_id, NULL as ai_confidence
-                    FROM exchange_trades
-                    WHERE pnl IS NOT NULL
-                """)
-            
-            if not queries:
+            if not union_query:
                 return []
             
-            # Объединяем запросы
-            union_query = " UNION ALL ".join(queries)
-            
             # Группируем по символам и фильтруем по минимальному количеству
             # ВАЖНО: Если min_trades=0, НЕ фильтруем по символам - возвращаем ВСЕ сделки
             if min_trades > 0:
@@ -3997,28 +4124,7 @@ class AIDatabase:
                         if trade.get('pnl') is None:
                             continue
                         
-                        # Формируем запись в формате для обучения
-                        converted_trade = {
-                            'source': 'BOTS_HISTORY',
-                            'symbol': trade.get('symbol', ''),
-                            'direction': trade.get('direction', 'LONG'),
-                            'entry_price': trade.get('entry_price', 0.0),
-                            'exit_price': trade.get('exit_price'),
-                            'rsi': trade.get('entry_rsi'),  # RSI на входе
-                            'trend': trade.get('entry_trend'),  # Тренд на входе
-                            'entry_volatility': trade.get('entry_volatility'),
-                            'entry_volume_ratio': trade.get('entry_volume_ratio'),
-                            'pnl': trade.get('pnl'),
-                            'roi': trade.get('roi'),
-                            'is_successful': 1 if trade.get('is_successful') else 0,
-                            'timestamp': trade.get('entry_time') or trade.get('entry_timestamp'),
-                            'close_timestamp': trade.get('exit_time') or trade.get('exit_timestamp'),
-                            'close_reason': trade.get('close_reason'),
-                            'ai_decision_id': trade.get('ai_decision_id'),
-                            'ai_confidence': trade.get('ai_confidence')
-                        }
-                        
-                        result.append(converted_trade)
+                        result.append(self._convert_bots_history_trade(trade))
                     
                     pass
                 except Exception as e:
@@ -4056,6 +4162,60 @@ class AIDatabase:
             pass
             return result
     
+    def iter_trades_for_training(self,
+                                 include_simulated: bool = True,
+                                 include_real: bool = True,
+                                 include_exchange: bool = True,
+                                 chunk_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Потоковый вариант get_trades_for_training: пачки сделок по chunk_size.
+        
+        Каждый источник читается страницами по курсору id, соединение открывается
+        только на время чтения страницы. Сделки не сортируются и не фильтруются
+        по min_trades (обе операции требуют всей выборки в памяти) — для обучения
+        порядок не важен. Формат записей тот же, история bots_data.db ->
+        bot_trades_history отдаётся последними пачками.
+        """
+        chunk_size = max(1, int(chunk_size))
+        
+        for query in self._training_source_queries(include_simulated, include_real, include_exchange, with_id=True):
+            last_id = 0
+            while True:
+                rows = self._fetch_page_by_id(query, [], last_id, chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    last_id = row.pop('id')
+                yield rows
+                if len(rows) < chunk_size:
+                    break
+        
+        if include_real:
+            try:
+                from bot_engine.bots_database import get_bots_database
+                bots_db = get_bots_database()
+            except Exception:
+                return
+            
+            last_id = 0
+            chunk = []
+            while True:
+                trades = bots_db.get_bot_trades_history(status='CLOSED', after_id=last_id, limit=chunk_size)
+                if not trades:
+                    break
+                last_id = trades[-1]['id']
+                for trade in trades:
+                    if trade.get('is_simulated') or trade.get('pnl') is None:
+                        continue
+                    chunk.append(self._convert_bots_history_trade(trade))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+                if len(trades) < chunk_size:
+                    break
+            if chunk:
+                yield chunk
+    
     def get_open_positions_for_ai(self) -> List[Dict[str, Any]]:
         """
         Получает открытые позиции из app_data.db и обогащает их данными для ИИ
@@ -5227,9 +5387,111 @@ class AIDatabase:
     
     # ==================== МЕТОДЫ ДЛЯ РАБОТЫ С ИСТОРИЕЙ СВЕЧЕЙ ====================
     
+    def _upsert_candles(self, cursor, candles_data: Dict[str, List[Dict]], timeframe: str, now: str) -> Dict[str, int]:
+        """
+        Инкрементальная запись свечей по водяным знакам (candles_watermarks).
+        
+        Водяной знак — время последней сохранённой свечи символа. Свечи не старше него
+        пишутся с ON CONFLICT DO UPDATE (последняя, ещё незакрытая свеча обновляется на
+        месте, более новые добавляются). Свечи старше водяного знака уже закрыты, поэтому
+        для них только INSERT OR IGNORE: дозагруженная история (пропуски) сохраняется,
+        существующие строки не переписываются. Старые строки не удаляются здесь — см.
+        trim_candles_history().
+        
+        Returns:
+            Словарь {symbol: количество записанных строк}
+        """
+        symbols = [s for s, candles in candles_data.items() if candles]
+        watermarks = {}
+        # Лимит параметров SQLite — читаем водяные знаки пачками
+        for i in range(0, len(symbols), 500):
+            chunk = symbols[i:i + 500]
+            placeholders = ','.join(['?'] * len(chunk))
+            cursor.execute(f"""
+                SELECT symbol, last_time FROM candles_watermarks
+                WHERE timeframe = ? AND symbol IN ({placeholders})
+            """, [timeframe] + chunk)
+            watermarks.update({row[0]: row[1] for row in cursor.fetchall()})
+        
+        def _row(symbol: str, candle: Dict) -> tuple:
+            return (
+                symbol, timeframe,
+                int(candle.get('time', 0)),
+                float(candle.get('open', 0)),
+                float(candle.get('high', 0)),
+                float(candle.get('low', 0)),
+                float(candle.get('close', 0)),
+                float(candle.get('volume', 0)),
+                now
+            )
+        
+        rows = []
+        new_watermarks = []
+        written_counts = {}
+        for symbol, candles in candles_data.items():
+            if not candles:
+                written_counts[symbol] = 0
+                continue
+            # Сортируем свечи по времени и берем только последние MAX_CANDLES_PER_SYMBOL
+            candles_sorted = sorted(candles, key=lambda x: x.get('time', 0))
+            candles_to_save = candles_sorted[-self.MAX_CANDLES_PER_SYMBOL:]
+            backfilled = 0
+            watermark = watermarks.get(symbol)
+            if watermark is not None:
+                older = [c for c in candles_to_save if int(c.get('time', 0)) < watermark]
+                if older:
+                    changes_before = cursor.connection.total_changes
+                    cursor.executemany("""
+                        INSERT OR IGNORE INTO candles_history (
+                            symbol, timeframe, candle_time, open_price, high_price,
+                            low_price, close_price, volume, created_at
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, [_row(symbol, c) for c in older])
+                    backfilled = cursor.connection.total_changes - changes_before
+                candles_to_save = [c for c in candles_to_save if int(c.get('time', 0)) >= watermark]
+            for candle in candles_to_save:
+                rows.append(_row(symbol, candle))
+            written_counts[symbol] = len(candles_to_save) + backfilled
+            if candles_to_save:
+                new_watermarks.append((symbol, timeframe, int(candles_to_save[-1].get('time', 0)), now))
+        
+        if rows:
+            cursor.executemany("""
+                INSERT INTO candles_history (
+                    symbol, timeframe, candle_time, open_price, high_price,
+                    low_price, close_price, volume, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(symbol, timeframe, candle_time) DO UPDATE SET
+                    open_price = excluded.open_price,
+                    high_price = excluded.high_price,
+                    low_price = excluded.low_price,
+                    close_price = excluded.close_price,
+                    volume = excluded.volume,
+                    created_at = excluded.created_at
+            """, rows)
+        if new_watermarks:
+            cursor.executemany("""
+                INSERT INTO candles_watermarks (symbol, timeframe, last_time, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(symbol, timeframe) DO UPDATE SET
+                    last_time = MAX(last_time, excluded.last_time),
+                    updated_at = excluded.updated_at
+            """, new_watermarks)
+        return written_counts
+    
+    def _maybe_trim_candles(self, written_rows: int) -> None:
+        """Запускает обслуживание candles_history, когда накопилось достаточно новых строк или прошло время"""
+        self._candles_written_since_trim += written_rows
+        if (self._candles_written_since_trim < self.CANDLES_TRIM_EVERY_ROWS
+                and time.time() - self._candles_last_trim < self.CANDLES_TRIM_INTERVAL_SEC):
+            return
+        self._candles_written_since_trim = 0
+        self._candles_last_trim = time.time()
+        self.trim_candles_history()
+    
     def save_candles(self, symbol: str, candles: List[Dict], timeframe: str = '6h') -> int:
         """
-        Сохраняет свечи для символа в БД с ограничением количества
+        Сохраняет свечи для символа в БД (инкрементально, по водяному знаку)
         
         Args:
             symbol: Символ монеты
@@ -5237,64 +5499,18 @@ class AIDatabase:
             timeframe: Таймфрейм (по умолчанию '6h')
         
         Returns:
-            Количество сохраненных свечей
+            Количество записанных (новых или обновлённых) свечей
         """
         if not candles:
             return 0
         
         try:
             now = datetime.now().isoformat()
-            saved_count = 0
-            
-            # ОГРАНИЧЕНИЕ: Максимум 1000 свечей на символ для предотвращения раздувания БД
-            # 1000 свечей = ~250 дней истории - более чем достаточно (запрашивается только 30 дней)
-            MAX_CANDLES_PER_SYMBOL = 1000
-            
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                
-                # ⚠️ КРИТИЧНО: Кэш должен ПОЛНОСТЬЮ ПЕРЕЗАПИСЫВАТЬСЯ, а не накапливаться!
-                # ВСЕГДА удаляем ВСЕ старые свечи для этого символа перед вставкой новых
-                # Это гарантирует, что старые неиспользуемые данные всегда удаляются
-                cursor.execute("""
-                    DELETE FROM candles_history 
-                    WHERE symbol = ? AND timeframe = ?
-                """, (symbol, timeframe))
-                deleted_old_count = cursor.rowcount
-                
-                # Сортируем свечи по времени и берем только последние MAX_CANDLES_PER_SYMBOL
-                candles_sorted = sorted(candles, key=lambda x: x.get('time', 0))
-                candles_to_save = candles_sorted[-MAX_CANDLES_PER_SYMBOL:]
-                
-                if len(candles_sorted) > MAX_CANDLES_PER_SYMBOL:
-                    pass
-                
-                # ⚡ ОПТИМИЗИРОВАННАЯ ВСТАВКА: используем executemany вместо цикла
-                # Вставляем только новые свечи (старые уже удалены)
-                if candles_to_save:
-                    cursor.executemany("""
-                        INSERT INTO candles_history (
-                            symbol, timeframe, candle_time, open_price, high_price,
-                            low_price, close_price, volume, created_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, [
-                        (
-                            symbol, timeframe,
-                            int(candle['time']),
-                            float(candle['open']),
-                            float(candle['high']),
-                            float(candle['low']),
-                            float(candle['close']),
-                            float(candle['volume']),
-                            now
-                        )
-                        for candle in candles_to_save
-                    ])
-                    saved_count = cursor.rowcount
-                else:
-                    saved_count = 0
-                
+                saved_count = self._upsert_candles(cursor, {symbol: candles}, timeframe, now).get(symbol, 0)
                 conn.commit()
+            self._maybe_trim_candles(saved_count)
             return saved_count
         except Exception as e:
             logger.error(f"❌ Ошибка сохранения свечей для {symbol}: {e}")
@@ -5304,6 +5520,9 @@ class AIDatabase:
         """
         Сохраняет свечи для нескольких символов (батч операция)
         
+        Одна транзакция на весь батч; для каждого символа пишутся только свечи
+        новее водяного знака (и обновляется последняя сохранённая свеча).
+        
         Args:
             candles_data: Словарь {symbol: [candles]}
             timeframe: Таймфрейм
@@ -5311,103 +5530,60 @@ class AIDatabase:
         Returns:
             Словарь {symbol: saved_count}
         """
-        # ⚡ ОПТИМИЗАЦИЯ: При батч-сохранении используем TRUNCATE-подход для всех символов в батче
-        # Удаляем старые свечи для всех символов из батча одним запросом, затем вставляем новые
         if not candles_data:
             return {}
         
         try:
             now = datetime.now().isoformat()
-            MAX_CANDLES_PER_SYMBOL = 1000
-            saved_counts = {}
-            
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                
-                # ⚠️ КРИТИЧНО: Удаляем ВСЕ старые свечи для символов из батча одним запросом
-                # Используем DELETE, так как candles_history - это история, а не кэш, и там могут быть данные для других символов
-                # Но для гарантированной очистки используем более агрессивный подход
-                symbols_list = list(candles_data.keys())
-                placeholders = ','.join(['?'] * len(symbols_list))
-                
-                # Проверяем количество перед удалением
-                cursor.execute(f"SELECT COUNT(*) FROM candles_history WHERE symbol IN ({placeholders}) AND timeframe = ?", symbols_list + [timeframe])
-                old_count = cursor.fetchone()[0]
-                
-                # Удаляем старые свечи для символов из батча
-                cursor.execute(f"""
-                    DELETE FROM candles_history 
-                    WHERE symbol IN ({placeholders}) AND timeframe = ?
-                """, symbols_list + [timeframe])
-                deleted_total = cursor.rowcount
-                
-                # ⚠️ КРИТИЧНО: Проверяем, что DELETE действительно удалил все записи
-                cursor.execute(f"SELECT COUNT(*) FROM candles_history WHERE symbol IN ({placeholders}) AND timeframe = ?", symbols_list + [timeframe])
-                count_after_delete = cursor.fetchone()[0]
-                
-                if count_after_delete > 0:
-                    logger.warning(f"⚠️ DELETE не удалил все записи! Осталось {count_after_delete:,} записей. Пытаемся удалить еще раз...")
-                    # Пытаемся удалить еще раз
-                    cursor.execute(f"DELETE FROM candles_history WHERE symbol IN ({placeholders}) AND timeframe = ?", symbols_list + [timeframe])
-                    cursor.execute(f"SELECT COUNT(*) FROM candles_history WHERE symbol IN ({placeholders}) AND timeframe = ?", symbols_list + [timeframe])
-                    final_count = cursor.fetchone()[0]
-                    if final_count > 0:
-                        logger.error(f"❌ КРИТИЧЕСКАЯ ОШИБКА! После повторного DELETE осталось {final_count:,} записей для символов из батча!")
-                
-                if old_count > 0:
-                    pass
-                
-                # Собираем все свечи для пакетной вставки
-                all_candles_to_insert = []
-                
-                for symbol, candles in candles_data.items():
-                    if not candles:
-                        saved_counts[symbol] = 0
-                        continue
-                    
-                    # Сортируем свечи по времени и берем только последние MAX_CANDLES_PER_SYMBOL
-                    candles_sorted = sorted(candles, key=lambda x: x.get('time', 0))
-                    candles_to_save = candles_sorted[-MAX_CANDLES_PER_SYMBOL:]
-                    
-                    if len(candles_sorted) > MAX_CANDLES_PER_SYMBOL:
-                        pass
-                    
-                    # Добавляем свечи в общий список для пакетной вставки
-                    for candle in candles_to_save:
-                        all_candles_to_insert.append((
-                            symbol, timeframe,
-                            int(candle.get('time', 0)),
-                            float(candle.get('open', 0)),
-                            float(candle.get('high', 0)),
-                            float(candle.get('low', 0)),
-                            float(candle.get('close', 0)),
-                            float(candle.get('volume', 0)),
-                            now
-                        ))
-                    
-                    saved_counts[symbol] = len(candles_to_save)
-                
-                # ⚡ ОПТИМИЗИРОВАННАЯ ПАКЕТНАЯ ВСТАВКА: вставляем все свечи одним запросом
-                if all_candles_to_insert:
-                    cursor.executemany("""
-                        INSERT INTO candles_history (
-                            symbol, timeframe, candle_time, open_price, high_price,
-                            low_price, close_price, volume, created_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, all_candles_to_insert)
-                    inserted_total = cursor.rowcount
-                    pass
-                
+                saved_counts = self._upsert_candles(cursor, candles_data, timeframe, now)
                 conn.commit()
-            
+            self._maybe_trim_candles(sum(saved_counts.values()))
             return saved_counts
             
         except Exception as e:
             logger.error(f"❌ Ошибка батч-сохранения свечей: {e}")
-            import traceback
-            pass
             return {}
     
+    def trim_candles_history(self, max_candles_per_symbol: Optional[int] = None, batch_size: int = 20000) -> int:
+        """
+        Обслуживание candles_history: удаляет свечи сверх последних max_candles_per_symbol
+        для каждой пары (символ, таймфрейм). Удаление пачками по batch_size строк,
+        каждая пачка в отдельной транзакции, чтобы не держать блокировку записи.
+        
+        Returns:
+            Количество удалённых свечей
+        """
+        limit = int(max_candles_per_symbol or self.MAX_CANDLES_PER_SYMBOL)
+        deleted_total = 0
+        try:
+            while True:
+                with self._get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("""
+                        DELETE FROM candles_history WHERE id IN (
+                            SELECT id FROM (
+                                SELECT id, ROW_NUMBER() OVER (
+                                    PARTITION BY symbol, timeframe ORDER BY candle_time DESC
+                                ) AS rn
+                                FROM candles_history
+                            )
+                            WHERE rn > ?
+                            LIMIT ?
+                        )
+                    """, (limit, batch_size))
+                    deleted = cursor.rowcount
+                    conn.commit()
+                deleted_total += max(deleted, 0)
+                if deleted < batch_size:
+                    break
+            if deleted_total:
+                logger.info(f"🧹 candles_history: удалено {deleted_total:,} старых свечей (лимит {limit} на символ)")
+        except Exception as e:
+            logger.error(f"❌ Ошибка обслуживания candles_history: {e}")
+        return deleted_total
+    
     def get_candles(self, symbol: str, timeframe: str = '6h', 
                     limit: Optional[int] = None,
                     start_time: Optional[int] = None,
@@ -5473,6 +5649,7 @@ class AIDatabase:
         Получает свечи для символов из БД (таблица candles_history)
         
         ВАЖНО: Ограничения по умолчанию для предотвращения переполнения памяти!
+        Хвосты всех символов читаются одним запросом (ROW_NUMBER по символу).
         
         Args:
             timeframe: Таймфрейм
@@ -5486,70 +5663,49 @@ class AIDatabase:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Получаем список символов с ограничением (если max_symbols > 0)
+                # Ограничение по символам (если max_symbols > 0) — первые N по алфавиту, как и раньше
+                symbols_filter = ""
+                params: List[Any] = [timeframe]
                 if max_symbols > 0:
-                    cursor.execute("""
-                        SELECT DISTINCT symbol
-                        FROM candles_history
-                        WHERE timeframe = ?
-                        ORDER BY symbol
-                        LIMIT ?
-                    """, (timeframe, max_symbols))
-                else:
-                    # Без ограничения - загружаем все символы
-                    cursor.execute("""
-                        SELECT DISTINCT symbol
-                        FROM candles_history
-                        WHERE timeframe = ?
-                        ORDER BY symbol
-                    """, (timeframe,))
-                symbols = [row[0] for row in cursor.fetchall()]
-                
-                if not symbols:
-                    pass
-                    return {}
+                    symbols_filter = """
+                        AND symbol IN (
+                            SELECT DISTINCT symbol FROM candles_history
+                            WHERE timeframe = ?
+                            ORDER BY symbol
+                            LIMIT ?
+                        )
+                    """
+                    params += [timeframe, max_symbols]
+                params.append(max_candles_per_symbol)
                 
-                result = {}
-                for symbol in symbols:
-                    # Получаем только последние N свечей для каждого символа
-                    cursor.execute("""
-                        SELECT candle_time, open_price, high_price, low_price, close_price, volume
+                cursor.execute(f"""
+                    SELECT symbol, candle_time, open_price, high_price, low_price, close_price, volume
+                    FROM (
+                        SELECT symbol, candle_time, open_price, high_price, low_price, close_price, volume,
+                               ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY candle_time DESC) AS rn
                         FROM candles_history
-                        WHERE timeframe = ? AND symbol = ?
-                        ORDER BY candle_time DESC
-                        LIMIT ?
-                    """, (timeframe, symbol, max_candles_per_symbol))
-                    rows = cursor.fetchall()
-                    
-                    if rows:
-                        # Разворачиваем обратно (от старых к новым)
-                        candles = []
-                        for row in reversed(rows):
-                            if hasattr(row, 'keys'):
-                                row_dict = dict(row)
-                            else:
-                                row_dict = {
-                                    'candle_time': row[0],
-                                    'open_price': row[1],
-                                    'high_price': row[2],
-                                    'low_price': row[3],
-                                    'close_price': row[4],
-                                    'volume': row[5]
-                                }
-                            
-                            candles.append({
-                                'time': row_dict['candle_time'],
-                                'open': row_dict['open_price'],
-                                'high': row_dict['high_price'],
-                                'low': row_dict['low_price'],
-                                'close': row_dict['close_price'],
-                                'volume': row_dict['volume']
-                            })
-                        
-                        result[symbol] = candles
+                        WHERE timeframe = ? {symbols_filter}
+                    )
+                    WHERE rn <= ?
+                    ORDER BY symbol, candle_time ASC
+                """, params)
                 
-                total_candles = sum(len(c) for c in result.values())
-                pass
+                result = {}
+                current_symbol = None
+                candles = None
+                for row in cursor:
+                    symbol = row[0]
+                    if symbol != current_symbol:
+                        current_symbol = symbol
+                        candles = result[symbol] = []
+                    candles.append({
+                        'time': row[1],
+                        'open': row[2],
+                        'high': row[3],
+                        'low': row[4],
+                        'close': row[5],
+                        'volume': row[6]
+                    })
                 return result
         except Exception as e:
             logger.error(f"❌ Ошибка загрузки всех свечей: {e}")
@@ -5582,6 +5738,21 @@ class AIDatabase:
             logger.error(f"❌ Ошибка подсчета символов: {e}")
             return 0
     
+    def get_candles_data_version(self) -> str:
+        """
+        Версия данных candles_history (меняется при любой записи свечей).
+        Считается по водяным знакам — O(число символов), без сканирования свечей.
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*), MAX(last_time), MAX(updated_at) FROM candles_watermarks")
+                row = cursor.fetchone()
+                return f"{row[0]}:{row[1]}:{row[2]}"
+        except Exception as e:
+            logger.error(f"❌ Ошибка получения версии свечей: {e}")
+            return ''
+    
     def get_candles_last_time(self, symbol: str, timeframe: str = '6h') -> Optional[int]:
         """Получает время последней свечи для символа"""
         try:
@@ -5675,12 +5846,29 @@ class AIDatabase:
         pass
         return 0
     
+    def _get_backup_service(self):
+        """Сервис бэкапов (форматы .db.gz/.delta.gz и старые .sql/.db), создаётся один раз на экземпляр.
+
+        Директория — DATABASE_BACKUP['BACKUP_DIR'], иначе data/backups.
+        """
+        service = getattr(self, '_backup_service', None)
+        if service is None:
+            from bot_engine.backup_service import DatabaseBackupService
+            service = DatabaseBackupService(_configured_backup_dir())
+            self._backup_service = service
+        return service
+
     def _check_backup_integrity(self, backup_path: str) -> bool:
-        """Проверяет целостность бэкапа: для .sql — файл непустой; для .db — PRAGMA integrity_check."""
+        """
+        Проверяет целостность бэкапа: для .sql — файл непустой; для .db.gz/.delta.gz — проверка снимка
+        при создании и наличие полного бэкапа цепочки; для .db — PRAGMA integrity_check.
+        """
         if not backup_path or not os.path.exists(backup_path):
             return False
         if backup_path.endswith('.sql'):
             return os.path.getsize(backup_path) > 0
+        if backup_path.endswith('.gz'):
+            return self._get_backup_service()._check_backup_integrity(backup_path)[0]
         try:
             conn = sqlite3.connect(backup_path, timeout=5.0)
             cursor = conn.cursor()
@@ -5693,43 +5881,16 @@ class AIDatabase:
 
     def list_backups(self) -> List[Dict[str, Any]]:
         """
-        Список доступных резервных копий БД из data/backups.
+        Список доступных резервных копий БД из data/backups (новые первыми):
+        полные .db.gz, разностные .delta.gz и старые .sql/.db.
         
         Returns:
             Список словарей с информацией о резервных копиях
         """
-        backups = []
         try:
-            backup_dir = _get_project_root() / 'data' / 'backups'
-            if not backup_dir.exists():
-                return backups
-            
-            for filename in os.listdir(backup_dir):
-                if not filename.startswith("ai_data_"):
-                    continue
-                is_sql = filename.endswith(".sql")
-                if not is_sql and (not filename.endswith(".db") or filename.count(".db") != 1 or "-wal" in filename or "-shm" in filename):
-                    continue
-                backup_path = os.path.join(backup_dir, filename)
-                try:
-                    file_size = os.path.getsize(backup_path)
-                    timestamp_str = filename.replace("ai_data_", "").replace(".sql", "").replace(".db", "")
-                    try:
-                        backup_time = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-                    except Exception:
-                        backup_time = datetime.fromtimestamp(os.path.getmtime(backup_path))
-                    backups.append({
-                        'path': backup_path,
-                        'filename': filename,
-                        'size_mb': file_size / 1024 / 1024,
-                        'created_at': backup_time.isoformat(),
-                        'timestamp': timestamp_str
-                    })
-                except Exception:
-                    pass
-            
-            backups.sort(key=lambda x: x['created_at'], reverse=True)
-            return backups
+            backups = self._get_backup_service().list_backups(db_name='ai_data', check_integrity=False)
+            # ai_data_corrupted_* — архив повреждённой БД, не резервная копия
+            return [b for b in backups if b.get('db_name') == 'ai_data']
         except Exception as e:
             logger.error(f"❌ Ошибка получения списка резервных копий: {e}")
             return []
@@ -5790,20 +5951,11 @@ class AIDatabase:
                     _remove_safe(wal_file)
                     _remove_safe(shm_file)
                     _remove_safe(self.db_path)
-                    if backup_path.endswith('.sql'):
-                        with open(backup_path, 'r', encoding='utf-8') as f:
-                            sql_dump = f.read()
-                        conn = sqlite3.connect(self.db_path)
-                        conn.executescript(sql_dump)
-                        conn.close()
-                        restore_ok = True
-                        break
-                    else:
-                        shutil.copy2(backup_path, self.db_path)
-                        _remove_safe(wal_file)
-                        _remove_safe(shm_file)
-                        restore_ok = True
-                        break
+                    self._get_backup_service().restore_to_file(backup_path, self.db_path)
+                    _remove_safe(wal_file)
+                    _remove_safe(shm_file)
+                    restore_ok = True
+                    break
                 except OSError as copy_err:
                     if _file_in_use(copy_err):
                         if restore_attempt < max_restore_retries - 1:
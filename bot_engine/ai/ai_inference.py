@@ -6,11 +6,20 @@
 Отдельный код от ai.py: здесь только загрузка сохранённых моделей и предсказание.
 Никакого обучения, виртуальных сделок, trainer — только signal_predictor.pkl + scaler.pkl.
 Модели обучаются и сохраняются в ai.py; bots читают их с диска и предсказывают.
+
+predict_signals({symbol: market_data}) — все кандидаты раунда одной матрицей признаков:
+один scaler.transform и один predict_proba вместо вызова sklearn на каждую строку.
+Результаты раунда запоминаются, и predict_signal для тех же признаков модель не вызывает.
+Массивы моделей загружаются через joblib mmap_mode='r' (страницы читаются с диска по мере надобности,
+процессы ботов делят их через page cache).
+Входные признаки предсказаний попадают в скетчи дрифта (drift_detector.get_live_input_recorder),
+их сравнивает с reference AutoTrainer в ai.py.
 """
 
 import os
 import logging
-from typing import Dict, Optional, Any
+import threading
+from typing import Dict, Optional, Any, List, Tuple
 
 logger = logging.getLogger('AI.Inference')
 
@@ -20,6 +29,10 @@ _scaler = None
 _expected_features = None
 _models_dir = None
 
+# Результаты последнего predict_signals: (symbol, признаки) -> результат
+_batch_results: Dict[Tuple[str, Tuple[float, ...]], Dict[str, Any]] = {}
+_batch_lock = threading.Lock()
+
 
 def _get_models_dir() -> str:
     """Путь к data/ai/models относительно корня проекта."""
@@ -41,6 +54,27 @@ def _get_models_dir() -> str:
     return _models_dir
 
 
+def _joblib_load(joblib, path: str):
+    """
+    joblib.load с отображением массивов в память; сжатые/несовместимые файлы — обычная загрузка.
+    Отображается копия <файл>.mmap (заменяется атомарно): ai.py перезаписывает .pkl на месте,
+    и усечение отображённого файла уронило бы процесс. В Windows отображённый файл нельзя
+    заменить — там обычная загрузка.
+    """
+    if os.name == 'nt':
+        return joblib.load(path)
+    try:
+        import shutil
+        snapshot = path + '.mmap'
+        tmp_path = f"{snapshot}.{os.getpid()}.tmp"
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, snapshot)
+        return joblib.load(snapshot, mmap_mode='r')
+    except Exception as e:
+        logger.debug(f"ai_inference: mmap-загрузка {os.path.basename(path)} недоступна ({e}), обычная загрузка")
+        return joblib.load(path)
+
+
 def _load_models() -> bool:
     """Загружает signal_predictor.pkl и scaler.pkl. Возвращает True при успехе."""
     global _signal_predictor, _scaler, _expected_features
@@ -53,8 +87,10 @@ def _load_models() -> bool:
         scaler_path = os.path.normpath(os.path.join(base, 'scaler.pkl'))
         if not os.path.exists(signal_path) or not os.path.exists(scaler_path):
             return False
-        _signal_predictor = joblib.load(signal_path)
-        _scaler = joblib.load(scaler_path)
+        _signal_predictor = _joblib_load(joblib, signal_path)
+        _scaler = _joblib_load(joblib, scaler_path)
+        with _batch_lock:
+            _batch_results.clear()
         if hasattr(_scaler, 'n_features_in_') and _scaler.n_features_in_ is not None:
             _expected_features = _scaler.n_features_in_
         elif hasattr(_scaler, 'mean_') and _scaler.mean_ is not None:
@@ -99,10 +135,91 @@ def build_features(market_data: Dict) -> list:
     return features
 
 
+def build_features_matrix(market_data_list: List[Dict]):
+    """Матрица признаков (n × expected) — строки как build_features, колонки собираются векторно"""
+    import numpy as np
+    n_rows = len(market_data_list)
+    n = _expected_features if _expected_features is not None else 7
+    matrix = np.zeros((n_rows, max(n, 7)), dtype=float)
+    if n_rows:
+        prices = np.fromiter((md.get('price', 0) for md in market_data_list), dtype=float, count=n_rows)
+        trends = [md.get('trend', 'NEUTRAL') for md in market_data_list]
+        matrix[:, 0] = np.fromiter((md.get('rsi', 50) for md in market_data_list), dtype=float, count=n_rows)
+        matrix[:, 1] = np.fromiter((md.get('volatility', 0) for md in market_data_list), dtype=float, count=n_rows)
+        matrix[:, 2] = np.fromiter((md.get('volume_ratio', 1.0) for md in market_data_list), dtype=float, count=n_rows)
+        matrix[:, 3] = [trend == 'UP' for trend in trends]
+        matrix[:, 4] = [trend == 'DOWN' for trend in trends]
+        matrix[:, 5] = [md.get('direction', 'LONG') == 'LONG' for md in market_data_list]
+        matrix[:, 6] = np.where(prices > 0, prices / 1000.0, 0.0)
+    return matrix[:, :n]
+
+
+def _record_live_inputs(symbols: List[str], features) -> None:
+    """Входы инференса — в потоковый монитор дрифта (ошибки мониторинга не мешают предсказанию)"""
+    try:
+        from bot_engine.ai.drift_detector import get_live_input_recorder
+        recorder = get_live_input_recorder()
+        if recorder is not None:
+            recorder.record(symbols, features)
+    except Exception as e:
+        logger.debug(f"ai_inference: дрифт входов не записан: {e}")
+
+
+def _signal_result(prob_profit: float, market_data: Dict) -> Dict[str, Any]:
+    """Интерпретация вероятности прибыли как в ai_trainer.predict()"""
+    rsi = market_data.get('rsi', 50)
+    if prob_profit > 0.6:
+        signal = 'LONG' if rsi < 35 else ('SHORT' if rsi > 65 else 'WAIT')
+    else:
+        signal = 'WAIT'
+    return {
+        'signal': signal,
+        'confidence': prob_profit,
+        'rsi': rsi,
+        'trend': market_data.get('trend', 'NEUTRAL'),
+    }
+
+
+def predict_signals(batch: Dict[str, Dict]) -> Dict[str, Dict[str, Any]]:
+    """
+    Предсказания для всех кандидатов раунда одним вызовом модели.
+    batch: {symbol: market_data}. Возвращает {symbol: результат как у predict_signal}.
+    Результаты запоминаются до следующего predict_signals — predict_signal для тех же
+    признаков берёт их без обращения к sklearn.
+    """
+    if not batch:
+        return {}
+    if not _load_models():
+        return {symbol: {'error': 'Models not loaded'} for symbol in batch}
+    if not hasattr(_signal_predictor, 'predict_proba'):
+        return {symbol: {'error': 'signal_predictor does not support predict_proba'} for symbol in batch}
+    symbols = list(batch)
+    try:
+        features = build_features_matrix([batch[symbol] for symbol in symbols])
+        probs = _signal_predictor.predict_proba(_scaler.transform(features))
+    except Exception as e:
+        logger.warning(f"ai_inference predict_signals: {e}")
+        return {symbol: {'error': str(e)} for symbol in symbols}
+    _record_live_inputs(symbols, features)
+    if probs.ndim != 2 or probs.shape[1] < 2:
+        return {symbol: {'signal': 'WAIT', 'confidence': 0.0, 'error': 'Invalid proba shape'} for symbol in symbols}
+    results = {}
+    cached = {}
+    for row, symbol in enumerate(symbols):
+        result = _signal_result(float(probs[row, 1]), batch[symbol])
+        results[symbol] = result
+        cached[(symbol, tuple(features[row].tolist()))] = result
+    with _batch_lock:
+        _batch_results.clear()
+        _batch_results.update(cached)
+    return {symbol: dict(result) for symbol, result in results.items()}
+
+
 def predict_signal(symbol: str, market_data: Dict) -> Dict[str, Any]:
     """
     Предсказание сигнала для реальной сделки (только инференс, без ai.py/trainer).
     Использует сохранённые signal_predictor.pkl и scaler.pkl из data/ai/models.
+    Если кандидат уже посчитан в predict_signals этого раунда — результат оттуда.
     Возвращает {'signal': 'LONG'|'SHORT'|'WAIT', 'confidence': float, ...} или {'error': str}.
     """
     if not _load_models():
@@ -112,24 +229,17 @@ def predict_signal(symbol: str, market_data: Dict) -> Dict[str, Any]:
     try:
         import numpy as np
         features = build_features(market_data)
+        with _batch_lock:
+            cached = _batch_results.get((symbol, tuple(float(x) for x in features)))
+        if cached is not None:
+            return dict(cached)
         features_array = np.array([features])
         features_scaled = _scaler.transform(features_array)
         signal_prob = _signal_predictor.predict_proba(features_scaled)[0]
-        rsi = market_data.get('rsi', 50)
-        # Интерпретация как в ai_trainer.predict()
+        _record_live_inputs([symbol], features_array)
         if len(signal_prob) < 2:
             return {'signal': 'WAIT', 'confidence': 0.0, 'error': 'Invalid proba shape'}
-        prob_profit = float(signal_prob[1])
-        if prob_profit > 0.6:
-            signal = 'LONG' if rsi < 35 else ('SHORT' if rsi > 65 else 'WAIT')
-        else:
-            signal = 'WAIT'
-        return {
-            'signal': signal,
-            'confidence': prob_profit,
-            'rsi': rsi,
-            'trend': market_data.get('trend', 'NEUTRAL'),
-        }
+        return _signal_result(float(signal_prob[1]), market_data)
     except Exception as e:
         logger.warning(f"ai_inference predict_signal: {e}")
         return {'error': str(e)}
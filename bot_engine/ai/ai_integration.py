@@ -13,9 +13,9 @@ import os
 import logging
 import threading
 import time
+from collections import OrderedDict
 from typing import Dict, Optional, Any, List
 from datetime import datetime
-import pandas as pd
 
 logger = logging.getLogger('AI.Integration')
 
@@ -124,13 +124,52 @@ def get_smc_features():
     return _smc_features
 
 
-def get_smc_signal(candles: List[Dict], current_price: float = None) -> Optional[Dict]:
+# Кэш сигналов SMC: (symbol, timeframe, время последней свечи) -> (длина, close последней свечи, сигнал).
+# Пока новой свечи нет, повторные вызовы в раунде и между раундами детекторы не запускают.
+_SMC_SIGNAL_CACHE_MAX = 4096
+_smc_signal_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_smc_signal_cache_lock = threading.Lock()
+
+
+def _copy_smc_signal(signal: Dict) -> Dict:
+    result = dict(signal)
+    if isinstance(result.get('reasons'), list):
+        result['reasons'] = list(result['reasons'])
+    if isinstance(result.get('entry_zone'), dict):
+        result['entry_zone'] = dict(result['entry_zone'])
+    return result
+
+
+def _smc_frame(candles, symbol: Optional[str], timeframe: Optional[str]):
+    """DataFrame для детекторов SMC: колонки из общего кадра признаков (без pd.DataFrame(list of dicts))"""
+    if not isinstance(candles, list):
+        return candles
+    from bot_engine.feature_frame import FeatureFrame, get_feature_frame
+    frame = get_feature_frame(symbol, timeframe, candles) if symbol else FeatureFrame(None, timeframe, candles)
+    return frame.ohlcv_frame
+
+
+def _smc_cache_key(candles, symbol: Optional[str], timeframe: Optional[str]):
+    """Ключ кэша и подпись свечей; None — свечи без символа/времени (не кэшируются)"""
+    if not symbol or not isinstance(candles, list) or not candles:
+        return None, None
+    last = candles[-1]
+    last_time = last.get('time', last.get('timestamp'))
+    if last_time is None:
+        return None, None
+    # Длина и close последней свечи: незакрытая свеча с тем же временем или другой набор свечей — пересчёт
+    return (symbol, timeframe, last_time), (len(candles), last.get('close'))
+
+
+def get_smc_signal(candles: List[Dict], current_price: float = None,
+                   symbol: Optional[str] = None, timeframe: Optional[str] = None) -> Optional[Dict]:
     """
     Получить сигнал Smart Money Concepts
     
     Args:
-        candles: Список свечей с OHLCV данными
+        candles: Список свечей с OHLCV данными (или DataFrame)
         current_price: Текущая цена (опционально)
+        symbol, timeframe: Монета и таймфрейм свечей — сигнал кэшируется до появления новой свечи
     
     Returns:
         Сигнал SMC или None
@@ -140,25 +179,38 @@ def get_smc_signal(candles: List[Dict], current_price: float = None) -> Optional
         if smc is None:
             return None
         
-        # Конвертируем в DataFrame
-        if isinstance(candles, list):
-            df = pd.DataFrame(candles)
-        else:
-            df = candles
+        if len(candles) < 10:
+            pass
+            return None
+        
+        key, signature = _smc_cache_key(candles, symbol, timeframe)
+        if key is not None:
+            with _smc_signal_cache_lock:
+                entry = _smc_signal_cache.get(key)
+                if entry is not None and entry[0] == signature:
+                    _smc_signal_cache.move_to_end(key)
+                    return _copy_smc_signal(entry[1])
         
         # Проверяем необходимые колонки
         required = ['open', 'high', 'low', 'close']
-        if not all(col in df.columns for col in required):
+        columns = candles[-1].keys() if isinstance(candles, list) else candles.columns
+        if not all(col in columns for col in required):
             logger.warning(f"SMC: отсутствуют колонки {required}")
             return None
         
-        if len(df) < 10:
-            pass
-            return None
+        # Колонки OHLCV (из общего кадра признаков монеты, если он уже построен в раунде)
+        df = _smc_frame(candles, symbol, timeframe)
         
         # Получаем комплексный сигнал
         signal = smc.get_smc_signal(df)
         
+        if key is not None and signal is not None:
+            with _smc_signal_cache_lock:
+                _smc_signal_cache[key] = (signature, _copy_smc_signal(signal))
+                _smc_signal_cache.move_to_end(key)
+                while len(_smc_signal_cache) > _SMC_SIGNAL_CACHE_MAX:
+                    _smc_signal_cache.popitem(last=False)
+        
         return signal
         
     except Exception as e:
@@ -166,12 +218,14 @@ def get_smc_signal(candles: List[Dict], current_price: float = None) -> Optional
         return None
 
 
-def get_smc_analysis(candles: List[Dict]) -> Optional[Dict]:
+def get_smc_analysis(candles: List[Dict], symbol: Optional[str] = None,
+                     timeframe: Optional[str] = None) -> Optional[Dict]:
     """
     Получить детальный SMC анализ
     
     Args:
-        candles: Список свечей с OHLCV данными
+        candles: Список свечей с OHLCV данными (или DataFrame)
+        symbol, timeframe: Монета и таймфрейм (общие колонки и кэш сигнала, как в get_smc_signal)
     
     Returns:
         Детальный анализ SMC или None
@@ -181,15 +235,11 @@ def get_smc_analysis(candles: List[Dict]) -> Optional[Dict]:
         if smc is None:
             return None
         
-        # Конвертируем в DataFrame
-        if isinstance(candles, list):
-            df = pd.DataFrame(candles)
-        else:
-            df = candles
-        
-        if len(df) < 10:
+        if len(candles) < 10:
             return None
         
+        df = _smc_frame(candles, symbol, timeframe)
+        
         current_price = df['close'].iloc[-1]
         
         # Собираем все данные SMC
@@ -202,7 +252,7 @@ def get_smc_analysis(candles: List[Dict]) -> Optional[Dict]:
             'choch': smc.detect_choch(df),
             'price_zone': smc.get_price_zone(df),
             'liquidity_zones': smc.find_liquidity_zones(df),
-            'signal': smc.get_smc_signal(df)
+            'signal': get_smc_signal(candles, symbol=symbol, timeframe=timeframe) if symbol else smc.get_smc_signal(df)
         }
         
         return analysis
@@ -319,10 +369,10 @@ def apply_ai_prediction_to_signal(
         ai_conf_01 = _confidence_01(ai_confidence)
 
         if ai_conf_01 >= min_confidence:
-        return {
-            'signal': ai_signal,
-            'ai_used': True,
-            'ai_confidence': ai_conf_01,
+            return {
+                'signal': ai_signal,
+                'ai_used': True,
+                'ai_confidence': ai_conf_01,
                 'ai_prediction': ai_prediction,
                 'original_signal': original_signal,
                 'sentiment_used': sentiment_used,
@@ -402,6 +452,33 @@ def _smc_enabled_from_config() -> bool:
     return True
 
 
+def prefetch_ai_predictions(candidates: List[Dict]) -> int:
+    """
+    Предсказания AI для всех кандидатов раунда одним вызовом модели (bots.py, ai_inference.predict_signals).
+    candidates: [{'symbol', 'direction', 'rsi', 'trend', 'price'}] — те же значения, что затем уйдут
+    в should_open_position_with_ai; его предсказание для этих признаков модель уже не вызывает.
+    Возвращает число посчитанных кандидатов (0 — в ai.py или модели не загружены).
+    """
+    if not candidates or _is_ai_process():
+        return 0
+    try:
+        from bot_engine.ai.ai_inference import predict_signals
+        batch = {
+            c['symbol']: {
+                'rsi': c.get('rsi'),
+                'trend': c.get('trend'),
+                'price': c.get('price'),
+                'direction': c.get('direction'),
+            }
+            for c in candidates
+        }
+        results = predict_signals(batch)
+        return sum(1 for r in results.values() if 'error' not in r)
+    except Exception as e:
+        pass
+        return 0
+
+
 def should_open_position_with_ai(
     symbol: str,
     direction: str,
@@ -409,10 +486,12 @@ def should_open_position_with_ai(
     trend: str,
     price: float,
     config: Dict = None,
-    candles: List[Dict] = None
+    candles: List[Dict] = None,
+    timeframe: str = None
 ) -> Dict:
     """
     Проверяет, нужно ли открывать позицию с учётом AI и SMC.
+    timeframe — таймфрейм candles (по умолчанию текущий системный); сигнал SMC кэшируется до новой свечи.
     В bots.py: предсказание через ai_inference (только pkl-модели, без ai.py/trainer).
     В ai.py: предсказание через get_ai_system() (обучение, виртуальные сделки).
     """
@@ -431,7 +510,13 @@ def should_open_position_with_ai(
         smc_signal = None
         smc_enabled = _smc_enabled_from_config()
         if smc_enabled and candles and len(candles) >= 10:
-            smc_signal = get_smc_signal(candles, price)
+            if timeframe is None:
+                try:
+                    from bot_engine.config_loader import get_current_timeframe
+                    timeframe = get_current_timeframe()
+                except Exception:
+                    pass
+            smc_signal = get_smc_signal(candles, price, symbol=symbol, timeframe=timeframe)
             
             if smc_signal:
                 result['smc_used'] = True
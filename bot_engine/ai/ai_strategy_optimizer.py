@@ -489,6 +489,29 @@ class AIStrategyOptimizer:
             logger.error(f"❌ Ошибка оптимизации для {symbol}: {e}")
             return {}
 
+    @staticmethod
+    def _resolve_simulation_params(params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Эффективные параметры симуляции: значения из params с подставленными
+        умолчаниями (SL/TP — из DEFAULT_AUTO_BOT_CONFIG). По ним же строится ключ
+        кэша бэктестов, поэтому смена конфига не отдаёт устаревший результат.
+        """
+        from bot_engine.config_loader import DEFAULT_AUTO_BOT_CONFIG
+        _def = DEFAULT_AUTO_BOT_CONFIG
+        return {
+            'rsi_long_threshold': int(params.get('rsi_long_threshold', 29)),
+            'rsi_short_threshold': int(params.get('rsi_short_threshold', 71)),
+            'rsi_exit_long_with_trend': int(params.get('rsi_exit_long_with_trend', 65)),
+            'rsi_exit_short_with_trend': int(params.get('rsi_exit_short_with_trend', 35)),
+            'max_loss_percent': float(params.get('max_loss_percent') or _def.get('max_loss_percent')),
+            'take_profit_percent': float(params.get('take_profit_percent') or _def.get('take_profit_percent')),
+            'trailing_stop_activation': float(params.get('trailing_stop_activation', 30)),
+            'trailing_stop_distance': float(params.get('trailing_stop_distance', 10)),
+            'break_even_trigger': float(params.get('break_even_trigger', 50)),
+            'trailing_take_distance': float(params.get('trailing_take_distance', 0.5)),
+            'trailing_update_interval': float(params.get('trailing_update_interval', 2.0)),
+        }
+
     def _simulate_trades_with_params(
         self,
         candles_sorted: List[Dict],
@@ -504,19 +527,18 @@ class AIStrategyOptimizer:
                 trailing_stop_activation, trailing_stop_distance, break_even_trigger,
                 trailing_take_distance, trailing_update_interval.
         """
-        rsi_long_entry = int(params.get('rsi_long_threshold', 29))
-        rsi_short_entry = int(params.get('rsi_short_threshold', 71))
-        rsi_long_exit = int(params.get('rsi_exit_long_with_trend', 65))
-        rsi_short_exit = int(params.get('rsi_exit_short_with_trend', 35))
-        from bot_engine.config_loader import DEFAULT_AUTO_BOT_CONFIG
-        _def = DEFAULT_AUTO_BOT_CONFIG
-        stop_loss = float(params.get('max_loss_percent') or _def.get('max_loss_percent'))
-        take_profit = float(params.get('take_profit_percent') or _def.get('take_profit_percent'))
-        trailing_activation = float(params.get('trailing_stop_activation', 30))
-        trailing_distance = float(params.get('trailing_stop_distance', 10))
-        break_even_trigger = float(params.get('break_even_trigger', 50))
-        trailing_take_distance = float(params.get('trailing_take_distance', 0.5))
-        trailing_update_interval = float(params.get('trailing_update_interval', 2.0))
+        params = self._resolve_simulation_params(params)
+        rsi_long_entry = params['rsi_long_threshold']
+        rsi_short_entry = params['rsi_short_threshold']
+        rsi_long_exit = params['rsi_exit_long_with_trend']
+        rsi_short_exit = params['rsi_exit_short_with_trend']
+        stop_loss = params['max_loss_percent']
+        take_profit = params['take_profit_percent']
+        trailing_activation = params['trailing_stop_activation']
+        trailing_distance = params['trailing_stop_distance']
+        break_even_trigger = params['break_even_trigger']
+        trailing_take_distance = params['trailing_take_distance']
+        trailing_update_interval = params['trailing_update_interval']
 
         simulated_trades: List[Dict] = []
         current_position: Optional[Dict] = None
@@ -637,7 +659,8 @@ class AIStrategyOptimizer:
         symbol: str, 
         candles: List[Dict],
         current_win_rate: float = 0.0,
-        use_bayesian: bool = True
+        use_bayesian: bool = True,
+        persist: bool = True
     ) -> Optional[Dict]:
         """
         ОПТИМИЗАЦИЯ ПАРАМЕТРОВ ДЛЯ КОНКРЕТНОЙ МОНЕТЫ.
@@ -651,6 +674,8 @@ class AIStrategyOptimizer:
             candles: Список свечей для тестирования
             current_win_rate: Текущий win rate (если < 80%, запускаем оптимизацию)
             use_bayesian: Использовать Bayesian Optimization (быстрее), иначе Grid Search
+            persist: Сохранять найденные параметры сразу (False — вызывающий сохраняет
+                пакетно через persist_optimized_params_batch)
 
         Returns:
             Оптимизированные параметры или None
@@ -779,6 +804,29 @@ class AIStrategyOptimizer:
 
             closes = [float(c.get('close', 0) or 0) for c in candles_sorted]
 
+            # Кэш симуляций: те же параметры на том же окне свечей не пересчитываются между запусками
+            try:
+                from bot_engine.ai.backtest_cache import (
+                    BACKTEST_ENGINE_VERSION, cached_trades, fingerprint_candles, get_backtest_cache,
+                )
+                backtest_cache = get_backtest_cache()
+                window_fingerprint = fingerprint_candles(candles_sorted)
+            except Exception:
+                backtest_cache = None
+
+            def simulate(p: Dict[str, Any]) -> List[Dict]:
+                if backtest_cache is None:
+                    return self._simulate_trades_with_params(candles_sorted, rsi_history, closes, p)
+                # Ключ — по эффективным параметрам (с умолчаниями из конфига), а не по переданным
+                key = backtest_cache.make_key(
+                    self._resolve_simulation_params(p), symbol, None, window_fingerprint,
+                    engine_version=f"optimizer-{BACKTEST_ENGINE_VERSION}"
+                )
+                return cached_trades(
+                    backtest_cache, key,
+                    lambda: self._simulate_trades_with_params(candles_sorted, rsi_history, closes, p),
+                )
+
             best_params: Optional[Dict[str, Any]] = None
             best_win_rate = 0.0
             best_total_pnl = float('-inf')
@@ -809,7 +857,7 @@ class AIStrategyOptimizer:
                     logger.info(f"   🧠 Bayesian Optimization: до {n_iter} итераций (вместо Grid Search)")
 
                     def objective(p: Dict[str, Any]) -> float:
-                        trades = self._simulate_trades_with_params(candles_sorted, rsi_history, closes, p)
+                        trades = simulate(p)
                         if len(trades) < 5:
                             return -1e9
                         wr = sum(1 for t in trades if t.get('is_successful')) / len(trades) * 100
@@ -820,7 +868,7 @@ class AIStrategyOptimizer:
                     res = opt.optimize(n_iterations=n_iter, verbose=logger.isEnabledFor(logging.INFO))
                     bp = res.get('best_params') if isinstance(res, dict) else None
                     if bp:
-                        trades = self._simulate_trades_with_params(candles_sorted, rsi_history, closes, bp)
+                        trades = simulate(bp)
                         if len(trades) >= 5:
                             best_win_rate = sum(1 for t in trades if t.get('is_successful')) / len(trades) * 100
                             best_total_pnl = sum(t.get('pnl_pct', 0) for t in trades)
@@ -845,6 +893,9 @@ class AIStrategyOptimizer:
                             run_grid = False
                 except Exception as e:
                     logger.warning(f"   ⚠️ Bayesian оптимизация не удалась, fallback на Grid Search: {e}")
+                finally:
+                    if backtest_cache is not None:
+                        backtest_cache.flush()
 
             # Тестируем комбинации (Grid Search), если Bayesian не использовался или не сработал
             if run_grid:
@@ -1133,27 +1184,10 @@ class AIStrategyOptimizer:
                     logger.info(f"      💡 Эти параметры будут использоваться ботами вместо глобальных")
                     self._log_param_changes(symbol, best_params)
 
-                    # Сохраняем оптимальные параметры для монеты через API bots.py
-                    try:
-                        import requests
-                        response = requests.post(
-                            'http://localhost:5001/api/bots/individual-settings/' + symbol,
-                            json=best_params,
-                            timeout=5
-                        )
-                        if response.status_code == 200:
-                            logger.info(f"   💾 Оптимизированные параметры сохранены для {symbol}")
-                        else:
-                            logger.warning(f"   ⚠️ Не удалось сохранить параметры через API: {response.status_code}")
-                            # Пробуем напрямую через импорт
-                            try:
-                                from bots_modules.imports_and_globals import set_individual_coin_settings
-                                set_individual_coin_settings(symbol, best_params, persist=True)
-                                logger.info(f"   💾 Параметры сохранены напрямую для {symbol}")
-                            except Exception as direct_error:
-                                logger.error(f"   ❌ Ошибка прямого сохранения: {direct_error}")
-                    except Exception as save_error:
-                        logger.error(f"   ❌ Ошибка сохранения параметров: {save_error}")
+                    if persist:
+                        self._persist_optimized_params(symbol, best_params)
+                    else:
+                        logger.info(f"      📦 Сохранение {symbol} отложено до пакетной записи")
                 else:
                     logger.info(f"      ⚠️ Win Rate {best_win_rate:.1f}% < 80% - НЕ сохраняем индивидуальные настройки")
                     logger.info(f"      💡 Продолжаем использовать глобальные настройки (скрипты) пока AI модель не достигнет >=80%")
@@ -1172,6 +1206,108 @@ class AIStrategyOptimizer:
             logger.error(traceback.format_exc())
             return None
 
+    def _persist_optimized_params(self, symbol: str, best_params: Dict[str, Any]) -> bool:
+        """Сохраняет индивидуальные настройки монеты через API bots.py (fallback — напрямую)."""
+        try:
+            import requests
+            response = requests.post(
+                'http://localhost:5001/api/bots/individual-settings/' + symbol,
+                json=best_params,
+                timeout=5
+            )
+            if response.status_code == 200:
+                logger.info(f"   💾 Оптимизированные параметры сохранены для {symbol}")
+                return True
+            logger.warning(f"   ⚠️ Не удалось сохранить параметры через API: {response.status_code}")
+            # Пробуем напрямую через импорт
+            try:
+                from bots_modules.imports_and_globals import set_individual_coin_settings
+                set_individual_coin_settings(symbol, best_params, persist=True)
+                logger.info(f"   💾 Параметры сохранены напрямую для {symbol}")
+                return True
+            except Exception as direct_error:
+                logger.error(f"   ❌ Ошибка прямого сохранения: {direct_error}")
+        except Exception as save_error:
+            logger.error(f"   ❌ Ошибка сохранения параметров: {save_error}")
+        return False
+
+    def persist_optimized_params_batch(self, results: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Пакетно сохраняет индивидуальные настройки нескольких монет.
+
+        Один HTTP-сеанс на всю пачку; монеты, которые не удалось отправить через API,
+        записываются напрямую с одним сохранением файла настроек в конце.
+
+        Returns:
+            Количество сохранённых монет
+        """
+        to_save = {
+            symbol: params for symbol, params in (results or {}).items()
+            if params and float(params.get('optimization_win_rate', 0) or 0) >= 80.0
+        }
+        if not to_save:
+            return 0
+
+        saved = 0
+        failed: Dict[str, Dict[str, Any]] = {}
+        try:
+            import requests
+            with requests.Session() as session:
+                for symbol, params in to_save.items():
+                    try:
+                        response = session.post(
+                            'http://localhost:5001/api/bots/individual-settings/' + symbol,
+                            json=params,
+                            timeout=5
+                        )
+                        if response.status_code == 200:
+                            saved += 1
+                        else:
+                            failed[symbol] = params
+                    except Exception:
+                        failed[symbol] = params
+        except ImportError:
+            failed = dict(to_save)
+
+        if failed:
+            try:
+                from bots_modules.imports_and_globals import (
+                    set_individual_coin_settings,
+                    save_individual_coin_settings,
+                )
+                for symbol, params in failed.items():
+                    set_individual_coin_settings(symbol, params, persist=False)
+                if save_individual_coin_settings():
+                    saved += len(failed)
+            except Exception as direct_error:
+                logger.error(f"   ❌ Ошибка пакетного сохранения ({len(failed)} монет): {direct_error}")
+
+        logger.info(f"   💾 Пакетно сохранены параметры: {saved}/{len(to_save)} монет")
+        return saved
+
+    def optimize_symbols_parallel(
+        self,
+        candles_by_symbol: Dict[str, List[Dict]],
+        current_win_rates: Optional[Dict[str, float]] = None,
+        use_bayesian: bool = True,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Оптимизирует параметры сразу для многих монет в пуле процессов.
+
+        Свечи передаются воркерам через shared memory, монеты блокируются через
+        AIDatabase.try_lock_symbol, результаты сохраняются пакетами по мере готовности.
+        См. bot_engine/ai/parallel_optimizer.py.
+        """
+        from bot_engine.ai.parallel_optimizer import ParallelSymbolOptimizer
+
+        driver = ParallelSymbolOptimizer(max_workers=max_workers, use_bayesian=use_bayesian)
+        return driver.optimize(
+            candles_by_symbol,
+            current_win_rates=current_win_rates,
+            on_batch=self.persist_optimized_params_batch,
+        )
+
     def _calculate_ema(self, prices: List[float], period: int) -> Optional[float]:
         """Вычисляет EMA (Exponential Moving Average)"""
         if not prices or len(prices) < period:
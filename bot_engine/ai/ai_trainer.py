@@ -181,6 +181,10 @@ class AITrainer:
     Класс для обучения AI моделей
     """
     
+    # Курсор чтения общей таблицы closed_pnl (bot_engine.closed_pnl_sync)
+    EXCHANGE_HISTORY_CONSUMER = 'ai_exchange_trades'
+    _exchange_history_read = None
+    
     def __init__(self):
         """Инициализация тренера"""
         # Нормализуем пути для кроссплатформенной совместимости (особенно для Windows)
@@ -317,10 +321,14 @@ class AITrainer:
             from bot_engine.config_loader import AIConfig
             self._online_learning_buffer_size = getattr(AIConfig, 'AI_SELF_LEARNING_BUFFER_SIZE', 50)
             self._online_learning_enabled = getattr(AIConfig, 'AI_SELF_LEARNING_ENABLED', True)
+            self._training_chunk_size = int(getattr(AIConfig, 'AI_TRAINING_CHUNK_SIZE', 5000) or 5000)
+            self._training_max_in_memory_samples = int(getattr(AIConfig, 'AI_TRAINING_MAX_IN_MEMORY_SAMPLES', 200000) or 0)
         except (ImportError, AttributeError):
             # Дефолтные значения, если конфиг не доступен
             self._online_learning_buffer_size = 50
             self._online_learning_enabled = True
+            self._training_chunk_size = 5000
+            self._training_max_in_memory_samples = 200000
         
         from collections import deque
         self._online_learning_buffer = deque(maxlen=self._online_learning_buffer_size)
@@ -661,7 +669,7 @@ class AITrainer:
                     'id': 'signal_predictor',
                     'model_type': 'signal_predictor',
                     'model_path': str(self.signal_model_path),
-                    'model_class': 'RandomForestClassifier',
+                    'model_class': type(self.signal_predictor).__name__,
                     'saved_at': datetime.now().isoformat(),
                     'n_estimators': getattr(self.signal_predictor, 'n_estimators', 'unknown'),
                     'max_depth': getattr(self.signal_predictor, 'max_depth', 'unknown')
@@ -685,7 +693,7 @@ class AITrainer:
                     'id': 'profit_predictor',
                     'model_type': 'profit_predictor',
                     'model_path': str(self.profit_model_path),
-                    'model_class': 'GradientBoostingRegressor',
+                    'model_class': type(self.profit_predictor).__name__,
                     'saved_at': datetime.now().isoformat(),
                     'n_estimators': getattr(self.profit_predictor, 'n_estimators', 'unknown'),
                     'max_depth': getattr(self.profit_predictor, 'max_depth', 'unknown'),
@@ -1304,19 +1312,24 @@ class AITrainer:
             # Загружаем историю сделок с биржи через метод get_closed_pnl
             if hasattr(exchange, 'get_closed_pnl'):
                 try:
-                    logger.info("   📥 Вызов exchange.get_closed_pnl(period='all')...")
-                    # Загружаем историю закрытых позиций (последние 2 года максимум)
-                    closed_pnl_data = exchange.get_closed_pnl(
-                        sort_by='time',
-                        period='all'  # Загружаем всю доступную историю
-                    )
+                    # Биржа запрашивается только после курсора аккаунта (общая таблица closed_pnl),
+                    # AITrainer читает из неё строки, которые ещё не обрабатывал
+                    from bot_engine.closed_pnl_sync import get_closed_pnl_synchronizer
+                    try:
+                        from app.config import ACTIVE_EXCHANGE
+                        exchange_name = ACTIVE_EXCHANGE or 'BYBIT'
+                    except Exception:
+                        exchange_name = 'BYBIT'
+                    synchronizer = get_closed_pnl_synchronizer(exchange, exchange_name=exchange_name)
+                    logger.info("   📥 Синхронизация closed PnL с биржи (инкрементально по курсору)...")
+                    synchronizer.sync()
+                    closed_pnl_data, last_id = synchronizer.read_new(self.EXCHANGE_HISTORY_CONSUMER)
                     
                     if not closed_pnl_data:
-                        logger.info(f"   📊 Получено данных от биржи: 0 записей (пустой результат)")
-                        logger.info(f"   💡 Возможно, на бирже нет закрытых позиций с PnL")
+                        logger.info(f"   📊 Новых закрытых позиций с прошлого обновления нет")
                         return []
                     
-                    logger.info(f"   📊 Получено данных от биржи: {len(closed_pnl_data)} записей")
+                    logger.info(f"   📊 Новых записей closed PnL для обучения: {len(closed_pnl_data)}")
                     
                     if closed_pnl_data:
                         trades = []
@@ -1370,7 +1383,7 @@ class AITrainer:
                             
                             # Создаем запись сделки
                             trade = {
-                                'id': trade_data.get('orderId') or trade_data.get('id') or trade_data.get('orderLinkId') or f"exchange_{symbol}_{close_timestamp}",
+                                'id': trade_data.get('orderId') or trade_data.get('order_id') or trade_data.get('orderLinkId') or f"exchange_{symbol}_{close_timestamp}",
                                 'symbol': symbol,
                                 'direction': direction,
                                 'entry_price': entry_price,
@@ -1411,6 +1424,8 @@ class AITrainer:
                                         reason.append(f"exit_price={exit_price}")
                                     pass
                         
+                        # Курсор сдвигается в _update_exchange_trades_history после сохранения
+                        self._exchange_history_read = (synchronizer, last_id)
                         logger.info(f"   ✅ Обработано: {processed_count} сделок")
                         if skipped_count > 0:
                             logger.info(f"   ⏭️ Пропущено: {skipped_count} сделок (нет PnL или цены)")
@@ -1563,7 +1578,8 @@ class AITrainer:
         3. Можно вызывать вручную для периодического обновления
         
         КАК РАБОТАЕТ:
-        - Загружает историю через exchange.get_closed_pnl()
+        - Догружает с биржи только новые закрытые позиции (ClosedPnlSynchronizer, курсор в БД)
+          и читает строки closed_pnl, которые ещё не обрабатывал
         - Сохраняет в БД (exchange_trades)
         - ДОПОЛНЯЕТ файл (не перезаписывает!)
         - Избегает дубликатов по ключевым полям
@@ -1582,6 +1598,7 @@ class AITrainer:
                 except:
                     pass
             
+            self._exchange_history_read = None
             new_trades = self._load_exchange_trades_history()
             
             if new_trades:
@@ -1595,6 +1612,13 @@ class AITrainer:
                     logger.info(f"💡 Новых сделок в истории биржи не найдено (в файле уже {existing_count} сделок)")
                 else:
                     logger.info(f"💡 История биржи пуста - возможно, на бирже нет закрытых позиций")
+            
+            # Прочитанные строки closed_pnl обработаны (сохранены или отброшены) — сдвигаем курсор AITrainer;
+            # при ошибке сохранения сюда не доходим и в следующий раз читаем их снова
+            if self._exchange_history_read and self.ai_db:
+                synchronizer, last_id = self._exchange_history_read
+                synchronizer.commit_read(self.EXCHANGE_HISTORY_CONSUMER, last_id)
+                self._exchange_history_read = None
         except Exception as e:
             logger.warning(f"⚠️ Ошибка обновления истории сделок биржи: {e}")
             import traceback
@@ -2403,36 +2427,36 @@ class AITrainer:
             logger.info("🎲 Запуск train_on_historical_data для генерации симуляций...")
             self.train_on_historical_data()
             
-            # 3. Загружаем созданные симуляции из БД
-            logger.info("📥 Загрузка симулированных сделок из БД...")
+            # 3. Первый проход по симуляциям в БД: статистика и scaler (потоково, пачками)
+            logger.info("📥 Чтение симулированных сделок из БД пачками...")
             if not self.ai_db:
                 logger.warning("⚠️ БД недоступна, невозможно загрузить симуляции")
                 return False
             
-            simulated_trades_for_training = self.ai_db.get_trades_for_training(
-                include_simulated=True,
-                include_real=False,
-                include_exchange=False,
-                min_trades=0,
-                limit=None
-            )
-            
-            if not simulated_trades_for_training or len(simulated_trades_for_training) < self._simulated_trades_min_samples:
-                logger.warning(f"⚠️ Недостаточно симулированных сделок: {len(simulated_trades_for_training) if simulated_trades_for_training else 0} < {self._simulated_trades_min_samples}")
+            scaler = StandardScaler()
+            total_samples = 0
+            successful_count = 0
+            total_pnl = 0.0
+            for X_chunk, y_signal_chunk, y_profit_chunk in self._iter_simulation_feature_batches():
+                scaler.partial_fit(X_chunk)
+                total_samples += len(X_chunk)
+                successful_count += int(y_signal_chunk.sum())
+                total_pnl += float(y_profit_chunk.sum())
+            
+            if total_samples < self._simulated_trades_min_samples:
+                logger.warning(f"⚠️ Недостаточно симулированных сделок: {total_samples} < {self._simulated_trades_min_samples}")
                 logger.info("💡 Запустите train_on_historical_data для генерации симуляций")
                 return False
             
-            logger.info(f"✅ Загружено {len(simulated_trades_for_training)} симулированных сделок")
+            logger.info(f"✅ Прочитано {total_samples} симулированных сделок")
             
             # Анализируем результаты симуляций
-            successful_trades = [t for t in simulated_trades_for_training if t.get('pnl', 0) > 0]
-            win_rate = len(successful_trades) / len(simulated_trades_for_training) if simulated_trades_for_training else 0
-            total_pnl = sum(t.get('pnl', 0) for t in simulated_trades_for_training)
+            win_rate = successful_count / total_samples
             
             logger.info(f"📊 Статистика симуляций:")
             logger.info(f"   Win rate: {win_rate:.2%}")
             logger.info(f"   Total PnL: {total_pnl:.2f} USDT")
-            logger.info(f"   Всего сделок: {len(simulated_trades_for_training)}")
+            logger.info(f"   Всего сделок: {total_samples}")
             
             # Проверяем, достигли ли целевого win_rate
             if win_rate >= target_win_rate:
@@ -2445,106 +2469,35 @@ class AITrainer:
             # 4. Обучаем модель на симулированных сделках
             logger.info("🎓 Обучение модели на симулированных сделках...")
             
-            # Загружаем симуляции для обучения
-            if self.ai_db:
-                simulated_trades_for_training = self.ai_db.get_trades_for_training(
-                    include_simulated=True,
-                    include_real=False,
-                    include_exchange=False,
-                    min_trades=0,
-                    limit=None
-                )
+            if self._training_max_in_memory_samples and total_samples <= self._training_max_in_memory_samples:
+                trained = self._fit_simulation_models_in_memory()
+            else:
+                # Выборка не помещается в память целиком — инкрементальное обучение по пачкам
+                self.scaler = scaler
+                trained = self._fit_simulation_models_streaming()
+            
+            if trained:
+                # Сохранение моделей
+                self._save_models()
                 
-                if simulated_trades_for_training and len(simulated_trades_for_training) >= self._simulated_trades_min_samples:
-                    # Единый 7-признаковый вектор — как при инференсе
-                    X = []
-                    y_signal = []
-                    y_profit = []
-                    
-                    for trade in simulated_trades_for_training:
-                        features = self._build_signal_features_7(trade)
-                        if features is None:
-                            continue
-                        
-                        X.append(features)
-                        pnl = trade.get('pnl', 0)
-                        y_signal.append(1 if pnl > 0 else 0)
-                        y_profit.append(pnl)
-                    
-                    if len(X) >= self._simulated_trades_min_samples:
-                        X = np.array(X)
-                        y_signal = np.array(y_signal)
-                        y_profit = np.array(y_profit)
-                        
-                        current_n = X.shape[1] if len(X.shape) > 1 else len(X[0])
-                        if getattr(self.scaler, 'n_features_in_', None) != current_n:
-                            self.scaler = StandardScaler()
-                        X_scaled = self.scaler.fit_transform(X)
-                        
-                        # Разделение на train/test
-                        X_train, X_test, y_signal_train, y_signal_test, y_profit_train, y_profit_test = train_test_split(
-                            X_scaled, y_signal, y_profit, test_size=0.2, random_state=42
-                        )
-                        
-                        # Обучение моделей
-                        self.signal_predictor = RandomForestClassifier(
-                            n_estimators=100,
-                            max_depth=10,
-                            random_state=42,
-                            n_jobs=1  # без параллелизма — устраняет UserWarning про delayed/Parallel
-                        )
-                        self.signal_predictor.fit(X_train, y_signal_train)
-                        
-                        # Проверка на переобучение
-                        train_accuracy = self.signal_predictor.score(X_train, y_signal_train)
-                        test_accuracy = self.signal_predictor.score(X_test, y_signal_test)
-                        accuracy_diff = train_accuracy - test_accuracy
-                        
-                        if accuracy_diff > 0.15:
-                            logger.warning(f"⚠️ Возможно переобучение: train={train_accuracy:.2%}, test={test_accuracy:.2%}")
-                        else:
-                            logger.info(f"✅ Проверка на переобучение: train={train_accuracy:.2%}, test={test_accuracy:.2%} (OK)")
-                        
-                        # Кросс-валидация
-                        try:
-                            from sklearn.model_selection import cross_val_score
-                            cv_scores = cross_val_score(self.signal_predictor, X_scaled, y_signal, cv=min(5, len(X) // 20), scoring='accuracy', n_jobs=1)
-                            cv_mean = np.mean(cv_scores)
-                            logger.info(f"📊 Кросс-валидация: {cv_mean:.2%} ± {np.std(cv_scores):.2%}")
-                        except Exception as cv_error:
-                            pass
-                        
-                        self._signal_predictor_accuracy = float(test_accuracy)
-                        
-                        # Обучение profit_predictor
-                        self.profit_predictor = GradientBoostingRegressor(
-                            n_estimators=100,
-                            max_depth=5,
-                            random_state=42
+                logger.info("✅ Обучение на симуляциях завершено")
+                
+                # Сохраняем статистику симуляций
+                if self.ai_db:
+                    try:
+                        # Получаем лучшие параметры из БД (если есть)
+                        optimized_params = self.ai_db.get_optimized_params(
+                            symbol=None,
+                            optimization_type='SIMULATIONS_90_PERCENT'
                         )
-                        self.profit_predictor.fit(X_train, y_profit_train)
-                        
-                        # Сохранение моделей
-                        self._save_models()
-                        
-                        logger.info("✅ Обучение на симуляциях завершено")
-                        
-                        # Сохраняем статистику симуляций
-                        if self.ai_db:
-                            try:
-                                # Получаем лучшие параметры из БД (если есть)
-                                optimized_params = self.ai_db.get_optimized_params(
-                                    symbol=None,
-                                    optimization_type='SIMULATIONS_90_PERCENT'
-                                )
-                                if optimized_params:
-                                    logger.info(f"🏆 Найденные оптимальные параметры:")
-                                    logger.info(f"   Win rate: {optimized_params.get('win_rate', 0):.2%}")
-                                    logger.info(f"   Total PnL: {optimized_params.get('total_pnl', 0):.2f} USDT")
-                            except Exception as e:
-                                pass
-                        
-                        return True
+                        if optimized_params:
+                            logger.info(f"🏆 Найденные оптимальные параметры:")
+                            logger.info(f"   Win rate: {optimized_params.get('win_rate', 0):.2%}")
+                            logger.info(f"   Total PnL: {optimized_params.get('total_pnl', 0):.2f} USDT")
+                    except Exception as e:
+                        pass
+                
+                return True
             
             logger.warning("⚠️ Не удалось обучить модель на симуляциях")
             return False
@@ -2555,6 +2508,174 @@ class AITrainer:
             traceback.print_exc()
             return False
     
+    def _iter_simulation_feature_batches(self):
+        """
+        Пачки признаков симуляций прямо из курсора БД: (X, y_signal, y_profit).
+        
+        В памяти одновременно только одна пачка (AI_TRAINING_CHUNK_SIZE сделок),
+        признаки — тот же 7-признаковый вектор, что при инференсе.
+        """
+        for trades in self.ai_db.iter_trades_for_training(
+            include_simulated=True,
+            include_real=False,
+            include_exchange=False,
+            chunk_size=self._training_chunk_size
+        ):
+            features = []
+            pnls = []
+            for trade in trades:
+                vector = self._build_signal_features_7(trade)
+                if vector is None:
+                    continue
+                features.append(vector)
+                pnls.append(float(trade.get('pnl') or 0))
+            if not features:
+                continue
+            y_profit = np.asarray(pnls, dtype=np.float64)
+            yield np.vstack(features), (y_profit > 0).astype(np.int64), y_profit
+    
+    def _fit_simulation_models_in_memory(self) -> bool:
+        """Обучение RandomForest/GradientBoosting на всей выборке (только числовые массивы, без словарей сделок)"""
+        X_parts, y_signal_parts, y_profit_parts = [], [], []
+        for X_chunk, y_signal_chunk, y_profit_chunk in self._iter_simulation_feature_batches():
+            X_parts.append(X_chunk)
+            y_signal_parts.append(y_signal_chunk)
+            y_profit_parts.append(y_profit_chunk)
+        if not X_parts:
+            return False
+        
+        X = np.vstack(X_parts)
+        y_signal = np.concatenate(y_signal_parts)
+        y_profit = np.concatenate(y_profit_parts)
+        del X_parts, y_signal_parts, y_profit_parts
+        
+        if len(X) < self._simulated_trades_min_samples:
+            return False
+        
+        current_n = X.shape[1]
+        if getattr(self.scaler, 'n_features_in_', None) != current_n:
+            self.scaler = StandardScaler()
+        X_scaled = self.scaler.fit_transform(X)
+        
+        # Разделение на train/test
+        X_train, X_test, y_signal_train, y_signal_test, y_profit_train, y_profit_test = train_test_split(
+            X_scaled, y_signal, y_profit, test_size=0.2, random_state=42
+        )
+        
+        # Обучение моделей
+        self.signal_predictor = RandomForestClassifier(
+            n_estimators=100,
+            max_depth=10,
+            random_state=42,
+            n_jobs=1  # без параллелизма — устраняет UserWarning про delayed/Parallel
+        )
+        self.signal_predictor.fit(X_train, y_signal_train)
+        
+        # Проверка на переобучение
+        train_accuracy = self.signal_predictor.score(X_train, y_signal_train)
+        test_accuracy = self.signal_predictor.score(X_test, y_signal_test)
+        accuracy_diff = train_accuracy - test_accuracy
+        
+        if accuracy_diff > 0.15:
+            logger.warning(f"⚠️ Возможно переобучение: train={train_accuracy:.2%}, test={test_accuracy:.2%}")
+        else:
+            logger.info(f"✅ Проверка на переобучение: train={train_accuracy:.2%}, test={test_accuracy:.2%} (OK)")
+        
+        # Кросс-валидация
+        try:
+            from sklearn.model_selection import cross_val_score
+            cv_scores = cross_val_score(self.signal_predictor, X_scaled, y_signal, cv=min(5, len(X) // 20), scoring='accuracy', n_jobs=1)
+            cv_mean = np.mean(cv_scores)
+            logger.info(f"📊 Кросс-валидация: {cv_mean:.2%} ± {np.std(cv_scores):.2%}")
+        except Exception as cv_error:
+            pass
+        
+        self._signal_predictor_accuracy = float(test_accuracy)
+        
+        # Обучение profit_predictor
+        self.profit_predictor = GradientBoostingRegressor(
+            n_estimators=100,
+            max_depth=5,
+            random_state=42
+        )
+        self.profit_predictor.fit(X_train, y_profit_train)
+        return True
+    
+    def _fit_simulation_models_streaming(self) -> bool:
+        """
+        Инкрементальное обучение (partial_fit) по пачкам из БД для выборок больше
+        AI_TRAINING_MAX_IN_MEMORY_SAMPLES. self.scaler уже обучен первым проходом.
+        
+        Точность оценивается prequential-схемой: каждая пачка сначала
+        предсказывается текущей моделью, затем используется для обучения.
+        """
+        from sklearn.linear_model import SGDClassifier, SGDRegressor
+        
+        signal_model = SGDClassifier(loss='log_loss', alpha=1e-4, random_state=42)
+        profit_model = SGDRegressor(alpha=1e-4, random_state=42)
+        classes = np.array([0, 1])
+        correct = 0
+        evaluated = 0
+        chunks = 0
+        
+        for X_chunk, y_signal_chunk, y_profit_chunk in self._iter_simulation_feature_batches():
+            X_scaled = self.scaler.transform(X_chunk)
+            if chunks:
+                correct += int((signal_model.predict(X_scaled) == y_signal_chunk).sum())
+                evaluated += len(y_signal_chunk)
+            signal_model.partial_fit(X_scaled, y_signal_chunk, classes=classes)
+            profit_model.partial_fit(X_scaled, y_profit_chunk)
+            chunks += 1
+            if chunks % 100 == 0:
+                logger.info(f"   📈 Обработано пачек: {chunks}")
+        
+        if not chunks:
+            return False
+        
+        test_accuracy = correct / evaluated if evaluated else 0.0
+        logger.info(f"✅ Инкрементальное обучение: {chunks} пачек, точность (prequential): {test_accuracy:.2%}")
+        
+        self.signal_predictor = signal_model
+        self.profit_predictor = profit_model
+        self._signal_predictor_accuracy = float(test_accuracy)
+        if getattr(self.scaler, 'n_features_in_', None) is not None:
+            self.expected_features = self.scaler.n_features_in_
+        return True
+    
+    def _optimize_symbols_before_training(self, candles_data: Dict, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Параллельно оптимизирует параметры для всех переданных монет перед обучением.
+
+        Args:
+            candles_data: {symbol: {'candles': [...], ...}} из _load_market_data
+            symbols: монеты, не заблокированные другими процессами
+
+        Returns:
+            {symbol: params} для монет, где найдены лучшие параметры
+        """
+        try:
+            from bot_engine.config_loader import AIConfig
+            if not getattr(AIConfig, 'AI_PARALLEL_OPTIMIZE_ON_TRAINING', True):
+                return {}
+            use_bayesian = getattr(AIConfig, 'AI_USE_BAYESIAN', True)
+        except Exception:
+            use_bayesian = True
+
+        candles_by_symbol = {}
+        for symbol in symbols:
+            candles = (candles_data.get(symbol) or {}).get('candles') or []
+            if len(candles) >= 100:
+                candles_by_symbol[symbol] = candles
+        if not candles_by_symbol:
+            return {}
+
+        try:
+            from bot_engine.ai.ai_strategy_optimizer import AIStrategyOptimizer
+            return AIStrategyOptimizer().optimize_symbols_parallel(candles_by_symbol, use_bayesian=use_bayesian)
+        except Exception as e:
+            logger.warning(f"⚠️ Параллельная оптимизация параметров не выполнена: {e}")
+            return {}
+
     def _simulate_trades_with_params(self, params: Dict, historical_data: Dict) -> List[Dict]:
         """
         Симулирует сделки с заданными параметрами на исторических данных
@@ -2675,6 +2796,22 @@ class AITrainer:
         """
         simulated_trades = []
         
+        # Повторная симуляция тех же параметров на том же окне свечей берётся из кэша
+        backtest_cache = None
+        cache_key = None
+        try:
+            from bot_engine.ai.backtest_cache import BACKTEST_ENGINE_VERSION, fingerprint_candles, get_backtest_cache
+            backtest_cache = get_backtest_cache()
+            cache_key = backtest_cache.make_key(
+                params, symbol, None, fingerprint_candles(candles),
+                engine_version=f"trainer-{BACKTEST_ENGINE_VERSION}"
+            )
+            cached = backtest_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        except Exception:
+            backtest_cache = None
+        
         try:
             # Вычисляем RSI для свечей
             from bot_engine.indicators import TechnicalIndicators
@@ -2760,6 +2897,8 @@ class AITrainer:
                             simulated_trades.append(simulated_trade)
                             position = None
             
+            if backtest_cache is not None:
+                backtest_cache.put(cache_key, simulated_trades)
             return simulated_trades
             
         except Exception as e:
@@ -4119,6 +4258,14 @@ class AITrainer:
                 except Exception as e:
                     pass
             
+            # Оптимизация параметров всех доступных монет в пуле процессов (см. parallel_optimizer.py).
+            # Найденные параметры сохраняются в индивидуальные настройки и становятся базой
+            # для посимвольного обучения ниже (AI_USE_SAVED_SETTINGS_AS_BASE).
+            self._optimize_symbols_before_training(
+                candles_data,
+                available_symbols if self.ai_db else list(candles_data.keys())
+            )
+            
             for symbol_idx, (symbol, candle_info) in enumerate(candles_data.items(), 1):
                 # Показываем прогресс каждые 50 монет или для первых 10 монет
                 if symbol_idx % progress_interval == 0 or symbol_idx <= 10:
@@ -16,6 +16,9 @@ from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import joblib  # только dump/load; Parallel/delayed — оба из sklearn через utils.sklearn_parallel_config (патч joblib)
 import os
+import threading
+
+from bot_engine.ai.training_worker import guarded_by_model_lock
 
 logger = logging.getLogger('AI.AnomalyDetector')
 
@@ -34,6 +37,7 @@ class AnomalyDetector:
         self.model = None
         self.scaler = None
         self.is_trained = False
+        self._model_lock = threading.RLock()  # держат detect и hot_swap_model
         
         # Параметры модели
         self.contamination = 0.1  # 10% данных считаем аномалиями
@@ -124,6 +128,7 @@ class AnomalyDetector:
         
         return np.array(features).reshape(1, -1)
     
+    @guarded_by_model_lock
     def detect(self, candles: List[dict]) -> Dict[str, Any]:
         """
         Обнаруживает аномалии в данных свечей
@@ -32,7 +32,9 @@ except ImportError:
 
 # Drift Detection — опционально (AI_DRIFT_DETECTION_ENABLED)
 try:
-    from bot_engine.ai.drift_detector import DataDriftDetector
+    from bot_engine.ai.drift_detector import (
+        DRIFT_GROUPS_PATH, LIVE_INPUTS_STATE_PATH, StreamingDriftMonitor, liquidity_groups, save_symbol_groups,
+    )
     _DRIFT_DETECTOR_AVAILABLE = True
 except ImportError:
     _DRIFT_DETECTOR_AVAILABLE = False
@@ -282,7 +284,12 @@ class AutoTrainer:
         self.train_pattern_script = self.scripts_dir / 'train_pattern_detector.py'
 
         self._drift_retrain_requested = False
-        self._drift_ref_path = Path('data/ai/drift_reference.npy')
+        # Скетчи признаков свечей всего рынка (текущее окно + reference), сохраняются между перезапусками
+        self._drift_state_path = Path('data/ai/drift_sketches.json')
+        self._drift_monitor = None
+        # Входы инференса из bots.py (корзины читаются из их файла, reference — свой)
+        self._live_drift_state_path = Path('data/ai/drift_live_reference.json')
+        self._live_drift_monitor = None
         self._drift_min_samples = 100
         self._drift_threshold_pct = 20.0
     
@@ -649,10 +656,12 @@ class AutoTrainer:
             # 1. Обучаем Anomaly Detector
             if get_ai_config_attr('AI_ANOMALY_DETECTION_ENABLED', True):
                 logger.info("[AutoTrainer] 📊 Обучение Anomaly Detector...")
-                success = self._train_model(
-                    self.train_anomaly_script,
+                success = self._train_model_in_worker(
+                    'anomaly',
                     "Anomaly Detector",
-                    timeout=600
+                    timeout=600,
+                    tracker=tracker,
+                    fallback_script=self.train_anomaly_script,
                 )
                 tracker.log_metric('anomaly_success', 1 if success else 0)
                 if success:
@@ -692,11 +701,14 @@ class AutoTrainer:
             # 3. Обучаем LSTM Predictor
             if get_ai_config_attr('AI_LSTM_ENABLED', True):
                 logger.info("[AutoTrainer] 🧠 Обучение LSTM Predictor...")
-                success = self._train_model(
-                    self.train_lstm_script,
+                success = self._train_model_in_worker(
+                    'lstm',
                     "LSTM Predictor",
                     timeout=1800,  # 30 минут для LSTM
-                    args=['--coins', '0', '--epochs', '50']
+                    params={'coins': 0, 'epochs': 50},
+                    tracker=tracker,
+                    fallback_script=self.train_lstm_script,
+                    fallback_args=['--coins', '0', '--epochs', '50'],
                 )
                 if not success:
                     all_success = False
@@ -704,11 +716,14 @@ class AutoTrainer:
             # 4. Обучаем Pattern Detector
             if get_ai_config_attr('AI_PATTERN_ENABLED', True):
                 logger.info("[AutoTrainer] 📊 Обучение Pattern Detector...")
-                success = self._train_model(
-                    self.train_pattern_script,
+                success = self._train_model_in_worker(
+                    'pattern',
                     "Pattern Detector",
                     timeout=600,
-                    args=['--coins', '0']
+                    params={'coins': 0},
+                    tracker=tracker,
+                    fallback_script=self.train_pattern_script,
+                    fallback_args=['--coins', '0'],
                 )
                 if not success:
                     all_success = False
@@ -755,23 +770,68 @@ class AutoTrainer:
         finally:
             self._training_in_progress = False
 
-    def _get_candles_matrix_for_drift(self, ai_db, max_symbols: int = 10, max_candles_per_symbol: int = 200):
+    def _get_drift_monitor(self):
+        """Потоковый монитор дрифта (скетчи загружаются из файла при первом обращении)"""
+        if self._drift_monitor is None:
+            self._drift_monitor = StreamingDriftMonitor(
+                state_path=str(self._drift_state_path),
+                window_buckets=int(get_ai_config_attr('AI_DRIFT_WINDOW_DAYS', 7) or 7),
+                min_samples=self._drift_min_samples,
+            )
+        return self._drift_monitor
+
+    def _get_live_drift_monitor(self):
+        """Монитор входов инференса: корзины — из файла, который пишет bots.py, reference — свой"""
+        if self._live_drift_monitor is None:
+            self._live_drift_monitor = StreamingDriftMonitor(
+                state_path=str(self._live_drift_state_path),
+                window_buckets=int(get_ai_config_attr('AI_DRIFT_WINDOW_DAYS', 7) or 7),
+                min_samples=self._drift_min_samples,
+            )
+        self._live_drift_monitor.adopt_buckets(StreamingDriftMonitor(state_path=LIVE_INPUTS_STATE_PATH))
+        return self._live_drift_monitor
+
+    def _drift_exceeded(self, monitor) -> Optional[str]:
+        """Группа (ALL или группа ликвидности), где доля дрейфующих признаков выше порога"""
+        for group in [StreamingDriftMonitor.ALL_GROUP] + sorted(set(monitor.groups()) - {StreamingDriftMonitor.ALL_GROUP}):
+            if not monitor.has_reference(group):
+                continue
+            res = monitor.detect_drift(group)
+            if res.drift_detected and res.drifted_features:
+                drift_pct = len(res.drifted_features) / float(max(len(res.p_values), 1)) * 100.0
+                if drift_pct >= self._drift_threshold_pct:
+                    return f"{group}: {drift_pct:.0f}% признаков"
+        return None
+
+    def _update_drift_monitor(self, ai_db) -> int:
+        """
+        Добавляет в скетчи новые закрытые свечи всех монет (по группам ликвидности).
+        Свечи берутся из shared memory (bots.py), иначе одним запросом из БД;
+        после первого заполнения достаточно хвоста — старые свечи отсекаются водяным знаком.
+        Соответствие символ → группа сохраняется для bots.py (группы входов инференса).
+        """
+        monitor = self._get_drift_monitor()
+        max_candles = 50 if monitor.has_watermarks() else 1000
         try:
             from bot_engine.config_loader import get_current_timeframe
-            data = ai_db.get_all_candles_dict(
-                get_current_timeframe(),
-                max_symbols=max_symbols,
-                max_candles_per_symbol=max_candles_per_symbol
-            )
-            rows = []
-            for _sym, candles in (data or {}).items():
-                for c in candles:
-                    rows.append([float(c.get('open', 0)), float(c.get('high', 0)), float(c.get('low', 0)),
-                                 float(c.get('close', 0)), float(c.get('volume', 0))])
-            return np.array(rows, dtype=np.float64) if rows else None
+            timeframe = get_current_timeframe()
+            data = None
+            try:
+                from bot_engine.candles_shm import get_candles_reader
+                reader = get_candles_reader()
+                if reader is not None:
+                    data = reader.get_all_candles(timeframe, max_symbols=0, max_candles_per_symbol=max_candles)
+            except Exception:
+                data = None
+            if not data:
+                data = ai_db.get_all_candles_dict(timeframe, max_symbols=0, max_candles_per_symbol=max_candles)
+            groups = liquidity_groups(data or {})
+            if groups:
+                save_symbol_groups(DRIFT_GROUPS_PATH, groups)
+            return monitor.observe_candles_batch(data or {}, group_of=groups.get)
         except Exception as e:
             pass
-            return None
+            return 0
 
     def _check_drift_and_trigger_retrain(self) -> None:
         if not get_ai_config_attr('AI_DRIFT_DETECTION_ENABLED', True) or not _DRIFT_DETECTOR_AVAILABLE:
@@ -781,45 +841,47 @@ class AutoTrainer:
             ai_db = get_ai_database()
             if not ai_db:
                 return
-            current = self._get_candles_matrix_for_drift(ai_db)
-            if current is None or len(current) < self._drift_min_samples:
-                return
-            ref_path = self._drift_ref_path
-            if ref_path.exists():
-                try:
-                    ref = np.load(ref_path, allow_pickle=False)
-                except Exception:
-                    return
-                if ref.size == 0 or (ref.ndim == 2 and ref.shape[0] < self._drift_min_samples):
-                    return
-                det = DataDriftDetector(reference_data=ref, threshold=0.05, min_samples=self._drift_min_samples)
-                res = det.detect_drift(current)
-                if res.drift_detected and res.drifted_features:
-                    n_feat = current.shape[1] if current.ndim > 1 else 1
-                    drift_pct = len(res.drifted_features) / float(n_feat) * 100.0
-                    if drift_pct >= self._drift_threshold_pct:
-                        self._drift_retrain_requested = True
-                        logger.info(f"[AutoTrainer] 📊 Data drift: {drift_pct:.0f}% признаков — запланировано переобучение")
-            else:
-                self._drift_ref_path.parent.mkdir(parents=True, exist_ok=True)
-                np.save(ref_path, current, allow_pickle=False)
-                pass
+            monitor = self._get_drift_monitor()
+            added = self._update_drift_monitor(ai_db)
+            if monitor.has_reference():
+                drifted = self._drift_exceeded(monitor)
+                if drifted:
+                    self._drift_retrain_requested = True
+                    logger.info(f"[AutoTrainer] 📊 Data drift свечей ({drifted}) — запланировано переобучение")
+            elif added >= self._drift_min_samples:
+                monitor.set_reference()
+            if added:
+                monitor.save()
+            
+            live_monitor = self._get_live_drift_monitor()
+            if live_monitor.has_reference():
+                drifted = self._drift_exceeded(live_monitor)
+                if drifted:
+                    self._drift_retrain_requested = True
+                    logger.info(f"[AutoTrainer] 📊 Data drift входов модели ({drifted}) — запланировано переобучение")
+            elif max((s.count for s in live_monitor.current_sketches().values()), default=0) >= self._drift_min_samples:
+                live_monitor.set_reference()
+                live_monitor.save()
         except Exception as e:
             pass
 
     def _save_drift_reference_after_retrain(self) -> None:
-        if not get_ai_config_attr('AI_DRIFT_DETECTION_ENABLED', True):
+        if not get_ai_config_attr('AI_DRIFT_DETECTION_ENABLED', True) or not _DRIFT_DETECTOR_AVAILABLE:
             return
         try:
             from bot_engine.ai.ai_database import get_ai_database
             ai_db = get_ai_database()
             if not ai_db:
                 return
-            current = self._get_candles_matrix_for_drift(ai_db)
-            if current is not None and len(current) >= self._drift_min_samples:
-                self._drift_ref_path.parent.mkdir(parents=True, exist_ok=True)
-                np.save(self._drift_ref_path, current, allow_pickle=False)
+            monitor = self._get_drift_monitor()
+            self._update_drift_monitor(ai_db)
+            monitor.set_reference()
+            if monitor.save():
                 logger.info("[AutoTrainer] ✅ Drift reference обновлён после переобучения")
+            live_monitor = self._get_live_drift_monitor()
+            if live_monitor.current_sketches():
+                live_monitor.set_reference()
+                live_monitor.save()
         except Exception as e:
             pass
 
@@ -897,6 +959,100 @@ class AutoTrainer:
             logger.error(f"[AutoTrainer] ❌ Ошибка обучения {model_name}: {e}")
             return False
     
+    def _train_model_in_worker(self, kind: str, model_name: str, timeout: int = 600,
+                               params: Optional[Dict[str, Any]] = None, tracker: Optional[ExperimentTracker] = None,
+                               fallback_script: Optional[Path] = None, fallback_args: list = None) -> bool:
+        """
+        Обучает модель в постоянном процессе обучения (training_worker): тяжёлые
+        импорты и подготовленные данные остаются в памяти между переобучениями.
+        Если воркер отключен (AI_TRAINING_WORKER_ENABLED) или не запустился —
+        запускается скрипт обучения, как раньше.
+        
+        Args:
+            kind: Задание воркера ('anomaly', 'lstm', 'pattern')
+            model_name: Название модели для логов
+            timeout: Таймаут в секундах
+            params: Параметры задания
+            tracker: ExperimentTracker текущего запуска (этапы и метрики обучения)
+            fallback_script: Скрипт обучения для запуска через subprocess
+            fallback_args: Аргументы скрипта
+        
+        Returns:
+            True если успешно
+        """
+        if not get_ai_config_attr('AI_TRAINING_WORKER_ENABLED', True):
+            return self._train_model(fallback_script, model_name, timeout=timeout, args=fallback_args)
+        
+        stages = {'loading_data': 1, 'training': 2}
+        
+        def on_progress(stage: str, metrics: Dict[str, Any]):
+            logger.info(f"[AutoTrainer] ⏳ {model_name}: {stage} {metrics or ''}")
+            if tracker:
+                tracker.log_metrics({f'{kind}_stage': stages.get(stage, 0),
+                                     **{f'{kind}_{k}': float(v) for k, v in metrics.items()}})
+        
+        try:
+            from bot_engine.ai.training_worker import get_training_worker
+            logger.info(f"[AutoTrainer] Обучение {model_name} в процессе обучения...")
+            result = get_training_worker().run(kind, params, timeout=timeout, on_progress=on_progress)
+        except Exception as e:
+            logger.warning(f"[AutoTrainer] ⚠️ Процесс обучения недоступен ({e}) — запускаем скрипт")
+            return self._train_model(fallback_script, model_name, timeout=timeout, args=fallback_args)
+        
+        if tracker:
+            numeric = {f'{kind}_{k}': float(v) for k, v in result.items()
+                       if isinstance(v, (int, float)) and not isinstance(v, bool)}
+            numeric[f'{kind}_data_cache_hit'] = 1.0 if result.get('data_cache_hit') else 0.0
+            tracker.log_metrics(numeric)
+        
+        if result.get('success'):
+            logger.info(f"[AutoTrainer] ✅ {model_name} успешно обучен за {result.get('duration_sec', 0):.0f}с"
+                        f"{' (данные из кэша)' if result.get('data_cache_hit') else ''}")
+            return True
+        error = str(result.get('error') or 'неизвестная ошибка')
+        if len(error) > 1000:
+            error = error[:1000] + f"\n... (еще {len(error) - 1000} символов)"
+        logger.error(f"[AutoTrainer] ❌ Ошибка обучения {model_name}:\n{error}")
+        return False
+    
+    def _swap_in_fresh_model(self, name: str, live, factory) -> bool:
+        """Загружает новый экземпляр модели и подменяет им состояние живого предиктора под его блокировкой"""
+        try:
+            fresh = factory(live)
+        except Exception as e:
+            logger.error(f"[AutoTrainer] ❌ Ошибка загрузки {name}: {e}")
+            return False
+        from bot_engine.ai.training_worker import hot_swap_model
+        version = hot_swap_model(name, live, fresh)
+        logger.info(f"[AutoTrainer] ✅ {name} перезагружен (hot reload, версия {version})")
+        return True
+    
+    @staticmethod
+    def _load_fresh_anomaly_detector(live, model_path, scaler_path):
+        fresh = type(live)()
+        if not fresh.load_model(model_path, scaler_path):
+            raise RuntimeError(f"модель не загружена: {model_path}")
+        return fresh
+    
+    @staticmethod
+    def _load_fresh_lstm_predictor(live):
+        fresh = type(live)(
+            model_path=live.model_path,
+            scaler_path=live.scaler_path,
+            config_path=live.config_path,
+            use_improved_model=live.use_improved_model,
+        )
+        if not getattr(fresh, 'model_loaded', False):
+            raise RuntimeError(f"модель не загружена: {live.model_path}")
+        return fresh
+    
+    @staticmethod
+    def _load_fresh_pattern_detector(live):
+        fresh = type(live)(model_path=live.model_path, scaler_path=live.scaler_path)
+        if not getattr(fresh, 'model_loaded', False):
+            raise RuntimeError(f"модель не загружена: {live.model_path}")
+        return fresh
+    
     def _reload_models(self):
         """Перезагружает все модели в AI Manager без перезапуска бота"""
         try:
@@ -950,10 +1106,11 @@ class AutoTrainer:
                             logger.info(f"[AutoTrainer] ✅ В AI БД есть данные 6h: свечей={candles_count:,}, монет={symbols_count:,}")
 
                         # 2) Обучаем Anomaly Detector (скрипт сам сохранит model/scaler в AIConfig пути)
-                        train_ok = self._train_model(
-                            self.train_anomaly_script,
+                        train_ok = self._train_model_in_worker(
+                            'anomaly',
                             "Anomaly Detector",
                             timeout=900,
+                            fallback_script=self.train_anomaly_script,
                         )
                         if train_ok:
                             model_exists = os.path.exists(model_path) if model_path else False
@@ -962,10 +1119,10 @@ class AutoTrainer:
                                 logger.error(f"[AutoTrainer] ❌ Обучение завершилось, но файл модели не появился: {model_path}")
                             else:
                                 logger.info("[AutoTrainer] ✅ Модель Anomaly Detector создана, выполняем hot reload...")
-                                success = ai_manager.anomaly_detector.load_model(model_path, scaler_path)
-                                if success:
-                                    logger.info("[AutoTrainer] ✅ Anomaly Detector перезагружен (hot reload)")
-                                else:
+                                if not self._swap_in_fresh_model(
+                                    'anomaly_detector', ai_manager.anomaly_detector,
+                                    lambda live: self._load_fresh_anomaly_detector(live, model_path, scaler_path)
+                                ):
                                     logger.error("[AutoTrainer] ❌ Ошибка перезагрузки Anomaly Detector после обучения")
                         else:
                             logger.error("[AutoTrainer] ❌ Не удалось обучить Anomaly Detector (модель не создана)")
@@ -974,30 +1131,29 @@ class AutoTrainer:
                             logger.warning(f"[AutoTrainer] ⚠️ Файл scaler Anomaly Detector не найден: {scaler_path}")
                             pass
                         
-                        success = ai_manager.anomaly_detector.load_model(model_path, scaler_path)
-                        
-                        if success:
-                            logger.info("[AutoTrainer] ✅ Anomaly Detector перезагружен (hot reload)")
-                        else:
+                        if not self._swap_in_fresh_model(
+                            'anomaly_detector', ai_manager.anomaly_detector,
+                            lambda live: self._load_fresh_anomaly_detector(live, model_path, scaler_path)
+                        ):
                             logger.error(f"[AutoTrainer] ❌ Ошибка перезагрузки Anomaly Detector")
-                            pass
-                            pass
                 except Exception as e:
                     logger.error(f"[AutoTrainer] ❌ Ошибка hot reload Anomaly Detector: {e}", exc_info=True)
             
             # 2. Перезагружаем LSTM Predictor
             if ai_manager.lstm_predictor:
                 try:
-                    ai_manager.lstm_predictor.load_model()
-                    logger.info("[AutoTrainer] ✅ LSTM Predictor перезагружен (hot reload)")
+                    self._swap_in_fresh_model(
+                        'lstm_predictor', ai_manager.lstm_predictor, self._load_fresh_lstm_predictor
+                    )
                 except Exception as e:
                     logger.error(f"[AutoTrainer] Ошибка hot reload LSTM Predictor: {e}")
             
             # 3. Перезагружаем Pattern Detector
             if ai_manager.pattern_detector:
                 try:
-                    ai_manager.pattern_detector.load_model()
-                    logger.info("[AutoTrainer] ✅ Pattern Detector перезагружен (hot reload)")
+                    self._swap_in_fresh_model(
+                        'pattern_detector', ai_manager.pattern_detector, self._load_fresh_pattern_detector
+                    )
                 except Exception as e:
                     logger.error(f"[AutoTrainer] Ошибка hot reload Pattern Detector: {e}")
         
@@ -0,0 +1,262 @@
+"""
+Кэш результатов бэктестов/симуляций.
+
+Ключ: (хеш параметров стратегии, символ, таймфрейм, отпечаток окна данных,
+версия движка симуляции). Одинаковые параметры на тех же свечах дают тот же
+результат, поэтому повторные прогоны оптимизатора и тренера берут его из кэша.
+
+- в памяти: LRU (OrderedDict) на max_entries записей;
+- на диске: data/ai/backtest_cache.db (SQLite), запись пакетами,
+  вытеснение по last_used при превышении max_disk_entries.
+
+При изменении логики симуляции увеличьте BACKTEST_ENGINE_VERSION —
+старые записи перестанут совпадать по ключу и вытеснятся.
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger('AI.BacktestCache')
+
+BACKTEST_ENGINE_VERSION = '1'
+
+DEFAULT_DB_PATH = os.path.join('data', 'ai', 'backtest_cache.db')
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_DISK_ENTRIES = 200_000
+FLUSH_EVERY = 50
+
+# Поля, которые не влияют на результат симуляции
+_VOLATILE_PARAM_KEYS = frozenset({'name', 'optimized_at', 'timestamp', 'updated_at'})
+
+
+def _normalize(value: Any) -> Any:
+    """Приводит значение к стабильному JSON-представлению (numpy → python, float с фикс. точностью)."""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items() if k not in _VOLATILE_PARAM_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return round(value, 10)
+    return value
+
+
+def hash_params(params: Dict[str, Any]) -> str:
+    """Стабильный хеш набора параметров (порядок ключей и numpy-типы не влияют)."""
+    payload = json.dumps(_normalize(params or {}), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
+def fingerprint_candles(candles: Sequence[Dict[str, Any]]) -> str:
+    """Отпечаток окна свечей: время и OHLCV всех свечей."""
+    if not candles:
+        return 'empty'
+    matrix = np.array(
+        [[float(c.get(field, 0) or 0) for field in ('time', 'open', 'high', 'low', 'close', 'volume')]
+         for c in candles],
+        dtype=np.float64,
+    )
+    return hashlib.blake2b(matrix.tobytes(), digest_size=16).hexdigest()
+
+
+def fingerprint_records(records: Iterable[Dict[str, Any]], fields: Sequence[str]) -> str:
+    """Отпечаток произвольных записей (сделок и т.п.) по заданным полям."""
+    digest = hashlib.blake2b(digest_size=16)
+    count = 0
+    for record in records:
+        digest.update(json.dumps([record.get(f) for f in fields], default=str).encode('utf-8'))
+        count += 1
+    return f"{count}:{digest.hexdigest()}"
+
+
+class BacktestResultCache:
+    """LRU-кэш результатов бэктестов с персистентностью в SQLite."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max(1, int(max_entries))
+        self.max_disk_entries = max(self.max_entries, int(max_disk_entries))
+        self._memory: 'OrderedDict[str, Any]' = OrderedDict()
+        self._pending_writes: Dict[str, str] = {}
+        self._pending_touches: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._disk_enabled = True
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS backtest_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        result_json TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_used REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_backtest_cache_last_used ON backtest_cache(last_used)")
+        except Exception as db_error:
+            logger.warning(f"⚠️ Кэш бэктестов работает только в памяти: {db_error}")
+            self._disk_enabled = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def make_key(params: Dict[str, Any], symbol: Optional[str], timeframe: Optional[str],
+                 data_fingerprint: str, engine_version: str = BACKTEST_ENGINE_VERSION) -> str:
+        return '|'.join((
+            hash_params(params),
+            (symbol or '*').upper(),
+            timeframe or '*',
+            data_fingerprint,
+            engine_version,
+        ))
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._pending_touches[key] = time.time()
+                self.hits += 1
+                return self._memory[key]
+
+        value = None
+        if self._disk_enabled:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        "SELECT result_json FROM backtest_cache WHERE cache_key = ?", (key,)
+                    ).fetchone()
+                if row:
+                    value = json.loads(row[0])
+            except Exception:
+                value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, value)
+            self._pending_touches[key] = time.time()
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        try:
+            payload = json.dumps(value, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            # В памяти храним уже JSON-совместимую копию, чтобы результат из памяти и с диска совпадал
+            self._remember(key, json.loads(payload))
+            if self._disk_enabled:
+                self._pending_writes[key] = payload
+                if len(self._pending_writes) >= FLUSH_EVERY:
+                    self.flush()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = compute()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def flush(self) -> None:
+        """Пишет накопленные записи и отметки использования на диск, вытесняет старые."""
+        with self._lock:
+            writes, self._pending_writes = self._pending_writes, {}
+            touches, self._pending_touches = self._pending_touches, {}
+        if not self._disk_enabled or not (writes or touches):
+            return
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                if writes:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO backtest_cache (cache_key, result_json, created_at, last_used) "
+                        "VALUES (?, ?, ?, ?)",
+                        [(k, v, now, now) for k, v in writes.items()],
+                    )
+                if touches:
+                    conn.executemany(
+                        "UPDATE backtest_cache SET last_used = ? WHERE cache_key = ?",
+                        [(ts, k) for k, ts in touches.items()],
+                    )
+                count = conn.execute("SELECT COUNT(*) FROM backtest_cache").fetchone()[0]
+                if count > self.max_disk_entries:
+                    conn.execute(
+                        "DELETE FROM backtest_cache WHERE cache_key IN ("
+                        "SELECT cache_key FROM backtest_cache ORDER BY last_used ASC LIMIT ?)",
+                        (count - self.max_disk_entries,),
+                    )
+        except Exception as db_error:
+            logger.warning(f"⚠️ Не удалось записать кэш бэктестов: {db_error}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total * 100) if total else 0.0,
+                'memory_entries': len(self._memory),
+                'pending_writes': len(self._pending_writes),
+            }
+
+
+_cache_instance: Optional[BacktestResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_backtest_cache() -> BacktestResultCache:
+    """Возвращает общий для процесса экземпляр кэша (сбрасывается на диск при выходе)."""
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            max_entries = DEFAULT_MAX_ENTRIES
+            try:
+                from bot_engine.config_loader import AIConfig
+                max_entries = int(getattr(AIConfig, 'AI_BACKTEST_CACHE_SIZE', DEFAULT_MAX_ENTRIES) or DEFAULT_MAX_ENTRIES)
+            except Exception:
+                pass
+            _cache_instance = BacktestResultCache(max_entries=max_entries)
+            atexit.register(_cache_instance.flush)
+        return _cache_instance
+
+
+def cached_trades(cache: BacktestResultCache, key: str,
+                  simulate: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Хелпер для симуляторов, возвращающих список сделок (пустой список тоже кэшируется)."""
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    trades = simulate()
+    cache.put(key, trades)
+    return trades
@@ -8,10 +8,16 @@ Bayesian Optimizer - эффективная оптимизация гиперп
 - Находит оптимум за меньшее число итераций
 - Учитывает неопределенность в оценках
 - Автоматически балансирует exploration vs exploitation
+
+Batch-режим (batch_size > 1): за итерацию предлагается k точек по стратегии
+constant liar, их можно оценивать параллельно (executor). GP обновляется
+инкрементально (добавление строк к разложению Холецкого), acquisition
+считается векторно по матрице кандидатов.
 """
 
 import logging
 import numpy as np
+from concurrent.futures import Executor
 from typing import Dict, List, Callable, Any, Optional, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime
@@ -24,6 +30,7 @@ logger = logging.getLogger('BayesianOptimizer')
 try:
     from scipy.stats import norm
     from scipy.optimize import minimize
+    from scipy.linalg import cho_solve, solve_triangular
     SCIPY_AVAILABLE = True
 except ImportError:
     SCIPY_AVAILABLE = False
@@ -89,42 +96,114 @@ class GaussianProcessSurrogate:
     """
     Простая реализация Gaussian Process для surrogate модели
 
-    Использует RBF (Radial Basis Function) kernel
+    Использует RBF (Radial Basis Function) kernel. Вместо обратной матрицы
+    хранится нижний треугольный фактор Холецкого L (K = L @ L.T), который
+    при добавлении точек расширяется за O(n^2) (update), а не пересчитывается.
     """
 
     def __init__(self, length_scale: float = 1.0, noise: float = 1e-4):
         self.length_scale = length_scale
         self.noise = noise
         self.X_train = None
+        self.y_raw = None
         self.y_train = None
-        self.K_inv = None
+        self.L = None
+        self.alpha = None
         self.y_mean = 0.0
         self.y_std = 1.0
 
     def _rbf_kernel(self, X1: np.ndarray, X2: np.ndarray) -> np.ndarray:
         """RBF (Squared Exponential) kernel"""
-        # X1: (n1, d), X2: (n2, d)
-        dist_sq = np.sum((X1[:, np.newaxis, :] - X2[np.newaxis, :, :]) ** 2, axis=-1)
+        # X1: (n1, d), X2: (n2, d); ||a-b||^2 = |a|^2 + |b|^2 - 2ab без промежуточного (n1, n2, d)
+        sq1 = np.sum(X1 ** 2, axis=1)[:, np.newaxis]
+        sq2 = np.sum(X2 ** 2, axis=1)[np.newaxis, :]
+        dist_sq = np.maximum(sq1 + sq2 - 2.0 * (X1 @ X2.T), 0.0)
         return np.exp(-0.5 * dist_sq / (self.length_scale ** 2))
 
-    def fit(self, X: np.ndarray, y: np.ndarray):
-        """Обучает GP на данных"""
-        self.X_train = np.array(X)
+    @staticmethod
+    def _solve_lower(L: np.ndarray, b: np.ndarray) -> np.ndarray:
+        if SCIPY_AVAILABLE:
+            return solve_triangular(L, b, lower=True, check_finite=False)
+        return np.linalg.solve(L, b)
+
+    def _refresh_targets(self):
+        """Нормализует y и пересчитывает alpha = K^-1 y (две треугольные системы)."""
+        y = np.asarray(self.y_raw, dtype=float)
+        # Неудачные оценки (-inf/NaN) заменяем худшим конечным значением, иначе нормализация ломается
+        finite = np.isfinite(y)
+        if not finite.all():
+            y = np.where(finite, y, np.min(y[finite]) if finite.any() else 0.0)
 
-        # Нормализуем y для стабильности
         self.y_mean = np.mean(y)
         self.y_std = np.std(y) + 1e-8
-        self.y_train = (np.array(y) - self.y_mean) / self.y_std
+        self.y_train = (y - self.y_mean) / self.y_std
+
+        if SCIPY_AVAILABLE:
+            self.alpha = cho_solve((self.L, True), self.y_train, check_finite=False)
+        else:
+            self.alpha = np.linalg.solve(self.L.T, np.linalg.solve(self.L, self.y_train))
+
+    def fit(self, X: np.ndarray, y: np.ndarray):
+        """Обучает GP на данных"""
+        self.X_train = np.array(X, dtype=float)
+        self.y_raw = np.array(y, dtype=float)
 
         # Вычисляем ковариационную матрицу
         K = self._rbf_kernel(self.X_train, self.X_train)
         K += self.noise * np.eye(len(K))
 
-        # Инвертируем (с регуляризацией для численной стабильности)
-        try:
-            self.K_inv = np.linalg.inv(K)
-        except np.linalg.LinAlgError:
-            self.K_inv = np.linalg.pinv(K)
+        # Разложение Холецкого (с наращиванием регуляризации для численной стабильности)
+        jitter = 0.0
+        for _ in range(5):
+            try:
+                self.L = np.linalg.cholesky(K + jitter * np.eye(len(K)))
+                break
+            except np.linalg.LinAlgError:
+                jitter = max(jitter * 10, 1e-8)
+        else:
+            eigvals, eigvecs = np.linalg.eigh(K)
+            self.L = np.linalg.cholesky((eigvecs * np.maximum(eigvals, 1e-6)) @ eigvecs.T)
+
+        self._refresh_targets()
+
+    def update(self, X_new: np.ndarray, y_new: np.ndarray):
+        """
+        Добавляет наблюдения без полного пересчёта.
+
+        Фактор Холецкого расширяется блоком:
+            L' = [[L, 0], [l.T, d]],  l = L^-1 k,  d = sqrt(k_ss - l.l)
+        """
+        X_new = np.atleast_2d(np.asarray(X_new, dtype=float))
+        y_new = np.atleast_1d(np.asarray(y_new, dtype=float))
+        if self.X_train is None or self.L is None:
+            self.fit(X_new, y_new)
+            return
+
+        for x, value in zip(X_new, y_new):
+            k = self._rbf_kernel(self.X_train, x[np.newaxis, :])[:, 0]
+            l = self._solve_lower(self.L, k)
+            d = np.sqrt(max(1.0 + self.noise - float(l @ l), 1e-10))
+
+            n = len(self.L)
+            L_ext = np.zeros((n + 1, n + 1))
+            L_ext[:n, :n] = self.L
+            L_ext[n, :n] = l
+            L_ext[n, n] = d
+            self.L = L_ext
+            self.X_train = np.vstack([self.X_train, x])
+            self.y_raw = np.append(self.y_raw, value)
+
+        self._refresh_targets()
+
+    def downdate(self, count: int):
+        """Удаляет последние count наблюдений (обрезка хвоста L — O(1))."""
+        if count <= 0 or self.X_train is None:
+            return
+        n = len(self.X_train) - count
+        self.X_train = self.X_train[:n]
+        self.y_raw = self.y_raw[:n]
+        self.L = self.L[:n, :n]
+        self._refresh_targets()
 
     def predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -137,19 +216,17 @@ class GaussianProcessSurrogate:
         if self.X_train is None:
             return np.zeros(len(X)), np.ones(len(X))
 
-        X = np.array(X)
+        X = np.atleast_2d(np.asarray(X, dtype=float))
 
         # Ковариация между новыми и обучающими точками
         K_s = self._rbf_kernel(X, self.X_train)
 
-        # Ковариация новых точек
-        K_ss = self._rbf_kernel(X, X)
-
         # Предсказание среднего
-        mean = K_s @ self.K_inv @ self.y_train
+        mean = K_s @ self.alpha
 
-        # Предсказание дисперсии
-        var = np.diag(K_ss) - np.sum(K_s @ self.K_inv * K_s, axis=1)
+        # Предсказание дисперсии: diag(K_ss) = 1 для RBF, полную K_ss не строим
+        v = self._solve_lower(self.L, K_s.T)
+        var = 1.0 - np.sum(v ** 2, axis=0)
         var = np.maximum(var, 1e-8)  # Избегаем отрицательных значений
         std = np.sqrt(var)
 
@@ -164,7 +241,10 @@ class BayesianOptimizer:
     Bayesian Optimizer с Gaussian Process surrogate
 
     Использует Expected Improvement acquisition function
-    для балансировки exploration и exploitation
+    для балансировки exploration и exploitation.
+
+    Поддерживает batch-режим: ask(k) возвращает k точек (constant liar),
+    tell() принимает их оценки — точки можно бэктестить параллельно.
     """
 
     def __init__(
@@ -175,7 +255,10 @@ class BayesianOptimizer:
         acquisition: str = 'ei',  # 'ei' (Expected Improvement) или 'ucb' (Upper Confidence Bound)
         xi: float = 0.01,  # Exploration параметр для EI
         kappa: float = 2.0,  # Exploration параметр для UCB
-        random_state: int = 42
+        random_state: int = 42,
+        batch_size: int = 1,
+        liar: str = 'min',  # 'min', 'mean' или 'max' — "ложное" значение для constant liar
+        n_candidates: int = 2000
     ):
         """
         Args:
@@ -186,6 +269,9 @@ class BayesianOptimizer:
             xi: Exploration параметр для Expected Improvement
             kappa: Exploration параметр для Upper Confidence Bound
             random_state: Seed для воспроизводимости
+            batch_size: Сколько точек предлагать за итерацию (1 — последовательный режим)
+            liar: Стратегия constant liar для batch-режима
+            n_candidates: Размер матрицы случайных кандидатов для acquisition
         """
         self.param_space = param_space
         self.objective_function = objective_function
@@ -194,6 +280,9 @@ class BayesianOptimizer:
         self.xi = xi
         self.kappa = kappa
         self.rng = np.random.default_rng(random_state)
+        self.batch_size = max(1, int(batch_size))
+        self.liar = liar
+        self.n_candidates = max(100, int(n_candidates))
 
         self.gp = GaussianProcessSurrogate()
 
@@ -205,8 +294,12 @@ class BayesianOptimizer:
         self.best_params = None
         self.best_value = float('-inf')
         self.iteration = 0
+        self._last_ask: Tuple[Optional[List[Dict]], Optional[np.ndarray]] = (None, None)
 
-        logger.info(f"BayesianOptimizer создан: {len(param_space)} параметров, acquisition={acquisition}")
+        logger.info(
+            f"BayesianOptimizer создан: {len(param_space)} параметров, acquisition={acquisition}, "
+            f"batch_size={self.batch_size}"
+        )
 
     def _params_to_unit(self, params: Dict) -> np.ndarray:
         """Преобразует параметры в unit [0, 1] пространство"""
@@ -222,23 +315,23 @@ class BayesianOptimizer:
             for i, ps in enumerate(self.param_space)
         }
 
-    def _expected_improvement(self, x: np.ndarray) -> float:
-        """Expected Improvement acquisition function"""
-        if not SCIPY_AVAILABLE:
-            # Fallback без scipy
-            mean, std = self.gp.predict(x.reshape(1, -1))
-            return mean[0] + self.kappa * std[0]
-
-        mean, std = self.gp.predict(x.reshape(1, -1))
-        mean, std = mean[0], std[0]
+    def _acquisition_batch(self, X: np.ndarray) -> np.ndarray:
+        """Acquisition function по матрице кандидатов (m, d) — один predict на всю матрицу"""
+        mean, std = self.gp.predict(X)
 
-        if std < 1e-8:
-            return 0.0
+        if self.acquisition != 'ei' or not SCIPY_AVAILABLE:
+            # UCB (и fallback EI без scipy)
+            return mean + self.kappa * std
 
-        z = (mean - self.best_value - self.xi) / std
-        ei = (mean - self.best_value - self.xi) * norm.cdf(z) + std * norm.pdf(z)
+        improvement = mean - self.best_value - self.xi
+        safe_std = np.where(std < 1e-8, 1.0, std)
+        z = improvement / safe_std
+        ei = improvement * norm.cdf(z) + safe_std * norm.pdf(z)
+        return np.where(std < 1e-8, 0.0, ei)
 
-        return ei
+    def _expected_improvement(self, x: np.ndarray) -> float:
+        """Expected Improvement acquisition function"""
+        return float(self._acquisition_batch(x.reshape(1, -1))[0])
 
     def _upper_confidence_bound(self, x: np.ndarray) -> float:
         """Upper Confidence Bound acquisition function"""
@@ -252,51 +345,128 @@ class BayesianOptimizer:
         else:
             return self._upper_confidence_bound(x)
 
+    def _candidate_matrix(self) -> np.ndarray:
+        """Случайные кандидаты + локальные возмущения вокруг лучших наблюдений"""
+        n_dims = len(self.param_space)
+        candidates = [self.rng.uniform(0, 1, (self.n_candidates, n_dims))]
+
+        if self.y_observed:
+            y = np.asarray(self.y_observed, dtype=float)
+            y = np.where(np.isfinite(y), y, -np.inf)
+            top = np.argsort(y)[::-1][:5]
+            centers = np.asarray(self.X_observed)[top]
+            per_center = max(1, self.n_candidates // (4 * len(centers)))
+            local = centers[:, np.newaxis, :] + self.rng.normal(0, 0.05, (len(centers), per_center, n_dims))
+            candidates.append(np.clip(local.reshape(-1, n_dims), 0, 1))
+
+        return np.vstack(candidates)
+
     def _suggest_next_point(self) -> np.ndarray:
         """Предлагает следующую точку для оценки"""
         n_dims = len(self.param_space)
 
-        # Multi-start оптимизация acquisition function
-        best_x = None
-        best_acq = float('-inf')
-
-        n_restarts = 10
+        # Векторная оценка acquisition по матрице кандидатов
+        candidates = self._candidate_matrix()
+        acq = self._acquisition_batch(candidates)
 
-        for _ in range(n_restarts):
-            # Случайная начальная точка
-            x0 = self.rng.uniform(0, 1, n_dims)
+        best_idx = int(np.argmax(acq))
+        best_x = candidates[best_idx]
+        best_acq = float(acq[best_idx])
 
-            if SCIPY_AVAILABLE:
-                # Оптимизируем acquisition function
+        if SCIPY_AVAILABLE:
+            # Локальная доводка L-BFGS-B только из лучших кандидатов
+            n_restarts = 3
+            for idx in np.argsort(acq)[::-1][:n_restarts]:
                 result = minimize(
                     lambda x: -self._acquisition_function(x),
-                    x0,
+                    candidates[idx],
                     bounds=[(0, 1)] * n_dims,
                     method='L-BFGS-B'
                 )
-                x_opt = result.x
-            else:
-                # Простой random search если scipy недоступен
-                x_opt = x0
-                for _ in range(50):
-                    x_try = x0 + self.rng.normal(0, 0.1, n_dims)
-                    x_try = np.clip(x_try, 0, 1)
-                    if self._acquisition_function(x_try) > self._acquisition_function(x_opt):
-                        x_opt = x_try
-
-            acq_value = self._acquisition_function(x_opt)
-
-            if acq_value > best_acq:
-                best_acq = acq_value
-                best_x = x_opt
+                acq_value = -float(result.fun)
+                if acq_value > best_acq:
+                    best_acq = acq_value
+                    best_x = result.x
 
         return np.clip(best_x, 0, 1)
 
+    def _lie_value(self) -> float:
+        finite = [v for v in self.y_observed if np.isfinite(v)]
+        if not finite:
+            return 0.0
+        if self.liar == 'max':
+            return float(np.max(finite))
+        if self.liar == 'mean':
+            return float(np.mean(finite))
+        return float(np.min(finite))
+
+    def _suggest_batch(self, k: int) -> np.ndarray:
+        """
+        Предлагает k точек (constant liar): после выбора точки GP временно
+        получает для неё "ложное" значение, чтобы следующая точка была в другом месте.
+        """
+        if k <= 1:
+            return self._suggest_next_point().reshape(1, -1)
+
+        lie = self._lie_value()
+        points = []
+        for _ in range(k):
+            x = self._suggest_next_point()
+            points.append(x)
+            self.gp.update(x.reshape(1, -1), [lie])
+        self.gp.downdate(k)
+        return np.array(points)
+
+    def ask(self, k: Optional[int] = None) -> List[Dict]:
+        """Возвращает k наборов параметров для оценки (для внешнего параллельного бэктеста)"""
+        k = max(1, int(k or self.batch_size))
+        n_observed = len(self.y_observed)
+        if n_observed < self.n_initial_points:
+            k = min(k, self.n_initial_points - n_observed)
+            X_batch = self.rng.uniform(0, 1, (k, len(self.param_space)))
+        else:
+            X_batch = self._suggest_batch(k)
+        params_list = [self._unit_to_params(x) for x in X_batch]
+        self._last_ask = (params_list, X_batch)
+        return params_list
+
+    def tell(self, params_list: List[Dict], values: List[float]) -> None:
+        """Принимает результаты оценки и инкрементально обновляет GP"""
+        last_params, last_units = self._last_ask
+        if params_list is last_params:
+            X_batch = last_units
+        else:
+            X_batch = np.array([self._params_to_unit(p) for p in params_list])
+        for x_unit, params, value in zip(X_batch, params_list, values):
+            self.X_observed.append(x_unit)
+            self.y_observed.append(value)
+            self.params_observed.append(params)
+            if value > self.best_value:
+                self.best_value = value
+                self.best_params = params.copy()
+        self.gp.update(X_batch, values)
+
+    def _evaluate_batch(self, params_list: List[Dict], executor: Optional[Executor] = None) -> List[float]:
+        """Оценивает пачку параметров (параллельно, если передан executor)"""
+        def _safe_result(call) -> float:
+            try:
+                return call()
+            except Exception as e:
+                logger.warning(f"Ошибка при оценке параметров: {e}")
+                return float('-inf')
+
+        if executor is not None and len(params_list) > 1:
+            futures = [executor.submit(self.objective_function, params) for params in params_list]
+            return [_safe_result(future.result) for future in futures]
+        return [_safe_result(lambda p=params: self.objective_function(p)) for params in params_list]
+
     def optimize(
         self,
         n_iterations: int = 50,
         verbose: bool = True,
-        callback: Callable = None
+        callback: Callable = None,
+        batch_size: Optional[int] = None,
+        executor: Optional[Executor] = None
     ) -> Dict:
         """
         Запускает оптимизацию
@@ -305,61 +475,50 @@ class BayesianOptimizer:
             n_iterations: Количество итераций (не включая initial points)
             verbose: Выводить прогресс
             callback: Функция, вызываемая после каждой итерации
+            batch_size: Точек за итерацию (по умолчанию self.batch_size)
+            executor: concurrent.futures Executor для параллельной оценки пачки
+                (для ProcessPoolExecutor objective_function должна быть picklable)
 
         Returns:
             Dict с лучшими параметрами и историей
         """
         total_iterations = self.n_initial_points + n_iterations
+        batch_size = max(1, int(batch_size or self.batch_size))
 
         if verbose:
-            logger.info(f"Начало оптимизации: {self.n_initial_points} initial + {n_iterations} iterations")
-
-        for i in range(total_iterations):
-            self.iteration = i + 1
-
-            # Начальные случайные точки
-            if i < self.n_initial_points:
-                x_unit = self.rng.uniform(0, 1, len(self.param_space))
-            else:
-                # Bayesian optimization
-                self.gp.fit(np.array(self.X_observed), np.array(self.y_observed))
-                x_unit = self._suggest_next_point()
-
-            # Преобразуем в реальные параметры
-            params = self._unit_to_params(x_unit)
-
-            # Оцениваем objective
-            try:
-                value = self.objective_function(params)
-            except Exception as e:
-                logger.warning(f"Ошибка при оценке параметров: {e}")
-                value = float('-inf')
-
-            # Сохраняем результат
-            self.X_observed.append(x_unit)
-            self.y_observed.append(value)
-            self.params_observed.append(params)
-
-            # Обновляем лучший результат
-            if value > self.best_value:
-                self.best_value = value
-                self.best_params = params.copy()
+            logger.info(
+                f"Начало оптимизации: {self.n_initial_points} initial + {n_iterations} iterations"
+                + (f", batch={batch_size}" if batch_size > 1 else "")
+            )
 
-                if verbose:
-                    logger.info(f"[{i+1}/{total_iterations}] Новый лучший результат: {value:.4f}")
-                    logger.info(f"  Параметры: {params}")
-
-            elif verbose and (i + 1) % 10 == 0:
-                logger.info(f"[{i+1}/{total_iterations}] Текущий: {value:.4f}, Лучший: {self.best_value:.4f}")
-
-            if callback:
-                callback({
-                    'iteration': i + 1,
-                    'params': params,
-                    'value': value,
-                    'best_value': self.best_value,
-                    'best_params': self.best_params
-                })
+        while len(self.y_observed) < total_iterations:
+            k = min(batch_size, total_iterations - len(self.y_observed))
+            params_batch = self.ask(k)
+            values = self._evaluate_batch(params_batch, executor)
+            previous_best = self.best_value
+            self.tell(params_batch, values)
+
+            for offset, (params, value) in enumerate(zip(params_batch, values)):
+                i = len(self.y_observed) - len(params_batch) + offset
+                self.iteration = i + 1
+
+                if value > previous_best:
+                    previous_best = value
+                    if verbose:
+                        logger.info(f"[{i+1}/{total_iterations}] Новый лучший результат: {value:.4f}")
+                        logger.info(f"  Параметры: {params}")
+
+                elif verbose and (i + 1) % 10 == 0:
+                    logger.info(f"[{i+1}/{total_iterations}] Текущий: {value:.4f}, Лучший: {self.best_value:.4f}")
+
+                if callback:
+                    callback({
+                        'iteration': i + 1,
+                        'params': params,
+                        'value': value,
+                        'best_value': self.best_value,
+                        'best_params': self.best_params
+                    })
 
         if verbose:
             logger.info(f"Оптимизация завершена. Лучший результат: {self.best_value:.4f}")
@@ -8,11 +8,17 @@ Data Drift Detection - обнаружение дрифта данных и де
 
 Использует:
 - Kolmogorov-Smirnov тест для детекции дрифта
+- Квантильные скетчи для потокового мониторинга всего рынка (StreamingDriftMonitor)
 - Скользящие метрики для мониторинга производительности
 """
 
+import json
 import logging
+import math
+import os
 import re
+import threading
+import time
 import warnings
 from collections import deque
 from dataclasses import dataclass, field
@@ -41,6 +47,7 @@ class DriftResult:
     p_values: Dict[str, float]
     recommendation: str
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    psi: Dict[str, float] = field(default_factory=dict)
 
 
 @dataclass
@@ -260,6 +267,582 @@ class DataDriftDetector:
         }
 
 
+class QuantileSketch:
+    """
+    Мергируемый квантильный скетч с логарифмическими корзинами (по схеме DDSketch)
+    
+    Значение x попадает в корзину ceil(log_gamma(|x|)) со своим знаком, поэтому
+    скетчи с одинаковой точностью объединяются сложением счётчиков, а CDF и
+    квантили вычисляются за O(число корзин) с относительной ошибкой relative_accuracy.
+    """
+    
+    MIN_ABS_VALUE = 1e-9  # |x| меньше — в нулевую корзину
+    
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+    
+    def update(self, values) -> None:
+        """Добавляет значения (скаляр или массив); NaN/inf игнорируются"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        self.zero_count += int(np.count_nonzero(np.abs(values) < self.MIN_ABS_VALUE))
+        for store, part in ((self.positive, values[values >= self.MIN_ABS_VALUE]),
+                            (self.negative, -values[values <= -self.MIN_ABS_VALUE])):
+            if part.size:
+                keys, counts = np.unique(np.ceil(np.log(part) / self._log_gamma).astype(np.int64),
+                                         return_counts=True)
+                for key, cnt in zip(keys.tolist(), counts.tolist()):
+                    store[key] = store.get(key, 0) + cnt
+        self.count += int(values.size)
+        self._collapse()
+    
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """Добавляет в скетч счётчики другого скетча с той же точностью"""
+        if abs(other.gamma - self.gamma) > 1e-12:
+            raise ValueError("Нельзя объединить скетчи с разной точностью")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, cnt in other_store.items():
+                store[key] = store.get(key, 0) + cnt
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self._collapse()
+        return self
+    
+    def copy(self) -> 'QuantileSketch':
+        return QuantileSketch(self.relative_accuracy, self.max_bins).merge(self)
+    
+    def _collapse(self) -> None:
+        """Ограничивает число корзин, объединяя корзины с наименьшими |x|"""
+        excess = len(self.positive) + len(self.negative) - self.max_bins
+        for store in (self.negative, self.positive):
+            if excess <= 0 or len(store) < 2:
+                continue
+            keys = sorted(store)
+            n_merge = min(excess, len(keys) - 1)
+            target = keys[n_merge]
+            for key in keys[:n_merge]:
+                store[target] += store.pop(key)
+            excess -= n_merge
+    
+    def cdf_points(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Значения корзин по возрастанию и накопленная доля наблюдений (F(x) в этих точках)"""
+        if self.count == 0:
+            return np.empty(0), np.empty(0)
+        scale = 2.0 / (self.gamma + 1)
+        neg_keys = sorted(self.negative, reverse=True)
+        pos_keys = sorted(self.positive)
+        values = ([-scale * self.gamma ** k for k in neg_keys]
+                  + ([0.0] if self.zero_count else [])
+                  + [scale * self.gamma ** k for k in pos_keys])
+        counts = ([self.negative[k] for k in neg_keys]
+                  + ([self.zero_count] if self.zero_count else [])
+                  + [self.positive[k] for k in pos_keys])
+        return np.asarray(values), np.cumsum(counts, dtype=np.float64) / self.count
+    
+    def cdf(self, x) -> np.ndarray:
+        """Доля наблюдений <= x (векторно)"""
+        values, cum = self.cdf_points()
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        if values.size == 0:
+            return np.zeros_like(x)
+        idx = np.searchsorted(values, x, side='right')
+        return np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0.0)
+    
+    def quantile(self, q) -> np.ndarray:
+        """Квантили q (векторно)"""
+        values, cum = self.cdf_points()
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if values.size == 0:
+            return np.full_like(q, np.nan)
+        idx = np.minimum(np.searchsorted(cum, q, side='left'), len(values) - 1)
+        return values[idx]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_bins': self.max_bins,
+            'positive': {str(k): v for k, v in self.positive.items()},
+            'negative': {str(k): v for k, v in self.negative.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuantileSketch':
+        sketch = cls(data.get('relative_accuracy', 0.01), data.get('max_bins', 2048))
+        sketch.positive = {int(k): int(v) for k, v in (data.get('positive') or {}).items()}
+        sketch.negative = {int(k): int(v) for k, v in (data.get('negative') or {}).items()}
+        sketch.zero_count = int(data.get('zero_count', 0))
+        sketch.count = int(data.get('count', 0))
+        return sketch
+
+
+def sketch_ks_2samp(reference: QuantileSketch, current: QuantileSketch,
+                    max_effective_samples: Optional[int] = None) -> Tuple[float, float]:
+    """
+    Приближённый двухвыборочный KS тест по скетчам (O(число корзин))
+    
+    Args:
+        max_effective_samples: Ограничение размера выборок для p-value — на сотнях
+            тысяч свечей любое малое отличие было бы «значимым»
+    
+    Returns:
+        statistic: KS статистика
+        p_value: асимптотическое p-value
+    """
+    ref_values, _ = reference.cdf_points()
+    cur_values, _ = current.cdf_points()
+    if ref_values.size == 0 or cur_values.size == 0:
+        return 0.0, 1.0
+    points = np.union1d(ref_values, cur_values)
+    statistic = float(np.max(np.abs(reference.cdf(points) - current.cdf(points))))
+    
+    n1, n2 = reference.count, current.count
+    if max_effective_samples:
+        n1, n2 = min(n1, max_effective_samples), min(n2, max_effective_samples)
+    en = math.sqrt(n1 * n2 / float(n1 + n2))
+    if SCIPY_AVAILABLE:
+        p_value = float(stats.kstwobign.sf((en + 0.12 + 0.11 / en) * statistic))
+    else:
+        p_value = 2 * math.exp(-2 * en * en * statistic ** 2)
+    return statistic, min(max(p_value, 0.0), 1.0)
+
+
+def sketch_psi(reference: QuantileSketch, current: QuantileSketch, n_bins: int = 10) -> float:
+    """Population Stability Index по квантильным корзинам reference"""
+    if reference.count == 0 or current.count == 0:
+        return 0.0
+    edges = np.unique(reference.quantile(np.arange(1, n_bins) / n_bins))
+    ref_frac = np.diff(np.concatenate(([0.0], reference.cdf(edges), [1.0])))
+    cur_frac = np.diff(np.concatenate(([0.0], current.cdf(edges), [1.0])))
+    ref_frac = np.clip(ref_frac, 1e-4, None)
+    cur_frac = np.clip(cur_frac, 1e-4, None)
+    return float(np.sum((cur_frac - ref_frac) * np.log(cur_frac / ref_frac)))
+
+
+# Признаки свечей для потокового мониторинга — относительные, чтобы монеты с разной ценой были сравнимы
+CANDLE_DRIFT_FEATURES = ('return_pct', 'range_pct', 'body_pct', 'volume_change')
+
+
+def candle_drift_features(candles: List[Dict]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Признаки закрытых свечей (последняя, возможно незакрытая, свеча не используется)
+    
+    Returns:
+        (время свечей в мс, {признак: массив}) — для свечей со второй по предпоследнюю
+    """
+    if not candles or len(candles) < 3:
+        return np.empty(0), {}
+    matrix = np.array(
+        [[float(c.get(f, 0) or 0) for f in ('time', 'open', 'high', 'low', 'close', 'volume')] for c in candles],
+        dtype=np.float64,
+    )
+    matrix = matrix[np.argsort(matrix[:, 0], kind='stable')][:-1]
+    times, opens, highs, lows, closes, volumes = matrix.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        features = {
+            'return_pct': (closes[1:] / closes[:-1] - 1.0) * 100.0,
+            'range_pct': (highs[1:] - lows[1:]) / opens[1:] * 100.0,
+            'body_pct': (closes[1:] - opens[1:]) / opens[1:] * 100.0,
+            'volume_change': np.log1p(np.maximum(volumes[1:], 0)) - np.log1p(np.maximum(volumes[:-1], 0)),
+        }
+    return times[1:], features
+
+
+def liquidity_groups(candles_by_symbol: Dict[str, List[Dict]], n_groups: int = 3) -> Dict[str, str]:
+    """
+    Группы символов по ликвидности: медианный оборот свечи (close × volume),
+    символы упорядочены по убыванию и делятся на n_groups равных частей (LIQ_1 — самые ликвидные).
+    """
+    turnover = {}
+    for symbol, candles in (candles_by_symbol or {}).items():
+        values = [float(c.get('close', 0) or 0) * float(c.get('volume', 0) or 0) for c in candles or ()]
+        if values:
+            turnover[symbol] = float(np.median(values))
+    ranked = sorted(turnover, key=lambda s: (-turnover[s], s))
+    n_groups = max(1, int(n_groups))
+    return {symbol: f"LIQ_{rank * n_groups // len(ranked) + 1}" for rank, symbol in enumerate(ranked)}
+
+
+def save_symbol_groups(path: str, groups: Dict[str, str]) -> bool:
+    """Сохраняет соответствие символ → группа (читают процессы, где группы не вычисляются)"""
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(groups, f)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить группы символов: {e}")
+        return False
+
+
+def load_symbol_groups(path: str) -> Dict[str, str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            groups = json.load(f)
+        return groups if isinstance(groups, dict) else {}
+    except Exception:
+        return {}
+
+
+class StreamingDriftMonitor:
+    """
+    Потоковый монитор дрифта на квантильных скетчах
+    
+    Для каждой группы символов и признака хранятся скетчи по временным корзинам
+    (по умолчанию сутки). Текущее распределение — объединение последних
+    window_buckets корзин, reference — снимок, сделанный set_reference() (после
+    переобучения). Свечи добавляются инкрементально по водяному знаку символа,
+    состояние сохраняется в JSON между перезапусками.
+    """
+    
+    ALL_GROUP = 'ALL'
+    STATE_VERSION = 1
+    
+    def __init__(
+        self,
+        state_path: Optional[str] = None,
+        bucket_sec: int = 86400,
+        window_buckets: int = 7,
+        max_buckets: int = 60,
+        threshold: float = 0.05,
+        min_samples: int = 100,
+        max_effective_samples: int = 2000,
+        relative_accuracy: float = 0.01
+    ):
+        """
+        Args:
+            state_path: JSON-файл состояния (None — без сохранения)
+            bucket_sec: Размер временной корзины скетчей
+            window_buckets: Сколько последних корзин составляют текущее окно
+            max_buckets: Сколько корзин хранить (старые удаляются)
+            threshold: Порог p-value для определения дрифта
+            min_samples: Минимум наблюдений в окне и reference для теста
+            max_effective_samples: Ограничение размера выборок для p-value
+            relative_accuracy: Относительная точность скетчей
+        """
+        self.state_path = state_path
+        self.bucket_ms = int(bucket_sec) * 1000
+        self.window_buckets = window_buckets
+        self.max_buckets = max_buckets
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.max_effective_samples = max_effective_samples
+        self.relative_accuracy = relative_accuracy
+        
+        self._lock = threading.RLock()
+        # {group: {bucket_id: {feature: QuantileSketch}}}
+        self._buckets: Dict[str, Dict[int, Dict[str, QuantileSketch]]] = {}
+        # {group: {feature: QuantileSketch}}
+        self._reference: Dict[str, Dict[str, QuantileSketch]] = {}
+        # {symbol: время последней учтённой свечи}
+        self._watermarks: Dict[str, int] = {}
+        
+        if state_path:
+            self.load()
+    
+    def observe(self, group: str, features: Dict[str, np.ndarray], times_ms: np.ndarray) -> int:
+        """
+        Добавляет наблюдения признаков (с временем в мс) в группу и в общую группу ALL
+        
+        Returns:
+            Количество добавленных наблюдений
+        """
+        times_ms = np.asarray(times_ms, dtype=np.float64)
+        if times_ms.size == 0 or not features:
+            return 0
+        bucket_ids = (times_ms // self.bucket_ms).astype(np.int64)
+        groups = {self.ALL_GROUP, group or self.ALL_GROUP}
+        with self._lock:
+            for bucket_id in np.unique(bucket_ids).tolist():
+                mask = bucket_ids == bucket_id
+                for grp in groups:
+                    bucket = self._buckets.setdefault(grp, {}).setdefault(bucket_id, {})
+                    for name, values in features.items():
+                        sketch = bucket.get(name)
+                        if sketch is None:
+                            sketch = bucket[name] = QuantileSketch(self.relative_accuracy)
+                        sketch.update(np.asarray(values)[mask])
+            for grp in groups:
+                buckets = self._buckets[grp]
+                for bucket_id in sorted(buckets)[:-self.max_buckets]:
+                    del buckets[bucket_id]
+        return int(times_ms.size)
+    
+    def observe_candles(self, symbol: str, candles: List[Dict], group: Optional[str] = None) -> int:
+        """Добавляет закрытые свечи символа, которые новее его водяного знака"""
+        times, features = candle_drift_features(candles)
+        if times.size == 0:
+            return 0
+        with self._lock:
+            watermark = self._watermarks.get(symbol)
+            if watermark is not None:
+                mask = times > watermark
+                if not mask.any():
+                    return 0
+                times = times[mask]
+                features = {name: values[mask] for name, values in features.items()}
+            self._watermarks[symbol] = int(times[-1])
+            return self.observe(group or self.ALL_GROUP, features, times)
+    
+    def observe_candles_batch(self, candles_by_symbol: Dict[str, List[Dict]],
+                              group_of: Optional[Any] = None) -> int:
+        """Добавляет свечи всех символов; group_of(symbol) -> имя группы (опционально)"""
+        added = 0
+        for symbol, candles in (candles_by_symbol or {}).items():
+            group = group_of(symbol) if group_of else None
+            added += self.observe_candles(symbol, candles, group)
+        return added
+    
+    def has_watermarks(self) -> bool:
+        return bool(self._watermarks)
+    
+    def groups(self) -> List[str]:
+        with self._lock:
+            return list(self._buckets)
+    
+    def adopt_buckets(self, other: 'StreamingDriftMonitor') -> None:
+        """Заменяет корзины копией корзин другого монитора (reference остаётся своим)"""
+        with other._lock:
+            buckets = {
+                grp: {bid: {name: s.copy() for name, s in sketches.items()} for bid, sketches in grp_buckets.items()}
+                for grp, grp_buckets in other._buckets.items()
+            }
+        with self._lock:
+            self._buckets = buckets
+    
+    def _merge_buckets(self, group: str, last_n: Optional[int] = None) -> Dict[str, QuantileSketch]:
+        buckets = self._buckets.get(group) or {}
+        bucket_ids = sorted(buckets)
+        if last_n:
+            bucket_ids = bucket_ids[-last_n:]
+        merged: Dict[str, QuantileSketch] = {}
+        for bucket_id in bucket_ids:
+            for name, sketch in buckets[bucket_id].items():
+                if name in merged:
+                    merged[name].merge(sketch)
+                else:
+                    merged[name] = sketch.copy()
+        return merged
+    
+    def current_sketches(self, group: str = ALL_GROUP) -> Dict[str, QuantileSketch]:
+        """Скетчи текущего окна (последние window_buckets корзин)"""
+        with self._lock:
+            return self._merge_buckets(group, self.window_buckets)
+    
+    def has_reference(self, group: str = ALL_GROUP) -> bool:
+        return bool(self._reference.get(group))
+    
+    def set_reference(self, group: Optional[str] = None) -> None:
+        """Делает reference из всех хранимых корзин (для группы или для всех групп)"""
+        with self._lock:
+            groups = [group] if group else list(self._buckets)
+            for grp in groups:
+                self._reference[grp] = self._merge_buckets(grp)
+        logger.info(f"Reference скетчи установлены для групп: {', '.join(groups) or '-'}")
+    
+    def detect_drift(self, group: str = ALL_GROUP) -> DriftResult:
+        """Приближённый KS тест (и PSI) текущего окна против reference по каждому признаку"""
+        with self._lock:
+            reference = {name: sketch.copy() for name, sketch in (self._reference.get(group) or {}).items()}
+            current = self._merge_buckets(group, self.window_buckets)
+        
+        if not reference:
+            return DriftResult(
+                drift_detected=False,
+                drifted_features=[],
+                drift_scores={},
+                p_values={},
+                recommendation="Установите reference данные"
+            )
+        n_current = max((s.count for s in current.values()), default=0)
+        if n_current < self.min_samples:
+            return DriftResult(
+                drift_detected=False,
+                drifted_features=[],
+                drift_scores={},
+                p_values={},
+                recommendation=f"Недостаточно данных ({n_current} < {self.min_samples})"
+            )
+        
+        drifted_features = []
+        drift_scores = {}
+        p_values = {}
+        psi = {}
+        n_features = 0
+        for name, ref_sketch in reference.items():
+            cur_sketch = current.get(name)
+            if cur_sketch is None or ref_sketch.count < self.min_samples:
+                continue
+            n_features += 1
+            statistic, p_value = sketch_ks_2samp(ref_sketch, cur_sketch, self.max_effective_samples)
+            drift_scores[name] = statistic
+            p_values[name] = p_value
+            psi[name] = sketch_psi(ref_sketch, cur_sketch)
+            if p_value < self.threshold:
+                drifted_features.append(name)
+        
+        drift_detected = len(drifted_features) > 0
+        if drift_detected:
+            drift_pct = len(drifted_features) / n_features * 100
+            recommendation = f"ДРИФТ: {drift_pct:.0f}% признаков ({', '.join(drifted_features)})"
+        else:
+            recommendation = "Дрифт не обнаружен. Данные стабильны."
+        
+        return DriftResult(
+            drift_detected=drift_detected,
+            drifted_features=drifted_features,
+            drift_scores=drift_scores,
+            p_values=p_values,
+            recommendation=recommendation,
+            psi=psi
+        )
+    
+    def save(self) -> bool:
+        """Сохраняет скетчи, reference и водяные знаки в state_path (атомарно)"""
+        if not self.state_path:
+            return False
+        with self._lock:
+            state = {
+                'version': self.STATE_VERSION,
+                'bucket_ms': self.bucket_ms,
+                'relative_accuracy': self.relative_accuracy,
+                'watermarks': dict(self._watermarks),
+                'buckets': {
+                    grp: {str(bid): {name: s.to_dict() for name, s in sketches.items()}
+                          for bid, sketches in buckets.items()}
+                    for grp, buckets in self._buckets.items()
+                },
+                'reference': {
+                    grp: {name: s.to_dict() for name, s in sketches.items()}
+                    for grp, sketches in self._reference.items()
+                },
+            }
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+            return True
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить состояние дрифта: {e}")
+            return False
+    
+    def load(self) -> bool:
+        """Загружает состояние; несовместимое (другая точность/корзины) игнорируется"""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return False
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if (state.get('version') != self.STATE_VERSION or state.get('bucket_ms') != self.bucket_ms
+                    or state.get('relative_accuracy') != self.relative_accuracy):
+                logger.info("Состояние дрифта несовместимо с настройками — начинаем заново")
+                return False
+            with self._lock:
+                self._watermarks = {k: int(v) for k, v in (state.get('watermarks') or {}).items()}
+                self._buckets = {
+                    grp: {int(bid): {name: QuantileSketch.from_dict(d) for name, d in sketches.items()}
+                          for bid, sketches in buckets.items()}
+                    for grp, buckets in (state.get('buckets') or {}).items()
+                }
+                self._reference = {
+                    grp: {name: QuantileSketch.from_dict(d) for name, d in sketches.items()}
+                    for grp, sketches in (state.get('reference') or {}).items()
+                }
+            return True
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить состояние дрифта: {e}")
+            return False
+
+
+# Признаки инференса ai_inference (порядок build_features)
+LIVE_INPUT_FEATURES = ('rsi', 'volatility', 'volume_ratio', 'trend_up', 'trend_down', 'direction_long', 'price_k')
+
+
+class LiveInputDriftRecorder:
+    """
+    Копит входы инференса (процесс bots.py) в скетчи StreamingDriftMonitor и
+    периодически сохраняет их в свой файл. AutoTrainer (процесс ai.py) читает
+    корзины из этого файла и сравнивает со своим reference (adopt_buckets).
+    Группа символа берётся из файла групп, который пишет AutoTrainer.
+    """
+    
+    def __init__(self, state_path: str, groups_path: str, save_interval_sec: float = 60.0):
+        self.monitor = StreamingDriftMonitor(state_path=state_path)
+        self.groups_path = groups_path
+        self.save_interval_sec = save_interval_sec
+        self._groups: Dict[str, str] = load_symbol_groups(groups_path)
+        self._saved_at = time.monotonic()
+        self._flush_lock = threading.Lock()
+    
+    def record(self, symbols: List[str], features: np.ndarray, time_ms: Optional[float] = None) -> int:
+        """Добавляет строки признаков (по строке на символ); возвращает число добавленных"""
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim != 2 or not len(symbols) or features.shape[0] != len(symbols):
+            return 0
+        names = LIVE_INPUT_FEATURES[:features.shape[1]]
+        now_ms = float(time_ms if time_ms is not None else time.time() * 1000)
+        rows_by_group: Dict[str, List[int]] = {}
+        for row, symbol in enumerate(symbols):
+            rows_by_group.setdefault(self._groups.get(symbol) or StreamingDriftMonitor.ALL_GROUP, []).append(row)
+        added = 0
+        for group, rows in rows_by_group.items():
+            added += self.monitor.observe(
+                group,
+                {name: features[rows, col] for col, name in enumerate(names)},
+                np.full(len(rows), now_ms),
+            )
+        if time.monotonic() - self._saved_at >= self.save_interval_sec:
+            self.flush()
+        return added
+    
+    def flush(self) -> None:
+        if not self._flush_lock.acquire(blocking=False):
+            return  # сохраняет другой поток
+        try:
+            self._saved_at = time.monotonic()
+            self.monitor.save()
+            self._groups = load_symbol_groups(self.groups_path) or self._groups
+        finally:
+            self._flush_lock.release()
+
+
+DRIFT_GROUPS_PATH = os.path.join('data', 'ai', 'drift_groups.json')
+LIVE_INPUTS_STATE_PATH = os.path.join('data', 'ai', 'drift_live_inputs.json')
+
+_live_recorder: Optional[LiveInputDriftRecorder] = None
+_live_recorder_lock = threading.Lock()
+
+
+def get_live_input_recorder() -> Optional[LiveInputDriftRecorder]:
+    """Общий для процесса регистратор входов инференса (None — мониторинг дрифта выключен)"""
+    global _live_recorder
+    if _live_recorder is None:
+        with _live_recorder_lock:
+            if _live_recorder is None:
+                try:
+                    from bot_engine.config_loader import AIConfig
+                    if not getattr(AIConfig, 'AI_DRIFT_DETECTION_ENABLED', True):
+                        return None
+                except Exception:
+                    pass
+                _live_recorder = LiveInputDriftRecorder(LIVE_INPUTS_STATE_PATH, DRIFT_GROUPS_PATH)
+    return _live_recorder
+
+
 class ModelPerformanceMonitor:
     """
     Монитор производительности модели
@@ -283,16 +866,38 @@ class ModelPerformanceMonitor:
         self.accuracy_threshold = accuracy_threshold
         self.degradation_threshold = degradation_threshold
         
-        # Хранение предсказаний и результатов
-        self.predictions = deque(maxlen=window_size)
-        self.actuals = deque(maxlen=window_size)
+        # Кольцевые колонки предсказаний и результатов (без dict на каждую запись):
+        # предсказания — direction, change_percent, confidence; результаты — direction, change_percent
+        self._pred = np.zeros((window_size, 3), dtype=np.float64)
+        self._actual = np.zeros((window_size, 2), dtype=np.float64)
+        self._pred_count = 0
+        self._actual_count = 0
         self.timestamps = deque(maxlen=window_size)
         
         # Baseline метрики (устанавливаются после первого периода)
         self.baseline_metrics: Optional[PerformanceMetrics] = None
         
-        # История метрик
-        self.metrics_history: List[PerformanceMetrics] = []
+        # История метрик (ограничена, get_performance_trend нужны только последние периоды)
+        self.metrics_history: deque = deque(maxlen=1000)
+    
+    @staticmethod
+    def _last_rows(ring: np.ndarray, count: int, n: int) -> np.ndarray:
+        """Последние n строк кольцевого буфера в порядке добавления"""
+        size = ring.shape[0]
+        idx = (count - n + np.arange(n)) % size
+        return ring[idx]
+    
+    @property
+    def predictions(self) -> List[Dict]:
+        n = min(self._pred_count, self.window_size)
+        rows = self._last_rows(self._pred, self._pred_count, n)
+        return [{'direction': r[0], 'change_percent': r[1], 'confidence': r[2]} for r in rows]
+    
+    @property
+    def actuals(self) -> List[Dict]:
+        n = min(self._actual_count, self.window_size)
+        rows = self._last_rows(self._actual, self._actual_count, n)
+        return [{'direction': r[0], 'change_percent': r[1]} for r in rows]
     
     def log_prediction(
         self,
@@ -306,11 +911,12 @@ class ModelPerformanceMonitor:
             prediction: Dict с 'direction', 'change_percent', 'confidence'
             timestamp: Время предсказания
         """
-        self.predictions.append({
-            'direction': prediction.get('direction', 0),
-            'change_percent': prediction.get('change_percent', 0),
-            'confidence': prediction.get('confidence', 0.5)
-        })
+        self._pred[self._pred_count % self.window_size] = (
+            prediction.get('direction', 0),
+            prediction.get('change_percent', 0),
+            prediction.get('confidence', 0.5),
+        )
+        self._pred_count += 1
         self.timestamps.append(timestamp or datetime.now())
     
     def log_actual_result(
@@ -323,10 +929,11 @@ class ModelPerformanceMonitor:
         Args:
             actual: Dict с 'direction', 'change_percent'
         """
-        self.actuals.append({
-            'direction': actual.get('direction', 0),
-            'change_percent': actual.get('change_percent', 0)
-        })
+        self._actual[self._actual_count % self.window_size] = (
+            actual.get('direction', 0),
+            actual.get('change_percent', 0),
+        )
+        self._actual_count += 1
     
     def get_metrics(self) -> PerformanceMetrics:
         """
@@ -335,43 +942,31 @@ class ModelPerformanceMonitor:
         Returns:
             PerformanceMetrics
         """
-        if len(self.predictions) < 10 or len(self.actuals) < 10:
+        pred_size = min(self._pred_count, self.window_size)
+        actual_size = min(self._actual_count, self.window_size)
+        if pred_size < 10 or actual_size < 10:
             return PerformanceMetrics(
                 direction_accuracy=0.5,
                 mae=0,
                 calibration_error=0,
-                total_predictions=len(self.predictions)
+                total_predictions=pred_size
             )
         
         # Берем последние N пар (предсказание, результат)
-        n = min(len(self.predictions), len(self.actuals))
+        n = min(pred_size, actual_size)
         
-        predictions = list(self.predictions)[-n:]
-        actuals = list(self.actuals)[-n:]
+        predictions = self._last_rows(self._pred, self._pred_count, n)
+        actuals = self._last_rows(self._actual, self._actual_count, n)
         
         # Точность направления
-        correct_direction = sum(
-            1 for p, a in zip(predictions, actuals)
-            if (p['direction'] > 0 and a['direction'] > 0) or
-               (p['direction'] < 0 and a['direction'] < 0)
-        )
-        direction_accuracy = correct_direction / n
+        is_correct = ((predictions[:, 0] > 0) & (actuals[:, 0] > 0)) | ((predictions[:, 0] < 0) & (actuals[:, 0] < 0))
+        direction_accuracy = is_correct.mean()
         
         # MAE для % изменения
-        mae = np.mean([
-            abs(p['change_percent'] - a['change_percent'])
-            for p, a in zip(predictions, actuals)
-        ])
+        mae = np.abs(predictions[:, 1] - actuals[:, 1]).mean()
         
         # Calibration error (средняя разница между confidence и реальной точностью)
-        # Группируем по уровням confidence
-        calibration_errors = []
-        for p, a in zip(predictions, actuals):
-            is_correct = (p['direction'] > 0 and a['direction'] > 0) or \
-                        (p['direction'] < 0 and a['direction'] < 0)
-            calibration_errors.append(abs(p['confidence'] - (1.0 if is_correct else 0.0)))
-        
-        calibration_error = np.mean(calibration_errors)
+        calibration_error = np.abs(predictions[:, 2] - is_correct).mean()
         
         metrics = PerformanceMetrics(
             direction_accuracy=float(direction_accuracy),
@@ -401,7 +996,7 @@ class ModelPerformanceMonitor:
                 'change_pct': 0
             }
         
-        recent = self.metrics_history[-periods:]
+        recent = list(self.metrics_history)[-periods:]
         
         # Анализируем тренд точности
         accuracies = [m.direction_accuracy for m in recent]
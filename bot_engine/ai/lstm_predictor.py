@@ -15,6 +15,7 @@ import os
 import json
 import pickle
 import logging
+import threading
 import warnings
 import time
 from datetime import datetime, timedelta
@@ -22,6 +23,8 @@ from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 
+from bot_engine.ai.training_worker import guarded_by_model_lock
+
 try:
     from sklearn.exceptions import NotFittedError
 except ImportError:  # pragma: no cover - fallback если scikit-learn не установлен
@@ -390,6 +393,8 @@ class LSTMPredictor:
         
         self.model = None
         self.scaler = None
+        self.model_loaded = False  # True — модель и scaler загружены из файлов (load_model)
+        self._model_lock = threading.RLock()  # держат predict и hot_swap_model
         self.config = {
             'sequence_length': 60,  # 60 свечей для предсказания
             'features': ['close', 'volume', 'high', 'low', 'rsi', 'ema_fast', 'ema_slow'],
@@ -492,6 +497,7 @@ class LSTMPredictor:
         
         return features.astype(np.float32)
     
+    @guarded_by_model_lock
     def predict(
         self,
         candles: List[Dict],
@@ -798,10 +804,11 @@ class LSTMPredictor:
         except Exception as e:
             logger.error(f"❌ Ошибка сохранения модели: {e}")
     
-    def load_model(self):
-        """Загружает модель, scaler и конфигурацию"""
+    def load_model(self) -> bool:
+        """Загружает модель, scaler и конфигурацию (False — не загружена, создана новая модель)"""
+        self.model_loaded = False
         if not PYTORCH_AVAILABLE:
-            return
+            return False
         
         try:
             # Загружаем конфигурацию
@@ -843,6 +850,7 @@ class LSTMPredictor:
             logger.info(f"Архитектура: {arch_name}")
             logger.info(f"Обучена: {self.config.get('trained_at', 'неизвестно')}")
             logger.info(f"Образцов: {self.config.get('training_samples', 0)}")
+            self.model_loaded = True
             
         except NameError as e:
             logger.error(f"Ошибка загрузки модели: {e}. PyTorch недоступен.")
@@ -851,6 +859,7 @@ class LSTMPredictor:
         except Exception as e:
             logger.warning(f"Ошибка загрузки модели: {e}. Создаем новую.")
             self._create_new_model()
+        return self.model_loaded
     
     def get_status(self) -> Dict:
         """Возвращает статус модели"""
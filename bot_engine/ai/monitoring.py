@@ -8,13 +8,13 @@ AI Performance Monitoring - мониторинг производительно
 - Генерации отчетов
 """
 
+import atexit
 import logging
 import os
 import json
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
-from collections import deque
-from dataclasses import dataclass, asdict
 import numpy as np
 
 logger = logging.getLogger('AI.Monitoring')
@@ -26,18 +26,151 @@ def _project_root() -> str:
 def _default_models_path() -> str:
     return os.path.join(_project_root(), 'data', 'ai', 'models')
 
-@dataclass
 class PredictionRecord:
-    """Запись предсказания"""
-    symbol: str
-    direction: int  # 1 или -1
-    change_percent: float
-    confidence: float
-    timestamp: str
-    model: str = 'unknown'
-    actual_direction: Optional[int] = None
-    actual_change: Optional[float] = None
-    is_correct: Optional[bool] = None
+    """Запись предсказания (копия строки колоночного хранилища)"""
+
+    __slots__ = ('symbol', 'direction', 'change_percent', 'confidence', 'timestamp', 'model',
+                 'actual_direction', 'actual_change', 'is_correct')
+
+    def __init__(self, symbol: str, direction: int, change_percent: float, confidence: float,
+                 timestamp: str, model: str = 'unknown', actual_direction: Optional[int] = None,
+                 actual_change: Optional[float] = None, is_correct: Optional[bool] = None):
+        self.symbol = symbol
+        self.direction = direction  # 1 или -1
+        self.change_percent = change_percent
+        self.confidence = confidence
+        self.timestamp = timestamp
+        self.model = model
+        self.actual_direction = actual_direction
+        self.actual_change = actual_change
+        self.is_correct = is_correct
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"PredictionRecord({self.symbol}, {self.model}, dir={self.direction}, correct={self.is_correct})"
+
+
+# Колонки кольцевого буфера предсказаний (is_correct: -1 — результат ещё неизвестен)
+_PREDICTION_DTYPE = np.dtype([
+    ('ts', 'f8'),
+    ('symbol', 'i4'),
+    ('model', 'i2'),
+    ('direction', 'i1'),
+    ('is_correct', 'i1'),
+    ('actual_direction', 'i1'),
+    ('change_percent', 'f4'),
+    ('confidence', 'f4'),
+    ('actual_change', 'f4'),
+])
+
+
+class PredictionStore:
+    """
+    Кольцевой буфер предсказаний фиксированной ёмкости в структурированном массиве NumPy
+
+    Символы и модели хранятся как номера (интернирование строк), поэтому запись
+    занимает ~30 байт и память не растёт при долгой работе.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self.data = np.zeros(self.capacity, dtype=_PREDICTION_DTYPE)
+        self.size = 0
+        self._next = 0
+        self._symbols: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self._models: List[str] = []
+        self._model_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    @staticmethod
+    def _intern(value: str, values: List[str], ids: Dict[str, int]) -> int:
+        idx = ids.get(value)
+        if idx is None:
+            idx = ids[value] = len(values)
+            values.append(value)
+        return idx
+
+    def symbol_id(self, symbol: str) -> Optional[int]:
+        return self._symbol_ids.get(symbol)
+
+    def model_name(self, model_id: int) -> str:
+        return self._models[model_id]
+
+    def append(self, ts: float, symbol: str, model: str, direction: int,
+               change_percent: float, confidence: float) -> int:
+        """Добавляет предсказание (самое старое вытесняется) и возвращает позицию в буфере"""
+        pos = self._next
+        self.data[pos] = (
+            ts,
+            self._intern(symbol, self._symbols, self._symbol_ids),
+            self._intern(model, self._models, self._model_ids),
+            direction, -1, 0, change_percent, confidence, 0.0,
+        )
+        self._next = (pos + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return pos
+
+    def ordered_positions(self) -> np.ndarray:
+        """Позиции записей от старых к новым"""
+        start = (self._next - self.size) % self.capacity
+        return (start + np.arange(self.size)) % self.capacity
+
+    def record(self, pos: int) -> PredictionRecord:
+        row = self.data[pos]
+        resolved = int(row['is_correct']) >= 0
+        return PredictionRecord(
+            symbol=self._symbols[int(row['symbol'])],
+            direction=int(row['direction']),
+            change_percent=float(row['change_percent']),
+            confidence=float(row['confidence']),
+            timestamp=datetime.fromtimestamp(float(row['ts'])).isoformat(),
+            model=self._models[int(row['model'])],
+            actual_direction=int(row['actual_direction']) if resolved else None,
+            actual_change=float(row['actual_change']) if resolved else None,
+            is_correct=bool(row['is_correct']) if resolved else None,
+        )
+
+
+class _DayRollup:
+    """Агрегаты разрешённых предсказаний за день"""
+
+    __slots__ = ('total', 'correct', 'sum_confidence', 'sum_abs_error', 'by_model')
+
+    def __init__(self):
+        self.total = 0
+        self.correct = 0
+        self.sum_confidence = 0.0
+        self.sum_abs_error = 0.0
+        self.by_model: Dict[str, List[int]] = {}  # model -> [total, correct]
+
+    def add(self, model: str, correct: bool, confidence: float, abs_error: float) -> None:
+        self.total += 1
+        self.correct += int(correct)
+        self.sum_confidence += confidence
+        self.sum_abs_error += abs_error
+        counts = self.by_model.setdefault(model, [0, 0])
+        counts[0] += 1
+        counts[1] += int(correct)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'total': self.total, 'correct': self.correct, 'sum_confidence': self.sum_confidence,
+                'sum_abs_error': self.sum_abs_error, 'by_model': self.by_model}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> '_DayRollup':
+        rollup = cls()
+        rollup.total = int(data.get('total', 0))
+        rollup.correct = int(data.get('correct', 0))
+        rollup.sum_confidence = float(data.get('sum_confidence', 0.0))
+        rollup.sum_abs_error = float(data.get('sum_abs_error', 0.0))
+        rollup.by_model = {m: [int(c[0]), int(c[1])] for m, c in (data.get('by_model') or {}).items()}
+        return rollup
+
 
 class AIPerformanceMonitor:
     """
@@ -48,8 +181,18 @@ class AIPerformanceMonitor:
     - Калибровку уверенности
     - MAE предсказаний
     - Тренды производительности
+
+    Предсказания хранятся в кольцевом буфере (PredictionStore, max_records записей).
+    Разрешённые предсказания сразу сворачиваются в дневные агрегаты, поэтому
+    get_daily_metrics/get_weekly_report не сканируют историю. Агрегаты пишутся
+    на диск только дописыванием строк (outcomes.jsonl) и переживают перезапуск.
     """
 
+    OUTCOMES_FILE = "outcomes.jsonl"
+    FLUSH_EVERY = 100
+    MAX_ROLLUP_DAYS = 90
+    COMPACT_AFTER_LINES = 50000
+
     def __init__(
         self,
         max_records: int = 10000,
@@ -58,14 +201,24 @@ class AIPerformanceMonitor:
         self.max_records = max_records
         self.save_path = save_path
 
-        self.predictions: deque = deque(maxlen=max_records)
+        self.store = PredictionStore(max_records)
         self.daily_metrics: Dict[str, Dict] = {}  # date -> metrics
+        self._rollups: Dict[str, _DayRollup] = {}
+        self._pending_lines: List[str] = []
+        self._lock = threading.RLock()
 
         os.makedirs(save_path, exist_ok=True)
         self._load_history()
+        atexit.register(self._flush_outcomes)
+
+    @property
+    def predictions(self) -> List[PredictionRecord]:
+        """Предсказания из буфера от старых к новым (копии записей)"""
+        with self._lock:
+            return [self.store.record(int(pos)) for pos in self.store.ordered_positions()]
 
     def _load_history(self):
-        """Загружает историю метрик"""
+        """Загружает историю метрик: старый daily_metrics.json и агрегаты из outcomes.jsonl"""
         metrics_file = os.path.join(self.save_path, "daily_metrics.json")
         if os.path.exists(metrics_file):
             try:
@@ -74,14 +227,57 @@ class AIPerformanceMonitor:
             except:
                 pass
 
-    def _save_history(self):
-        """Сохраняет историю метрик"""
-        metrics_file = os.path.join(self.save_path, "daily_metrics.json")
+        outcomes_file = os.path.join(self.save_path, self.OUTCOMES_FILE)
+        if not os.path.exists(outcomes_file):
+            return
+        lines = 0
+        try:
+            with open(outcomes_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        item = json.loads(line)
+                    except ValueError:
+                        continue
+                    if 'snapshot' in item:
+                        self._rollups[item['d']] = _DayRollup.from_dict(item['snapshot'])
+                    else:
+                        self._rollups.setdefault(item['d'], _DayRollup()).add(
+                            item['m'], bool(item['c']), float(item['conf']), float(item['err'])
+                        )
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить агрегаты предсказаний: {e}")
+        self._trim_rollups()
+        if lines > self.COMPACT_AFTER_LINES:
+            self._compact_outcomes()
+
+    def _trim_rollups(self):
+        for day in sorted(self._rollups)[:-self.MAX_ROLLUP_DAYS]:
+            del self._rollups[day]
+
+    def _compact_outcomes(self):
+        """Переписывает outcomes.jsonl одним снимком агрегатов на день"""
+        outcomes_file = os.path.join(self.save_path, self.OUTCOMES_FILE)
+        tmp_file = outcomes_file + '.tmp'
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                for day in sorted(self._rollups):
+                    f.write(json.dumps({'d': day, 'snapshot': self._rollups[day].to_dict()}) + "\n")
+            os.replace(tmp_file, outcomes_file)
+        except Exception as e:
+            logger.warning(f"Не удалось сжать агрегаты предсказаний: {e}")
+
+    def _flush_outcomes(self):
+        """Дописывает накопленные результаты в outcomes.jsonl"""
+        with self._lock:
+            lines, self._pending_lines = self._pending_lines, []
+        if not lines:
+            return
         try:
-            with open(metrics_file, 'w') as f:
-                json.dump(self.daily_metrics, f, indent=2)
+            with open(os.path.join(self.save_path, self.OUTCOMES_FILE), 'a', encoding='utf-8') as f:
+                f.write("".join(lines))
         except Exception as e:
-                        pass
+            logger.warning(f"Не удалось записать результаты предсказаний: {e}")
 
     def track_prediction(
         self,
@@ -100,18 +296,16 @@ class AIPerformanceMonitor:
         Returns:
             ID записи
         """
-        record = PredictionRecord(
-            symbol=symbol,
-            direction=prediction.get('direction', 0),
-            change_percent=prediction.get('change_percent', 0),
-            confidence=prediction.get('confidence', 50),
-            timestamp=datetime.now().isoformat(),
-            model=model
-        )
-
-        self.predictions.append(record)
+        now = datetime.now()
+        with self._lock:
+            self.store.append(
+                now.timestamp(), symbol, model,
+                int(prediction.get('direction', 0) or 0),
+                float(prediction.get('change_percent', 0) or 0),
+                float(prediction.get('confidence', 50) or 0),
+            )
 
-        return f"{symbol}_{record.timestamp}"
+        return f"{symbol}_{now.isoformat()}"
 
     def track_actual_result(
         self,
@@ -129,28 +323,45 @@ class AIPerformanceMonitor:
             actual_change: Фактическое изменение %
             lookback_minutes: Сколько минут назад искать предсказание
         """
-        cutoff = datetime.now() - timedelta(minutes=lookback_minutes)
-
-        for record in reversed(self.predictions):
-            if record.symbol != symbol:
-                continue
-
-            record_time = datetime.fromisoformat(record.timestamp)
-            if record_time < cutoff:
-                break
-
-            if record.actual_direction is None:
-                record.actual_direction = actual_direction
-                record.actual_change = actual_change
-                record.is_correct = (
-                    (record.direction > 0 and actual_direction > 0) or
-                    (record.direction < 0 and actual_direction < 0)
-                )
-                break
+        cutoff = (datetime.now() - timedelta(minutes=lookback_minutes)).timestamp()
+
+        with self._lock:
+            symbol_id = self.store.symbol_id(symbol)
+            if symbol_id is None or not self.store.size:
+                return
+            positions = self.store.ordered_positions()
+            rows = self.store.data[positions]
+            # Последнее (самое новое) неразрешённое предсказание символа в окне lookback
+            candidates = np.flatnonzero(
+                (rows['symbol'] == symbol_id) & (rows['ts'] >= cutoff) & (rows['is_correct'] < 0)
+            )
+            if candidates.size == 0:
+                return
+            pos = int(positions[candidates[-1]])
+            row = self.store.data[pos]
+            direction = int(row['direction'])
+            is_correct = (direction > 0 and actual_direction > 0) or (direction < 0 and actual_direction < 0)
+            row['actual_direction'] = actual_direction
+            row['actual_change'] = actual_change
+            row['is_correct'] = int(is_correct)
+
+            day = datetime.fromtimestamp(float(row['ts'])).strftime('%Y-%m-%d')
+            model = self.store.model_name(int(row['model']))
+            confidence = float(row['confidence'])
+            abs_error = abs(float(row['change_percent']) - (actual_change or 0))
+            self._rollups.setdefault(day, _DayRollup()).add(model, is_correct, confidence, abs_error)
+            if len(self._rollups) > self.MAX_ROLLUP_DAYS:
+                self._trim_rollups()
+            self._pending_lines.append(json.dumps(
+                {'d': day, 'm': model, 'c': int(is_correct), 'conf': round(confidence, 4), 'err': round(abs_error, 6)}
+            ) + "\n")
+            flush = len(self._pending_lines) >= self.FLUSH_EVERY
+        if flush:
+            self._flush_outcomes()
 
     def get_daily_metrics(self, date: str = None) -> Dict:
         """
-        Получает метрики за день
+        Получает метрики за день (из дневных агрегатов, O(1))
 
         Args:
             date: Дата в формате YYYY-MM-DD (по умолчанию сегодня)
@@ -161,47 +372,32 @@ class AIPerformanceMonitor:
         if date is None:
             date = datetime.now().strftime('%Y-%m-%d')
 
-        # Фильтруем записи за день
-        day_records = [
-            r for r in self.predictions
-            if r.timestamp.startswith(date) and r.is_correct is not None
-        ]
-
-        if not day_records:
-            return {
+        with self._lock:
+            rollup = self._rollups.get(date)
+            if rollup is None or rollup.total == 0:
+                return {
+                    'date': date,
+                    'total_predictions': 0,
+                    'direction_accuracy': 0,
+                    'avg_confidence': 0,
+                    'mae': 0
+                }
+
+            total = rollup.total
+            metrics = {
                 'date': date,
-                'total_predictions': 0,
-                'direction_accuracy': 0,
-                'avg_confidence': 0,
-                'mae': 0
-            }
-
-        correct = sum(1 for r in day_records if r.is_correct)
-        total = len(day_records)
-
-        metrics = {
-            'date': date,
-            'total_predictions': total,
-            'direction_accuracy': correct / total if total > 0 else 0,
-            'avg_confidence': np.mean([r.confidence for r in day_records]),
-            'mae': np.mean([abs(r.change_percent - (r.actual_change or 0)) for r in day_records]),
-            'by_model': {}
-        }
-
-        # Метрики по моделям
-        models = set(r.model for r in day_records)
-        for model in models:
-            model_records = [r for r in day_records if r.model == model]
-            model_correct = sum(1 for r in model_records if r.is_correct)
-            metrics['by_model'][model] = {
-                'total': len(model_records),
-                'accuracy': model_correct / len(model_records) if model_records else 0
+                'total_predictions': total,
+                'direction_accuracy': rollup.correct / total,
+                'avg_confidence': rollup.sum_confidence / total,
+                'mae': rollup.sum_abs_error / total,
+                'by_model': {
+                    model: {'total': counts[0], 'accuracy': counts[1] / counts[0] if counts[0] else 0}
+                    for model, counts in rollup.by_model.items()
+                }
             }
+            self.daily_metrics[date] = metrics
 
-        # Сохраняем
-        self.daily_metrics[date] = metrics
-        self._save_history()
-
+        self._flush_outcomes()
         return metrics
 
     def get_weekly_report(self) -> str:
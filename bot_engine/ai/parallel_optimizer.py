@@ -0,0 +1,275 @@
+"""
+Параллельная оптимизация параметров по монетам.
+
+Оптимизация одной монеты не зависит от других, поэтому монеты раздаются по
+процессам пула (ProcessPoolExecutor):
+- свечи всех монет упаковываются в один float64-массив в shared memory
+  (воркеры получают только имя сегмента и индекс, без пиклинга свечей);
+- каждая монета блокируется через AIDatabase.try_lock_symbol/release_lock,
+  поэтому несколько процессов/ПК не оптимизируют одну монету одновременно;
+- результаты возвращаются по мере готовности и сохраняются пакетами;
+- воркеры стартуют через spawn с этим модулем в роли __main__ (utils.spawn_main):
+  верхний уровень ai.py в них не выполняется повторно.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('AI.ParallelOptimizer')
+
+CANDLE_FIELDS: Tuple[str, ...] = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_LOCK_MINUTES = 120
+
+# Состояние воркера (заполняется в _init_worker, живёт всё время жизни процесса)
+_worker_state: Dict[str, Any] = {}
+
+
+class SharedCandleStore:
+    """
+    Упаковывает свечи всех монет в один сегмент shared memory.
+
+    Layout: матрица (total_candles, len(CANDLE_FIELDS)) float64, строки монеты
+    лежат подряд; index: symbol -> (offset, length).
+    """
+
+    def __init__(self, candles_by_symbol: Dict[str, List[Dict[str, Any]]]):
+        self.index: Dict[str, Tuple[int, int]] = {}
+        total = 0
+        for symbol, candles in candles_by_symbol.items():
+            count = len(candles or [])
+            if count:
+                self.index[symbol] = (total, count)
+                total += count
+
+        self.shape = (max(total, 1), len(CANDLE_FIELDS))
+        nbytes = int(np.prod(self.shape)) * np.dtype(np.float64).itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        matrix = np.ndarray(self.shape, dtype=np.float64, buffer=self._shm.buf)
+
+        for symbol, (offset, count) in self.index.items():
+            candles = sorted(candles_by_symbol[symbol], key=lambda c: c.get('time', 0) or 0)
+            matrix[offset:offset + count] = [
+                [float(c.get(field, 0) or 0) for field in CANDLE_FIELDS]
+                for c in candles
+            ]
+        del matrix
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def close(self) -> None:
+        """Закрывает и удаляет сегмент (вызывать только в процессе-владельце)."""
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def candles_from_matrix(matrix: np.ndarray, offset: int, count: int) -> List[Dict[str, Any]]:
+    """Восстанавливает список свечей-словарей из строк общей матрицы."""
+    rows = matrix[offset:offset + count].tolist()
+    candles = []
+    for row in rows:
+        candle = dict(zip(CANDLE_FIELDS, row))
+        candle['time'] = int(candle['time'])
+        candles.append(candle)
+    return candles
+
+
+def _init_worker(shm_name: str, shape: Tuple[int, int], index: Dict[str, Tuple[int, int]], use_bayesian: bool) -> None:
+    """Инициализация воркера: подключение к shared memory и тяжёлые объекты — один раз на процесс."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_state['shm'] = shm
+    _worker_state['matrix'] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _worker_state['index'] = index
+    _worker_state['use_bayesian'] = use_bayesian
+
+    from bot_engine.ai.ai_strategy_optimizer import AIStrategyOptimizer
+    _worker_state['optimizer'] = AIStrategyOptimizer()
+
+    try:
+        from bot_engine.ai.ai_database import get_ai_database
+        _worker_state['ai_db'] = get_ai_database()
+    except Exception as db_error:
+        logger.warning(f"⚠️ Воркер {os.getpid()}: AIDatabase недоступна, работа без блокировок: {db_error}")
+        _worker_state['ai_db'] = None
+
+
+def _init_pool_worker(*args) -> None:
+    """Инициализатор процесса пула: BLAS/OpenMP в один поток, иначе N процессов × M потоков перегружают CPU."""
+    # numpy (и его BLAS) уже загружен вместе с этим модулем — переменные окружения
+    # на него не влияют, потоки ограничиваются через threadpoolctl
+    try:
+        from threadpoolctl import threadpool_limits
+        _worker_state['thread_limits'] = threadpool_limits(limits=1)
+    except Exception:
+        pass
+    # Для библиотек, которые загрузятся позже
+    for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ.setdefault(var, '1')
+    # ai.py в воркере не выполняется — конфиг joblib → sklearn подключаем сами
+    try:
+        import utils.sklearn_parallel_config  # noqa: F401
+    except Exception:
+        pass
+    _init_worker(*args)
+
+
+def _optimize_symbol_task(symbol: str, current_win_rate: float, process_id: str,
+                          hostname: str, lock_minutes: int) -> Dict[str, Any]:
+    """Оптимизирует одну монету в воркере; возвращает компактный результат для родителя."""
+    started = time.time()
+    ai_db = _worker_state.get('ai_db')
+    worker_process_id = f"{process_id}-w{os.getpid()}"
+
+    if ai_db is not None and not ai_db.try_lock_symbol(symbol, worker_process_id, hostname,
+                                                       lock_duration_minutes=lock_minutes):
+        return {'symbol': symbol, 'status': 'locked', 'params': None, 'elapsed': 0.0}
+
+    try:
+        offset, count = _worker_state['index'][symbol]
+        candles = candles_from_matrix(_worker_state['matrix'], offset, count)
+        params = _worker_state['optimizer'].optimize_coin_parameters_on_candles(
+            symbol=symbol,
+            candles=candles,
+            current_win_rate=current_win_rate,
+            use_bayesian=_worker_state['use_bayesian'],
+            persist=False,
+        )
+        status = 'optimized' if params else 'no_improvement'
+        return {'symbol': symbol, 'status': status, 'params': params, 'elapsed': time.time() - started}
+    except Exception as task_error:
+        return {'symbol': symbol, 'status': 'error', 'params': None,
+                'error': str(task_error), 'elapsed': time.time() - started}
+    finally:
+        if ai_db is not None:
+            ai_db.release_lock(symbol, worker_process_id)
+
+
+class ParallelSymbolOptimizer:
+    """
+    Драйвер параллельной оптимизации параметров по монетам.
+
+    Пример:
+        driver = ParallelSymbolOptimizer(max_workers=16)
+        results = driver.optimize(candles_by_symbol, on_batch=optimizer.persist_optimized_params_batch)
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, use_bayesian: bool = True,
+                 batch_size: int = DEFAULT_BATCH_SIZE, lock_duration_minutes: int = DEFAULT_LOCK_MINUTES):
+        if max_workers is None:
+            try:
+                from bot_engine.config_loader import AIConfig
+                max_workers = int(getattr(AIConfig, 'AI_OPTIMIZER_WORKERS', 0) or 0)
+            except Exception:
+                max_workers = 0
+        if max_workers <= 0:
+            max_workers = max(1, (os.cpu_count() or 2) - 1)
+        self.max_workers = max_workers
+        self.use_bayesian = use_bayesian
+        self.batch_size = max(1, int(batch_size))
+        self.lock_duration_minutes = lock_duration_minutes
+        self.hostname = socket.gethostname()
+        self.process_id = f"{self.hostname}-{os.getpid()}-{int(time.time())}"
+
+    def optimize(
+        self,
+        candles_by_symbol: Dict[str, List[Dict[str, Any]]],
+        current_win_rates: Optional[Dict[str, float]] = None,
+        on_batch: Optional[Callable[[Dict[str, Dict[str, Any]]], Any]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Запускает оптимизацию всех монет.
+
+        Args:
+            candles_by_symbol: {symbol: [candle, ...]}
+            current_win_rates: текущий win rate по монетам (по умолчанию 0)
+            on_batch: вызывается с {symbol: params} каждые batch_size найденных результатов
+
+        Returns:
+            {symbol: params} для монет, где найдены лучшие параметры
+        """
+        current_win_rates = current_win_rates or {}
+        symbols = [s for s, candles in candles_by_symbol.items() if candles and len(candles) >= 100]
+        if not symbols:
+            return {}
+
+        workers = min(self.max_workers, len(symbols))
+        logger.info(f"🚀 Параллельная оптимизация: {len(symbols)} монет, {workers} процессов")
+
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, Dict[str, Any]] = {}
+        stats = {'optimized': 0, 'no_improvement': 0, 'locked': 0, 'error': 0}
+
+        def _flush() -> None:
+            if pending and on_batch is not None:
+                try:
+                    on_batch(dict(pending))
+                except Exception as batch_error:
+                    logger.error(f"❌ Ошибка пакетного сохранения: {batch_error}")
+            pending.clear()
+
+        def _collect(result: Dict[str, Any]) -> None:
+            stats[result['status']] = stats.get(result['status'], 0) + 1
+            if result['status'] == 'error':
+                logger.warning(f"   ⚠️ {result['symbol']}: {result.get('error')}")
+            if result.get('params'):
+                results[result['symbol']] = result['params']
+                pending[result['symbol']] = result['params']
+                if len(pending) >= self.batch_size:
+                    _flush()
+
+        store = SharedCandleStore({s: candles_by_symbol[s] for s in symbols})
+        try:
+            init_args = (store.name, store.shape, store.index, self.use_bayesian)
+            if workers <= 1:
+                _init_worker(*init_args)
+                try:
+                    for symbol in symbols:
+                        _collect(_optimize_symbol_task(symbol, float(current_win_rates.get(symbol, 0.0)),
+                                                       self.process_id, self.hostname, self.lock_duration_minutes))
+                finally:
+                    _worker_state.pop('matrix', None)
+                    _worker_state.pop('shm').close()
+            else:
+                from utils.spawn_main import spawn_main_module
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=_init_pool_worker, initargs=init_args) as pool:
+                    # Процессы пула создаются при submit
+                    with spawn_main_module(__name__):
+                        futures = {
+                            pool.submit(_optimize_symbol_task, symbol, float(current_win_rates.get(symbol, 0.0)),
+                                        self.process_id, self.hostname, self.lock_duration_minutes): symbol
+                            for symbol in symbols
+                        }
+                    for done, future in enumerate(as_completed(futures), 1):
+                        try:
+                            _collect(future.result())
+                        except Exception as future_error:
+                            _collect({'symbol': futures[future], 'status': 'error',
+                                      'params': None, 'error': str(future_error)})
+                        if done % 50 == 0:
+                            logger.info(f"   📈 Оптимизировано {done}/{len(symbols)} монет")
+            _flush()
+        finally:
+            store.close()
+
+        logger.info(
+            f"✅ Параллельная оптимизация завершена: найдено {stats['optimized']}, "
+            f"без улучшений {stats['no_improvement']}, заняты {stats['locked']}, ошибок {stats['error']}"
+        )
+        return results
@@ -18,12 +18,15 @@ Pattern Recognition Module для технического анализа кри
 import os
 import logging
 import pickle
+import threading
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import numpy as np
 from scipy.signal import argrelextrema
 from scipy.stats import linregress
 
+from bot_engine.ai.training_worker import guarded_by_model_lock
+
 logger = logging.getLogger('AI')
 
 try:
@@ -63,6 +66,8 @@ class PatternDetector:
         
         self.model = None  # RandomForest для классификации
         self.scaler = None
+        self.model_loaded = False  # True — модель загружена из файла (load_model)
+        self._model_lock = threading.RLock()  # держат detect_patterns/get_pattern_signal и hot_swap_model
         
         # Конфигурация паттернов
         self.config = {
@@ -101,6 +106,7 @@ class PatternDetector:
         
         logger.info("Создана новая модель для распознавания паттернов")
     
+    @guarded_by_model_lock
     def detect_patterns(
         self,
         candles: List[Dict],
@@ -562,6 +568,7 @@ class PatternDetector:
         
         return patterns
     
+    @guarded_by_model_lock
     def get_pattern_signal(
         self,
         candles: List[Dict],
@@ -660,12 +667,14 @@ class PatternDetector:
             logger.error(f"Ошибка обучения: {e}")
             return {'success': False, 'error': str(e)}
     
-    def load_model(self):
-        """Загружает обученную модель из файла"""
+    def load_model(self) -> bool:
+        """Загружает обученную модель из файла (False — не загружена, создана новая модель)"""
+        self.model_loaded = False
         try:
             if os.path.exists(self.model_path):
                 with open(self.model_path, 'rb') as f:
                     self.model = pickle.load(f)
+                self.model_loaded = self.model is not None
                 
                 logger.info(f"Модель загружена: {self.model_path}")
             
@@ -681,7 +690,9 @@ class PatternDetector:
         
         except Exception as e:
             logger.error(f"Ошибка загрузки модели: {e}")
+            self.model_loaded = False
             self._create_new_model()
+        return self.model_loaded
     
     def save_model(self):
         """Сохраняет модель в файл"""
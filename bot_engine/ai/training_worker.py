@@ -0,0 +1,362 @@
+"""
+Постоянный процесс обучения AI моделей (Anomaly Detector, LSTM, Pattern Detector).
+
+Раньше AutoTrainer на каждое переобучение запускал scripts/ai/train_*.py через
+subprocess: интерпретатор заново импортировал torch/sklearn и заново читал все
+свечи из ai_data.db. Теперь задания выполняет один долгоживущий процесс:
+
+- тяжёлые модули импортируются один раз;
+- подготовленные обучающие данные кэшируются в процессе и переиспользуются,
+  пока не изменилась версия свечей в БД (AIDatabase.get_candles_data_version);
+- ход обучения (этапы, метрики) передаётся в основной процесс через очередь;
+- процесс стартует с этим модулем в роли __main__ (utils.spawn_main): верхний
+  уровень ai.py в нём не выполняется повторно.
+
+Новые модели подменяются в живых предикторах под их собственной блокировкой:
+свежий экземпляр загружается рядом со старым, затем состояние живого объекта
+заменяется, пока методы предсказания (помеченные guarded_by_model_lock) ждут;
+ссылки на объект у других модулей остаются валидными.
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import gc
+import importlib.util
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger('AI.TrainingWorker')
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+_SCRIPTS_DIR = _PROJECT_ROOT / 'scripts' / 'ai'
+DEFAULT_LOG_PATH = os.path.join('logs', 'ai_training_worker.log')
+
+
+# ==================== ДОЧЕРНИЙ ПРОЦЕСС ====================
+
+_script_modules: Dict[str, Any] = {}
+_data_cache: Dict[Any, tuple] = {}
+
+
+def _load_script(file_name: str):
+    """Импортирует скрипт обучения из scripts/ai как модуль (один раз на процесс)"""
+    module = _script_modules.get(file_name)
+    if module is None:
+        path = _SCRIPTS_DIR / file_name
+        spec = importlib.util.spec_from_file_location(f"_ai_training_{path.stem}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _script_modules[file_name] = module
+    return module
+
+
+def _data_version() -> str:
+    try:
+        from bot_engine.ai.ai_database import get_ai_database
+        ai_db = get_ai_database()
+        return ai_db.get_candles_data_version() if ai_db else ''
+    except Exception:
+        return ''
+
+
+def _cached_training_data(key, loader: Callable[[], Any]):
+    """Данные из кэша процесса, если версия свечей в БД не изменилась"""
+    version = _data_version()
+    entry = _data_cache.get(key)
+    if entry is not None and version and entry[0] == version:
+        return entry[1], True
+    # Старые данные этого задания больше не нужны — освобождаем до загрузки новых
+    _data_cache.pop(key, None)
+    gc.collect()
+    data = loader()
+    if data:
+        _data_cache[key] = (version, data)
+    return data, False
+
+
+def _job_anomaly(params: Dict[str, Any], progress: Callable) -> Dict[str, Any]:
+    module = _load_script('train_anomaly_on_real_data.py')
+    timeframe = params.get('timeframe', '6h')
+    progress('loading_data')
+    data, cache_hit = _cached_training_data(('anomaly', timeframe),
+                                            lambda: module.load_historical_data(timeframe=timeframe))
+    if not data:
+        return {'success': False, 'error': 'Нет данных для обучения'}
+    progress('training', samples=len(data), data_cache_hit=int(cache_hit))
+    detector = module.train_and_save(data)
+    return {'success': detector is not None, 'samples': len(data), 'data_cache_hit': cache_hit}
+
+
+def _job_lstm(params: Dict[str, Any], progress: Callable) -> Dict[str, Any]:
+    module = _load_script('train_lstm_predictor.py')
+    coins = int(params.get('coins', 0))
+    sequence_length = int(params.get('sequence_length', 60))
+    progress('loading_data')
+    data, cache_hit = _cached_training_data(
+        ('lstm', coins, sequence_length),
+        lambda: module.load_all_historical_data(max_coins=coins, sequence_length=sequence_length),
+    )
+    if not data:
+        return {'success': False, 'error': 'Нет данных для обучения'}
+    progress('training', samples=len(data), data_cache_hit=int(cache_hit))
+    result = module.train_and_save(data, epochs=int(params.get('epochs', 50)),
+                                   batch_size=int(params.get('batch_size', 32)))
+    return {
+        'success': bool(result.get('success')),
+        'error': result.get('error'),
+        'samples': len(data),
+        'data_cache_hit': cache_hit,
+        'final_loss': result.get('final_loss'),
+        'final_val_loss': result.get('final_val_loss'),
+        'epochs_trained': result.get('epochs_trained'),
+    }
+
+
+def _job_pattern(params: Dict[str, Any], progress: Callable) -> Dict[str, Any]:
+    module = _load_script('train_pattern_detector.py')
+    coins = int(params.get('coins', 0))
+    window = int(params.get('window', 50))
+    progress('loading_data')
+    data, cache_hit = _cached_training_data(
+        ('pattern', coins, window),
+        lambda: module.load_all_historical_data(max_coins=coins, window_size=window),
+    )
+    if not data:
+        return {'success': False, 'error': 'Нет данных для обучения'}
+    progress('training', samples=len(data), data_cache_hit=int(cache_hit))
+    result = module.train_and_save(data)
+    return {
+        'success': bool(result.get('success')),
+        'error': result.get('error'),
+        'samples': len(data),
+        'data_cache_hit': cache_hit,
+        'train_accuracy': result.get('train_accuracy'),
+        'val_accuracy': result.get('val_accuracy'),
+    }
+
+
+_JOBS: Dict[str, Callable[[Dict[str, Any], Callable], Dict[str, Any]]] = {
+    'anomaly': _job_anomaly,
+    'lstm': _job_lstm,
+    'pattern': _job_pattern,
+}
+
+
+def _worker_main(job_queue, result_queue, log_path: str) -> None:
+    """Цикл дочернего процесса: выполняет задания до получения None"""
+    # Вывод скриптов обучения (print) и логи — в отдельный файл, как раньше capture_output
+    try:
+        os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+        log_stream = open(log_path, 'a', encoding='utf-8', buffering=1)
+        sys.stdout = sys.stderr = log_stream
+    except Exception:
+        log_stream = None
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        stream=sys.stdout, force=True)
+    if str(_PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(_PROJECT_ROOT))
+    # ai.py здесь не выполняется — конфиг joblib → sklearn подключаем сами, до скриптов обучения
+    try:
+        import utils.sklearn_parallel_config  # noqa: F401
+    except Exception:
+        pass
+
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+        job_id, kind, params = job
+
+        def progress(stage, **metrics):
+            result_queue.put(('progress', job_id, stage, metrics))
+
+        started = time.time()
+        try:
+            job_func = _JOBS.get(kind)
+            if job_func is None:
+                result = {'success': False, 'error': f'Неизвестное задание: {kind}'}
+            else:
+                result = job_func(params or {}, progress)
+            result['duration_sec'] = time.time() - started
+            result_queue.put(('done', job_id, result))
+        except BaseException as e:
+            result_queue.put(('done', job_id, {
+                'success': False,
+                'error': f"{e}\n{traceback.format_exc()[-2000:]}",
+                'duration_sec': time.time() - started,
+            }))
+        finally:
+            gc.collect()
+
+    if log_stream is not None:
+        log_stream.close()
+
+
+# ==================== ОСНОВНОЙ ПРОЦЕСС ====================
+
+class TrainingWorker:
+    """Управляет дочерним процессом обучения: запуск, задания с таймаутом, перезапуск"""
+
+    def __init__(self, log_path: str = DEFAULT_LOG_PATH):
+        self.log_path = log_path
+        self._ctx = multiprocessing.get_context('spawn')
+        self._process = None
+        self._jobs = None
+        self._results = None
+        self._job_seq = 0
+        self._lock = threading.Lock()
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def _ensure_started(self) -> None:
+        if self.is_alive():
+            return
+        self._jobs = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(self._jobs, self._results, self.log_path),
+            name='AI_TrainingWorker',
+            daemon=True,
+        )
+        from utils.spawn_main import spawn_main_module
+        with spawn_main_module(__name__):
+            self._process.start()
+        logger.info(f"🧠 Процесс обучения запущен (PID {self._process.pid})")
+
+    def run(self, kind: str, params: Optional[Dict[str, Any]] = None, timeout: float = 600,
+            on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Выполняет задание обучения в процессе-воркере и ждёт результат.
+
+        Returns:
+            {'success': bool, 'error': str|None, 'duration_sec': float, ...метрики задания}
+        """
+        with self._lock:
+            self._ensure_started()
+            self._job_seq += 1
+            job_id = self._job_seq
+            self._jobs.put((job_id, kind, params or {}))
+            deadline = time.time() + timeout
+
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    logger.error(f"❌ Таймаут обучения '{kind}' ({timeout:.0f}с) — процесс обучения перезапускается")
+                    self.stop(force=True)
+                    return {'success': False, 'error': 'timeout'}
+                try:
+                    message = self._results.get(timeout=min(remaining, 5.0))
+                except queue.Empty:
+                    if not self.is_alive():
+                        exitcode = self._process.exitcode if self._process else None
+                        self._process = None
+                        return {'success': False, 'error': f'процесс обучения завершился (код {exitcode})'}
+                    continue
+                if message[1] != job_id:
+                    continue  # ответ на задание, прерванное ранее
+                if message[0] == 'progress':
+                    if on_progress:
+                        try:
+                            on_progress(message[2], message[3])
+                        except Exception:
+                            pass
+                    continue
+                return message[2]
+
+    def stop(self, force: bool = False) -> None:
+        process = self._process
+        if process is None:
+            return
+        try:
+            if force or not process.is_alive():
+                process.terminate()
+            else:
+                self._jobs.put(None)
+            process.join(timeout=10)
+            if process.is_alive():
+                process.kill()
+        except Exception:
+            pass
+        self._process = None
+
+
+_worker: Optional[TrainingWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_training_worker() -> TrainingWorker:
+    """Общий для процесса воркер обучения (останавливается при выходе)"""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = TrainingWorker()
+            atexit.register(_worker.stop)
+        return _worker
+
+
+# ==================== ГОРЯЧАЯ ПОДМЕНА МОДЕЛЕЙ ====================
+
+_model_versions: Dict[str, int] = {}
+_swap_lock = threading.Lock()
+
+MODEL_LOCK_ATTR = '_model_lock'
+
+
+def model_lock(obj: Any) -> threading.RLock:
+    """Блокировка модели конкретного экземпляра предиктора (создаётся при первом обращении)"""
+    lock = obj.__dict__.get(MODEL_LOCK_ATTR)
+    if lock is None:
+        with _swap_lock:
+            lock = obj.__dict__.setdefault(MODEL_LOCK_ATTR, threading.RLock())
+    return lock
+
+
+def guarded_by_model_lock(method: Callable) -> Callable:
+    """Декоратор метода предсказания: модель и scaler читаются под блокировкой экземпляра"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with model_lock(self):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def hot_swap_model(name: str, live: Any, fresh: Any) -> int:
+    """
+    Подменяет состояние живого предиктора состоянием свежезагруженного.
+
+    Замена выполняется под блокировкой живого экземпляра (model_lock), которую
+    держат методы предсказания, поэтому предсказание видит либо старые model/scaler,
+    либо новые, но не их смесь. Блокировка остаётся прежней (своя у каждого
+    экземпляра). Объект тот же, поэтому ссылки на него (SmartRiskManager и т.п.)
+    не устаревают.
+
+    Returns:
+        Новая версия модели
+    """
+    lock = model_lock(live)
+    with lock:
+        with _swap_lock:
+            version = _model_versions.get(name, 0) + 1
+            _model_versions[name] = version
+        state = dict(fresh.__dict__)
+        state[MODEL_LOCK_ATTR] = lock
+        state['model_version_loaded'] = version
+        live.__dict__ = state
+    return version
+
+
+def get_model_version(name: str) -> int:
+    """Сколько раз модель была подменена в этом процессе (0 — исходная)"""
+    return _model_versions.get(name, 0)
@@ -287,6 +287,16 @@ class AppDatabase:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_closed_pnl_closed_pnl ON closed_pnl(closed_pnl)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_closed_pnl_exchange ON closed_pnl(exchange)")
             
+            # ==================== ТАБЛИЦА: КУРСОРЫ СИНХРОНИЗАЦИИ ====================
+            # Позиция инкрементальной загрузки с биржи и чтения потребителями (closed PnL и т.п.)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS sync_cursors (
+                    name TEXT PRIMARY KEY,
+                    cursor_json TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            
             # ==================== ТАБЛИЦА: МАКСИМАЛЬНЫЕ ЗНАЧЕНИЯ ====================
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS max_values (
@@ -425,6 +435,19 @@ class AppDatabase:
             except Exception as e:
                 pass
             
+            # ==================== МИГРАЦИЯ: id ордера биржи в closed_pnl (дедупликация синхронизации) ====================
+            try:
+                cursor.execute("PRAGMA table_info(closed_pnl)")
+                columns = [col[1] for col in cursor.fetchall()]
+                if 'order_id' not in columns:
+                    cursor.execute("ALTER TABLE closed_pnl ADD COLUMN order_id TEXT")
+                cursor.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_closed_pnl_order_id
+                    ON closed_pnl(exchange, order_id) WHERE order_id IS NOT NULL
+                """)
+            except Exception as e:
+                logger.warning(f"⚠️ Миграция order_id для closed_pnl не выполнена: {e}")
+            
             conn.commit()
             
             pass
@@ -697,12 +720,13 @@ class AppDatabase:
                         close_timestamp = pnl_data.get('close_timestamp', 0)
                         entry_timestamp = pnl_data.get('entry_timestamp')
                         duration_seconds = pnl_data.get('duration_seconds')
+                        order_id = pnl_data.get('order_id') or None
                         # Собираем дополнительные данные в extra_data_json
                         extra_data = {}
                         known_fields = {
                             'symbol', 'side', 'entry_price', 'exit_price', 'size',
                             'closed_pnl', 'closed_pnl_percent', 'fee',
-                            'close_timestamp', 'entry_timestamp', 'duration_seconds', 'exchange'
+                            'close_timestamp', 'entry_timestamp', 'duration_seconds', 'exchange', 'order_id'
                         }
                         for key, value in pnl_data.items():
                             if key not in known_fields:
@@ -715,8 +739,8 @@ class AppDatabase:
                                 symbol, side, entry_price, exit_price, size,
                                 closed_pnl, closed_pnl_percent, fee,
                                 close_timestamp, entry_timestamp, duration_seconds,
-                                exchange, extra_data_json, created_at, updated_at
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                                exchange, order_id, extra_data_json, created_at, updated_at
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
                                 COALESCE((SELECT created_at FROM closed_pnl 
                                     WHERE symbol = ? AND side = ? AND close_timestamp = ?), ?),
                                 ?)
@@ -724,7 +748,7 @@ class AppDatabase:
                             symbol, side, entry_price, exit_price, size,
                             closed_pnl, closed_pnl_percent, fee,
                             close_timestamp, entry_timestamp, duration_seconds,
-                            exchange or '', extra_data_json,
+                            exchange or '', order_id, extra_data_json,
                             symbol, side, close_timestamp, now, now
                         ))
                         
@@ -850,32 +874,7 @@ class AppDatabase:
                 cursor.execute(query, params)
                 rows = cursor.fetchall()
                 
-                result = []
-                for row in rows:
-                    pnl_data = {
-                        'symbol': row['symbol'],
-                        'side': row['side'],
-                        'entry_price': row['entry_price'],
-                        'exit_price': row['exit_price'],
-                        'size': row['size'],
-                        'closed_pnl': row['closed_pnl'],
-                        'closed_pnl_percent': row['closed_pnl_percent'],
-                        'fee': row['fee'],
-                        'close_timestamp': row['close_timestamp'],
-                        'entry_timestamp': row['entry_timestamp'],
-                        'duration_seconds': row['duration_seconds'],
-                        'exchange': row['exchange']
-                    }
-                    
-                    # Загружаем дополнительные данные из extra_data_json
-                    if row['extra_data_json']:
-                        try:
-                            extra_data = json.loads(row['extra_data_json'])
-                            pnl_data.update(extra_data)
-                        except json.JSONDecodeError:
-                            pass
-                    
-                    result.append(pnl_data)
+                result = [self._closed_pnl_row_to_dict(row) for row in rows]
                 
                 pass
                 return result
@@ -886,6 +885,147 @@ class AppDatabase:
             pass
             return []
     
+    @staticmethod
+    def _closed_pnl_row_to_dict(row) -> Dict:
+        """Строка closed_pnl -> словарь (с полями из extra_data_json)"""
+        pnl_data = {
+            'symbol': row['symbol'],
+            'side': row['side'],
+            'entry_price': row['entry_price'],
+            'exit_price': row['exit_price'],
+            'size': row['size'],
+            'closed_pnl': row['closed_pnl'],
+            'closed_pnl_percent': row['closed_pnl_percent'],
+            'fee': row['fee'],
+            'close_timestamp': row['close_timestamp'],
+            'entry_timestamp': row['entry_timestamp'],
+            'duration_seconds': row['duration_seconds'],
+            'exchange': row['exchange']
+        }
+        
+        # Загружаем дополнительные данные из extra_data_json
+        if row['extra_data_json']:
+            try:
+                extra_data = json.loads(row['extra_data_json'])
+                pnl_data.update(extra_data)
+            except json.JSONDecodeError:
+                pass
+        
+        keys = row.keys()
+        if 'id' in keys:
+            pnl_data['id'] = row['id']
+        if 'order_id' in keys and row['order_id']:
+            pnl_data['order_id'] = row['order_id']
+        return pnl_data
+    
+    def insert_new_closed_pnl(self, closed_pnl_list: List[Dict], exchange: str = None) -> List[Dict]:
+        """
+        Добавляет закрытые PnL, которых ещё нет в БД (дубликаты по id ордера биржи
+        или по symbol/side/close_timestamp пропускаются, существующие строки не переписываются)
+        
+        Args:
+            closed_pnl_list: Список словарей с данными закрытых PnL
+            exchange: Название биржи
+            
+        Returns:
+            List[Dict]: Действительно добавленные записи (с id строки)
+        
+        Raises:
+            Exception: ошибка подключения, записи строки или commit — транзакция откатывается
+            целиком, вызывающий код не должен считать окно сохранённым
+        """
+        if not closed_pnl_list:
+            return []
+        
+        known_fields = {
+            'symbol', 'side', 'entry_price', 'exit_price', 'size',
+            'closed_pnl', 'closed_pnl_percent', 'fee',
+            'close_timestamp', 'entry_timestamp', 'duration_seconds', 'exchange', 'order_id'
+        }
+        inserted = []
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            now = datetime.now().isoformat()
+            for pnl_data in closed_pnl_list:
+                extra_data = {k: v for k, v in pnl_data.items() if k not in known_fields}
+                cursor.execute("""
+                    INSERT OR IGNORE INTO closed_pnl (
+                        symbol, side, entry_price, exit_price, size,
+                        closed_pnl, closed_pnl_percent, fee,
+                        close_timestamp, entry_timestamp, duration_seconds,
+                        exchange, order_id, extra_data_json, created_at, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    pnl_data.get('symbol', ''), pnl_data.get('side', ''),
+                    pnl_data.get('entry_price'), pnl_data.get('exit_price'), pnl_data.get('size'),
+                    pnl_data.get('closed_pnl', 0), pnl_data.get('closed_pnl_percent', 0), pnl_data.get('fee', 0),
+                    pnl_data.get('close_timestamp', 0), pnl_data.get('entry_timestamp'),
+                    pnl_data.get('duration_seconds'),
+                    exchange or pnl_data.get('exchange') or '', pnl_data.get('order_id') or None,
+                    json.dumps(extra_data, ensure_ascii=False) if extra_data else None,
+                    now, now
+                ))
+                if cursor.rowcount > 0:
+                    inserted.append(dict(pnl_data, id=cursor.lastrowid))
+        if inserted:
+            logger.info(f"💾 Добавлено {len(inserted)} новых записей closed_pnl в БД")
+        return inserted
+    
+    def load_closed_pnl_after_id(self, last_id: int = 0, exchange: Optional[str] = None,
+                                 limit: Optional[int] = None) -> List[Dict]:
+        """
+        Записи closed_pnl с id больше last_id в порядке добавления (чтение потребителем по курсору)
+        
+        Args:
+            last_id: Последний прочитанный id (0 — вся таблица)
+            exchange: Фильтр по бирже
+            limit: Максимум записей
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                query = "SELECT * FROM closed_pnl WHERE id > ?"
+                params = [int(last_id or 0)]
+                if exchange:
+                    query += " AND exchange = ?"
+                    params.append(exchange)
+                query += " ORDER BY id"
+                if limit:
+                    query += " LIMIT ?"
+                    params.append(int(limit))
+                cursor.execute(query, params)
+                return [self._closed_pnl_row_to_dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"❌ Ошибка инкрементальной загрузки closed_pnl: {e}")
+            return []
+    
+    # ==================== МЕТОДЫ ДЛЯ SYNC_CURSORS ====================
+    
+    def get_sync_cursor(self, name: str) -> Optional[Dict]:
+        """Сохранённый курсор синхронизации (None — ещё не было)"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT cursor_json FROM sync_cursors WHERE name = ?", (name,))
+                row = cursor.fetchone()
+                return json.loads(row['cursor_json']) if row else None
+        except Exception as e:
+            logger.error(f"❌ Ошибка чтения курсора синхронизации {name}: {e}")
+            return None
+    
+    def save_sync_cursor(self, name: str, value: Dict) -> bool:
+        """Сохраняет курсор синхронизации"""
+        try:
+            with self._get_connection() as conn:
+                conn.execute("""
+                    INSERT INTO sync_cursors (name, cursor_json, updated_at) VALUES (?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET cursor_json = excluded.cursor_json, updated_at = excluded.updated_at
+                """, (name, json.dumps(value, ensure_ascii=False), datetime.now().isoformat()))
+            return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения курсора синхронизации {name}: {e}")
+            return False
+    
     def get_latest_closed_pnl_timestamp(self, exchange: Optional[str] = None) -> Optional[int]:
         """
         Получает timestamp последней закрытой позиции
@@ -4,17 +4,21 @@
 Сервис для бэкапа баз данных AI и Bots
 
 Предоставляет централизованное управление резервными копиями:
-- Создание бэкапов обеих БД
+- Создание бэкапов обеих БД (online backup API, параллельно, полные и разностные)
 - Управление бэкапами (список, удаление, восстановление)
 - Автоматическая очистка старых бэкапов
 - Проверка целостности бэкапов
 """
 
+import gzip
+import hashlib
+import json
 import os
 import shutil
 import sqlite3
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
@@ -22,6 +26,13 @@ import logging
 
 logger = logging.getLogger('BackupService')
 
+# Размер хэша страницы БД в манифесте полного бэкапа (для разностных бэкапов)
+_PAGE_HASH_SIZE = 8
+
+
+class _BackupRestartLimit(Exception):
+    """Копирование по шагам слишком часто начиналось заново из-за записи в БД"""
+
 
 def _get_project_root() -> Path:
     """
@@ -70,11 +81,27 @@ class DatabaseBackupService:
             logger.error(f"❌ Ошибка создания директории бэкапов: {e}")
             raise
     
+    # Online backup API: страниц за шаг и пауза между шагами (писатели не ждут весь бэкап)
+    BACKUP_PAGES_PER_STEP = 4096
+    BACKUP_STEP_SLEEP = 0.005
+    # Сколько раз копирование по шагам может начаться заново из-за записи в БД,
+    # прежде чем докопировать оставшееся одним шагом
+    BACKUP_MAX_RESTARTS = 3
+    # Каждый N-й бэкап БД полный, между ними — разностные (только изменённые страницы)
+    FULL_BACKUP_EVERY = 6
+    # Если изменилось больше этой доли страниц, разностный бэкап не выгоден — делаем полный
+    DELTA_MAX_CHANGED_RATIO = 0.5
+    COMPRESS_LEVEL = 1
+    COPY_CHUNK_SIZE = 4 * 1024 * 1024
+    # Расширения файлов бэкапов (от длинных к коротким): .delta.gz/.db.gz — новые, .sql/.db — старые
+    BACKUP_EXTENSIONS = ('.delta.gz', '.db.gz', '.sql', '.db')
+
     def create_backup(self, include_ai: bool = True, include_bots: bool = True,
                      include_app: bool = False, max_retries: int = 3,
-                     keep_last_n: int = 5) -> Dict[str, Any]:
+                     keep_last_n: int = 5, full_every_n: int = None) -> Dict[str, Any]:
         """
         Создает резервные копии указанных баз данных.
+        Базы копируются параллельно через online backup API SQLite.
         После создания оставляет только последние keep_last_n бэкапов для каждой системы.
         
         Args:
@@ -83,6 +110,7 @@ class DatabaseBackupService:
             include_app: Создавать бэкап App БД (app_data.db)
             max_retries: Максимальное количество попыток при блокировке файла
             keep_last_n: Сколько последних бэкапов хранить для каждой БД (остальные удаляются)
+            full_every_n: Каждый N-й бэкап полный, остальные разностные (1 = всегда полный)
         
         Returns:
             Словарь с результатами бэкапа (backups: ai, bots, app).
@@ -99,86 +127,51 @@ class DatabaseBackupService:
                 },
                 'errors': []
             }
+            if full_every_n is None:
+                full_every_n = self.FULL_BACKUP_EVERY
             
             # ✅ ПУТИ ОТНОСИТЕЛЬНО КОРНЯ ПРОЕКТА, А НЕ РАБОЧЕЙ ДИРЕКТОРИИ
             project_root = _get_project_root()
-            ai_db_path = str((project_root / 'data' / 'ai_data.db').resolve())
-            bots_db_path = str((project_root / 'data' / 'bots_data.db').resolve())
-            app_db_path = str((project_root / 'data' / 'app_data.db').resolve())
-            
-            # Бэкап App БД (только из app.py)
+            jobs = []
             if include_app:
-                try:
-                    app_backup = self._backup_database(
-                        db_path=app_db_path,
-                        db_name='app_data',
-                        timestamp=timestamp,
-                        max_retries=max_retries
-                    )
-                    if app_backup:
-                        result['backups']['app'] = app_backup
-                        logger.info(f"✅ Создан бэкап App БД: {app_backup['path']}")
-                    else:
-                        if not os.path.exists(app_db_path):
-                            result['errors'].append(f"App БД не найдена: {app_db_path}")
-                            logger.warning(f"⚠️ App БД не найдена: {app_db_path}")
-                        else:
-                            result['success'] = False
-                            result['errors'].append("Не удалось создать бэкап App БД")
-                except Exception as e:
-                    result['success'] = False
-                    result['errors'].append(f"Ошибка создания бэкапа App БД: {e}")
-                    logger.error(f"❌ Ошибка создания бэкапа App БД: {e}")
-            
-            # Бэкап AI БД
+                jobs.append(('app', 'App', 'app_data'))
             if include_ai:
-                try:
-                    ai_backup = self._backup_database(
-                        db_path=ai_db_path,
-                        db_name='ai_data',
-                        timestamp=timestamp,
-                        max_retries=max_retries
-                    )
-                    if ai_backup:
-                        result['backups']['ai'] = ai_backup
-                        logger.info(f"✅ Создан бэкап AI БД: {ai_backup['path']}")
-                    else:
-                        # Если БД не найдена, это не критическая ошибка
-                        if not os.path.exists(ai_db_path):
-                            result['errors'].append(f"AI БД не найдена: {ai_db_path}")
-                            logger.warning(f"⚠️ AI БД не найдена: {ai_db_path}")
-                        else:
-                            result['success'] = False
-                            result['errors'].append("Не удалось создать бэкап AI БД")
-                except Exception as e:
-                    result['success'] = False
-                    error_msg = f"Ошибка создания бэкапа AI БД: {e}"
-                    result['errors'].append(error_msg)
-                    logger.error(f"❌ {error_msg}")
-            
-            # Бэкап Bots БД
+                jobs.append(('ai', 'AI', 'ai_data'))
             if include_bots:
+                jobs.append(('bots', 'Bots', 'bots_data'))
+            db_paths = {db_name: str((project_root / 'data' / f'{db_name}.db').resolve()) for _, _, db_name in jobs}
+
+            futures = {}
+            if jobs:
+                with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix='DBBackup') as executor:
+                    for key, _, db_name in jobs:
+                        futures[key] = executor.submit(
+                            self._backup_database,
+                            db_path=db_paths[db_name],
+                            db_name=db_name,
+                            timestamp=timestamp,
+                            max_retries=max_retries,
+                            full_every_n=full_every_n
+                        )
+
+            for key, label, db_name in jobs:
+                db_path = db_paths[db_name]
                 try:
-                    bots_backup = self._backup_database(
-                        db_path=bots_db_path,
-                        db_name='bots_data',
-                        timestamp=timestamp,
-                        max_retries=max_retries
-                    )
-                    if bots_backup:
-                        result['backups']['bots'] = bots_backup
-                        logger.info(f"✅ Создан бэкап Bots БД: {bots_backup['path']}")
+                    backup = futures[key].result()
+                    if backup:
+                        result['backups'][key] = backup
+                        logger.info(f"✅ Создан бэкап {label} БД: {backup['path']}")
                     else:
                         # Если БД не найдена, это не критическая ошибка
-                        if not os.path.exists(bots_db_path):
-                            result['errors'].append(f"Bots БД не найдена: {bots_db_path}")
-                            logger.warning(f"⚠️ Bots БД не найдена: {bots_db_path}")
+                        if not os.path.exists(db_path):
+                            result['errors'].append(f"{label} БД не найдена: {db_path}")
+                            logger.warning(f"⚠️ {label} БД не найдена: {db_path}")
                         else:
                             result['success'] = False
-                            result['errors'].append("Не удалось создать бэкап Bots БД")
+                            result['errors'].append(f"Не удалось создать бэкап {label} БД")
                 except Exception as e:
                     result['success'] = False
-                    error_msg = f"Ошибка создания бэкапа Bots БД: {e}"
+                    error_msg = f"Ошибка создания бэкапа {label} БД: {e}"
                     result['errors'].append(error_msg)
                     logger.error(f"❌ {error_msg}")
             
@@ -209,73 +202,283 @@ class DatabaseBackupService:
             return result
     
     def _backup_database(self, db_path: str, db_name: str, timestamp: str,
-                        max_retries: int = 3) -> Optional[Dict[str, Any]]:
+                        max_retries: int = 3, full_every_n: int = None) -> Optional[Dict[str, Any]]:
         """
-        Создаёт резервную копию одной БД в виде SQL-дампа (.sql).
-        Через запрос/iterdump — не копируем файл, нет блокировок.
+        Создаёт резервную копию одной БД.
+
+        Снимок делается online backup API SQLite по BACKUP_PAGES_PER_STEP страниц
+        (между шагами блокировки отпускаются), затем потоково сжимается в
+        <db>_<ts>.db.gz (полный) или <db>_<ts>.delta.gz — только страницы,
+        изменившиеся относительно последнего полного бэкапа.
         """
         if not os.path.exists(db_path):
             logger.warning(f"⚠️ БД не найдена: {db_path}")
             return None
+        if full_every_n is None:
+            full_every_n = self.FULL_BACKUP_EVERY
 
-        backup_filename = f"{db_name}_{timestamp}.sql"
-        backup_path = os.path.join(self.backup_dir, backup_filename)
-        backup_path_tmp = backup_path + '.tmp'
+        snapshot_path = os.path.join(self.backup_dir, f"{db_name}_{timestamp}.snapshot.tmp")
 
         for attempt in range(max_retries):
             try:
                 if attempt > 0:
                     time.sleep(1.0 * attempt)
-                conn = sqlite3.connect(db_path, timeout=30.0)
-                try:
-                    with open(backup_path_tmp, 'w', encoding='utf-8') as f:
-                        for line in conn.iterdump():
-                            f.write(line + '\n')
-                finally:
-                    conn.close()
-                if os.path.getsize(backup_path_tmp) == 0:
-                    try:
-                        os.remove(backup_path_tmp)
-                    except OSError:
-                        pass
-                    return None
-                os.replace(backup_path_tmp, backup_path)
-                file_size = os.path.getsize(backup_path)
-                size_mb = file_size / (1024 * 1024)
-                return {
-                    'path': backup_path,
-                    'size_mb': size_mb,
-                    'size_bytes': file_size,
-                    'valid': True,
-                    'created_at': datetime.now().isoformat()
-                }
+                started = time.time()
+                valid = self._snapshot_database(db_path, snapshot_path)
+                page_size, hashes = self._page_hashes(snapshot_path)
+                page_count = len(hashes) // _PAGE_HASH_SIZE
+
+                base = self._find_delta_base(db_name, page_size, full_every_n) if full_every_n > 1 else None
+                backup_info = None
+                if base is not None:
+                    backup_info = self._write_delta_backup(
+                        snapshot_path, db_name, timestamp, base, page_size, hashes, valid
+                    )
+                if backup_info is None:
+                    backup_info = self._write_full_backup(snapshot_path, db_name, timestamp, page_size, hashes, valid)
+                backup_info['page_count'] = page_count
+                backup_info['duration_sec'] = round(time.time() - started, 2)
+                return backup_info
             except sqlite3.Error as e:
-                if os.path.exists(backup_path_tmp):
-                    try:
-                        os.remove(backup_path_tmp)
-                    except OSError:
-                        pass
-                logger.warning(f"⚠️ Ошибка дампа БД (попытка {attempt + 1}): {e}")
+                logger.warning(f"⚠️ Ошибка бэкапа БД {db_name} (попытка {attempt + 1}): {e}")
                 if attempt == max_retries - 1:
                     return None
             except Exception as e:
-                if os.path.exists(backup_path_tmp):
-                    try:
-                        os.remove(backup_path_tmp)
-                    except OSError:
-                        pass
-                logger.error(f"❌ Ошибка создания SQL-бэкапа: {e}")
+                logger.error(f"❌ Ошибка создания бэкапа {db_name}: {e}")
+                return None
+            finally:
+                self._remove_file_safe(snapshot_path)
+                self._remove_file_safe(snapshot_path + '-wal')
+                self._remove_file_safe(snapshot_path + '-shm')
+        return None
+
+    def _snapshot_database(self, db_path: str, snapshot_path: str) -> bool:
+        """
+        Копирует БД в snapshot_path через online backup API и проверяет копию (quick_check).
+
+        Если во время пошагового копирования в БД пишут из другого соединения, SQLite
+        начинает копирование заново; после BACKUP_MAX_RESTARTS перезапусков оставшееся
+        копируется одним шагом (в WAL-режиме это не блокирует писателей).
+        """
+        self._remove_file_safe(snapshot_path)
+        src = sqlite3.connect(db_path, timeout=30.0)
+        try:
+            dst = sqlite3.connect(snapshot_path)
+            try:
+                state = {'remaining': None, 'restarts': 0}
+
+                def _progress(status, remaining, total):
+                    if state['remaining'] is not None and remaining > state['remaining']:
+                        state['restarts'] += 1
+                        if state['restarts'] > self.BACKUP_MAX_RESTARTS:
+                            raise _BackupRestartLimit()
+                    state['remaining'] = remaining
+
+                try:
+                    src.backup(dst, pages=self.BACKUP_PAGES_PER_STEP, progress=_progress,
+                               sleep=self.BACKUP_STEP_SLEEP)
+                except _BackupRestartLimit:
+                    logger.info(f"ℹ️ БД {os.path.basename(db_path)} активно изменяется — копирование одним шагом")
+                    src.backup(dst, pages=-1)
+
+                row = dst.execute("PRAGMA quick_check").fetchone()
+                valid = bool(row and row[0] == 'ok')
+                # Снимок — самостоятельный файл: без WAL, все страницы в основном файле
+                dst.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                dst.close()
+        finally:
+            src.close()
+        return valid
+
+    @staticmethod
+    def _page_hashes(db_file: str) -> Tuple[int, bytes]:
+        """Размер страницы (из заголовка SQLite) и короткие хэши всех страниц файла подряд"""
+        with open(db_file, 'rb') as f:
+            header = f.read(100)
+            page_size = int.from_bytes(header[16:18], 'big')
+            if page_size == 1:
+                page_size = 65536
+            if page_size < 512:
+                raise ValueError(f"Некорректный размер страницы SQLite: {page_size}")
+            f.seek(0)
+            hashes = bytearray()
+            while True:
+                page = f.read(page_size)
+                if not page:
+                    break
+                hashes += hashlib.blake2b(page, digest_size=_PAGE_HASH_SIZE).digest()
+        return page_size, bytes(hashes)
+
+    def _read_meta(self, backup_path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(backup_path + '.json', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, backup_path: str, meta: Dict[str, Any]) -> None:
+        with open(backup_path + '.json.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(backup_path + '.json.tmp', backup_path + '.json')
+
+    def _find_delta_base(self, db_name: str, page_size: int, full_every_n: int) -> Optional[Dict[str, Any]]:
+        """Последний полный бэкап БД, к которому можно записать разностный (или None — нужен полный)"""
+        backups = [b for b in self.list_backups(db_name=db_name, check_integrity=False)
+                   if b.get('db_name') == db_name]
+        deltas_since_full = 0
+        for backup in backups:  # новые первыми
+            if backup['kind'] == 'delta':
+                deltas_since_full += 1
+                continue
+            if backup['kind'] != 'full':
+                return None
+            meta = self._read_meta(backup['path'])
+            hashes_path = backup['path'] + '.pages'
+            if (not meta or not meta.get('valid') or meta.get('page_size') != page_size
+                    or not os.path.exists(hashes_path) or deltas_since_full + 1 >= full_every_n):
                 return None
+            with open(hashes_path, 'rb') as f:
+                return {'path': backup['path'], 'filename': backup['filename'], 'hashes': f.read()}
         return None
+
+    def _write_full_backup(self, snapshot_path: str, db_name: str, timestamp: str,
+                           page_size: int, hashes: bytes, valid: bool) -> Dict[str, Any]:
+        """Потоково сжимает снимок в <db>_<ts>.db.gz и сохраняет хэши страниц для разностных бэкапов"""
+        backup_path = os.path.join(self.backup_dir, f"{db_name}_{timestamp}.db.gz")
+        tmp_path = backup_path + '.tmp'
+        try:
+            with open(snapshot_path, 'rb') as src, open(tmp_path, 'wb') as raw:
+                with gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=self.COMPRESS_LEVEL) as gz:
+                    shutil.copyfileobj(src, gz, self.COPY_CHUNK_SIZE)
+            os.replace(tmp_path, backup_path)
+        except Exception:
+            self._remove_file_safe(tmp_path)
+            raise
+        with open(backup_path + '.pages', 'wb') as f:
+            f.write(hashes)
+        self._write_meta(backup_path, {
+            'kind': 'full',
+            'page_size': page_size,
+            'page_count': len(hashes) // _PAGE_HASH_SIZE,
+            'valid': valid,
+        })
+        file_size = os.path.getsize(backup_path)
+        return {
+            'path': backup_path,
+            'kind': 'full',
+            'base': None,
+            'size_mb': file_size / (1024 * 1024),
+            'size_bytes': file_size,
+            'valid': valid,
+            'created_at': datetime.now().isoformat()
+        }
+
+    def _write_delta_backup(self, snapshot_path: str, db_name: str, timestamp: str, base: Dict[str, Any],
+                            page_size: int, hashes: bytes, valid: bool) -> Optional[Dict[str, Any]]:
+        """
+        Записывает <db>_<ts>.delta.gz: заголовок JSON и изменённые относительно base страницы
+        (4 байта номер страницы + содержимое). None — изменилось слишком много, нужен полный бэкап.
+        """
+        base_hashes = base['hashes']
+        page_count = len(hashes) // _PAGE_HASH_SIZE
+        changed = [
+            pgno for pgno in range(page_count)
+            if hashes[pgno * _PAGE_HASH_SIZE:(pgno + 1) * _PAGE_HASH_SIZE]
+            != base_hashes[pgno * _PAGE_HASH_SIZE:(pgno + 1) * _PAGE_HASH_SIZE]
+        ]
+        if page_count and len(changed) > page_count * self.DELTA_MAX_CHANGED_RATIO:
+            return None
+
+        backup_path = os.path.join(self.backup_dir, f"{db_name}_{timestamp}.delta.gz")
+        tmp_path = backup_path + '.tmp'
+        header = {'base': base['filename'], 'page_size': page_size, 'page_count': page_count}
+        try:
+            with open(snapshot_path, 'rb') as src, open(tmp_path, 'wb') as raw:
+                with gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=self.COMPRESS_LEVEL) as gz:
+                    gz.write(json.dumps(header).encode('utf-8') + b'\n')
+                    for pgno in changed:
+                        src.seek(pgno * page_size)
+                        gz.write(pgno.to_bytes(4, 'big'))
+                        gz.write(src.read(page_size))
+            os.replace(tmp_path, backup_path)
+        except Exception:
+            self._remove_file_safe(tmp_path)
+            raise
+        self._write_meta(backup_path, dict(header, kind='delta', changed_pages=len(changed), valid=valid))
+        file_size = os.path.getsize(backup_path)
+        logger.info(f"📦 Разностный бэкап {db_name}: {len(changed)}/{page_count} страниц изменено (база {base['filename']})")
+        return {
+            'path': backup_path,
+            'kind': 'delta',
+            'base': base['path'],
+            'size_mb': file_size / (1024 * 1024),
+            'size_bytes': file_size,
+            'valid': valid,
+            'created_at': datetime.now().isoformat()
+        }
+
+    def _restore_to_file(self, backup_path: str, target_path: str) -> None:
+        """Разворачивает бэкап .db.gz/.delta.gz в файл БД target_path"""
+        if backup_path.endswith('.delta.gz'):
+            with gzip.open(backup_path, 'rb') as gz:
+                header = json.loads(gz.readline().decode('utf-8'))
+                base_path = os.path.join(os.path.dirname(backup_path), header['base'])
+                if not os.path.exists(base_path):
+                    raise FileNotFoundError(f"Полный бэкап для разностного не найден: {base_path}")
+                self._restore_to_file(base_path, target_path)
+                page_size = int(header['page_size'])
+                with open(target_path, 'r+b') as dst:
+                    while True:
+                        pgno_bytes = gz.read(4)
+                        if not pgno_bytes:
+                            break
+                        page = gz.read(page_size)
+                        dst.seek(int.from_bytes(pgno_bytes, 'big') * page_size)
+                        dst.write(page)
+                    dst.truncate(int(header['page_count']) * page_size)
+            return
+        with gzip.open(backup_path, 'rb') as gz, open(target_path, 'wb') as dst:
+            shutil.copyfileobj(gz, dst, self.COPY_CHUNK_SIZE)
     
+    def restore_to_file(self, backup_path: str, target_path: str) -> None:
+        """
+        Разворачивает бэкап любого формата в файл БД target_path (файла быть не должно или он перезаписывается):
+        .db.gz и .delta.gz (вместе с полным бэкапом цепочки) — _restore_to_file, старые .sql — дамп, .db — копия.
+        Используется restore_backup и самовосстановлением AI/Bots БД.
+        """
+        if backup_path.endswith('.sql'):
+            with open(backup_path, 'r', encoding='utf-8') as f:
+                sql_dump = f.read()
+            conn = sqlite3.connect(target_path)
+            try:
+                conn.executescript(sql_dump)
+            finally:
+                conn.close()
+        elif backup_path.endswith('.gz'):
+            self._restore_to_file(backup_path, target_path)
+        else:
+            shutil.copy2(backup_path, target_path)
+
     def _check_backup_integrity(self, backup_path: str) -> Tuple[bool, Optional[str]]:
         """
-        Проверяет целостность бэкапа: для .sql — файл непустой; для .db — PRAGMA integrity_check.
+        Проверяет целостность бэкапа: для .sql — файл непустой; для .db.gz/.delta.gz —
+        результат проверки снимка при создании (метаданные) и наличие полного бэкапа;
+        для .db — PRAGMA integrity_check.
         """
         if not os.path.exists(backup_path):
             return False, "Файл бэкапа не найден"
         if backup_path.endswith('.sql'):
             return (os.path.getsize(backup_path) > 0, None)
+        if backup_path.endswith('.gz'):
+            meta = self._read_meta(backup_path)
+            if meta is None:
+                return False, "Нет метаданных бэкапа"
+            if not meta.get('valid'):
+                return False, "Снимок не прошёл quick_check"
+            if meta.get('kind') == 'delta':
+                return self._check_backup_integrity(os.path.join(os.path.dirname(backup_path), meta.get('base', '')))
+            return True, None
         try:
             conn = sqlite3.connect(backup_path)
             cursor = conn.cursor()
@@ -288,12 +491,13 @@ class DatabaseBackupService:
         except Exception as e:
             return False, str(e)
     
-    def list_backups(self, db_name: str = None) -> List[Dict[str, Any]]:
+    def list_backups(self, db_name: str = None, check_integrity: bool = True) -> List[Dict[str, Any]]:
         """
         Получает список всех бэкапов
         
         Args:
             db_name: Фильтр по имени БД ('ai_data', 'bots_data', 'app_data'), None для всех
+            check_integrity: Проверять целостность каждого бэкапа (поле valid)
         
         Returns:
             Список словарей с информацией о бэкапах
@@ -307,14 +511,14 @@ class DatabaseBackupService:
             for filename in os.listdir(self.backup_dir):
                 if filename.endswith('-wal') or filename.endswith('-shm'):
                     continue
-                is_sql = filename.endswith('.sql')
-                if not is_sql and not filename.endswith('.db'):
+                ext = next((e for e in self.BACKUP_EXTENSIONS if filename.endswith(e)), None)
+                if ext is None:
                     continue
                 if db_name and not filename.startswith(db_name):
                     continue
                 backup_path = os.path.join(self.backup_dir, filename)
                 try:
-                    name_without_ext = filename[:-4] if is_sql else filename[:-3]
+                    name_without_ext = filename[:-len(ext)]
                     parts = name_without_ext.split('_')
                     timestamp_str = None
                     db_name_from_file = None
@@ -333,11 +537,20 @@ class DatabaseBackupService:
                         backup_time = datetime.fromtimestamp(os.path.getmtime(backup_path))
                     file_size = os.path.getsize(backup_path)
                     size_mb = file_size / (1024 * 1024)
-                    is_valid, error_msg = self._check_backup_integrity(backup_path)
+                    if check_integrity:
+                        is_valid, error_msg = self._check_backup_integrity(backup_path)
+                    else:
+                        is_valid, error_msg = True, None
+                    base = None
+                    if ext == '.delta.gz':
+                        meta = self._read_meta(backup_path) or {}
+                        base = os.path.join(self.backup_dir, meta['base']) if meta.get('base') else None
                     backups.append({
                         'path': backup_path,
                         'filename': filename,
                         'db_name': db_name_from_file,
+                        'kind': {'.delta.gz': 'delta', '.db.gz': 'full'}.get(ext, ext[1:]),
+                        'base': base,
                         'size_mb': size_mb,
                         'size_bytes': file_size,
                         'created_at': backup_time.isoformat(),
@@ -401,16 +614,9 @@ class DatabaseBackupService:
             # Удаляем старую БД (и -wal, -shm), создаём новую и загружаем дамп
             for path in [target_db_path, target_db_path + '-wal', target_db_path + '-shm']:
                 self._remove_file_safe(path)
-            if backup_path.endswith('.sql'):
-                with open(backup_path, 'r', encoding='utf-8') as f:
-                    sql_dump = f.read()
-                conn = sqlite3.connect(target_db_path)
-                conn.executescript(sql_dump)
-                conn.close()
-            else:
-                shutil.copy2(backup_path, target_db_path)
-                self._remove_file_safe(target_db_path + '-wal')
-                self._remove_file_safe(target_db_path + '-shm')
+            self.restore_to_file(backup_path, target_db_path)
+            self._remove_file_safe(target_db_path + '-wal')
+            self._remove_file_safe(target_db_path + '-shm')
             is_valid, error_msg = self._check_backup_integrity(target_db_path)
             if is_valid:
                 logger.info(f"✅ БД {db_name} успешно восстановлена из бэкапа")
@@ -450,7 +656,7 @@ class DatabaseBackupService:
 
     def delete_backup(self, backup_path: str) -> bool:
         """
-        Удаляет бэкап (основной файл и -wal/-shm при наличии).
+        Удаляет бэкап (основной файл, -wal/-shm и метаданные при наличии).
         При «файл занят» выполняет несколько попыток с паузой, затем пропускает без падения.
         """
         if not os.path.exists(backup_path):
@@ -465,6 +671,9 @@ class DatabaseBackupService:
         shm_file = backup_path + '-shm'
         self._remove_file_safe(wal_file)
         self._remove_file_safe(shm_file)
+        # Метаданные и хэши страниц бэкапов .db.gz/.delta.gz
+        self._remove_file_safe(backup_path + '.json')
+        self._remove_file_safe(backup_path + '.pages')
 
         logger.info(f"🗑️ Бэкап удален: {backup_path}")
         return True
@@ -487,7 +696,7 @@ class DatabaseBackupService:
             'total': 0
         }
         try:
-            backups = self.list_backups()
+            backups = self.list_backups(check_integrity=False)
             backups_by_type = {}
             for backup in backups:
                 db_name = backup.get('db_name', 'unknown')
@@ -499,7 +708,9 @@ class DatabaseBackupService:
                 if db_name not in result:
                     result[db_name] = 0
                 to_keep = db_backups[:keep_count]
-                to_delete = db_backups[keep_count:]
+                # Полные бэкапы, на которых основаны оставляемые разностные, не удаляем
+                required = {b['base'] for b in to_keep if b.get('base')}
+                to_delete = [b for b in db_backups[keep_count:] if b['path'] not in required]
                 for backup in to_delete:
                     if self.delete_backup(backup['path']):
                         result[db_name] = result.get(db_name, 0) + 1
@@ -551,10 +762,11 @@ class DatabaseBackupService:
                 
                 # Оставляем последние keep_count бэкапов
                 to_keep = db_backups[-keep_count:] if len(db_backups) > keep_count else []
+                required = {b['base'] for b in db_backups if b.get('base')}
                 to_delete = []
                 
                 for backup in db_backups:
-                    if backup in to_keep:
+                    if backup in to_keep or backup['path'] in required:
                         continue
                     
                     backup_date = datetime.fromisoformat(backup['created_at'])
@@ -641,13 +853,15 @@ def _run_backup_job(backup_service: 'DatabaseBackupService', backup_config: dict
 
     max_retries = backup_config.get('MAX_RETRIES', 3)
     keep_last_n = backup_config.get('KEEP_LAST_N', 5)
+    full_every_n = backup_config.get('FULL_EVERY_N')
     try:
         result = backup_service.create_backup(
             include_app=include_app,
             include_ai=include_ai,
             include_bots=include_bots,
             max_retries=max_retries,
-            keep_last_n=keep_last_n
+            keep_last_n=keep_last_n,
+            full_every_n=full_every_n
         )
     except Exception as exc:
         backup_logger.exception(f"[Backup] Ошибка выполнения резервного копирования: {exc}")
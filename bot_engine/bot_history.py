@@ -69,18 +69,27 @@ class BotHistoryManager:
         # Создаем директорию data если её нет
         os.makedirs('data', exist_ok=True)
         
-        # Инициализируем реляционную БД для всех данных AI
-        self.ai_db = None
-        try:
-            from bot_engine.ai.ai_database import get_ai_database
-            self.ai_db = get_ai_database()
-            logger.info("✅ AI Database подключена в BotHistoryManager")
-        except Exception as e:
-            pass
+        # Реляционная БД для всех данных AI подключается при первом обращении (self.ai_db):
+        # модуль импортируется при старте bots.py, а bot_engine.ai там нужен не сразу
+        self._ai_db = None
+        self._ai_db_loaded = False
         
         # Загружаем историю из файла
         self._load_history()
     
+    @property
+    def ai_db(self):
+        """AIDatabase (None — недоступна); подключается лениво"""
+        if not self._ai_db_loaded:
+            self._ai_db_loaded = True
+            try:
+                from bot_engine.ai.ai_database import get_ai_database
+                self._ai_db = get_ai_database()
+                logger.info("✅ AI Database подключена в BotHistoryManager")
+            except Exception as e:
+                pass
+        return self._ai_db
+    
     def _load_history(self):
         """Загружает историю из файла"""
         try:
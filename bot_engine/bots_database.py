@@ -93,6 +93,8 @@ except ImportError:
     load_sql_file = None
     execute_sql_string = None
 
+from bot_engine.recent_closures import notify_bot_closure
+
 logger = logging.getLogger('Bots.Database')
 
 # Троттлинг лога "Таймфрейм загружен из БД" — не чаще раза в 60 с на таймфрейм (убирает спам при загрузке свечей)
@@ -156,21 +158,12 @@ class BotsDatabase:
                             os.remove(_p)
                         except OSError:
                             pass
-                backup_dir = _get_project_root() / 'data' / 'backups'
-                if backup_dir.exists():
-                    sql_backups = sorted(
-                        [f for f in backup_dir.glob("bots_data_*.sql") if f.is_file() and f.stat().st_size > 0],
-                        key=lambda f: f.stat().st_mtime,
-                        reverse=True
-                    )
-                    if sql_backups:
-                        latest_sql = str(sql_backups[0])
-                        with open(latest_sql, 'r', encoding='utf-8') as _f:
-                            _sql = _f.read()
-                        _conn = sqlite3.connect(self.db_path)
-                        _conn.executescript(_sql)
-                        _conn.close()
-                        logger.info(f"✅ БД восстановлена из SQL-бэкапа: {latest_sql}")
+                # Самый свежий целостный бэкап любого формата (.db.gz/.delta.gz, старые .sql/.db)
+                for _b in self.list_backups():
+                    if self._check_backup_integrity(_b['path']):
+                        self._get_backup_service().restore_to_file(_b['path'], self.db_path)
+                        logger.info(f"✅ БД восстановлена из резервной копии: {_b['path']}")
+                        break
                 # Если бэкапов не было — файла нет, _init_database() создаст пустую БД ниже
             except Exception as _e:
                 logger.warning(f"⚠️ Ошибка отложенного ремонта: {_e}")
@@ -186,7 +179,7 @@ class BotsDatabase:
                     logger.info(f"📦 Автовосстановление БД из {_backup_path} (после перезапуска)...")
                     valid_list = [b for b in self.list_backups() if self._check_backup_integrity(b['path'])]
                     chosen_path = _backup_path if self._check_backup_integrity(_backup_path) else (valid_list[0]['path'] if valid_list else _backup_path)
-                    shutil.copy2(chosen_path, self.db_path)
+                    self._get_backup_service().restore_to_file(chosen_path, self.db_path)
                     for _suffix in ('-wal', '-shm'):
                         _f = self.db_path + _suffix
                         if os.path.exists(_f):
@@ -198,7 +191,7 @@ class BotsDatabase:
                         for b in valid_list:
                             if b['path'] == chosen_path:
                                 continue
-                            shutil.copy2(b['path'], self.db_path)
+                            self._get_backup_service().restore_to_file(b['path'], self.db_path)
                             for _s in ('-wal', '-shm'):
                                 _f2 = self.db_path + _s
                                 if os.path.exists(_f2):
@@ -5737,6 +5730,9 @@ class BotsDatabase:
                             """, (exit_price, exit_time, exit_timestamp, pnl, roi, status, close_reason,
                                   exit_rsi, exit_trend, is_successful, now, existing['id']))
                             conn.commit()
+                            notify_bot_closure({'id': existing['id'], 'symbol': symbol, 'status': status, 'pnl': pnl,
+                                                'exit_time': exit_time, 'exit_timestamp': exit_timestamp,
+                                                'close_reason': close_reason, 'is_simulated': is_simulated})
                             return existing['id']
                     
                     # Доп. проверка на дубликат по (symbol, exit_timestamp): одна и та же сделка могла прийти из биржи и от бота с разным entry_timestamp
@@ -5822,7 +5818,11 @@ class BotsDatabase:
                             logger.warning(f"⚠️ Ошибка очистки bot_trades_history: {cleanup_error}")
                     
                     conn.commit()
-                    return cursor.lastrowid
+                    trade_id = cursor.lastrowid
+                    notify_bot_closure({'id': trade_id, 'symbol': symbol, 'status': status, 'pnl': pnl,
+                                        'exit_time': exit_time, 'exit_timestamp': exit_timestamp,
+                                        'close_reason': close_reason, 'is_simulated': is_simulated})
+                    return trade_id
             except sqlite3.OperationalError as e:
                 err_str = str(e).lower()
                 if ("locked" in err_str or "database is locked" in err_str) and save_attempt < max_save_retries - 1:
@@ -5842,7 +5842,8 @@ class BotsDatabase:
                               decision_source: Optional[str] = None,
                               limit: Optional[int] = None,
                               offset: int = 0,
-                              days_back: Optional[int] = None) -> List[Dict[str, Any]]:
+                              days_back: Optional[int] = None,
+                              after_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Загружает историю сделок ботов из БД
         
@@ -5854,6 +5855,7 @@ class BotsDatabase:
             limit: Максимальное количество записей
             offset: Смещение для пагинации
             days_back: Только сделки за последние N дней (по exit_timestamp для CLOSED, иначе по entry_timestamp)
+            after_id: Только сделки с id больше after_id, по возрастанию id (постраничное чтение по курсору)
         
         Returns:
             Список словарей с данными сделок
@@ -5895,9 +5897,15 @@ class BotsDatabase:
                     params.append(since_sec)
                     params.append(since_ms)
                 
+                if after_id is not None:
+                    query += " AND id > ?"
+                    params.append(int(after_id))
+                
                 # ✅ КРИТИЧНО: Для закрытых сделок сортируем по exit_timestamp (времени закрытия)
                 # чтобы получить самые последние закрытые сделки
-                if status == 'CLOSED':
+                if after_id is not None:
+                    query += " ORDER BY id"
+                elif status == 'CLOSED':
                     query += " ORDER BY exit_timestamp DESC, entry_timestamp DESC, created_at DESC"
                 else:
                     # Для открытых сделок сортируем по времени входа
@@ -5962,6 +5970,68 @@ class BotsDatabase:
             pass
             return []
     
+    def get_recent_closed_trades_by_symbol(self, per_symbol: int = 20) -> List[Dict[str, Any]]:
+        """
+        Последние per_symbol закрытых сделок каждого символа одним запросом
+        (для индекса последних закрытий, см. bot_engine/recent_closures.py)
+        
+        Returns:
+            Список словарей (id, symbol, pnl, exit_time, exit_timestamp, close_reason, is_simulated, status)
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT id, symbol, pnl, exit_time, exit_timestamp, close_reason, is_simulated, status
+                    FROM (
+                        SELECT id, symbol, pnl, exit_time, exit_timestamp, close_reason, is_simulated, status,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY symbol
+                                   ORDER BY exit_timestamp DESC, entry_timestamp DESC, created_at DESC
+                               ) AS rn
+                        FROM bot_trades_history
+                        WHERE status = 'CLOSED'
+                    )
+                    WHERE rn <= ?
+                """, (max(1, int(per_symbol)),))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки последних закрытых сделок: {e}")
+            return []
+    
+    def get_max_trade_history_id(self) -> int:
+        """Наибольший id в bot_trades_history (0 — таблица пуста)"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT MAX(id) FROM bot_trades_history")
+                row = cursor.fetchone()
+                return int(row[0] or 0) if row else 0
+        except Exception as e:
+            logger.error(f"❌ Ошибка чтения максимального id истории сделок: {e}")
+            return 0
+    
+    def get_closed_trades_after_id(self, last_id: int = 0) -> List[Dict[str, Any]]:
+        """
+        Закрытые сделки с id больше last_id в порядке добавления (инкрементальное чтение по курсору)
+        
+        Returns:
+            Список словарей в формате get_recent_closed_trades_by_symbol
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT id, symbol, pnl, exit_time, exit_timestamp, close_reason, is_simulated, status
+                    FROM bot_trades_history
+                    WHERE id > ? AND status = 'CLOSED'
+                    ORDER BY id
+                """, (int(last_id or 0),))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"❌ Ошибка инкрементальной загрузки закрытых сделок: {e}")
+            return []
+    
     # ==================== МЕТОДЫ МИГРАЦИИ ====================
     
     def _is_migration_needed(self) -> bool:
@@ -6389,12 +6459,22 @@ class BotsDatabase:
             logger.error(f"❌ Ошибка получения статистики БД: {e}")
             return {}
     
+    def _get_backup_service(self):
+        """Сервис бэкапов над data/backups (форматы .db.gz/.delta.gz и старые .sql/.db)"""
+        from bot_engine.backup_service import DatabaseBackupService
+        return DatabaseBackupService(str(_get_project_root() / 'data' / 'backups'))
+
     def _check_backup_integrity(self, backup_path: str) -> bool:
-        """Проверяет целостность бэкапа: для .sql — файл непустой; для .db — PRAGMA integrity_check."""
+        """
+        Проверяет целостность бэкапа: для .sql — файл непустой; для .db.gz/.delta.gz — проверка снимка
+        при создании и наличие полного бэкапа цепочки; для .db — PRAGMA integrity_check.
+        """
         if not backup_path or not os.path.exists(backup_path):
             return False
         if backup_path.endswith('.sql'):
             return os.path.getsize(backup_path) > 0
+        if backup_path.endswith('.gz'):
+            return self._get_backup_service()._check_backup_integrity(backup_path)[0]
         try:
             conn = sqlite3.connect(backup_path, timeout=5.0)
             cursor = conn.cursor()
@@ -6407,46 +6487,16 @@ class BotsDatabase:
 
     def list_backups(self) -> List[Dict[str, Any]]:
         """
-        Список доступных резервных копий БД из data/backups.
+        Список доступных резервных копий БД из data/backups (новые первыми):
+        полные .db.gz, разностные .delta.gz и старые .sql/.db.
         
         Returns:
             Список словарей с информацией о резервных копиях
         """
-        backups = []
         try:
-            backup_dir = _get_project_root() / 'data' / 'backups'
-            if not backup_dir.exists():
-                return backups
-            
-            for filename in os.listdir(backup_dir):
-                if not filename.startswith("bots_data_"):
-                    continue
-                is_sql = filename.endswith(".sql")
-                if not is_sql and (not filename.endswith(".db") or filename.count(".db") != 1 or "-wal" in filename or "-shm" in filename):
-                    continue
-                backup_path = os.path.join(backup_dir, filename)
-                try:
-                    file_size = os.path.getsize(backup_path)
-                    if is_sql:
-                        timestamp_str = filename.replace("bots_data_", "").replace(".sql", "")
-                    else:
-                        timestamp_str = filename.replace("bots_data_", "").replace(".db", "")
-                    try:
-                        backup_time = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-                    except Exception:
-                        backup_time = datetime.fromtimestamp(os.path.getmtime(backup_path))
-                    backups.append({
-                        'path': backup_path,
-                        'filename': filename,
-                        'size_mb': file_size / 1024 / 1024,
-                        'created_at': backup_time.isoformat(),
-                        'timestamp': timestamp_str
-                    })
-                except Exception:
-                    pass
-            
-            backups.sort(key=lambda x: x['created_at'], reverse=True)
-            return backups
+            backups = self._get_backup_service().list_backups(db_name='bots_data', check_integrity=False)
+            # bots_data_corrupted_* — архив повреждённой БД, не резервная копия
+            return [b for b in backups if b.get('db_name') == 'bots_data']
         except Exception as e:
             logger.error(f"❌ Ошибка получения списка резервных копий: {e}")
             return []
@@ -6510,20 +6560,11 @@ class BotsDatabase:
                     _remove_safe(wal_file)
                     _remove_safe(shm_file)
                     _remove_safe(self.db_path)
-                    if backup_path.endswith('.sql'):
-                        with open(backup_path, 'r', encoding='utf-8') as f:
-                            sql_dump = f.read()
-                        conn = sqlite3.connect(self.db_path)
-                        conn.executescript(sql_dump)
-                        conn.close()
-                        restore_ok = True
-                        break
-                    else:
-                        shutil.copy2(backup_path, self.db_path)
-                        _remove_safe(wal_file)
-                        _remove_safe(shm_file)
-                        restore_ok = True
-                        break
+                    self._get_backup_service().restore_to_file(backup_path, self.db_path)
+                    _remove_safe(wal_file)
+                    _remove_safe(shm_file)
+                    restore_ok = True
+                    break
                 except OSError as copy_err:
                     if _file_in_use(copy_err):
                         if restore_attempt < max_restore_retries - 1:
@@ -0,0 +1,481 @@
+"""
+Передача свечей из bots.py в ai.py через именованную shared memory.
+
+bots.py после каждой загрузки свечей публикует их по таймфреймам в сегменты
+данных infobot_candles_<tf>_<gen>; текущее поколение gen записано в маленьком
+сегменте-указателе с постоянным именем infobot_candles_<tf>. ai.py читает
+поколение из указателя, подключается к сегменту данных и читает свечи нужной
+монеты без запросов к бирже и без чтения bots_data.db.
+
+Layout указателя: magic, generation (0 — данных ещё нет).
+
+Layout сегмента данных:
+    [header 48 байт][index JSON][padding до 8][float64 матрица (n_rows, 6)]
+    header: magic, seq, index_len, n_rows, published_at_ms, retired
+    index: {symbol: [offset, count]} — строки монеты лежат подряд, по времени.
+
+Согласованность — seqlock: писатель делает seq нечётным на время записи и
+чётным после; читатель повторяет чтение, если seq изменился или нечётный.
+Если новые данные не помещаются, писатель создаёт сегмент следующего поколения,
+переключает на него указатель и помечает старый retired — читатели
+переподключаются. Новое имя нужно Windows: там имя удалённого сегмента занято,
+пока его держит хотя бы один читатель.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('CandlesShm')
+
+CANDLE_FIELDS: Tuple[str, ...] = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+SEGMENT_PREFIX = 'infobot_candles_'
+MAGIC = b'IBCANDL1'
+_HEADER = struct.Struct('<8sQQQQQ')
+POINTER_MAGIC = b'IBCNDPT1'
+_POINTER = struct.Struct('<8sQ')
+_POINTER_SIZE = 64
+_MAX_GENERATION_PROBES = 64
+_SEQ_OFFSET = 8
+_MIN_SEGMENT_SIZE = 1024 * 1024
+_READ_RETRIES = 5
+DEFAULT_MAX_AGE_SEC = 900
+
+_attach_lock = threading.Lock()
+
+
+def segment_name(timeframe: str) -> str:
+    """Имя сегмента-указателя таймфрейма (постоянное)"""
+    return f"{SEGMENT_PREFIX}{timeframe}"
+
+
+def data_segment_name(timeframe: str, generation: int) -> str:
+    return f"{SEGMENT_PREFIX}{timeframe}_{generation}"
+
+
+def _data_offset(index_len: int) -> int:
+    offset = _HEADER.size + index_len
+    return (offset + 7) & ~7
+
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Подключается к чужому сегменту, не передавая его resource_tracker'у (иначе он удалит сегмент при выходе)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Python < 3.13: параметра track нет — на время подключения отключаем регистрацию
+    try:
+        from multiprocessing import resource_tracker
+    except ImportError:
+        return shared_memory.SharedMemory(name=name)
+    with _attach_lock:
+        original_register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = original_register
+
+
+def _read_seq(buf) -> int:
+    return struct.unpack_from('<Q', buf, _SEQ_OFFSET)[0]
+
+
+def _read_generation(pointer: shared_memory.SharedMemory) -> int:
+    magic, generation = _POINTER.unpack_from(pointer.buf, 0)
+    return generation if magic == POINTER_MAGIC else 0
+
+
+class CandlesShmPublisher:
+    """Публикация свечей (процесс bots.py): указатель и сегмент данных на таймфрейм."""
+
+    def __init__(self):
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._pointers: Dict[str, shared_memory.SharedMemory] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _pointer(self, timeframe: str) -> shared_memory.SharedMemory:
+        pointer = self._pointers.get(timeframe)
+        if pointer is not None:
+            return pointer
+        name = segment_name(timeframe)
+        try:
+            pointer = shared_memory.SharedMemory(name=name, create=True, size=_POINTER_SIZE)
+            _POINTER.pack_into(pointer.buf, 0, POINTER_MAGIC, 0)
+        except FileExistsError:
+            # Остался от упавшего процесса bots.py (на Windows — ещё открыт читателями):
+            # используем его, поколения продолжаются — подключённые читатели видят переключение
+            pointer = shared_memory.SharedMemory(name=name)
+            if pointer.size < _POINTER.size:
+                pointer.close()
+                raise
+            if bytes(pointer.buf[:8]) != POINTER_MAGIC:
+                _POINTER.pack_into(pointer.buf, 0, POINTER_MAGIC, 0)
+        self._pointers[timeframe] = pointer
+        self._generations[timeframe] = _read_generation(pointer)
+        return pointer
+
+    def _ensure_segment(self, timeframe: str, required: int) -> Tuple[shared_memory.SharedMemory, Optional[shared_memory.SharedMemory]]:
+        """
+        Сегмент данных не меньше required байт. Возвращает (сегмент, старый сегмент) —
+        старый нужно пометить retired после переключения указателя на новый.
+        """
+        shm = self._segments.get(timeframe)
+        if shm is not None and shm.size >= required:
+            return shm, None
+
+        self._pointer(timeframe)
+        generation = self._generations.get(timeframe, 0)
+        # Старый сегмент мал: версия продолжается с прежней
+        seq = _read_seq(shm.buf) if shm is not None else 0
+        seq += seq % 2
+        if shm is None and generation:
+            # Указатель остался от упавшего bots.py: его сегмент данных отключаем от читателей
+            seq = max(seq, self._retire_stale(data_segment_name(timeframe, generation)))
+        size = max(_MIN_SEGMENT_SIZE, int(required * 1.5))
+        for _ in range(_MAX_GENERATION_PROBES):
+            generation += 1
+            name = data_segment_name(timeframe, generation)
+            try:
+                new_shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+                break
+            except FileExistsError:
+                # Имя занято (удалённый, но ещё открытый на Windows сегмент) — следующее поколение
+                seq = max(seq, self._retire_stale(name))
+        else:
+            raise FileExistsError(f"нет свободного имени сегмента свечей для {timeframe}")
+        _HEADER.pack_into(new_shm.buf, 0, MAGIC, seq, 0, 0, 0, 0)
+        self._segments[timeframe] = new_shm
+        self._generations[timeframe] = generation
+        return new_shm, shm
+
+    @classmethod
+    def _retire_stale(cls, name: str) -> int:
+        """Помечает retired и удаляет чужой сегмент данных по имени. Возвращает его последнюю версию (0 — нет)."""
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+        except (FileNotFoundError, OSError, ValueError):
+            return 0
+        if stale.size >= _HEADER.size and bytes(stale.buf[:8]) == MAGIC:
+            return cls._retire(stale)
+        stale.close()
+        try:
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        return 0
+
+    @staticmethod
+    def _retire(shm: shared_memory.SharedMemory) -> int:
+        """Помечает сегмент retired (читатели отключаются от него) и удаляет. Возвращает последнюю версию."""
+        seq = _read_seq(shm.buf)
+        seq += 2 - seq % 2
+        _HEADER.pack_into(shm.buf, 0, MAGIC, seq, 0, 0, 0, 1)
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+        return seq
+
+    def publish(self, timeframe: str, candles_by_symbol: Dict[str, List[Dict[str, Any]]]) -> int:
+        """
+        Публикует свечи таймфрейма. Возвращает новую версию (seq) сегмента.
+
+        Args:
+            timeframe: таймфрейм ('1m', '6h', ...)
+            candles_by_symbol: {symbol: [candle, ...]}
+        """
+        index: Dict[str, List[int]] = {}
+        blocks = []
+        total = 0
+        for symbol, candles in candles_by_symbol.items():
+            if not candles:
+                continue
+            rows = sorted(
+                ([float(c.get(field, 0) or 0) for field in CANDLE_FIELDS] for c in candles if isinstance(c, dict)),
+                key=lambda row: row[0],
+            )
+            if not rows:
+                continue
+            index[symbol] = [total, len(rows)]
+            blocks.append(rows)
+            total += len(rows)
+
+        index_bytes = json.dumps(index, separators=(',', ':')).encode('utf-8')
+        data_offset = _data_offset(len(index_bytes))
+        matrix_bytes = total * len(CANDLE_FIELDS) * 8
+
+        with self._lock:
+            shm, old_shm = self._ensure_segment(timeframe, data_offset + matrix_bytes)
+            buf = shm.buf
+            seq = _read_seq(buf) + 1  # нечётный — запись в процессе
+            struct.pack_into('<Q', buf, _SEQ_OFFSET, seq)
+
+            buf[_HEADER.size:_HEADER.size + len(index_bytes)] = index_bytes
+            if total:
+                matrix = np.ndarray((total, len(CANDLE_FIELDS)), dtype=np.float64, buffer=buf, offset=data_offset)
+                offset = 0
+                for rows in blocks:
+                    matrix[offset:offset + len(rows)] = rows
+                    offset += len(rows)
+                del matrix
+
+            _HEADER.pack_into(buf, 0, MAGIC, seq + 1, len(index_bytes), total, int(time.time() * 1000), 0)
+            if old_shm is not None or _read_generation(self._pointers[timeframe]) != self._generations[timeframe]:
+                # Указатель переключается на заполненный сегмент, затем старый отключает читателей
+                _POINTER.pack_into(self._pointers[timeframe].buf, 0, POINTER_MAGIC, self._generations[timeframe])
+                if old_shm is not None:
+                    self._retire(old_shm)
+            return seq + 1
+
+    def publish_candles_cache(self, candles_cache: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Публикует кэш в формате load_all_coins_candles_fast: {symbol: {timeframe: {'candles': [...]}}}.
+
+        Returns:
+            {timeframe: количество монет}
+        """
+        by_timeframe: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for symbol, tf_data in (candles_cache or {}).items():
+            if not isinstance(tf_data, dict):
+                continue
+            for timeframe, candle_data in tf_data.items():
+                candles = candle_data.get('candles') if isinstance(candle_data, dict) else None
+                if candles:
+                    by_timeframe.setdefault(timeframe, {})[symbol] = candles
+
+        published = {}
+        for timeframe, candles_by_symbol in by_timeframe.items():
+            self.publish(timeframe, candles_by_symbol)
+            published[timeframe] = len(candles_by_symbol)
+        return published
+
+    def close(self) -> None:
+        """Удаляет все сегменты (при остановке bots.py)."""
+        with self._lock:
+            for shm in self._segments.values():
+                self._retire(shm)
+            self._segments.clear()
+            for pointer in self._pointers.values():
+                pointer.close()
+                try:
+                    pointer.unlink()
+                except FileNotFoundError:
+                    pass
+            self._pointers.clear()
+            self._generations.clear()
+
+
+class CandlesShmReader:
+    """Чтение свечей из сегментов bots.py (процесс ai.py). Сегменты не изменяет."""
+
+    def __init__(self, max_age_sec: float = DEFAULT_MAX_AGE_SEC):
+        self.max_age_sec = max_age_sec
+        # {timeframe: (generation, сегмент данных)}
+        self._segments: Dict[str, Tuple[int, shared_memory.SharedMemory]] = {}
+        self._pointers: Dict[str, shared_memory.SharedMemory] = {}
+        self._index_cache: Dict[str, Tuple[int, Dict[str, List[int]]]] = {}
+        self._lock = threading.Lock()
+
+    def _detach(self, timeframe: str, pointer: bool = True) -> None:
+        cached = self._segments.pop(timeframe, None)
+        if cached is not None:
+            cached[1].close()
+        self._index_cache.pop(timeframe, None)
+        if pointer:
+            shm = self._pointers.pop(timeframe, None)
+            if shm is not None:
+                shm.close()
+
+    def _segment(self, timeframe: str, reattach: bool = False) -> Optional[shared_memory.SharedMemory]:
+        """
+        Сегмент данных текущего поколения. reattach — заново подключиться и к указателю
+        (после retired/устаревшего снимка: указатель мог быть пересоздан новым bots.py).
+        """
+        if reattach:
+            self._detach(timeframe)
+        pointer = self._pointers.get(timeframe)
+        if pointer is None:
+            try:
+                pointer = _attach_segment(segment_name(timeframe))
+            except (FileNotFoundError, OSError, ValueError):
+                return None
+            if pointer.size < _POINTER.size or bytes(pointer.buf[:8]) != POINTER_MAGIC:
+                pointer.close()
+                return None
+            self._pointers[timeframe] = pointer
+        generation = _read_generation(pointer)
+        if not generation:
+            return None
+        cached = self._segments.get(timeframe)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        self._detach(timeframe, pointer=False)
+        try:
+            shm = _attach_segment(data_segment_name(timeframe, generation))
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        if shm.size < _HEADER.size or bytes(shm.buf[:8]) != MAGIC:
+            shm.close()
+            return None
+        self._segments[timeframe] = (generation, shm)
+        return shm
+
+    def _snapshot(self, timeframe: str, symbols: Optional[List[str]], max_candles: int) -> Optional[Tuple[int, Dict[str, np.ndarray]]]:
+        """Согласованный снимок строк по монетам: (version, {symbol: matrix_copy})."""
+        with self._lock:
+            shm = self._segment(timeframe)
+            reattached = False
+            for _ in range(_READ_RETRIES):
+                if shm is None:
+                    return None
+                buf = shm.buf
+                magic, seq, index_len, n_rows, published_at_ms, retired = _HEADER.unpack_from(buf, 0)
+                if retired:
+                    shm = self._segment(timeframe, reattach=True)
+                    continue
+                if seq == 0 or seq % 2:
+                    time.sleep(0.001)
+                    continue
+                if self.max_age_sec and time.time() - published_at_ms / 1000.0 > self.max_age_sec:
+                    # Старый снимок: возможно, держим указатель упавшего bots.py, а под тем же
+                    # именем уже новый — переподключаемся по имени один раз
+                    if reattached:
+                        return None
+                    shm = self._segment(timeframe, reattach=True)
+                    reattached = True
+                    continue
+
+                cached = self._index_cache.get(timeframe)
+                if cached is not None and cached[0] == seq:
+                    index = cached[1]
+                else:
+                    try:
+                        index = json.loads(bytes(buf[_HEADER.size:_HEADER.size + index_len]))
+                    except ValueError:
+                        time.sleep(0.001)
+                        continue
+
+                matrix = np.ndarray((n_rows, len(CANDLE_FIELDS)), dtype=np.float64,
+                                    buffer=buf, offset=_data_offset(index_len))
+                result = {}
+                for symbol in (symbols if symbols is not None else index.keys()):
+                    position = index.get(symbol)
+                    if not position:
+                        continue
+                    offset, count = position
+                    if max_candles and count > max_candles:
+                        offset, count = offset + count - max_candles, max_candles
+                    result[symbol] = matrix[offset:offset + count].copy()
+                del matrix
+
+                if _read_seq(buf) == seq:
+                    self._index_cache[timeframe] = (seq, index)
+                    return seq, result
+            return None
+
+    def version(self, timeframe: str) -> Optional[int]:
+        """Текущая версия данных таймфрейма (меняется при каждой публикации) или None."""
+        with self._lock:
+            shm = self._segment(timeframe)
+            if shm is not None and _HEADER.unpack_from(shm.buf, 0)[5]:
+                shm = self._segment(timeframe, reattach=True)
+            if shm is None:
+                return None
+            seq = _read_seq(shm.buf)
+            return seq if seq and seq % 2 == 0 else None
+
+    def get_matrix(self, symbol: str, timeframe: str, max_candles: int = 0) -> Optional[np.ndarray]:
+        """Свечи монеты матрицей (count, 6) в порядке CANDLE_FIELDS или None."""
+        snapshot = self._snapshot(timeframe, [symbol], max_candles)
+        if not snapshot:
+            return None
+        return snapshot[1].get(symbol)
+
+    def get_candles(self, symbol: str, timeframe: str, max_candles: int = 0) -> Optional[List[Dict[str, Any]]]:
+        """Свечи монеты в формате [{'time', 'open', 'high', 'low', 'close', 'volume'}] или None."""
+        matrix = self.get_matrix(symbol, timeframe, max_candles)
+        if matrix is None or not len(matrix):
+            return None
+        return _matrix_to_candles(matrix)
+
+    def get_all_candles(self, timeframe: str, max_symbols: int = 0,
+                        max_candles_per_symbol: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+        """Свечи всех опубликованных монет таймфрейма (как AIDatabase.get_all_candles_dict)."""
+        snapshot = self._snapshot(timeframe, None, max_candles_per_symbol)
+        if not snapshot:
+            return {}
+        symbols = sorted(snapshot[1])
+        if max_symbols:
+            symbols = symbols[:max_symbols]
+        return {symbol: _matrix_to_candles(snapshot[1][symbol]) for symbol in symbols}
+
+    def close(self) -> None:
+        with self._lock:
+            for timeframe in list(set(self._segments) | set(self._pointers)):
+                self._detach(timeframe)
+
+
+def _matrix_to_candles(matrix: np.ndarray) -> List[Dict[str, Any]]:
+    candles = []
+    for row in matrix.tolist():
+        candle = dict(zip(CANDLE_FIELDS, row))
+        candle['time'] = int(candle['time'])
+        candles.append(candle)
+    return candles
+
+
+_publisher: Optional[CandlesShmPublisher] = None
+_reader: Optional[CandlesShmReader] = None
+_singleton_lock = threading.Lock()
+
+
+def _shm_enabled() -> bool:
+    try:
+        from bot_engine.config_loader import SystemConfig
+        return bool(getattr(SystemConfig, 'CANDLES_SHARED_MEMORY_ENABLED', True))
+    except Exception:
+        return True
+
+
+def get_candles_publisher() -> Optional[CandlesShmPublisher]:
+    """Публикатор процесса bots.py (сегменты удаляются при выходе) или None, если отключено."""
+    global _publisher
+    if not _shm_enabled():
+        return None
+    with _singleton_lock:
+        if _publisher is None:
+            _publisher = CandlesShmPublisher()
+            atexit.register(_publisher.close)
+        return _publisher
+
+
+def get_candles_reader() -> Optional[CandlesShmReader]:
+    """Читатель для процесса ai.py или None, если отключено."""
+    global _reader
+    if not _shm_enabled():
+        return None
+    with _singleton_lock:
+        if _reader is None:
+            max_age = DEFAULT_MAX_AGE_SEC
+            try:
+                from bot_engine.config_loader import SystemConfig
+                max_age = float(getattr(SystemConfig, 'CANDLES_SHM_MAX_AGE_SEC', DEFAULT_MAX_AGE_SEC))
+            except Exception:
+                pass
+            _reader = CandlesShmReader(max_age_sec=max_age)
+            atexit.register(_reader.close)
+        return _reader
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Инкрементальная синхронизация закрытых PnL с биржи в общую БД (data/app_data.db, таблица closed_pnl).
+
+Раньше app.py каждые 30 секунд и AITrainer перед каждым обучением заново загружали
+историю closed PnL за полтора года (десятки постраничных запросов) и переписывали её в БД.
+ClosedPnlSynchronizer:
+
+- хранит в БД курсор по аккаунту (sync_cursors: до какого момента прочитана биржа,
+  время и id ордера последней закрытой позиции);
+- запрашивает у биржи только окно от курсора (с небольшим перекрытием на запоздавшие записи);
+- добавляет в closed_pnl только новые записи (дедупликация по id ордера биржи), старые не переписывает;
+- сообщает о новых записях подписчикам (subscribe) и индексу последних закрытий.
+
+Потребители в других процессах (AITrainer) читают новые строки closed_pnl по своему курсору
+(read_new / commit_read) и к бирже за историей не обращаются.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('ClosedPnlSync')
+
+DEFAULT_OVERLAP_SEC = 300
+DEFAULT_INITIAL_DAYS = 547  # как period='all' в BybitExchange.get_closed_pnl (лимит Bybit — 2 года)
+
+
+def _exchange_name(exchange) -> str:
+    """BybitExchange -> BYBIT (как ACTIVE_EXCHANGE в колонке exchange)"""
+    name = type(exchange).__name__.upper()
+    return name[:-len('EXCHANGE')] if name.endswith('EXCHANGE') else name
+
+
+def account_key(exchange, exchange_name: Optional[str] = None) -> str:
+    """Ключ аккаунта для курсора: биржа + хэш API-ключа (сам ключ в БД не пишется)"""
+    api_key = getattr(exchange, 'api_key', None) or ''
+    digest = hashlib.sha1(str(api_key).encode('utf-8')).hexdigest()[:12]
+    return f"{exchange_name or _exchange_name(exchange)}:{digest}"
+
+
+class ClosedPnlSynchronizer:
+    """Загрузка новых закрытых PnL аккаунта по курсору, сохранённому в БД"""
+
+    def __init__(self, exchange, db=None, exchange_name: Optional[str] = None,
+                 overlap_sec: Optional[float] = None, initial_days: Optional[int] = None):
+        try:
+            from bot_engine.config_loader import SystemConfig
+        except Exception:
+            SystemConfig = None
+        if db is None:
+            from bot_engine.app_database import get_app_database
+            db = get_app_database()
+        self.exchange = exchange
+        self.db = db
+        self.exchange_name = exchange_name or _exchange_name(exchange)
+        self.account = account_key(exchange, self.exchange_name)
+        self.overlap_ms = int(1000 * (overlap_sec if overlap_sec is not None else
+                                      getattr(SystemConfig, 'CLOSED_PNL_SYNC_OVERLAP_SEC', DEFAULT_OVERLAP_SEC)))
+        self.initial_days = int(initial_days if initial_days is not None else
+                                getattr(SystemConfig, 'CLOSED_PNL_SYNC_INITIAL_DAYS', DEFAULT_INITIAL_DAYS))
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+    @property
+    def cursor_name(self) -> str:
+        return f"closed_pnl:{self.account}"
+
+    def subscribe(self, callback: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """callback(новые записи) после каждой синхронизации, добавившей записи"""
+        self._listeners.append(callback)
+
+    # ==================== ЗАГРУЗКА С БИРЖИ ====================
+
+    def _start_time(self, cursor: Optional[Dict[str, Any]], now_ms: int) -> int:
+        if cursor and cursor.get('timestamp'):
+            return int(cursor['timestamp']) - self.overlap_ms
+        # Курсора ещё нет: продолжаем с последней записи в БД (загруженной до появления курсора)
+        try:
+            latest = self.db.get_latest_closed_pnl_timestamp(exchange=self.exchange_name)
+        except Exception:
+            latest = None
+        if latest:
+            return int(latest) - self.overlap_ms
+        return now_ms - self.initial_days * 24 * 60 * 60 * 1000
+
+    def _fetch(self, start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+        fetch_since = getattr(self.exchange, 'get_closed_pnl_since', None)
+        if callable(fetch_since):
+            return fetch_since(start_ms, end_ms)
+        # Биржа без инкрементального метода — окно через period='custom'
+        records = self.exchange.get_closed_pnl(sort_by='time', period='custom', start_date=start_ms, end_date=end_ms)
+        return sorted(records or [], key=lambda r: r.get('close_timestamp', 0))
+
+    def sync(self) -> List[Dict[str, Any]]:
+        """
+        Загружает закрытые PnL после курсора и сохраняет новые в БД.
+
+        Returns:
+            Добавленные записи (пустой список — новых нет или ошибка; курсор при ошибке
+            загрузки или записи в БД не двигается — окно будет запрошено повторно)
+        """
+        with self._lock:
+            now_ms = int(time.time() * 1000)
+            cursor = self.db.get_sync_cursor(self.cursor_name)
+            start_ms = self._start_time(cursor, now_ms)
+            try:
+                records = self._fetch(start_ms, now_ms)
+            except Exception as e:
+                logger.warning(f"⚠️ Синхронизация closed PnL ({self.account}) не удалась, курсор не сдвинут: {e}")
+                return []
+
+            try:
+                new_records = self.db.insert_new_closed_pnl(records, exchange=self.exchange_name) if records else []
+            except Exception as e:
+                logger.warning(f"⚠️ Закрытые PnL ({self.account}) не сохранены в БД, курсор не сдвинут: {e}")
+                return []
+
+            # Окно до now_ms прочитано целиком: следующий запрос начнётся отсюда (минус перекрытие),
+            # даже если закрытий давно не было
+            previous = cursor or {}
+            last = records[-1] if records else None
+            cursor = {
+                'timestamp': now_ms,
+                'last_close_timestamp': last.get('close_timestamp') if last else previous.get('last_close_timestamp'),
+                'order_id': last.get('order_id') if last else previous.get('order_id'),
+            }
+            self.db.save_sync_cursor(self.cursor_name, cursor)
+
+        if new_records:
+            logger.info(f"📥 Closed PnL ({self.account}): новых записей {len(new_records)} из {len(records)} полученных")
+            self._notify(new_records)
+        return new_records
+
+    def _notify(self, records: List[Dict[str, Any]]) -> None:
+        try:
+            from bot_engine.recent_closures import notify_exchange_closures
+            # id строк closed_pnl не относится к курсору индекса (closed_pnl_history) — не передаём
+            notify_exchange_closures([{k: v for k, v in r.items() if k != 'id'} for r in records])
+        except Exception:
+            pass
+        for callback in list(self._listeners):
+            try:
+                callback(records)
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка подписчика closed PnL: {e}")
+
+    # ==================== ЧТЕНИЕ ПОТРЕБИТЕЛЯМИ ====================
+
+    def read_new(self, consumer: str, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Записи closed_pnl, которых потребитель ещё не читал.
+
+        Returns:
+            (записи, id для commit_read) — курсор сдвигается только после commit_read,
+            чтобы при ошибке обработки записи прочитались снова
+        """
+        state = self.db.get_sync_cursor(f"{consumer}:{self.account}") or {}
+        last_id = int(state.get('last_id') or 0)
+        records = self.db.load_closed_pnl_after_id(last_id, exchange=self.exchange_name, limit=limit)
+        if records:
+            last_id = max(int(r.get('id') or 0) for r in records)
+        return records, last_id
+
+    def commit_read(self, consumer: str, last_id: int) -> None:
+        self.db.save_sync_cursor(f"{consumer}:{self.account}", {'last_id': int(last_id)})
+
+
+_synchronizers: Dict[Tuple[int, str], ClosedPnlSynchronizer] = {}
+_synchronizers_lock = threading.Lock()
+
+
+def get_closed_pnl_synchronizer(exchange, exchange_name: Optional[str] = None) -> ClosedPnlSynchronizer:
+    """Синхронизатор аккаунта (один на объект биржи в процессе)"""
+    key = (id(exchange), exchange_name or _exchange_name(exchange))
+    with _synchronizers_lock:
+        synchronizer = _synchronizers.get(key)
+        if synchronizer is None or synchronizer.exchange is not exchange:
+            synchronizer = ClosedPnlSynchronizer(exchange, exchange_name=exchange_name)
+            _synchronizers[key] = synchronizer
+        return synchronizer
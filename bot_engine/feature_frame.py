@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Общий на раунд набор признаков монеты (symbol, timeframe) для фильтров входа.
+
+Свечи раунда превращаются в цены закрытия и историю RSI один раз, а не в каждом фильтре
+(расчёт RSI, временной фильтр RSI, ExitScam, зрелость, Enhanced RSI):
+
+    frame = get_feature_frame(symbol, timeframe, candles)
+    frame.rsi()               # то же, что calculate_rsi(closes, 14)
+    frame.rsi_history()       # то же, что calculate_rsi_history(closes, 14) — НЕ изменять
+    frame.rsi_history(window=min_candles)  # история по последним N свечам (зрелость)
+    frame.ohlcv_frame         # DataFrame open/high/low/close/volume из колонок (SMC)
+
+Поля считаются лениво — только те, что запросил какой-либо фильтр, и один раз.
+Кадр привязан к конкретному списку свечей: если в кэше появились новые свечи
+(другой список, другая длина или изменилась последняя свеча), кадр строится заново.
+clear_feature_frames() в начале раунда сбрасывает кадры прошлого раунда.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .utils.rsi_utils import calculate_rsi_history
+
+
+class FeatureFrame:
+    """Признаки одной монеты на одном таймфрейме, рассчитываемые по требованию"""
+
+    def __init__(self, symbol: Optional[str], timeframe: Optional[str], candles: List[dict]):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.candles = candles
+        self._signature = self._candles_signature(candles)
+        self._cache: Dict[Any, Any] = {}
+
+    @staticmethod
+    def _candles_signature(candles) -> Tuple:
+        if not candles:
+            return (0, None, None)
+        last = candles[-1]
+        return (len(candles), last.get('time', last.get('timestamp')), last.get('close'))
+
+    def matches(self, candles) -> bool:
+        """Кадр построен по этому же списку свечей и он не менялся"""
+        return candles is self.candles and self._candles_signature(candles) == self._signature
+
+    def _cached(self, key, compute):
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = compute()
+            self._cache[key] = value
+            return value
+
+    # ==================== ЦЕНЫ ====================
+
+    @property
+    def closes(self) -> List[float]:
+        return self._cached('closes', lambda: [candle['close'] for candle in self.candles])
+
+    @property
+    def closes_array(self):
+        def compute():
+            import numpy as np
+            return np.asarray(self.closes, dtype=float)
+        return self._cached('closes_array', compute)
+
+    @property
+    def ohlcv(self) -> Dict[str, Any]:
+        """Колонки свечей: open/high/low/close/volume -> numpy float64 (общие — НЕ изменять)"""
+        def compute():
+            import numpy as np
+            candles = self.candles
+            return {
+                field: np.fromiter((float(candle.get(field, 0) or 0) for candle in candles), dtype=float, count=len(candles))
+                for field in ('open', 'high', 'low', 'close', 'volume')
+            }
+        return self._cached('ohlcv', compute)
+
+    @property
+    def ohlcv_frame(self):
+        """DataFrame из колонок ohlcv (для детекторов SMC) — строится один раз на кадр, НЕ изменять"""
+        def compute():
+            import pandas as pd
+            return pd.DataFrame(self.ohlcv, copy=False)
+        return self._cached('ohlcv_frame', compute)
+
+    @property
+    def formatted_candles(self) -> List[dict]:
+        """Свечи с float-полями и ключом timestamp (формат bot_engine.indicators)"""
+        return self._cached('formatted_candles', lambda: [
+            {
+                'timestamp': candle.get('time', 0),
+                'open': float(candle.get('open', 0)),
+                'high': float(candle.get('high', 0)),
+                'low': float(candle.get('low', 0)),
+                'close': float(candle.get('close', 0)),
+                'volume': float(candle.get('volume', 0)),
+            }
+            for candle in self.candles
+        ])
+
+    # ==================== RSI ====================
+
+    def rsi_history(self, period: int = 14, window: Optional[int] = None) -> Optional[List[float]]:
+        """История RSI Уайлдера (округление до 0.01) по всем свечам или по последним window"""
+        def compute():
+            closes = self.closes if window is None else self.closes[-window:]
+            return calculate_rsi_history(closes, period)
+        return self._cached(('rsi_history', period, window), compute)
+
+    def rsi(self, period: int = 14) -> Optional[float]:
+        history = self.rsi_history(period)
+        return history[-1] if history else None
+
+    def indicator_rsi_history(self, period: int = 14) -> List[float]:
+        """История RSI без округления (TechnicalIndicators.calculate_rsi_history, для Enhanced RSI)"""
+        def compute():
+            from .indicators import TechnicalIndicators
+            return TechnicalIndicators.calculate_rsi_history(self.formatted_candles, period)
+        return self._cached(('indicator_rsi_history', period), compute)
+
+    def extreme_zone_run(self, oversold: float, overbought: float, period: int = 14) -> int:
+        """Сколько последних свечей подряд RSI в экстремальной зоне (<= oversold или >= overbought)"""
+        def compute():
+            run = 0
+            for value in reversed(self.indicator_rsi_history(period) or []):
+                if value <= oversold or value >= overbought:
+                    run += 1
+                else:
+                    break
+            return run
+        return self._cached(('extreme_zone_run', oversold, overbought, period), compute)
+
+    # ==================== EMA / ATR ====================
+
+    def ema(self, period: int) -> Optional[float]:
+        """EMA по ценам закрытия (первое значение — SMA), как calculations.calculate_ema"""
+        def compute():
+            closes = self.closes
+            if len(closes) < period:
+                return None
+            ema = sum(closes[:period]) / period
+            multiplier = 2 / (period + 1)
+            for price in closes[period:]:
+                ema = (price * multiplier) + (ema * (1 - multiplier))
+            return ema
+        return self._cached(('ema', period), compute)
+
+    def atr(self, period: int = 14) -> Optional[float]:
+        def compute():
+            from .indicators import TechnicalIndicators
+            return TechnicalIndicators.calculate_atr(self.formatted_candles, period)
+        return self._cached(('atr', period), compute)
+
+    # ==================== ИЗМЕНЕНИЯ ЦЕНЫ ====================
+
+    @property
+    def body_percents(self) -> List[Optional[float]]:
+        """Тело каждой свечи в % (|C-O|/O×100); None, если open <= 0"""
+        def compute():
+            result = []
+            for candle in self.candles:
+                open_price = float(candle.get('open', 0) or 0)
+                close_price = float(candle.get('close', 0) or 0)
+                result.append(abs((close_price - open_price) / open_price) * 100 if open_price > 0 else None)
+            return result
+        return self._cached('body_percents', compute)
+
+    def window_change_percent(self, count: int) -> Optional[float]:
+        """Суммарное изменение за последние count свечей: |close последней - open первой| / open первой × 100"""
+        def compute():
+            if count <= 0 or len(self.candles) < count:
+                return None
+            first_open = float(self.candles[-count].get('open', 0) or 0)
+            last_close = float(self.candles[-1].get('close', 0) or 0)
+            if first_open <= 0:
+                return None
+            return abs((last_close - first_open) / first_open) * 100
+        return self._cached(('window_change', count), compute)
+
+    def pct_change(self, candles_back: int) -> Optional[float]:
+        """Изменение цены закрытия за candles_back свечей, % (со знаком)"""
+        def compute():
+            closes = self.closes
+            if candles_back <= 0 or len(closes) < candles_back + 1:
+                return None
+            base = closes[-candles_back - 1]
+            return ((closes[-1] - base) / base) * 100 if base else None
+        return self._cached(('pct_change', candles_back), compute)
+
+
+_frames: Dict[Tuple[str, Optional[str]], FeatureFrame] = {}
+_frames_lock = threading.Lock()
+
+
+def get_feature_frame(symbol: Optional[str], timeframe: Optional[str], candles: List[dict]) -> FeatureFrame:
+    """Кадр признаков раунда для монеты: повторные вызовы с теми же свечами возвращают тот же кадр"""
+    if not symbol:
+        return FeatureFrame(symbol, timeframe, candles)
+    key = (symbol, timeframe)
+    with _frames_lock:
+        frame = _frames.get(key)
+        if frame is not None and frame.matches(candles):
+            return frame
+        frame = FeatureFrame(symbol, timeframe, candles)
+        _frames[key] = frame
+        return frame
+
+
+def clear_feature_frames() -> None:
+    """Сброс кадров прошлого раунда (вызывается в начале раунда расчёта RSI)"""
+    with _frames_lock:
+        _frames.clear()
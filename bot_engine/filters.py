@@ -10,7 +10,7 @@ from .utils.rsi_utils import calculate_rsi_history
 
 logger = logging.getLogger('Filters')
 
-def check_rsi_time_filter(candles, rsi, signal, config, calculate_rsi_history_func=None):
+def check_rsi_time_filter(candles, rsi, signal, config, calculate_rsi_history_func=None, frame=None):
     """
     ГИБРИДНЫЙ ВРЕМЕННОЙ ФИЛЬТР RSI
 
@@ -25,6 +25,7 @@ def check_rsi_time_filter(candles, rsi, signal, config, calculate_rsi_history_fu
         signal: Торговый сигнал ('ENTER_LONG' или 'ENTER_SHORT')
         config: Конфигурация фильтра
         calculate_rsi_history_func: Функция для расчета RSI истории (опционально)
+        frame: FeatureFrame раунда (опционально) — история RSI берётся из него без пересчёта
 
     Returns:
         dict: {'allowed': bool, 'reason': str, 'last_extreme_candles_ago': int, 'calm_candles': int}
@@ -48,9 +49,13 @@ def check_rsi_time_filter(candles, rsi, signal, config, calculate_rsi_history_fu
         if len(candles) < 50:
             return {'allowed': False, 'reason': 'Недостаточно свечей для анализа', 'last_extreme_candles_ago': None, 'calm_candles': 0}
 
-        # Рассчитываем историю RSI
-        closes = [candle['close'] for candle in candles]
-        rsi_history = calc_rsi_hist(closes, 14)
+        # Рассчитываем историю RSI (или берём готовую из кадра признаков раунда)
+        if frame is not None:
+            rsi_history = frame.rsi_history(14)
+            rsi_history = list(rsi_history) if rsi_history else rsi_history  # ниже последний элемент заменяется
+        else:
+            closes = [candle['close'] for candle in candles]
+            rsi_history = calc_rsi_hist(closes, 14)
 
         min_rsi_history = max(rsi_time_filter_candles * 2 + 14, 30)
         if not rsi_history or len(rsi_history) < min_rsi_history:
@@ -197,7 +202,7 @@ def check_rsi_time_filter(candles, rsi, signal, config, calculate_rsi_history_fu
         logger.error(f"[RSI_TIME_FILTER] Ошибка проверки временного фильтра: {e}")
         return {'allowed': False, 'reason': f'Ошибка анализа: {str(e)}', 'last_extreme_candles_ago': None, 'calm_candles': 0}
 
-def check_exit_scam_filter(symbol, coin_data, config, exchange_obj, ensure_exchange_func):
+def check_exit_scam_filter(symbol, coin_data, config, exchange_obj, ensure_exchange_func, frame=None):
     """
     EXIT SCAM ФИЛЬТР
 
@@ -211,6 +216,7 @@ def check_exit_scam_filter(symbol, coin_data, config, exchange_obj, ensure_excha
         config: Конфигурация фильтра
         exchange_obj: Объект биржи
         ensure_exchange_func: Функция проверки инициализации биржи
+        frame: FeatureFrame раунда по тем же свечам (опционально) — проценты тела свечей из него
     """
     try:
         from .config_loader import get_config_value, get_current_timeframe
@@ -247,15 +253,19 @@ def check_exit_scam_filter(symbol, coin_data, config, exchange_obj, ensure_excha
             return False
 
         recent_candles = candles[-exit_scam_candles:]
+        if frame is None or frame.candles is not candles:
+            from .feature_frame import FeatureFrame
+            frame = FeatureFrame(symbol, timeframe, candles)
+        recent_bodies = frame.body_percents[-exit_scam_candles:]
 
         for i, candle in enumerate(recent_candles):
-            open_price = float(candle.get('open', 0) or 0)
-            close_price = float(candle.get('close', 0) or 0)
-            if open_price <= 0:
-                continue
             # % тела свечи = (close-open)/open×100. 100% = цена удвоилась (close=2×open), 0.5% = close=1.005×open. open/close из API биржи.
-            price_change = abs((close_price - open_price) / open_price) * 100
+            price_change = recent_bodies[i]
+            if price_change is None:
+                continue
             if price_change > single_candle_percent:
+                open_price = float(candle.get('open', 0) or 0)
+                close_price = float(candle.get('close', 0) or 0)
                 num_from_end = len(recent_candles) - i
                 candle_label = "последняя" if num_from_end == 1 else f"#{num_from_end} с конца"
                 logger.warning(
@@ -268,8 +278,8 @@ def check_exit_scam_filter(symbol, coin_data, config, exchange_obj, ensure_excha
             multi_candles = recent_candles[-multi_candle_count:]
             first_open = float(multi_candles[0].get('open', 0) or 0)
             last_close = float(multi_candles[-1].get('close', 0) or 0)
-            if first_open > 0:
-                total_change = abs((last_close - first_open) / first_open) * 100
+            total_change = frame.window_change_percent(multi_candle_count)
+            if total_change is not None:
                 if total_change > multi_candle_percent:
                     logger.warning(f"{symbol}: ❌ БЛОКИРОВКА: {multi_candle_count} свечей превысили суммарный лимит {multi_candle_percent}% (было {total_change:.1f}%)")
                     logger.info(f"{symbol}: Первая свеча: {first_open:.4f}, Последняя свеча: {last_close:.4f}")
@@ -2,7 +2,6 @@
 Технические индикаторы для торговых ботов
 """
 import numpy as np
-import pandas as pd
 from typing import List, Optional, Tuple, Dict
 from .bot_config import (
     RSI_PERIOD, EMA_FAST, EMA_SLOW, TREND_CONFIRMATION_BARS,
@@ -8,7 +8,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, replace
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 import math
 import time
 
@@ -312,3 +312,206 @@ def evaluate_protections(
 
     return ProtectionDecision(False, None, state, profit_percent)
 
+
+
+# ==================== ПАКЕТНАЯ ОЦЕНКА ====================
+
+
+def _config_params(config: Dict[str, Any]) -> Tuple[float, ...]:
+    """Параметры защит из конфига — с теми же приведениями, что в evaluate_protections"""
+    max_loss = _safe_float(config.get('max_loss_percent', config.get('stop_loss_percent', 15.0)), 15.0) or 0.0
+    take_profit = _safe_float(config.get('take_profit_percent'), 0.0) or 0.0
+    if 0 < take_profit < 1.0:
+        take_profit = 1.0
+    close_at_profit = 1.0 if config.get('close_at_profit_enabled', True) else 0.0
+    max_hours = _safe_float(config.get('max_position_hours'), 0.0) or 0.0
+    break_even_enabled = 1.0 if bool(config.get('break_even_protection', True)) else 0.0
+    break_even_trigger = _safe_float(
+        config.get('break_even_trigger_percent', config.get('break_even_trigger')), 0.0
+    ) or 0.0
+    if break_even_trigger < 0:
+        break_even_trigger = 0.0
+    if 0 < break_even_trigger < 1.0:
+        break_even_trigger = 1.0
+    activation = _safe_float(config.get('trailing_stop_activation'), 0.0) or 0.0
+    stop_distance = max(0.0, _safe_float(config.get('trailing_stop_distance'), 0.0) or 0.0)
+    take_distance = max(0.0, _safe_float(config.get('trailing_take_distance'), 0.0) or 0.0)
+    update_interval = max(0.0, _safe_float(config.get('trailing_update_interval'), 0.0) or 0.0)
+    return (max_loss, take_profit, close_at_profit, max_hours, break_even_enabled, break_even_trigger,
+            activation, stop_distance, take_distance, update_interval)
+
+
+def _nan(value: Any) -> float:
+    value = _safe_float(value)
+    return math.nan if value is None else value
+
+
+def _none(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+
+def evaluate_protections_batch(
+    current_prices: Sequence[Any],
+    configs: Sequence[Dict[str, Any]],
+    states: Sequence[ProtectionState],
+    realized_pnls: Optional[Sequence[Any]] = None,
+    now_ts: Optional[float] = None,
+) -> List[ProtectionDecision]:
+    """
+    evaluate_protections для многих позиций сразу: правила считаются по столбцам
+    (вход, цена, сторона, параметры конфига, состояние) одним проходом numpy.
+
+    Результат по каждой позиции совпадает с evaluate_protections(current_prices[i], configs[i],
+    states[i], realized_pnls[i], now_ts). Одинаковые объекты конфига разбираются один раз.
+    """
+    import numpy as np
+
+    n = len(states)
+    if n == 0:
+        return []
+    now_ts = now_ts or time.time()
+    if realized_pnls is None:
+        realized_pnls = [0.0] * n
+
+    params_cache: Dict[int, Tuple[float, ...]] = {}
+    params = []
+    for config in configs:
+        key = id(config)
+        if key not in params_cache:
+            params_cache[key] = _config_params(config)
+        params.append(params_cache[key])
+    (max_loss, tp_percent, close_at_profit, max_hours, be_enabled, be_trigger,
+     activation, stop_distance, take_distance, update_interval) = np.array(params, dtype=float).T
+
+    sides = [(state.position_side or '').upper() for state in states]
+    is_long = np.array([side == 'LONG' for side in sides])
+    valid_side = np.array([side in ('LONG', 'SHORT') for side in sides])
+    entry = np.array([_nan(state.entry_price) for state in states])
+    price = np.array([_nan(p) for p in current_prices])
+    entry_time = np.array([_safe_float(state.entry_time) or 0.0 if state.entry_time else 0.0 for state in states])
+    max_profit_in = np.array([_safe_float(state.max_profit_percent) or 0.0 for state in states])
+    be_active_in = np.array([bool(state.break_even_activated) for state in states])
+    be_stop_in = np.array([_nan(state.break_even_stop_price) for state in states])
+    tr_active_in = np.array([bool(state.trailing_active) for state in states])
+    tr_ref_in = np.array([_nan(state.trailing_reference_price) for state in states])
+    tr_stop_in = np.array([_nan(state.trailing_stop_price) for state in states])
+    tr_take_in = np.array([_nan(state.trailing_take_profit_price) for state in states])
+    tr_ts_in = np.array([_safe_float(state.trailing_last_update_ts, 0.0) or 0.0 for state in states])
+    fee = np.array([abs(_safe_float(r, 0.0) or 0.0) for r in realized_pnls])
+    quantity = np.array([_nan(_get_quantity(state)) for state in states])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        valid = valid_side & ~np.isnan(entry) & (entry != 0) & ~np.isnan(price)
+        profit = np.where(is_long, (price - entry) / entry * 100, (entry - price) / entry * 100)
+        profit = np.where(valid, profit, 0.0)
+
+        # 1. Стоп-лосс
+        close_sl = valid & (max_loss > 0) & (profit <= -max_loss)
+        open_ = valid & ~close_sl
+        max_profit = np.where(open_, np.maximum(max_profit_in, profit), max_profit_in)
+
+        # 2. Тейк-профит
+        close_tp = open_ & (close_at_profit > 0) & (tp_percent >= 1.0) & (profit >= tp_percent)
+        open_ &= ~close_tp
+
+        # 3. Время в позиции
+        held_hours = (now_ts - entry_time) / 3600.0
+        close_time = open_ & (max_hours > 0) & (entry_time != 0) & (held_hours >= max_hours)
+        open_ &= ~close_time
+
+        # 4. Безубыток
+        be_on = open_ & (be_enabled > 0) & (be_trigger >= 1.0)
+        be_off = open_ & ~be_on
+        be_active = np.where(be_on, be_active_in | (profit >= be_trigger), np.where(be_off, False, be_active_in))
+        be_calc = be_on & be_active
+        per_coin = np.where(quantity > 0, fee * BREAK_EVEN_FEE_MULTIPLIER / quantity, 0.0)
+        use_offset = (quantity > 0) & (fee > 0) & (per_coin > 0)
+        be_long = np.maximum(np.minimum(entry + per_coin, price), entry)
+        be_short = np.minimum(np.maximum(entry - per_coin, price), entry)
+        be_stop_calc = np.where(use_offset, np.where(is_long, be_long, be_short), entry)
+        be_stop = np.where(be_calc, be_stop_calc, np.where(be_off, np.nan, be_stop_in))
+        close_be = be_calc & (profit <= 0.05) & (profit >= -0.05)
+        open_ &= ~close_be
+
+        # 5. Trailing
+        tr_active = tr_active_in.copy()
+        tr_ref = tr_ref_in.copy()
+        tr_stop = tr_stop_in.copy()
+        tr_take = tr_take_in.copy()
+        tr_ts = tr_ts_in.copy()
+
+        tr_off = open_ & (stop_distance <= 0)
+        tr_active[tr_off] = False
+        tr_ref[tr_off] = np.nan
+        tr_stop[tr_off] = np.nan
+
+        tr_rows = open_ & ~tr_off
+        waiting = tr_rows & (activation > 0) & (profit < activation) & ~tr_active_in
+        tr_ref = np.where(waiting & np.isnan(tr_ref), entry, tr_ref)
+
+        run = tr_rows & ~waiting
+        starting = run & ~tr_active_in
+        ref_base = np.where(np.isnan(tr_ref_in) | (tr_ref_in == 0), entry, tr_ref_in)
+        moved = np.where(is_long, np.maximum(ref_base, price), np.minimum(ref_base, price))
+        reference = np.where(starting, price, moved)
+        tr_active = np.where(run, True, tr_active)
+        tr_ref = np.where(run, reference, tr_ref)
+
+        has_be = ~np.isnan(be_stop)
+        stop_long = np.maximum(reference * (1 - stop_distance / 100.0), entry)
+        stop_long = np.where(has_be, np.maximum(stop_long, be_stop), stop_long)
+        stop_short = np.minimum(reference * (1 + stop_distance / 100.0), entry)
+        stop_short = np.where(has_be, np.minimum(stop_short, be_stop), stop_short)
+        stop_price = np.where(is_long, stop_long, stop_short)
+
+        tolerance = 1e-8
+        prev_none = np.isnan(tr_stop_in)
+        should_update = prev_none | np.where(is_long, stop_price > tr_stop_in + tolerance, stop_price < tr_stop_in - tolerance)
+        can_update = (update_interval <= 0) | ((now_ts - tr_ts_in) >= update_interval)
+        do_update = run & should_update & can_update
+        tr_stop = np.where(do_update | (run & prev_none), stop_price, tr_stop)
+        tr_ts = np.where(do_update, now_ts, tr_ts)
+
+        take_rows = run & (take_distance > 0) & (reference != 0) & ~np.isnan(reference)
+        tp_long = np.maximum(np.maximum(reference * (1 - take_distance / 100.0), entry), stop_price + tolerance)
+        tp_short = np.minimum(np.minimum(reference * (1 + take_distance / 100.0), entry), stop_price - tolerance)
+        tp_price = np.where(is_long, tp_long, tp_short)
+        take_none = np.isnan(tr_take_in)
+        take_better = np.where(is_long, tp_price > tr_take_in + tolerance, tp_price < tr_take_in - tolerance)
+        tr_take = np.where(take_rows & (take_none | take_better), tp_price, tr_take)
+
+        close_tr = run & np.where(is_long, price <= tr_stop, price >= tr_stop)
+
+    decisions: List[ProtectionDecision] = []
+    for i, state in enumerate(states):
+        if not valid[i]:
+            decisions.append(ProtectionDecision(False, None, replace(state), 0.0))
+            continue
+        row_profit = float(profit[i])
+        if close_sl[i]:
+            decisions.append(ProtectionDecision(True, f'STOP_LOSS_{row_profit:.2f}%', replace(state), row_profit))
+            continue
+        new_state = replace(
+            state,
+            max_profit_percent=float(max_profit[i]),
+            break_even_activated=bool(be_active[i]),
+            break_even_stop_price=_none(be_stop[i]),
+            trailing_active=bool(tr_active[i]),
+            trailing_reference_price=_none(tr_ref[i]),
+            trailing_stop_price=_none(tr_stop[i]),
+            trailing_take_profit_price=_none(tr_take[i]),
+            trailing_last_update_ts=float(tr_ts[i]),
+        )
+        if close_tp[i]:
+            reason = f'TAKE_PROFIT_{row_profit:.2f}%'
+        elif close_time[i]:
+            reason = f'MAX_POSITION_HOURS_{float(held_hours[i]):.1f}h'
+        elif close_be[i]:
+            reason = f'BREAK_EVEN_MAX_{new_state.max_profit_percent:.2f}%'
+        elif close_tr[i]:
+            reason = f'TRAILING_STOP_{row_profit:.2f}%'
+        else:
+            reason = None
+        decisions.append(ProtectionDecision(reason is not None, reason, new_state, row_profit))
+    return decisions
+
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Индекс последних закрытий по символам для защиты от повторных входов после убытков.
+
+Вместо запросов get_bot_trades_history + полного чтения closed_pnl_history на каждую
+монету в каждом раунде фильтр берёт последние N закрытий символа из памяти:
+
+- при первом обращении закрытия ботов загружаются одним запросом (последние
+  RECENT_CLOSURES_PER_SYMBOL закрытий каждого символа), закрытия с биржи — последние
+  RECENT_CLOSURES_EXCHANGE_SEED_ROWS строк closed_pnl_history (курсор от MAX(id) минус окно);
+- закрытия ботов добавляются при сохранении сделки (BotsDatabase.save_bot_trade_history);
+- закрытия с биржи добавляются при синхронизации closed PnL (AppDatabase.save_closed_pnl_history);
+- обе таблицы пишут и другие процессы (app.py, второй bots.py), поэтому новые строки
+  подтягиваются инкрементально по id-курсору, не чаще раза в RECENT_CLOSURES_REFRESH_SEC.
+
+Правило слияния то же, что было в фильтре: сначала закрытия ботов, недостающие до N
+дополняются закрытиями с биржи, затем сортировка по времени закрытия (новые первыми).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger('RecentClosures')
+
+DEFAULT_PER_SYMBOL = 20
+DEFAULT_REFRESH_SEC = 30.0
+DEFAULT_EXCHANGE_SEED_ROWS = 5000
+
+
+def _to_seconds(value) -> Optional[float]:
+    """Время закрытия в секундах (в БД встречаются и секунды, и миллисекунды)"""
+    if value is None or value == '':
+        return None
+    try:
+        ts = float(value)
+    except (TypeError, ValueError):
+        return None
+    if ts > 1e12:
+        ts = ts / 1000
+    return ts
+
+
+def _exchange_key(record: Dict[str, Any]) -> tuple:
+    """Ключ уникальности записи closed_pnl_history (как UNIQUE в таблице)"""
+    key = []
+    for field in ('close_timestamp', 'entry_price', 'exit_price'):
+        try:
+            key.append(float(record.get(field)))
+        except (TypeError, ValueError):
+            key.append(record.get(field))
+    return tuple(key)
+
+
+def _sort_key(closure: Dict[str, Any]) -> float:
+    return closure.get('exit_timestamp') or 0
+
+
+class RecentClosuresIndex:
+    """Последние закрытия по символам: закрытия ботов и закрытия с биржи (closed PnL)"""
+
+    def __init__(self, per_symbol: int = DEFAULT_PER_SYMBOL, refresh_interval: float = DEFAULT_REFRESH_SEC,
+                 exchange_seed_rows: int = DEFAULT_EXCHANGE_SEED_ROWS):
+        self.per_symbol = max(1, int(per_symbol))
+        self.refresh_interval = refresh_interval
+        self.exchange_seed_rows = max(0, int(exchange_seed_rows))
+        self._bot: Dict[str, List[Dict[str, Any]]] = {}
+        self._exchange: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+        self._bot_loaded = False
+        self._bot_cursor = 0  # последний прочитанный id bot_trades_history
+        self._bot_refreshed = 0.0
+        self._exchange_loaded = False
+        self._exchange_cursor = 0  # последний прочитанный id closed_pnl_history
+        self._exchange_refreshed = 0.0
+
+    # ==================== ЗАПОЛНЕНИЕ ====================
+
+    def _insert(self, bucket: Dict[str, List[Dict[str, Any]]], symbol: str, closure: Dict[str, Any], key: str) -> None:
+        items = bucket.setdefault(symbol, [])
+        identity = closure.get(key)
+        if identity is not None:
+            items[:] = [c for c in items if c.get(key) != identity]
+        items.append(closure)
+        items.sort(key=_sort_key, reverse=True)
+        del items[self.per_symbol:]
+
+    def add_bot_closure(self, trade: Dict[str, Any]) -> None:
+        """Закрытая сделка бота (формат строки bot_trades_history)"""
+        symbol = trade.get('symbol')
+        if not symbol or trade.get('status', 'CLOSED') != 'CLOSED':
+            return
+        closure = {
+            'id': trade.get('id'),
+            'pnl': trade.get('pnl'),
+            'exit_time': trade.get('exit_time'),
+            'exit_timestamp': _to_seconds(trade.get('exit_timestamp')),
+            'close_reason': trade.get('close_reason'),
+            'is_simulated': bool(trade.get('is_simulated', False)),
+        }
+        with self._lock:
+            self._insert(self._bot, symbol, closure, 'id')
+
+    def add_exchange_closures(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Закрытия с биржи (формат записей closed_pnl_history)"""
+        with self._lock:
+            for record in records:
+                symbol = record.get('symbol')
+                if not symbol:
+                    continue
+                row_id = record.get('id')
+                if row_id is not None:
+                    try:
+                        self._exchange_cursor = max(self._exchange_cursor, int(row_id))
+                    except (TypeError, ValueError):
+                        pass
+                closure = {
+                    'key': _exchange_key(record),
+                    'pnl': record.get('closed_pnl'),
+                    'exit_time': record.get('close_time'),
+                    'exit_timestamp': _to_seconds(record.get('close_timestamp')),
+                    'close_reason': 'MANUAL_CLOSE',
+                    'is_simulated': False,
+                }
+                self._insert(self._exchange, symbol, closure, 'key')
+
+    def _refresh_bot(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and self._bot_loaded and now - self._bot_refreshed < self.refresh_interval:
+            return
+        with self._lock:
+            if not force and self._bot_loaded and now - self._bot_refreshed < self.refresh_interval:
+                return
+            self._bot_refreshed = now
+            try:
+                from bot_engine.bots_database import get_bots_database
+                bots_db = get_bots_database()
+                if self._bot_loaded:
+                    trades = bots_db.get_closed_trades_after_id(self._bot_cursor)
+                    cursor = self._bot_cursor
+                else:
+                    # Курсор берём до загрузки: строки, добавленные между запросами,
+                    # прочитаются повторно и заменят себя по id
+                    cursor = bots_db.get_max_trade_history_id()
+                    trades = bots_db.get_recent_closed_trades_by_symbol(self.per_symbol)
+            except Exception as e:
+                logger.warning(f"⚠️ Индекс закрытий: не удалось загрузить сделки ботов: {e}")
+                return
+            for trade in trades:
+                self.add_bot_closure(trade)
+                if self._bot_loaded:
+                    try:
+                        cursor = max(cursor, int(trade.get('id') or 0))
+                    except (TypeError, ValueError):
+                        pass
+            self._bot_cursor = cursor
+            self._bot_loaded = True
+
+    def _refresh_exchange(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and self._exchange_loaded and now - self._exchange_refreshed < self.refresh_interval:
+            return
+        with self._lock:
+            if not force and self._exchange_loaded and now - self._exchange_refreshed < self.refresh_interval:
+                return
+            self._exchange_refreshed = now
+            try:
+                from app.app_database import get_app_database
+                app_db = get_app_database()
+                if not app_db:
+                    return
+                if not self._exchange_loaded and self.exchange_seed_rows:
+                    # Первая загрузка — только последние строки, а не вся таблица
+                    seed = app_db.get_max_closed_pnl_id() - self.exchange_seed_rows
+                    self._exchange_cursor = max(self._exchange_cursor, seed, 0)
+                records = app_db.load_closed_pnl_after_id(self._exchange_cursor)
+            except Exception:
+                return  # app_db может быть недоступен (например, вне веб-контекста)
+            self.add_exchange_closures(records)
+            self._exchange_loaded = True
+
+    # ==================== ЧТЕНИЕ ====================
+
+    def get_recent_closures(self, symbol: str, count: int) -> List[Dict[str, Any]]:
+        """
+        Последние count закрытий символа, новые первыми (exit_timestamp в секундах).
+
+        Сначала закрытия ботов; если их меньше count — дополняются закрытиями с биржи.
+        """
+        count = max(1, int(count))
+        if count > self.per_symbol:
+            # Глубина индекса меньше запрошенной — расширяем и перечитываем
+            with self._lock:
+                self.per_symbol = count
+                self.invalidate()
+        self._refresh_bot()
+        with self._lock:
+            closures = [dict(c) for c in self._bot.get(symbol, ())[:count]]
+        if len(closures) < count:
+            self._refresh_exchange()
+            with self._lock:
+                needed = count - len(closures)
+                closures.extend(dict(c) for c in self._exchange.get(symbol, ())[:needed])
+            closures.sort(key=_sort_key, reverse=True)
+        for closure in closures:
+            closure.pop('key', None)
+        return closures[:count]
+
+    def invalidate(self) -> None:
+        """Полная перезагрузка при следующем обращении"""
+        with self._lock:
+            self._bot.clear()
+            self._exchange.clear()
+            self._bot_loaded = False
+            self._bot_cursor = 0
+            self._bot_refreshed = 0.0
+            self._exchange_loaded = False
+            self._exchange_cursor = 0
+            self._exchange_refreshed = 0.0
+
+
+_index: Optional[RecentClosuresIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_recent_closures_index() -> RecentClosuresIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    from bot_engine.config_loader import SystemConfig
+                except Exception:
+                    SystemConfig = None
+                _index = RecentClosuresIndex(
+                    per_symbol=getattr(SystemConfig, 'RECENT_CLOSURES_PER_SYMBOL', DEFAULT_PER_SYMBOL),
+                    refresh_interval=getattr(SystemConfig, 'RECENT_CLOSURES_REFRESH_SEC', DEFAULT_REFRESH_SEC),
+                    exchange_seed_rows=getattr(SystemConfig, 'RECENT_CLOSURES_EXCHANGE_SEED_ROWS',
+                                               DEFAULT_EXCHANGE_SEED_ROWS),
+                )
+    return _index
+
+
+def notify_bot_closure(trade: Dict[str, Any]) -> None:
+    """Хук сохранения сделки бота: обновляет индекс, если он уже создан"""
+    index = _index
+    if index is not None:
+        try:
+            index.add_bot_closure(trade)
+        except Exception:
+            pass
+
+
+def notify_exchange_closures(records: List[Dict[str, Any]]) -> None:
+    """Хук синхронизации closed PnL: обновляет индекс, если он уже создан"""
+    index = _index
+    if index is not None and records:
+        try:
+            index.add_exchange_closures(records)
+        except Exception:
+            pass
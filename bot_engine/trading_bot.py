@@ -13,6 +13,7 @@ from .bot_config import (
 )
 from .indicators import SignalGenerator
 from .scaling_calculator import calculate_scaling_for_bot
+from utils.latency_tracing import traced
 
 # Символы, по которым уже вывели предупреждение о делистинге (один раз за сессию)
 _delisting_warned_symbols = set()
@@ -540,6 +541,7 @@ class TradingBot:
         
         return None
     
+    @traced('trading_bot.enter_position')
     def _enter_position(self, side: str, force_market_entry: bool = False) -> Dict:
         """Входит в позицию. force_market_entry=True — автоматический вход, всегда по рынку (игнор лимитных ордеров)."""
         self.logger.info(f" {self.symbol}: 🎯 _enter_position вызван для {side}" + (" (вход по рынку)" if force_market_entry else ""))
@@ -20,7 +20,11 @@ if _root and _root not in sys.path:
 _pw = os.environ.get("PYTHONWARNINGS", "").strip()
 _add = "ignore::UserWarning:sklearn.utils.parallel"
 os.environ["PYTHONWARNINGS"] = f"{_pw},{_add}" if _pw else _add
-# Вариант 1: joblib → sklearn.utils.parallel до любых импортов sklearn
+# Профилирование запуска (--profile-startup): время импорта модулей и шагов инициализации
+from utils.startup_profiler import init_startup_profiler, defer_startup_task, report_startup_profile
+_startup_profiler = init_startup_profiler()
+# Вариант 1: joblib → sklearn.utils.parallel до любых импортов sklearn.
+# Синхронно и первым: в фоне конфиг гонялся бы с импортами основного потока.
 import utils.sklearn_parallel_config  # noqa: F401
 
 # Ограничение ОЗУ процесса (AI_MEMORY_LIMIT_MB / AI_MEMORY_PCT из bot_config) — как для ai.py
@@ -71,10 +75,35 @@ try:
 except Exception:
     pass
 
-# Настройка git skip-worktree для игнорирования локальных изменений в bot_config.py
-# Это позволяет файлу оставаться в git, но локальные изменения не будут коммититься
-# И защищает от перезаписи при git pull - локальная версия всегда имеет приоритет
-if os.path.exists(_bot_config_path):
+# Дополнительная защита: если configs/bot_config.py был изменён в удалённом репозитории,
+# но у нас есть локальная версия — восстанавливаем её из бэкапа (если есть).
+# Выполняется сразу: от этого зависит, какой конфиг будет загружен.
+_bot_config_backup_path = _bot_config_path + '.local_backup'
+if os.path.exists(_bot_config_path) and os.path.exists(_bot_config_backup_path):
+    try:
+        import shutil
+        # Восстанавливаем локальную версию из бэкапа
+        shutil.copy2(_bot_config_backup_path, _bot_config_path)
+        # Удаляем бэкап после восстановления
+        try:
+            os.remove(_bot_config_backup_path)
+        except Exception:
+            pass
+        # Логгер еще не настроен, используем stderr
+        sys.stderr.write(f"[INFO] ✅ Восстановлена локальная версия configs/bot_config.py после git pull\n")
+    except Exception:
+        pass
+
+
+def _protect_bot_config_in_git():
+    """
+    Настройка git skip-worktree для игнорирования локальных изменений в bot_config.py.
+    Это позволяет файлу оставаться в git, но локальные изменения не будут коммититься
+    И защищает от перезаписи при git pull - локальная версия всегда имеет приоритет.
+    Вызовы git и установка хуков не влияют на работу сервиса — выполняются в фоне.
+    """
+    if not os.path.exists(_bot_config_path):
+        return
     try:
         import subprocess
         git_dir = os.path.dirname(os.path.abspath(__file__))
@@ -96,29 +125,8 @@ if os.path.exists(_bot_config_path):
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL
             )
-            # Логгер еще не настроен, используем stderr
-            import sys
             sys.stderr.write(f"[INFO] ✅ Защита configs/bot_config.py от перезаписи при git pull активирована\n")
 
-        # Дополнительная защита: если configs/bot_config.py был изменён в удалённом репозитории,
-        # но у нас есть локальная версия — восстанавливаем её из бэкапа (если есть)
-        backup_path = _bot_config_path + '.local_backup'
-        if os.path.exists(backup_path):
-            try:
-                import shutil
-                # Восстанавливаем локальную версию из бэкапа
-                shutil.copy2(backup_path, _bot_config_path)
-                # Удаляем бэкап после восстановления
-                try:
-                    os.remove(backup_path)
-                except Exception:
-                    pass
-                # Логгер еще не настроен, используем stderr
-                import sys
-                sys.stderr.write(f"[INFO] ✅ Восстановлена локальная версия configs/bot_config.py после git pull\n")
-            except Exception:
-                pass
-
         # Автоматическая установка git hooks для защиты bot_config.py
         try:
             hooks_install_script = os.path.join(git_dir, 'scripts', 'install_git_hooks.py')
@@ -136,7 +144,6 @@ if os.path.exists(_bot_config_path):
                         stderr=subprocess.DEVNULL
                     )
                     if install_result.returncode == 0:
-                        import sys
                         sys.stderr.write(f"[INFO] ✅ Git hooks для защиты bot_config.py установлены автоматически\n")
         except Exception:
             # Игнорируем ошибки установки хуков
@@ -146,6 +153,9 @@ if os.path.exists(_bot_config_path):
         # Игнорируем ошибки git (если это не git репозиторий или git не установлен)
         pass
 
+
+defer_startup_task('git skip-worktree и хуки', _protect_bot_config_in_git)
+
 # 🔍 ТРЕЙСИНГ из конфига (после импорта sys, но до остальных импортов)
 try:
     # Читаем настройку трейсинга из конфига
@@ -287,16 +297,17 @@ if __name__ == '__main__':
 from utils.color_logger import setup_color_logging
 
 # Импортируем все модули
-from bots_modules.imports_and_globals import *
-from bots_modules.calculations import *
-from bots_modules.maturity import *
-# ❌ ОТКЛЮЧЕНО: optimal_ema перемещен в backup (используются заглушки из imports_and_globals)
-# from bots_modules.optimal_ema import *
-from bots_modules.filters import *
-from bots_modules.bot_class import *
-from bots_modules.sync_and_cache import *
-from bots_modules.workers import *
-from bots_modules.init_functions import *
+with _startup_profiler.step('импорт bots_modules'):
+    from bots_modules.imports_and_globals import *
+    from bots_modules.calculations import *
+    from bots_modules.maturity import *
+    # ❌ ОТКЛЮЧЕНО: optimal_ema перемещен в backup (используются заглушки из imports_and_globals)
+    # from bots_modules.optimal_ema import *
+    from bots_modules.filters import *
+    from bots_modules.bot_class import *
+    from bots_modules.sync_and_cache import *
+    from bots_modules.workers import *
+    from bots_modules.init_functions import *
 
 # Импорт системы истории ботов (ПЕРЕД импортом API endpoints!)
 # Настройка логирования (раньше, чтобы использовать logger)
@@ -382,7 +393,8 @@ except Exception as e:
     traceback.print_exc()
 
 # Теперь импортируем API endpoints (после установки bot_history_manager)
-from bots_modules.api_endpoints import *
+with _startup_profiler.step('импорт bots_modules.api_endpoints'):
+    from bots_modules.api_endpoints import *
 
 # Файловый логгер уже настроен в setup_color_logging() выше, не нужно дублировать
 
@@ -649,6 +661,46 @@ def run_bots_service():
         logger.error(f"Ошибка запуска Flask сервера: {e}")
         raise
 
+def _init_ai_manager():
+    """
+    Инициализирует AI Manager (проверка лицензии и загрузка модулей).
+    AI модули тянут torch/sklearn, поэтому загружаются в фоне: API и мониторинг позиций
+    стартуют не дожидаясь их (до готовности get_ai_manager() вызывается лениво при первом использовании).
+    """
+    try:
+        from bot_engine.config_loader import AIConfig
+
+        if AIConfig.AI_ENABLED:
+            logger.info("🤖 Инициализация AI модулей...")
+            from bot_engine.ai import get_ai_manager
+            ai_manager = get_ai_manager()
+
+            # ✅ Обучение перенесено в ai.py - здесь только проверка доступности модулей
+            if ai_manager.is_available():
+                logger.info("")
+                logger.info("=" * 80)
+                logger.info("🟢 AI МОДУЛИ АКТИВНЫ - ЛИЦЕНЗИЯ ВАЛИДНА 🟢")
+                logger.info("=" * 80)
+                logger.info("🤖 AI модули активны (обучение выполняется в ai.py)")
+                logger.info("=" * 80)
+                logger.info("")
+            else:
+                logger.warning("")
+                logger.warning("=" * 80)
+                logger.warning("🔴 AI МОДУЛИ НЕ ЗАГРУЖЕНЫ - ЛИЦЕНЗИЯ НЕ ВАЛИДНА 🔴")
+                logger.warning("=" * 80)
+                logger.warning("⚠️ AI модули не загружены (проверьте лицензию)")
+                logger.warning("💡 Получите HWID: python scripts/activate_premium.py")
+                logger.warning("=" * 80)
+                logger.warning("")
+        else:
+            logger.info("ℹ️ AI модули отключены в конфигурации")
+    except ImportError as ai_import_error:
+        pass
+    except Exception as ai_error:
+        logger.warning(f"⚠️ Ошибка инициализации AI: {ai_error}")
+
+
 if __name__ == '__main__':
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -660,17 +712,23 @@ if __name__ == '__main__':
         from bots_modules.workers import auto_save_worker, auto_bot_worker, positions_monitor_worker
 
         logger.info("📋 Загрузка конфигурации Auto Bot...")
-        load_auto_bot_config()
+        with _startup_profiler.step('load_auto_bot_config'):
+            load_auto_bot_config()
         logger.info("✅ Конфигурация Auto Bot загружена")
 
         # Инициализируем ботов в отдельном потоке, чтобы не блокировать запуск сервера
         def init_bots_async():
             try:
-                init_bot_service()
+                with _startup_profiler.step('init_bot_service'):
+                    init_bot_service()
             except Exception as init_error:
                 logger.error(f"Ошибка инициализации (продолжаем запуск): {init_error}")
                 import traceback
                 traceback.print_exc()
+            if _startup_profiler.enabled:
+                from utils.startup_profiler import wait_deferred_startup_tasks
+                wait_deferred_startup_tasks(timeout=300)
+                report_startup_profile()
 
         init_thread = threading.Thread(target=init_bots_async, daemon=True)
         init_thread.start()
@@ -713,40 +771,8 @@ if __name__ == '__main__':
         except Exception as backup_err:
             logger.debug("Планировщик бэкапов не запущен: %s", backup_err)
 
-        # Инициализируем AI Manager (проверка лицензии и загрузка модулей)
-        ai_manager = None
-        try:
-            from bot_engine.config_loader import AIConfig
-
-            if AIConfig.AI_ENABLED:
-                logger.info("🤖 Инициализация AI модулей...")
-                from bot_engine.ai import get_ai_manager
-                ai_manager = get_ai_manager()
-
-                # ✅ Обучение перенесено в ai.py - здесь только проверка доступности модулей
-                if ai_manager.is_available():
-                    logger.info("")
-                    logger.info("=" * 80)
-                    logger.info("🟢 AI МОДУЛИ АКТИВНЫ - ЛИЦЕНЗИЯ ВАЛИДНА 🟢")
-                    logger.info("=" * 80)
-                    logger.info("🤖 AI модули активны (обучение выполняется в ai.py)")
-                    logger.info("=" * 80)
-                    logger.info("")
-                else:
-                    logger.warning("")
-                    logger.warning("=" * 80)
-                    logger.warning("🔴 AI МОДУЛИ НЕ ЗАГРУЖЕНЫ - ЛИЦЕНЗИЯ НЕ ВАЛИДНА 🔴")
-                    logger.warning("=" * 80)
-                    logger.warning("⚠️ AI модули не загружены (проверьте лицензию)")
-                    logger.warning("💡 Получите HWID: python scripts/activate_premium.py")
-                    logger.warning("=" * 80)
-                    logger.warning("")
-            else:
-                logger.info("ℹ️ AI модули отключены в конфигурации")
-        except ImportError as ai_import_error:
-                        pass
-        except Exception as ai_error:
-            logger.warning(f"⚠️ Ошибка инициализации AI: {ai_error}")
+        # AI Manager инициализируется в фоне (после загрузки конфига sklearn/joblib)
+        defer_startup_task('AI Manager', _init_ai_manager)
 
         # Открываем порт 5001 в брандмауэре
         open_firewall_port_5001()
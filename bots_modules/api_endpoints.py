@@ -248,6 +248,32 @@ def health_check():
             'error': str(e)
         }), 500
 
+@bots_app.route('/api/bots/metrics', methods=['GET'])
+def get_latency_metrics():
+    """Гистограммы задержек пути входа и счётчики планировщика запросов (текстовый формат Prometheus)"""
+    from flask import Response
+    from utils.latency_tracing import render_prometheus
+
+    extra = []
+    try:
+        scheduler = getattr(get_exchange(), 'request_scheduler', None)
+        if scheduler is not None:
+            stats = scheduler.get_stats()
+            extra.append('# HELP infobot_exchange_requests_total Запросы к бирже по классам приоритета')
+            extra.append('# TYPE infobot_exchange_requests_total counter')
+            for name, cls in stats['classes'].items():
+                extra.append(f'infobot_exchange_requests_total{{class="{name}",result="granted"}} {cls["granted"]}')
+                extra.append(f'infobot_exchange_requests_total{{class="{name}",result="rejected"}} {cls["rejected"]}')
+            extra.append('# HELP infobot_exchange_requests_waiting Запросы в очереди планировщика')
+            extra.append('# TYPE infobot_exchange_requests_waiting gauge')
+            for name, cls in stats['classes'].items():
+                extra.append(f'infobot_exchange_requests_waiting{{class="{name}"}} {cls["waiting"]}')
+            extra.append('# TYPE infobot_exchange_rate_per_second gauge')
+            extra.append(f'infobot_exchange_rate_per_second {stats["rate_per_sec"]}')
+    except Exception:
+        pass
+    return Response(render_prometheus(extra), mimetype='text/plain; version=0.0.4')
+
 @bots_app.route('/api/bots/status', methods=['GET'])
 def get_service_status():
     """Получить статус сервиса ботов"""
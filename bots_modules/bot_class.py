@@ -13,6 +13,8 @@ import threading
 from typing import Optional, Dict
 from dataclasses import dataclass
 
+from utils.latency_tracing import traced
+
 logger = logging.getLogger('BotsService')
 
 # Импортируем глобальные переменные
@@ -51,13 +53,18 @@ except:
     def check_rsi_time_filter(*args, **kwargs):
         return {'allowed': True, 'reason': 'Filter not loaded'}
 
-# Импорт AI Risk Manager для умного расчета TP/SL
-try:
-    from bot_engine.ai.risk_manager import DynamicRiskManager
-    AI_RISK_MANAGER_AVAILABLE = True
-except ImportError:
-    DynamicRiskManager = None
-    AI_RISK_MANAGER_AVAILABLE = False
+# AI Risk Manager для умного расчета TP/SL импортируется при первом обращении:
+# пакет bot_engine.ai загружает ML-модули и заметно замедляет запуск bots.py
+def __getattr__(name):
+    if name in ('DynamicRiskManager', 'AI_RISK_MANAGER_AVAILABLE'):
+        try:
+            from bot_engine.ai.risk_manager import DynamicRiskManager
+            available = True
+        except ImportError:
+            DynamicRiskManager, available = None, False
+        globals().update(DynamicRiskManager=DynamicRiskManager, AI_RISK_MANAGER_AVAILABLE=available)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 try:
     from bot_engine.protections import ProtectionState, evaluate_protections
@@ -798,65 +805,10 @@ class NewTradingBot:
             
             # Получаем последние N закрытых сделок для этого символа
             try:
-                from bot_engine.bots_database import get_bots_database
-                bots_db = get_bots_database()
-                
-                # ✅ КРИТИЧНО: Получаем последние N закрытых сделок по текущей монете
-                # Сначала пробуем из bot_trades_history (сделки ботов)
-                closed_trades = bots_db.get_bot_trades_history(
-                    bot_id=None,
-                    symbol=self.symbol,  # ⬅️ Только для текущей монеты
-                    status='CLOSED',
-                    decision_source=None,
-                    limit=n_count,  # ⬅️ Последние N сделок
-                    offset=0
-                )
-                
-                if closed_trades:
-                    for i, trade in enumerate(closed_trades):
-                        pnl = trade.get('pnl')
-                        exit_timestamp = trade.get('exit_timestamp')
-                
-                # ✅ КРИТИЧНО: Если нет сделок в bot_trades_history или недостаточно, дополняем из closed_pnl_history (сделки с биржи/UI)
-                if not closed_trades or len(closed_trades) < n_count:
-                    try:
-                        from app.app_database import get_app_database
-                        app_db = get_app_database()
-                        if app_db:
-                            # Читаем из closed_pnl_history
-                            all_closed_pnl = app_db.load_closed_pnl_history(sort_by='time', period='all')
-                            symbol_closed_pnl = [t for t in all_closed_pnl if t.get('symbol') == self.symbol]
-                            # Сортируем по close_timestamp DESC (новые первыми)
-                            symbol_closed_pnl.sort(key=lambda x: x.get('close_timestamp', 0), reverse=True)
-                            
-                            # Если closed_trades пустой - создаем список
-                            if not closed_trades:
-                                closed_trades = []
-                            
-                            # Дополняем до нужного количества
-                            needed_count = n_count - len(closed_trades)
-                            for pnl_trade in symbol_closed_pnl[:needed_count]:
-                                ct = pnl_trade.get('close_timestamp')
-                                exit_ts = int(ct) if ct is not None else None
-                                if exit_ts is not None and exit_ts > 1e12:
-                                    exit_ts = exit_ts // 1000  # мс -> сек для единообразия с bot_trades_history
-                                trade = {
-                                    'pnl': pnl_trade.get('closed_pnl'),  # ⬅️ В closed_pnl_history поле называется closed_pnl
-                                    'exit_time': pnl_trade.get('close_time'),
-                                    'exit_timestamp': exit_ts,
-                                    'close_reason': 'MANUAL_CLOSE',
-                                    'is_simulated': False
-                                }
-                                closed_trades.append(trade)
-                            
-                            # Сортируем объединенный список по exit_timestamp DESC
-                            closed_trades.sort(key=lambda x: x.get('exit_timestamp') or 0, reverse=True)
-                            # Берем только последние N
-                            closed_trades = closed_trades[:n_count]
-                    except Exception as app_db_error:
-                        logger.error(f"[NEW_BOT_{self.symbol}] ❌ Ошибка загрузки из closed_pnl_history: {app_db_error}")
-                        import traceback
-                        logger.error(traceback.format_exc())
+                # ✅ КРИТИЧНО: Последние N закрытий по текущей монете из индекса в памяти:
+                # сделки ботов (bot_trades_history), дополненные сделками с биржи/UI (closed_pnl_history)
+                from bot_engine.recent_closures import get_recent_closures_index
+                closed_trades = get_recent_closures_index().get_recent_closures(self.symbol, n_count)
                 
                 # ✅ КРИТИЧНО: Если нет закрытых сделок или недостаточно - РАЗРЕШАЕМ вход
                 # (фильтр не применяется, если недостаточно истории)
@@ -2703,6 +2655,7 @@ class NewTradingBot:
 
         return config
 
+    @traced('bot.enter_position')
     def enter_position(self, direction: str, force_market_entry: bool = True):
         """
         Открывает позицию через TradingBot, используя текущие настройки бота.
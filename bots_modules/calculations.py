@@ -147,7 +147,7 @@ except:
 # optimal_ema_data = {}
 # OPTIMAL_EMA_FILE = 'data/optimal_ema.json'
 
-def check_coin_maturity_with_storage(symbol, candles):
+def check_coin_maturity_with_storage(symbol, candles, frame=None):
     """Проверяет зрелость монеты с использованием постоянного хранилища"""
     # Сначала проверяем постоянное хранилище
     if is_coin_mature_stored(symbol):
@@ -161,7 +161,7 @@ def check_coin_maturity_with_storage(symbol, candles):
         }
 
     # Если не в хранилище, выполняем полную проверку
-    maturity_result = check_coin_maturity(symbol, candles)
+    maturity_result = check_coin_maturity(symbol, candles, frame=frame)
 
     # Если монета зрелая, добавляем в постоянное хранилище (без автосохранения)
     if maturity_result['is_mature']:
@@ -169,8 +169,8 @@ def check_coin_maturity_with_storage(symbol, candles):
 
     return maturity_result
 
-def check_coin_maturity(symbol, candles):
-    """Проверяет зрелость монеты для торговли"""
+def check_coin_maturity(symbol, candles, frame=None):
+    """Проверяет зрелость монеты для торговли (frame — FeatureFrame раунда по тем же свечам, опционально)"""
     try:
         # Получаем настройки зрелости из конфигурации
         with bots_data_lock:
@@ -195,11 +195,12 @@ def check_coin_maturity(symbol, candles):
         # Это означает что монета должна иметь достаточно истории в РЕЦЕНТНОЕ время
         recent_candles = candles[-min_candles:] if len(candles) >= min_candles else candles
 
-        # Извлекаем цены закрытия из последних свечей
-        closes = [candle['close'] for candle in recent_candles]
-
-        # Рассчитываем историю RSI
-        rsi_history = calculate_rsi_history(closes, 14)
+        # Рассчитываем историю RSI по последним свечам (из кадра признаков раунда, если передан)
+        if frame is not None and frame.candles is candles:
+            rsi_history = frame.rsi_history(14, window=min_candles)
+        else:
+            closes = [candle['close'] for candle in recent_candles]
+            rsi_history = calculate_rsi_history(closes, 14)
         if not rsi_history:
             return {
                 'is_mature': False,
@@ -381,8 +382,8 @@ def analyze_trend_6h(symbol, exchange_obj=None, candles_data=None):
         current_timeframe = TIMEFRAME
     return analyze_trend(symbol, exchange_obj, candles_data, timeframe=current_timeframe)
 
-def perform_enhanced_rsi_analysis(candles, current_rsi, symbol):
-    """Выполняет улучшенный анализ RSI для монеты"""
+def perform_enhanced_rsi_analysis(candles, current_rsi, symbol, frame=None):
+    """Выполняет улучшенный анализ RSI для монеты (frame — FeatureFrame раунда по тем же свечам, опционально)"""
     try:
         # ✅ Проверяем индивидуальные настройки монеты (имеют приоритет над глобальными)
         enhanced_rsi_enabled = SystemConfig.ENHANCED_RSI_ENABLED
@@ -415,18 +416,12 @@ def perform_enhanced_rsi_analysis(candles, current_rsi, symbol):
         # Создаем объект для анализа
         signal_generator = SignalGenerator()
 
-        # Форматируем данные свечей для анализа
+        # Форматируем данные свечей для анализа (кадр признаков раунда хранит их и историю RSI)
         # Bybit отправляет свечи в правильном порядке для анализа
-        formatted_candles = []
-        for candle in candles:  # Используем оригинальный порядок
-            formatted_candles.append({
-                'timestamp': candle.get('time', 0),
-                'open': float(candle.get('open', 0)),
-                'high': float(candle.get('high', 0)),
-                'low': float(candle.get('low', 0)),
-                'close': float(candle.get('close', 0)),
-                'volume': float(candle.get('volume', 0))
-            })
+        if frame is None or frame.candles is not candles:
+            from bot_engine.feature_frame import FeatureFrame
+            frame = FeatureFrame(symbol, None, candles)
+        formatted_candles = frame.formatted_candles
 
         # Получаем полный анализ
         if len(formatted_candles) >= 50:
@@ -438,7 +433,7 @@ def perform_enhanced_rsi_analysis(candles, current_rsi, symbol):
                 volumes = [candle['volume'] for candle in formatted_candles]
 
                 # Рассчитываем дополнительные индикаторы
-                rsi_history = TechnicalIndicators.calculate_rsi_history(formatted_candles)
+                rsi_history = frame.indicator_rsi_history()
                 adaptive_levels = TechnicalIndicators.calculate_adaptive_rsi_levels(formatted_candles)
                 divergence = TechnicalIndicators.detect_rsi_divergence(closes, rsi_history)
                 volume_confirmation = TechnicalIndicators.confirm_with_volume(volumes)
@@ -455,13 +450,7 @@ def perform_enhanced_rsi_analysis(candles, current_rsi, symbol):
                 stoch_rsi_d = stoch_rsi_result['d'] if stoch_rsi_result else None
 
                 # Определяем продолжительность в экстремальной зоне
-                extreme_duration = 0
-                if rsi_history:
-                    for rsi_val in reversed(rsi_history):
-                        if rsi_val <= SystemConfig.RSI_EXTREME_OVERSOLD or rsi_val >= SystemConfig.RSI_EXTREME_OVERBOUGHT:
-                            extreme_duration += 1
-                        else:
-                            break
+                extreme_duration = frame.extreme_zone_run(SystemConfig.RSI_EXTREME_OVERSOLD, SystemConfig.RSI_EXTREME_OVERBOUGHT)
 
                 # Определяем тип предупреждения
                 warning_type = None
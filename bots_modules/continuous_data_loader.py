@@ -33,6 +33,77 @@ logger = PrefixedLogger(logger, "🔄")
 # Таймаут этапа расчёта зрелости (сек). При большом числе монет и ТФ 1m 60с может не хватать.
 MATURITY_CALCULATION_TIMEOUT = 120
 
+# Тёплый старт: сколько ждать инициализации биржи для догрузки монет с позициями (сек)
+WARM_START_EXCHANGE_WAIT = 15
+
+_TIMEFRAME_SECONDS = {
+    '1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600,
+    '8h': 28800, '12h': 43200, '1d': 86400, '3d': 259200, '1w': 604800,
+}
+
+
+def _candle_time_sec(candle):
+    """Время открытия свечи в секундах (в кэше встречаются и мс, и секунды)"""
+    try:
+        t = float(candle.get('time') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return t / 1000.0 if t > 1e11 else t
+
+
+def split_fresh_candles(stored_candles, timeframe, now=None, max_stale_candles=2):
+    """
+    Делит сохранённый кэш свечей (формат BotsDatabase.load_candles_cache) на свежие и устаревшие монеты.
+
+    Монета свежая, если кэш для нужного таймфрейма и последняя свеча открыта не раньше,
+    чем max_stale_candles интервалов назад (текущая незакрытая свеча + допуск).
+
+    Returns:
+        (fresh, stale): {symbol: candles} и список символов, которые нужно догрузить
+    """
+    now = time.time() if now is None else now
+    max_age = _TIMEFRAME_SECONDS.get(timeframe, 60) * max(1, max_stale_candles)
+    fresh, stale = {}, []
+    for symbol, entry in (stored_candles or {}).items():
+        candles = (entry or {}).get('candles') or []
+        if (entry or {}).get('timeframe') != timeframe or len(candles) < 15:
+            stale.append(symbol)
+            continue
+        if now - _candle_time_sec(candles[-1]) > max_age:
+            stale.append(symbol)
+            continue
+        fresh[symbol] = candles
+    return fresh, stale
+
+
+def build_warm_coin(symbol, candles, timeframe, stored_coin=None):
+    """
+    Запись монеты для coins_rsi_data по свечам из кэша: RSI пересчитывается по свечам
+    (сохранённое значение могло быть посчитано по другому ТФ), цена — close последней свечи.
+    Сигнал всегда WAIT: входы откроются только после первого полного раунда.
+    """
+    from bots_modules.calculations import calculate_rsi
+    from bot_engine.config_loader import get_rsi_key, get_trend_key
+
+    closes = [float(c.get('close', 0) or 0) for c in candles]
+    rsi = calculate_rsi(closes, 14)
+    if rsi is None or not closes or closes[-1] <= 0:
+        return None
+    trend_key = get_trend_key(timeframe)
+    coin = dict(stored_coin or {})
+    coin.update({
+        'symbol': symbol,
+        get_rsi_key(timeframe): rsi,
+        trend_key: coin.get(trend_key) or 'NEUTRAL',
+        'signal': 'WAIT',
+        'price': closes[-1],
+        'last_update': datetime.now().isoformat(),
+        'warm_start': True,
+    })
+    return coin
+
+
 class ContinuousDataLoader:
     def __init__(self, exchange_obj=None, update_interval=180):
         """
@@ -90,8 +161,17 @@ class ContinuousDataLoader:
         except Exception as tf_err:
             logger.warning(f"⚠️ [CONTINUOUS] Не удалось получить таймфрейм при старте: {tf_err}")
 
-        # Небольшая задержка перед первым обновлением (даем системе запуститься)
-        time.sleep(5)
+        # 🔥 Тёплый старт из bots_data.db: позиции под защитой до первого полного раунда
+        warm_started = False
+        try:
+            warm_started = self._warm_start()
+        except Exception as warm_err:
+            logger.warning(f"⚠️ Тёплый старт не выполнен: {warm_err}")
+
+        # Небольшая задержка перед первым обновлением (даем системе запуститься);
+        # при тёплом старте данные уже есть — сразу начинаем раунд
+        if not warm_started:
+            time.sleep(5)
         logger.info("🔄 Начинаем первый раунд обновления данных...")
 
         # Импортируем shutdown_flag для корректной остановки
@@ -258,6 +338,134 @@ class ContinuousDataLoader:
         except Exception as e:
             logger.warning(f"⚠️ Не удалось предзаполнить список монет: {e}")
 
+    def _warm_start(self):
+        """
+        🔥 Тёплый старт: восстанавливает свечи и RSI из bots_data.db до первого раунда.
+
+        Свежесть проверяется по каждой монете (WARM_START_MAX_STALE_CANDLES интервалов ТФ).
+        Монеты ботов в позиции без свежих данных (или с entry_timeframe не системного ТФ)
+        догружаются с биржи сразу и в первую очередь — в этом же потоке, до первого раунда,
+        поэтому их запросы не накладываются на массовую загрузку. Остальные устаревшие монеты
+        обновит первый раунд. После этого выставляется warm_start_complete: мониторинг позиций
+        начинает защиту, автобот по-прежнему ждёт first_round_complete.
+
+        Returns:
+            True — монеты восстановлены, позиции обслуживаются по тёплым данным
+        """
+        from bot_engine.config_loader import SystemConfig, get_current_timeframe
+        if not getattr(SystemConfig, 'WARM_START_ENABLED', True):
+            return False
+
+        from bots_modules.imports_and_globals import (
+            coins_rsi_data, rsi_data_lock, bots_data, bots_data_lock, BOT_STATUS,
+        )
+        start = time.time()
+        try:
+            timeframe = get_current_timeframe()
+        except Exception:
+            from bot_engine.config_loader import TIMEFRAME
+            timeframe = TIMEFRAME
+        max_stale = getattr(SystemConfig, 'WARM_START_MAX_STALE_CANDLES', 2)
+
+        try:
+            from bot_engine.storage import load_candles_cache
+            stored_candles = load_candles_cache() or {}
+        except Exception as e:
+            logger.warning(f"⚠️ Тёплый старт: кэш свечей из БД не загружен: {e}")
+            stored_candles = {}
+        try:
+            from bot_engine.storage import load_rsi_cache
+            stored_coins = (load_rsi_cache() or {}).get('coins') or {}
+            if isinstance(stored_coins, list):
+                stored_coins = {c['symbol']: c for c in stored_coins if c.get('symbol')}
+        except Exception as e:
+            logger.warning(f"⚠️ Тёплый старт: RSI кэш из БД не загружен: {e}")
+            stored_coins = {}
+
+        fresh, stale = split_fresh_candles(stored_candles, timeframe, max_stale_candles=max_stale)
+
+        warm_coins = {}
+        warm_candles = {}
+        now_iso = datetime.now().isoformat()
+        for symbol, candles in fresh.items():
+            coin = build_warm_coin(symbol, candles, timeframe, stored_coins.get(symbol))
+            if coin:
+                warm_coins[symbol] = coin
+                warm_candles[symbol] = {timeframe: {
+                    'symbol': symbol, 'candles': candles, 'timeframe': timeframe, 'last_update': now_iso,
+                }}
+
+        with bots_data_lock:
+            positions = {
+                symbol: bot.get('entry_timeframe') or timeframe
+                for symbol, bot in (bots_data.get('bots') or {}).items()
+                if bot.get('status') in (BOT_STATUS.get('IN_POSITION_LONG'), BOT_STATUS.get('IN_POSITION_SHORT'))
+            }
+        to_refresh = [
+            (symbol, entry_tf) for symbol, entry_tf in positions.items()
+            if not (entry_tf == timeframe and symbol in warm_coins)
+        ]
+        refreshed = self._refresh_warm_positions(to_refresh, warm_coins, warm_candles) if to_refresh else 0
+
+        if not warm_coins:
+            logger.info("🧊 Тёплый старт: свежих данных в БД нет — холодный старт (ждём первый раунд)")
+            return False
+
+        with rsi_data_lock:
+            if coins_rsi_data.get('first_round_complete'):
+                return False
+            coins_rsi_data['coins'] = warm_coins
+            coins_rsi_data['candles_cache'] = warm_candles
+            coins_rsi_data['total_coins'] = len(warm_coins)
+            coins_rsi_data['last_update'] = now_iso
+            coins_rsi_data['warm_start_complete'] = True
+
+        logger.info(
+            f"🔥 Тёплый старт за {time.time() - start:.1f}с: {len(warm_coins)} монет из БД "
+            f"(устарело {len(stale)}), позиций {len(positions)}, догружено с биржи {refreshed}/{len(to_refresh)} "
+            f"→ мониторинг позиций запущен до первого раунда"
+        )
+        return True
+
+    def _refresh_warm_positions(self, to_refresh, warm_coins, warm_candles):
+        """Приоритетная догрузка свечей монет с позициями (по их entry_timeframe) для тёплого старта"""
+        from bots_modules.imports_and_globals import get_exchange, shutdown_flag
+        from bots_modules.filters import get_coin_candles_only
+
+        exchange = get_exchange()
+        deadline = time.time() + WARM_START_EXCHANGE_WAIT
+        while not exchange and time.time() < deadline:
+            if shutdown_flag.wait(0.5):
+                return 0
+            exchange = get_exchange()
+        if not exchange:
+            logger.warning(f"⚠️ Тёплый старт: биржа не готова — {len(to_refresh)} позиций обновит мониторинг/первый раунд")
+            return 0
+
+        import concurrent.futures
+        refreshed = 0
+        # Параллелизм ограничивает семафор kline-запросов внутри get_coin_candles_only
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(to_refresh))) as executor:
+            futures = {
+                executor.submit(get_coin_candles_only, symbol, exchange, entry_tf, True): (symbol, entry_tf)
+                for symbol, entry_tf in to_refresh
+            }
+            for future in concurrent.futures.as_completed(futures):
+                symbol, entry_tf = futures[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    result = None
+                if not result:
+                    continue
+                coin = build_warm_coin(symbol, result['candles'], entry_tf, warm_coins.get(symbol))
+                if not coin:
+                    continue
+                warm_coins[symbol] = coin
+                warm_candles.setdefault(symbol, {})[entry_tf] = result
+                refreshed += 1
+        return refreshed
+
     def _load_candles(self):
         """📦 Загружает свечи всех монет"""
         try:
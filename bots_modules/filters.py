@@ -17,6 +17,9 @@ from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from bots_modules.imports_and_globals import shutdown_flag, should_log_message
+from exchanges.request_scheduler import request_priority, PRIORITY_POSITION_CANDLES, PRIORITY_DISCOVERY
+from utils.latency_tracing import span, traced, propagate_context
+from bot_engine.feature_frame import get_feature_frame, clear_feature_frames
 
 try:
     from bot_engine.filters import (
@@ -154,7 +157,7 @@ except ImportError as e:
         return None
     def analyze_trend_6h(symbol, exchange_obj=None):
         return None
-    def perform_enhanced_rsi_analysis(candles, rsi, symbol):
+    def perform_enhanced_rsi_analysis(candles, rsi, symbol, frame=None):
         return {'enabled': False, 'enhanced_signal': 'WAIT'}
 
 def calculate_ema_list(prices, period):
@@ -190,9 +193,9 @@ try:
     )
 except ImportError as e:
     print(f"Warning: Could not import maturity functions in filters: {e}")
-    def check_coin_maturity(symbol, candles):
+    def check_coin_maturity(symbol, candles, frame=None):
         return {'is_mature': True, 'reason': 'Not checked'}
-    def check_coin_maturity_with_storage(symbol, candles):
+    def check_coin_maturity_with_storage(symbol, candles, frame=None):
         return {'is_mature': True, 'reason': 'Not checked'}
     def add_mature_coin_to_storage(symbol, data, auto_save=True):
         pass
@@ -563,7 +566,21 @@ def get_coin_candles_only(symbol, exchange_obj=None, timeframe=None, bulk_mode=F
         return None
 
 
-def check_rsi_time_filter(candles, rsi, signal, symbol=None, individual_settings=None):
+def _run_with_request_priority(priority, func, *args):
+    """Вызов func в заданном классе планировщика запросов к бирже (контекст ставится в потоке пула)"""
+    with request_priority(priority):
+        return func(*args)
+
+
+def _current_timeframe_safe():
+    try:
+        from bot_engine.config_loader import get_current_timeframe
+        return get_current_timeframe()
+    except Exception:
+        return None
+
+
+def check_rsi_time_filter(candles, rsi, signal, symbol=None, individual_settings=None, frame=None):
     """
     Обёртка над bot_engine.filters.check_rsi_time_filter с fallback на легаси-логику.
     
@@ -573,6 +590,7 @@ def check_rsi_time_filter(candles, rsi, signal, symbol=None, individual_settings
         signal: Торговый сигнал ('ENTER_LONG' или 'ENTER_SHORT')
         symbol: Символ монеты (опционально, для получения индивидуальных настроек)
         individual_settings: Индивидуальные настройки монеты (опционально)
+        frame: FeatureFrame раунда (если не передан — берётся общий кадр по symbol и свечам)
     """
     try:
         if engine_check_rsi_time_filter is None:
@@ -593,12 +611,16 @@ def check_rsi_time_filter(candles, rsi, signal, symbol=None, individual_settings
                 if key in individual_settings:
                     auto_config[key] = individual_settings[key]
         
+        if frame is None and symbol:
+            frame = get_feature_frame(symbol, _current_timeframe_safe(), candles)
+        
         result = engine_check_rsi_time_filter(
             candles,
             rsi,
             signal,
             auto_config,
             calculate_rsi_history_func=calculate_rsi_history,
+            frame=frame,
         )
         return {
             'allowed': bool(result.get('allowed')),
@@ -673,46 +695,10 @@ def _check_loss_reentry_protection_static(symbol, candles, loss_reentry_count, l
         
         n_count = max(1, int(loss_reentry_count) if loss_reentry_count is not None else 1)
         
-        # Получаем последние N закрытых сделок для этого символа
-        from bot_engine.bots_database import get_bots_database
-        bots_db = get_bots_database()
-        
-        # Получаем последние N закрытых сделок по символу, отсортированные по времени закрытия (новые первыми)
-        closed_trades = bots_db.get_bot_trades_history(
-            bot_id=None,
-            symbol=symbol,
-            status='CLOSED',
-            decision_source=None,
-            limit=n_count,
-            offset=0
-        )
-        
-        # ✅ КРИТИЧНО: Дополняем из closed_pnl_history (сделки с биржи/UI), иначе защита не видит закрытия не из бота
-        if not closed_trades or len(closed_trades) < n_count:
-            try:
-                from app.app_database import get_app_database
-                app_db = get_app_database()
-                if app_db:
-                    all_closed_pnl = app_db.load_closed_pnl_history(sort_by='time', period='all')
-                    symbol_closed_pnl = [t for t in all_closed_pnl if t.get('symbol') == symbol]
-                    symbol_closed_pnl.sort(key=lambda x: x.get('close_timestamp', 0), reverse=True)
-                    if not closed_trades:
-                        closed_trades = []
-                    needed = n_count - len(closed_trades)
-                    for pnl_trade in symbol_closed_pnl[:needed]:
-                        ct = pnl_trade.get('close_timestamp')
-                        exit_ts = int(ct) if ct is not None else None
-                        if exit_ts is not None and exit_ts > 1e12:
-                            exit_ts = exit_ts // 1000  # мс -> сек для единообразия
-                        closed_trades.append({
-                            'pnl': pnl_trade.get('closed_pnl'),
-                            'exit_time': pnl_trade.get('close_time'),
-                            'exit_timestamp': exit_ts,
-                        })
-                    closed_trades.sort(key=lambda x: x.get('exit_timestamp') or 0, reverse=True)
-                    closed_trades = closed_trades[:n_count]
-            except Exception as _e:
-                pass  # app_db может быть недоступен (например, вне веб-контекста)
+        # Последние N закрытий символа из индекса в памяти (новые первыми):
+        # сделки ботов, дополненные закрытиями с биржи/UI из closed_pnl_history
+        from bot_engine.recent_closures import get_recent_closures_index
+        closed_trades = get_recent_closures_index().get_recent_closures(symbol, n_count)
         
         # Если нет закрытых сделок - разрешаем вход, НЕ показываем фильтр
         if not closed_trades or len(closed_trades) < n_count:
@@ -898,6 +884,7 @@ def check_exit_scam_filter(symbol, coin_data):
             auto_config,
             exchange_obj or None,
             ensure_exchange_initialized,
+            frame=get_feature_frame(symbol, current_timeframe, candles) if candles else None,
         )
         if not base_allowed:
             return False
@@ -981,8 +968,8 @@ def get_coin_rsi_data_for_timeframe(symbol, exchange_obj=None, timeframe=None):
     rsi_key = get_rsi_key(timeframe)
     trend_key = get_trend_key(timeframe)
     
-    closes = [candle['close'] for candle in candles]
-    rsi = calculate_rsi(closes, 14)
+    frame = get_feature_frame(symbol, timeframe, candles)
+    rsi = frame.rsi(14)
     
     if rsi is None:
         return None
@@ -1079,7 +1066,7 @@ def get_coin_rsi_data_for_timeframe(symbol, exchange_obj=None, timeframe=None):
                 loss_reentry_info = None
                 if len(candles) >= 50:
                     try:
-                        time_filter_result = check_rsi_time_filter(candles, rsi, potential_signal, symbol=symbol, individual_settings=individual_settings)
+                        time_filter_result = check_rsi_time_filter(candles, rsi, potential_signal, symbol=symbol, individual_settings=individual_settings, frame=frame)
                         if time_filter_result:
                             time_filter_info = {'blocked': not time_filter_result.get('allowed', True), 'reason': time_filter_result.get('reason', ''), 'filter_type': 'time_filter', 'last_extreme_candles_ago': time_filter_result.get('last_extreme_candles_ago'), 'calm_candles': time_filter_result.get('calm_candles')}
                         else:
@@ -1104,21 +1091,16 @@ def get_coin_rsi_data_for_timeframe(symbol, exchange_obj=None, timeframe=None):
                         exit_scam_allowed = True
                         if exit_scam_enabled and exit_scam_candles and len(candles) >= exit_scam_candles:
                             recent = candles[-exit_scam_candles:]
-                            for c in recent:
-                                o, cl = float(c.get('open', 0) or 0), float(c.get('close', 0) or 0)
-                                if o <= 0:
+                            for ch in frame.body_percents[-exit_scam_candles:]:
+                                if ch is None:
                                     continue
-                                ch = abs((cl - o) / o) * 100
                                 if ch > limit_single:
                                     exit_scam_allowed = False
                                     exit_scam_reason = f'Тело свечи {ch:.2f}% > лимит {limit_single}% (как в конфиге, тело = |C-O|/O×100%)'
                                     break
                             if exit_scam_allowed and len(recent) >= multi_candle_count:
-                                m = recent[-multi_candle_count:]
-                                o0 = float(m[0].get('open', 0) or 0)
-                                cl_last = float(m[-1].get('close', 0) or 0)
-                                if o0 > 0:
-                                    total_ch = abs((cl_last - o0) / o0) * 100
+                                total_ch = frame.window_change_percent(multi_candle_count)
+                                if total_ch is not None:
                                     if total_ch > limit_multi:
                                         exit_scam_allowed = False
                                         exit_scam_reason = f'{multi_candle_count} свечей суммарно {total_ch:.1f}% > {limit_multi}%'
@@ -1351,9 +1333,11 @@ def get_coin_rsi_data(symbol, exchange_obj=None):
         
         # Рассчитываем RSI для текущего таймфрейма
         # Bybit отправляет свечи в правильном порядке для RSI (от старой к новой)
-        closes = [candle['close'] for candle in candles]
+        # Кадр признаков раунда: closes и история RSI считаются один раз и переиспользуются фильтрами
+        frame = get_feature_frame(symbol, current_timeframe, candles)
+        closes = frame.closes
         
-        rsi = calculate_rsi(closes, 14)
+        rsi = frame.rsi(14)
         
         if rsi is None:
             logger.warning(f"Не удалось рассчитать RSI для {symbol}")
@@ -1519,7 +1503,7 @@ def get_coin_rsi_data(symbol, exchange_obj=None):
         }
 
         if signal in ['ENTER_LONG', 'ENTER_SHORT'] or potential_signal in ['ENTER_LONG', 'ENTER_SHORT']:
-            enhanced_analysis = perform_enhanced_rsi_analysis(candles, rsi, symbol) or enhanced_analysis
+            enhanced_analysis = perform_enhanced_rsi_analysis(candles, rsi, symbol, frame=frame) or enhanced_analysis
 
             # Если Enhanced RSI включен и дает другой сигнал - используем его
             if enhanced_analysis.get('enabled') and enhanced_analysis.get('enhanced_signal'):
@@ -1655,7 +1639,8 @@ def get_coin_rsi_data(symbol, exchange_obj=None):
                         rsi, 
                         potential_signal, 
                         symbol=symbol, 
-                        individual_settings=individual_settings
+                        individual_settings=individual_settings,
+                        frame=frame
                     )
                     if time_filter_result:
                         time_filter_info = {
@@ -1716,12 +1701,9 @@ def get_coin_rsi_data(symbol, exchange_obj=None):
                     exit_scam_reason = 'ExitScam фильтр пройден'
                     if exit_scam_enabled and exit_scam_candles and len(candles) >= exit_scam_candles:
                         recent_candles = candles[-exit_scam_candles:]
-                        for candle in recent_candles:
-                            open_price = float(candle.get('open', 0) or 0)
-                            close_price = float(candle.get('close', 0) or 0)
-                            if open_price <= 0:
+                        for price_change in frame.body_percents[-exit_scam_candles:]:
+                            if price_change is None:
                                 continue
-                            price_change = abs((close_price - open_price) / open_price) * 100
                             if price_change > limit_single:
                                 exit_scam_allowed = False
                                 exit_scam_reason = f'ExitScam: тело свечи {price_change:.2f}% > лимит {limit_single}% (как в конфиге)'
@@ -1729,11 +1711,8 @@ def get_coin_rsi_data(symbol, exchange_obj=None):
                         
                         # 2. Проверка суммарного изменения (если первая проверка прошла)
                         if exit_scam_allowed and len(recent_candles) >= multi_candle_count:
-                            multi_candles = recent_candles[-multi_candle_count:]
-                            first_open = float(multi_candles[0].get('open', 0) or 0)
-                            last_close = float(multi_candles[-1].get('close', 0) or 0)
-                            if first_open > 0:
-                                total_change = abs((last_close - first_open) / first_open) * 100
+                            total_change = frame.window_change_percent(multi_candle_count)
+                            if total_change is not None:
                                 if total_change > limit_multi:
                                     exit_scam_allowed = False
                                     exit_scam_reason = f'ExitScam фильтр: {multi_candle_count} свечей превысили суммарный лимит {limit_multi}% (было {total_change:.1f}%)'
@@ -2007,12 +1986,17 @@ def load_all_coins_candles_fast():
         # ✅ Режим при лимите ботов: только монеты с активными ботами
         reduced_mode = False
         bot_symbols_to_tf: dict[str, list[str]] = {}
+        position_symbols = set()  # монеты в позиции: свечи грузятся первыми и классом выше массовой загрузки
         try:
             from bots_modules.imports_and_globals import bots_data, bots_data_lock, BOT_STATUS
             from bot_engine.config_loader import get_config_value, get_current_timeframe, TIMEFRAME
             with bots_data_lock:
                 bots = bots_data.get('bots', {})
                 auto_config = bots_data.get('auto_bot_config', {})
+                position_symbols = {
+                    symbol for symbol, bot_data in bots.items()
+                    if bot_data.get('status') in [BOT_STATUS.get('IN_POSITION_LONG'), BOT_STATUS.get('IN_POSITION_SHORT')]
+                }
             max_concurrent = get_config_value(auto_config, 'max_concurrent')
             try:
                 default_tf = get_current_timeframe() or TIMEFRAME
@@ -2083,6 +2067,9 @@ def load_all_coins_candles_fast():
                     continue
             else:
                 pairs_for_tf = pairs
+            if position_symbols:
+                # Монеты в позиции — в первых батчах (стабильная сортировка сохраняет порядок остальных)
+                pairs_for_tf = sorted(pairs_for_tf, key=lambda s: s not in position_symbols)
 
             logger.info(f"📦 Загружаем свечи для таймфрейма {timeframe}... ({len(pairs_for_tf)} монет)")
             
@@ -2108,6 +2095,10 @@ def load_all_coins_candles_fast():
                 # Глобальная пауза API только для массовой загрузки свечей. Боты не ждут.
                 if hasattr(current_exchange, '_wait_api_cooldown'):
                     current_exchange._wait_api_cooldown()
+                # Вытеснение: батч массовой загрузки ждёт, пока ордера/стопы/синхронизация позиций не освободят бюджет
+                scheduler = getattr(current_exchange, 'request_scheduler', None)
+                if scheduler is not None and scheduler.wait_for_headroom(PRIORITY_DISCOVERY):
+                    logger.info(f"⏸️ Свечи {timeframe}: батч уступил бюджет запросов срочным операциям")
 
                 batch = pairs_for_tf[i:i + batch_size]
                 batch_num = i//batch_size + 1
@@ -2125,7 +2116,11 @@ def load_all_coins_candles_fast():
                 # ✅ КРИТИЧНО: wait() ДОЛЖЕН быть ВНУТРИ with, иначе при выходе из with вызывается executor.shutdown(wait=True) и поток вечно ждёт все задачи, не дойдя до нашего wait(timeout=90)
                 with concurrent.futures.ThreadPoolExecutor(max_workers=current_max_workers) as executor:
                     future_to_symbol = {
-                        executor.submit(get_coin_candles_only, symbol, current_exchange, timeframe, use_bulk): symbol
+                        executor.submit(
+                            _run_with_request_priority,
+                            PRIORITY_POSITION_CANDLES if symbol in position_symbols else PRIORITY_DISCOVERY,
+                            get_coin_candles_only, symbol, current_exchange, timeframe, use_bulk,
+                        ): symbol
                         for symbol in batch
                     }
 
@@ -2293,16 +2288,19 @@ def load_all_coins_candles_fast():
                             current_timeframe = TIMEFRAME
 
                         saved_count = 0
-                        # ✅ ОПТИМИЗАЦИЯ: Сохраняем свечи для всех таймфреймов
+                        # ✅ ОПТИМИЗАЦИЯ: Сохраняем свечи для всех таймфреймов — одна транзакция на таймфрейм,
+                        # в БД пишутся только свечи новее водяного знака символа
+                        candles_by_tf = {}
                         for symbol, symbol_data in merged_candles_cache.items():
                             if isinstance(symbol_data, dict):
-                                # Сохраняем для каждого таймфрейма
                                 for tf, candle_data in symbol_data.items():
                                     if isinstance(candle_data, dict):
                                         candles = candle_data.get('candles', [])
                                         if candles:
-                                            ai_db.save_candles(symbol, candles, timeframe=tf)
-                                            saved_count += 1
+                                            candles_by_tf.setdefault(tf, {})[symbol] = candles
+                        for tf, tf_candles in candles_by_tf.items():
+                            ai_db.save_candles_batch(tf_candles, timeframe=tf)
+                            saved_count += len(tf_candles)
                         logger.info(f"✅ Свечи сохранены в ai_data.db: {saved_count} записей для {len(merged_candles_cache)} монет (процесс ai.py)")
                     else:
                         logger.error("❌ AI Database недоступна, свечи НЕ сохранены!")
@@ -2317,6 +2315,19 @@ def load_all_coins_candles_fast():
                     logger.warning(f"⚠️ Неизвестный процесс вызывает load_all_coins_candles_fast()! script_name={script_name}, main_file={main_file}")
                     logger.warning(f"⚠️ Сохраняем в bots_data.db (по умолчанию)")
                 
+                # Публикуем свечи всех таймфреймов в shared memory — ai.py читает их без БД и биржи
+                try:
+                    from bot_engine.candles_shm import get_candles_publisher
+                    candles_publisher = get_candles_publisher()
+                    if candles_publisher is not None:
+                        with rsi_data_lock:
+                            shared_cache = dict(coins_rsi_data.get('candles_cache', {}) or {})
+                        published = candles_publisher.publish_candles_cache(shared_cache)
+                        if published:
+                            logger.info(f"📡 Свечи опубликованы в shared memory: {published}")
+                except Exception as shm_error:
+                    logger.warning(f"⚠️ Не удалось опубликовать свечи в shared memory: {shm_error}")
+                
                 from bot_engine.storage import save_candles_cache
                 
                 # ✅ ОПТИМИЗАЦИЯ: Сохраняем свечи для всех таймфреймов
@@ -2424,6 +2435,8 @@ def load_all_coins_rsi():
     # ⚡ УСТАНАВЛИВАЕМ флаг БЕЗ блокировки
     coins_rsi_data["update_in_progress"] = True
     # ✅ UI блокировка уже установлена в continuous_data_loader
+    # Новый раунд: кадры признаков прошлого раунда больше не нужны (свечи обновлены)
+    clear_feature_frames()
 
     if shutdown_flag.is_set():
         logger.warning("⏹️ Обновление RSI отменено: система завершает работу")
@@ -2541,6 +2554,8 @@ def load_all_coins_rsi():
                     # ✅ Передаем timeframe в get_coin_rsi_data_for_timeframe
                     future_to_symbol = {
                         executor.submit(
+                            _run_with_request_priority,
+                            PRIORITY_POSITION_CANDLES if reduced_mode else PRIORITY_DISCOVERY,
                             get_coin_rsi_data_for_timeframe,
                             symbol,
                             current_exchange,
@@ -2984,65 +2999,93 @@ def process_auto_bot_signals(exchange_obj=None):
                 if not check_new_autobot_filters(symbol, signal, coin_data):
                     diag_skipped_filters += 1
                     continue
-                # ✅ Проверка AI ДО добавления в список: если AI не разрешает — монета не попадает в LONG/SHORT
-                # Флаг берём из AIConfig (сохраняется из UI «AI Модули») или из auto_bot_config (обратная совместимость)
-                last_ai_result = None
-                try:
-                    from bot_engine.config_live import get_ai_config_attr
-                    ai_confirmation_enabled = (
-                        bots_data.get('auto_bot_config', {}).get('ai_enabled') or
-                        get_ai_config_attr('AI_ENABLED', False)
-                    )
-                except Exception:
-                    ai_confirmation_enabled = bots_data.get('auto_bot_config', {}).get('ai_enabled', False)
-                if ai_confirmation_enabled:
-                    try:
-                        from bot_engine.ai.ai_integration import should_open_position_with_ai
-                        from bots_modules.imports_and_globals import get_config_snapshot
-                        config_snapshot = get_config_snapshot(symbol)
-                        filter_config = config_snapshot.get('merged', {}) or bots_data.get('auto_bot_config', {})
-                        price = float(coin_data.get('price') or 0)
-                        candles_for_ai = None
-                        candles_cache = coins_rsi_data.get('candles_cache', {})
-                        if symbol in candles_cache:
-                            c = candles_cache[symbol]
-                            if isinstance(c, dict):
-                                from bot_engine.config_loader import get_current_timeframe
-                                tf = get_current_timeframe()
-                                candles_for_ai = (c.get(tf) or {}).get('candles') if tf else c.get('candles')
-                                if not candles_for_ai and c:
-                                    for v in (c.values() if isinstance(c, dict) else []):
-                                        if isinstance(v, dict) and v.get('candles'):
-                                            candles_for_ai = v['candles']
-                                            break
-                        last_ai_result = should_open_position_with_ai(
-                            symbol=symbol,
-                            direction='LONG' if signal == 'ENTER_LONG' else 'SHORT',
-                            rsi=rsi,
-                            trend=trend or 'NEUTRAL',
-                            price=price,
-                            config=filter_config,
-                            candles=candles_for_ai
-                        )
-                        if last_ai_result.get('ai_used') and not last_ai_result.get('should_open'):
-                            logger.info(f" 🤖 AI блокирует вход {symbol}: {last_ai_result.get('reason', 'AI prediction')} — монета не в списке")
-                            diag_skipped_ai += 1
-                            continue
-                        if last_ai_result.get('ai_used') and last_ai_result.get('should_open'):
-                            logger.info(f" 🤖 AI разрешает вход {symbol} (уверенность {last_ai_result.get('ai_confidence', 0):.0%})")
-                    except Exception as ai_err:
-                        pass
                 potential_coins.append({
                     'symbol': symbol,
                     'rsi': rsi,
                     'trend': trend,
                     'signal': signal,
                     'coin_data': coin_data,
-                    'last_ai_result': last_ai_result
+                    'last_ai_result': None
                 })
             else:
                 diag_skipped_signal_wait += 1
         
+        # ✅ Проверка AI ДО попадания в итоговый список: если AI не разрешает — монета не попадает в LONG/SHORT
+        # Флаг берём из AIConfig (сохраняется из UI «AI Модули») или из auto_bot_config (обратная совместимость)
+        try:
+            from bot_engine.config_live import get_ai_config_attr
+            ai_confirmation_enabled = (
+                bots_data.get('auto_bot_config', {}).get('ai_enabled') or
+                get_ai_config_attr('AI_ENABLED', False)
+            )
+        except Exception:
+            ai_confirmation_enabled = bots_data.get('auto_bot_config', {}).get('ai_enabled', False)
+        if ai_confirmation_enabled and potential_coins:
+            # Предсказания модели для всех кандидатов раунда — одной матрицей, дальше по кандидатам без вызова sklearn
+            try:
+                from bot_engine.ai.ai_integration import prefetch_ai_predictions
+                prefetch_ai_predictions([
+                    {
+                        'symbol': coin['symbol'],
+                        'direction': 'LONG' if coin['signal'] == 'ENTER_LONG' else 'SHORT',
+                        'rsi': coin['rsi'],
+                        'trend': coin['trend'] or 'NEUTRAL',
+                        'price': float(coin['coin_data'].get('price') or 0),
+                    }
+                    for coin in potential_coins
+                ])
+            except Exception:
+                pass
+            ai_allowed_coins = []
+            for coin in potential_coins:
+                symbol = coin['symbol']
+                coin_data = coin['coin_data']
+                signal = coin['signal']
+                last_ai_result = None
+                try:
+                    from bot_engine.ai.ai_integration import should_open_position_with_ai
+                    from bots_modules.imports_and_globals import get_config_snapshot
+                    config_snapshot = get_config_snapshot(symbol)
+                    filter_config = config_snapshot.get('merged', {}) or bots_data.get('auto_bot_config', {})
+                    price = float(coin_data.get('price') or 0)
+                    candles_for_ai = None
+                    candles_tf = None
+                    candles_cache = coins_rsi_data.get('candles_cache', {})
+                    if symbol in candles_cache:
+                        c = candles_cache[symbol]
+                        if isinstance(c, dict):
+                            from bot_engine.config_loader import get_current_timeframe
+                            tf = get_current_timeframe()
+                            candles_for_ai = (c.get(tf) or {}).get('candles') if tf else c.get('candles')
+                            candles_tf = tf
+                            if not candles_for_ai and c:
+                                for k, v in (c.items() if isinstance(c, dict) else []):
+                                    if isinstance(v, dict) and v.get('candles'):
+                                        candles_for_ai = v['candles']
+                                        candles_tf = k
+                                        break
+                    last_ai_result = should_open_position_with_ai(
+                        symbol=symbol,
+                        direction='LONG' if signal == 'ENTER_LONG' else 'SHORT',
+                        rsi=coin['rsi'],
+                        trend=coin['trend'] or 'NEUTRAL',
+                        price=price,
+                        config=filter_config,
+                        candles=candles_for_ai,
+                        timeframe=candles_tf
+                    )
+                    if last_ai_result.get('ai_used') and not last_ai_result.get('should_open'):
+                        logger.info(f" 🤖 AI блокирует вход {symbol}: {last_ai_result.get('reason', 'AI prediction')} — монета не в списке")
+                        diag_skipped_ai += 1
+                        continue
+                    if last_ai_result.get('ai_used') and last_ai_result.get('should_open'):
+                        logger.info(f" 🤖 AI разрешает вход {symbol} (уверенность {last_ai_result.get('ai_confidence', 0):.0%})")
+                except Exception as ai_err:
+                    pass
+                coin['last_ai_result'] = last_ai_result
+                ai_allowed_coins.append(coin)
+            potential_coins = ai_allowed_coins
+        
         # Сводка диагностики при 0 кандидатах
         if total_coins > 0 and len(potential_coins) == 0 and (diag_skipped_rsi_none or diag_skipped_signal_wait or diag_skipped_scope_delisting or diag_skipped_filters or diag_skipped_ai):
             logger.info(
@@ -3132,21 +3175,22 @@ def process_auto_bot_signals(exchange_obj=None):
 
             # Создаём бота в памяти, входим по рынку, в список добавляем только после успешного входа
             try:
-                logger.info(f" 🚀 Создаем бота для {symbol} ({signal}, RSI: {coin['rsi']:.1f})")
-                new_bot = create_new_bot(symbol, exchange_obj=exchange_obj, register=False)
-                new_bot._remember_entry_context(coin['rsi'], coin.get('trend'))
-                if last_ai_result and last_ai_result.get('ai_used') and last_ai_result.get('should_open'):
-                    new_bot.ai_decision_id = last_ai_result.get('ai_decision_id')
-                    new_bot._set_decision_source('AI', last_ai_result)
-                logger.info(f" 📈 Входим в позицию {direction} для {symbol} (по рынку)")
-                entry_result = new_bot.enter_position(direction, force_market_entry=True)
-                if isinstance(entry_result, dict) and not entry_result.get('success', True):
-                    err_msg = entry_result.get('error') or entry_result.get('message') or str(entry_result)
-                    logger.warning(f" 🚫 {symbol}: вход по рынку не выполнен — бот не добавлен в список: {err_msg}")
-                    continue
-                # При успехе enter_position сам добавляет бота в bots_data
-                created_bots += 1
-                logger.info(f" ✅ {symbol}: позиция открыта, бот в списке")
+                with span('auto_bot.entry', trace_root=True, symbol=symbol, direction=direction):
+                    logger.info(f" 🚀 Создаем бота для {symbol} ({signal}, RSI: {coin['rsi']:.1f})")
+                    new_bot = create_new_bot(symbol, exchange_obj=exchange_obj, register=False)
+                    new_bot._remember_entry_context(coin['rsi'], coin.get('trend'))
+                    if last_ai_result and last_ai_result.get('ai_used') and last_ai_result.get('should_open'):
+                        new_bot.ai_decision_id = last_ai_result.get('ai_decision_id')
+                        new_bot._set_decision_source('AI', last_ai_result)
+                    logger.info(f" 📈 Входим в позицию {direction} для {symbol} (по рынку)")
+                    entry_result = new_bot.enter_position(direction, force_market_entry=True)
+                    if isinstance(entry_result, dict) and not entry_result.get('success', True):
+                        err_msg = entry_result.get('error') or entry_result.get('message') or str(entry_result)
+                        logger.warning(f" 🚫 {symbol}: вход по рынку не выполнен — бот не добавлен в список: {err_msg}")
+                        continue
+                    # При успехе enter_position сам добавляет бота в bots_data
+                    created_bots += 1
+                    logger.info(f" ✅ {symbol}: позиция открыта, бот в списке")
             except Exception as e:
                 error_str = str(e)
                 if 'заблокирован фильтрами' in error_str or 'filters_blocked' in error_str or 'exchange_position_exists' in error_str or 'уже есть позиция' in error_str:
@@ -3297,6 +3341,7 @@ def process_trading_signals_for_all_bots(exchange_obj=None):
     except Exception as e:
         logger.error(f"❌ Ошибка обработки торговых сигналов: {str(e)}")
 
+@traced('auto_bot.filters')
 def check_new_autobot_filters(symbol, signal, coin_data):
     """Проверяет фильтры для нового автобота. Учитывает включение/выключение каждого фильтра в конфиге."""
     try:
@@ -3793,7 +3838,10 @@ def get_lstm_prediction(symbol, signal, current_price):
             # Получаем предсказание с ТАЙМАУТОМ
             import concurrent.futures
             with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(ai_manager.lstm_predictor.predict, candles, current_price)
+                future = executor.submit(
+                    propagate_context(ai_manager.lstm_predictor.predict, span_name='ai.lstm_predict'),
+                    candles, current_price,
+                )
                 try:
                     prediction = future.result(timeout=5)  # 5 секунд таймаут для LSTM
                 except concurrent.futures.TimeoutError:
@@ -3891,7 +3939,7 @@ def get_pattern_analysis(symbol, signal, current_price):
             import concurrent.futures
             with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
                 future = executor.submit(
-                    ai_manager.pattern_detector.get_pattern_signal,
+                    propagate_context(ai_manager.pattern_detector.get_pattern_signal, span_name='ai.pattern_signal'),
                     candles, 
                     current_price, 
                     signal
@@ -3968,6 +4016,7 @@ def check_no_existing_position(symbol, signal):
         logger.error(f"{symbol}: Ошибка проверки позиций: {e}")
         return False
 
+@traced('bot.create')
 def create_new_bot(symbol, config=None, exchange_obj=None, register=True):
     """Создает нового бота. register=False — только объект в памяти, не добавлять в bots_data (для автовхода: регистрируем после успешного enter_position)."""
     try:
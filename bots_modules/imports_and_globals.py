@@ -538,6 +538,13 @@ def get_exchange():
 def set_exchange(exch):
     """Установить биржу во всех модулях"""
     _state.exchange = exch
+    # Фоновый прогрев плеча/режима маржи/параметров инструментов для быстрых входов
+    if exch is not None and hasattr(exch, 'start_preflight_warmup'):
+        try:
+            exch.start_preflight_warmup()
+            exch.start_ticker_refresh()
+        except Exception:
+            pass
     return exch
 
 # Экспортируем как переменные для обратной совместимости
@@ -609,6 +616,7 @@ coins_rsi_data = {
     'last_candles_update': None,  # ✅ Время последнего обновления свечей
     # ✅ Блокировка систем только до первой загрузки: после first_round_complete автобот и мониторинг не ждут загрузчик
     'first_round_complete': False,  # True после первой полной загрузки свечей + RSI; до этого автобот и проверки по RSI не запускаются
+    'warm_start_complete': False,  # True после тёплого старта из bots_data.db: мониторинг позиций работает до первого раунда (автобот ждёт)
 }
 
 # Модель данных для ботов
@@ -18,6 +18,8 @@ import threading
 import logging
 from datetime import datetime
 
+from bot_engine.feature_frame import get_feature_frame
+
 logger = logging.getLogger('BotsService')
 
 # Импорт глобальных переменных из imports_and_globals
@@ -311,7 +313,7 @@ def remove_mature_coin_from_storage(symbol):
 #     """Обновляет данные об оптимальных EMA из внешнего источника"""
 #     return False
 
-def check_coin_maturity_with_storage(symbol, candles):
+def check_coin_maturity_with_storage(symbol, candles, frame=None):
     """Проверяет зрелость монеты с использованием постоянного хранилища"""
     # Сначала проверяем постоянное хранилище
     if is_coin_mature_stored(symbol):
@@ -322,7 +324,7 @@ def check_coin_maturity_with_storage(symbol, candles):
         }
     
     # Если не в хранилище, выполняем полную проверку
-    maturity_result = check_coin_maturity(symbol, candles)
+    maturity_result = check_coin_maturity(symbol, candles, frame=frame)
     
     # Если монета зрелая, добавляем в постоянное хранилище (с автосохранением)
     if maturity_result['is_mature']:
@@ -330,8 +332,8 @@ def check_coin_maturity_with_storage(symbol, candles):
     
     return maturity_result
 
-def check_coin_maturity(symbol, candles):
-    """Проверяет зрелость монеты для торговли"""
+def check_coin_maturity(symbol, candles, frame=None):
+    """Проверяет зрелость монеты для торговли (frame — FeatureFrame раунда по тем же свечам, опционально)"""
     try:
         # Получаем настройки зрелости из конфигурации
         with bots_data_lock:
@@ -356,11 +358,12 @@ def check_coin_maturity(symbol, candles):
         # Это означает что монета должна иметь достаточно истории в РЕЦЕНТНОЕ время
         recent_candles = candles[-min_candles:] if len(candles) >= min_candles else candles
         
-        # Извлекаем цены закрытия из последних свечей
-        closes = [candle['close'] for candle in recent_candles]
-        
-        # Рассчитываем историю RSI
-        rsi_history = calculate_rsi_history(closes, 14)
+        # Рассчитываем историю RSI по последним свечам (из кадра признаков раунда, если передан)
+        if frame is not None and frame.candles is candles:
+            rsi_history = frame.rsi_history(14, window=min_candles)
+        else:
+            closes = [candle['close'] for candle in recent_candles]
+            rsi_history = calculate_rsi_history(closes, 14)
         if not rsi_history:
             return {
                 'is_mature': False,
@@ -512,7 +515,9 @@ def calculate_all_coins_maturity():
                     immature_count += 1
                     continue
                 
-                maturity_result = check_coin_maturity_with_storage(symbol, candles)
+                # Кадр признаков раунда: те же свечи уже разобраны при расчёте RSI — без повторного разбора
+                frame = get_feature_frame(symbol, maturity_tf, candles)
+                maturity_result = check_coin_maturity_with_storage(symbol, candles, frame=frame)
                 if maturity_result['is_mature']:
                     mature_count += 1
                 else:
@@ -213,16 +213,6 @@ def _check_if_trade_already_closed(bot_id, symbol, entry_price, entry_time_str):
         return False
 
 
-def _needs_price_update(position_side, desired_price, existing_price, tolerance=1e-6):
-    if desired_price is None:
-        return False
-    if existing_price is None:
-        return True
-    if (position_side or '').upper() == 'LONG':
-        return desired_price > existing_price + tolerance
-    return desired_price < existing_price - tolerance
-
-
 def _select_stop_loss_price(position_side, entry_price, current_price, config, break_even_price, trailing_price):
     entry_price = _safe_float(entry_price)
     current_price = _safe_float(current_price, entry_price)
@@ -284,6 +274,40 @@ def _apply_protection_state_to_bot_data(bot_data, state):
     bot_data['trailing_last_update_ts'] = state.trailing_last_update_ts
 
 
+def _evaluate_protections_for_bots(bot_instances, current_prices):
+    """
+    Решения Protection Engine для всех ботов одним пакетным расчётом (evaluate_protections_batch).
+
+    Состояние защит применяется к каждому боту, как в NewTradingBot._evaluate_protection_decision.
+    При ошибке пакетного расчёта — поштучная оценка.
+    """
+    from bot_engine.protections import evaluate_protections_batch
+
+    try:
+        configs, states, realized = [], [], []
+        for bot_instance in bot_instances:
+            try:
+                configs.append(bot_instance._get_effective_protection_config())
+            except Exception:
+                configs.append({})
+            states.append(bot_instance._build_protection_state())
+            realized.append(_safe_float(bot_instance.realized_pnl, 0.0) or 0.0)
+        decisions = evaluate_protections_batch(
+            current_prices, configs, states, realized_pnls=realized, now_ts=time.time()
+        )
+    except Exception as e:
+        logger.warning(f" ⚠️ Пакетная оценка защит не удалась, считаем поштучно: {e}")
+        return [
+            bot_instance._evaluate_protection_decision(price)
+            for bot_instance, price in zip(bot_instances, current_prices)
+        ]
+
+    for bot_instance, decision in zip(bot_instances, decisions):
+        if decision.state:
+            bot_instance._apply_protection_state(decision.state)
+    return decisions
+
+
 def _snapshot_bots_for_protections():
     """Возвращает копию автоконфига и ботов в позициях для обработки вне блокировки."""
     with bots_data_lock:
@@ -1469,12 +1493,23 @@ def update_bot_positions_status():
             return False
         leverage = 10
         results = []
+        quotes = {}
+        if hasattr(current_exchange, 'get_prices'):
+            # Цены всех монет одним снимком тикеров вместо запроса на каждую
+            try:
+                quotes = current_exchange.get_prices([item['symbol'] for item in to_update])
+            except Exception:
+                quotes = {}
         for item in to_update:
             try:
-                ticker_data = current_exchange.get_ticker(item['symbol'])
-                if not ticker_data or 'last_price' not in ticker_data:
-                    continue
-                current_price = float(ticker_data['last_price'])
+                quote = quotes.get(item['symbol'])
+                if quote and quote.get('last'):
+                    current_price = float(quote['last'])
+                else:
+                    ticker_data = current_exchange.get_ticker(item['symbol'])
+                    if not ticker_data or 'last_price' not in ticker_data:
+                        continue
+                    current_price = float(ticker_data['last_price'])
                 entry_price = item['entry_price']
                 position_side = item['position_side']
                 if position_side == 'LONG':
@@ -1543,25 +1578,29 @@ def get_exchange_positions():
             # ✅ ИСПРАВЛЕНИЕ: Используем exchange.get_positions() для получения ВСЕХ позиций с пагинацией
             # Это гарантирует, что мы получим все позиции, а не только первую страницу
             try:
-                positions_result = current_exchange.get_positions()
-                if isinstance(positions_result, tuple):
-                    processed_positions_list, rapid_growth = positions_result
+                if hasattr(current_exchange, 'get_raw_positions'):
+                    # Общий снимок позиций биржи: один постраничный запрос на всех потребителей
+                    raw_positions = current_exchange.get_raw_positions()
                 else:
-                    processed_positions_list = positions_result if positions_result else []
+                    positions_result = current_exchange.get_positions()
+                    if isinstance(positions_result, tuple):
+                        processed_positions_list, rapid_growth = positions_result
+                    else:
+                        processed_positions_list = positions_result if positions_result else []
                 
-                # Конвертируем обработанные позиции в формат, ожидаемый функцией
-                raw_positions = []
-                for pos in processed_positions_list:
-                    # Создаем формат сырых данных из обработанных
-                    raw_pos = {
-                        'symbol': pos.get('symbol', '') + 'USDT',
-                        'size': pos.get('size', 0),
-                        'side': 'Buy' if pos.get('side', '').upper() in ['LONG'] or pos.get('side', '') == 'Long' else 'Sell',
-                        'avgPrice': pos.get('avg_price', 0) or pos.get('entry_price', 0),
-                        'unrealisedPnl': pos.get('pnl', 0),
-                        'markPrice': pos.get('mark_price', 0) or pos.get('current_price', 0)
-                    }
-                    raw_positions.append(raw_pos)
+                    # Конвертируем обработанные позиции в формат, ожидаемый функцией
+                    raw_positions = []
+                    for pos in processed_positions_list:
+                        # Создаем формат сырых данных из обработанных
+                        raw_pos = {
+                            'symbol': pos.get('symbol', '') + 'USDT',
+                            'size': pos.get('size', 0),
+                            'side': 'Buy' if pos.get('side', '').upper() in ['LONG'] or pos.get('side', '') == 'Long' else 'Sell',
+                            'avgPrice': pos.get('avg_price', 0) or pos.get('entry_price', 0),
+                            'unrealisedPnl': pos.get('pnl', 0),
+                            'markPrice': pos.get('mark_price', 0) or pos.get('current_price', 0)
+                        }
+                        raw_positions.append(raw_pos)
                 
             except Exception as get_pos_error:
                 # Fallback: используем прямой вызов API с пагинацией
@@ -2282,15 +2321,17 @@ def check_missing_stop_losses():
             else:
                 processed_positions = positions_result if positions_result else []
             
-            # ✅ Получаем СЫРЫЕ позиции напрямую через API для детальной проверки
+            # ✅ Получаем СЫРЫЕ позиции для детальной проверки
             # Но используем обработанные позиции из exchange.get_positions() как основной источник
             try:
-                positions_response = current_exchange.client.get_positions(
+                if hasattr(current_exchange, 'get_raw_positions'):
+                    # Тот же снимок, из которого построен get_positions() — без повторной пагинации
+                    raw_positions = current_exchange.get_raw_positions()
+                elif current_exchange.client.get_positions(
                     category="linear",
                     settleCoin="USDT",
                     limit=100
-                )
-                if positions_response.get('retCode') == 0:
+                ).get('retCode') == 0:
                     # Получаем все страницы для сырых данных
                     raw_positions = []
                     cursor = None
@@ -2392,9 +2433,11 @@ def check_missing_stop_losses():
             return False
 
         from bots_modules.bot_class import NewTradingBot
+        from exchanges.trading_stop_reconciler import get_trading_stop_reconciler
 
         updated_count = 0
         failed_count = 0
+        pending = []
 
         for symbol, bot_snapshot in bots_snapshot.items():
             try:
@@ -2561,7 +2604,29 @@ def check_missing_stop_losses():
                     bot_instance.entry_timestamp = entry_timestamp
                     bot_instance.position_start_time = datetime.fromtimestamp(entry_timestamp)
 
-                decision = bot_instance._evaluate_protection_decision(current_price)
+                pending.append(
+                    (symbol, bot_snapshot, pos, bot_instance, entry_price, current_price, unrealized_pnl, position_side,
+                     position_size, entry_timestamp, existing_stop_loss, existing_take_profit, existing_trailing_stop)
+                )
+
+            except Exception as e:
+                logger.error(f" ❌ Ошибка обработки {symbol}: {e}")
+                failed_count += 1
+                continue
+
+        # Защиты всех позиций — одним пакетным расчётом, затем синхронизация стопов по каждой
+        decisions = _evaluate_protections_for_bots(
+            [item[3] for item in pending], [item[5] for item in pending]
+        ) if pending else []
+
+        stop_reconciler = get_trading_stop_reconciler(current_exchange)
+        reconciled = []
+        for item, decision in zip(pending, decisions):
+            (symbol, bot_snapshot, pos, bot_instance, entry_price, current_price, unrealized_pnl, position_side,
+             position_size, entry_timestamp, existing_stop_loss, existing_take_profit, existing_trailing_stop) = item
+            try:
+                # SL/TP на бирже сейчас (до того, как защитные механизмы бота их обновят)
+                stop_reconciler.observe(symbol, position_side, existing_stop_loss, existing_take_profit)
                 # ✅ ИСПРАВЛЕНО: Обновляем защитные механизмы (включая break-even стоп)
                 # Это нужно для установки break-even стопа на бирже при изменении конфига
                 bot_instance._update_protection_mechanisms(current_price)
@@ -2604,30 +2669,6 @@ def check_missing_stop_losses():
                     bot_instance.break_even_stop_price,
                     bot_instance.trailing_stop_price,
                 )
-                existing_stop_value = _safe_float(existing_stop_loss)
-
-                # ✅ ИСПРАВЛЕНО: Обновляем стоп-лосс, даже если он уже установлен, если нужен новый стоп
-                # Проверяем, нужно ли обновить стоп-лосс на бирже
-                if desired_stop and _needs_price_update(position_side, desired_stop, existing_stop_value):
-                    try:
-                        sl_response = current_exchange.update_stop_loss(
-                            symbol=symbol,
-                            stop_loss_price=desired_stop,
-                            position_side=position_side,
-                        )
-                        if sl_response and sl_response.get('success'):
-                            updates['stop_loss_price'] = desired_stop
-                            updated_count += 1
-                            logger.info(f" ✅ Стоп-лосс синхронизирован для {symbol}: {desired_stop:.6f}")
-                        elif sl_response and sl_response.get('zero_position'):
-                            # Позиция уже закрыта на бирже — не ошибка, синхронизация уберёт бота
-                            logger.info(f" 📌 {symbol}: позиция уже закрыта на бирже (zero position), будет синхронизирована")
-                        else:
-                            failed_count += 1
-                            logger.error(f" ❌ Ошибка установки стоп-лосса для {symbol}: {sl_response}")
-                    except Exception as e:
-                        failed_count += 1
-                        logger.error(f" ❌ Ошибка установки стоп-лосса для {symbol}: {e}")
 
                 desired_take = _select_take_profit_price(
                     position_side,
@@ -2635,39 +2676,41 @@ def check_missing_stop_losses():
                     protection_config,
                     bot_instance.trailing_take_profit_price,
                 )
-                existing_take_value = _safe_float(existing_take_profit)
-
-                # Проверяем, есть ли уже тейк-профит на бирже
+                # Тейк-профит, уже установленный на бирже, не трогаем
                 if existing_take_profit and existing_take_profit.strip():
-                    pass  # Тейк-профит уже установлен, пропускаем
-                elif desired_take and _needs_price_update(position_side, desired_take, existing_take_value):
-                    try:
-                        tp_response = current_exchange.update_take_profit(
-                            symbol=symbol,
-                            take_profit_price=desired_take,
-                            position_side=position_side,
-                        )
-                        if tp_response and tp_response.get('success'):
-                            updates['take_profit_price'] = desired_take
-                            updated_count += 1
-                            logger.info(f" ✅ Тейк-профит синхронизирован для {symbol}: {desired_take:.6f}")
-                        elif tp_response and tp_response.get('zero_position'):
-                            logger.info(f" 📌 {symbol}: позиция уже закрыта на бирже (zero position), будет синхронизирована")
-                        else:
-                            failed_count += 1
-                            logger.error(f" ❌ Ошибка установки тейк-профита для {symbol}: {tp_response}")
-                    except Exception as e:
-                        failed_count += 1
-                        logger.error(f" ❌ Ошибка установки тейк-профита для {symbol}: {e}")
+                    desired_take = None
 
-                if not _update_bot_record(symbol, updates):
-                    pass
+                # Изменения SL/TP — в очередь reconciler: отправится только реальная разница с биржей
+                stop_reconciler.submit(symbol, position_side, stop_loss=desired_stop, take_profit=desired_take)
+                reconciled.append((symbol, position_side, updates))
 
             except Exception as e:
                 logger.error(f" ❌ Ошибка обработки {symbol}: {e}")
                 failed_count += 1
                 continue
 
+        # SL и TP позиции — одним запросом, сначала позиции без стопа; остальное — на следующем проходе
+        results = stop_reconciler.flush() if reconciled else {}
+        for symbol, position_side, updates in reconciled:
+            result = results.get((symbol, position_side)) or {}
+            if result.get('zero_position'):
+                # Позиция уже закрыта на бирже — не ошибка, синхронизация уберёт бота
+                logger.info(f" 📌 {symbol}: позиция уже закрыта на бирже (zero position), будет синхронизирована")
+            elif result.get('failed'):
+                failed_count += 1
+                logger.error(f" ❌ Ошибка установки SL/TP для {symbol}: {result.get('message')}")
+            if result.get('stop_loss') is not None:
+                updates['stop_loss_price'] = result['stop_loss']
+                updated_count += 1
+                logger.info(f" ✅ Стоп-лосс синхронизирован для {symbol}: {result['stop_loss']:.6f}")
+            if result.get('take_profit') is not None:
+                updates['take_profit_price'] = result['take_profit']
+                updated_count += 1
+                logger.info(f" ✅ Тейк-профит синхронизирован для {symbol}: {result['take_profit']:.6f}")
+
+            if not _update_bot_record(symbol, updates):
+                pass
+
         if updated_count > 0 or failed_count > 0:
             logger.info(f" ✅ Установка завершена: установлено {updated_count}, ошибок {failed_count}")
             if updated_count > 0:
@@ -2717,10 +2760,14 @@ def check_startup_position_conflicts():
                     # Проверяем позицию на бирже
                     from bots_modules.imports_and_globals import get_exchange
                     current_exchange = get_exchange() or exchange
-                    positions_response = current_exchange.client.get_positions(
-                        category="linear",
-                        symbol=symbol_for_api
-                    )
+                    if hasattr(current_exchange, 'get_raw_positions'):
+                        # Позиции символа из общего снимка — без отдельного запроса на каждого бота
+                        positions_response = {'retCode': 0, 'result': {'list': current_exchange.get_raw_positions(symbol_for_api)}}
+                    else:
+                        positions_response = current_exchange.client.get_positions(
+                            category="linear",
+                            symbol=symbol_for_api
+                        )
                     
                     if positions_response.get('retCode') == 0:
                         positions = positions_response['result']['list']
@@ -2880,33 +2927,45 @@ def sync_bots_with_exchange():
                     logger.error(f"[SYNC_EXCHANGE] ❌ Биржа не инициализирована")
                     return False
                 
-                # 🔥 УПРОЩЕННЫЙ ПОДХОД: быстрый таймаут на уровне SDK
-                positions_response = None
-                timeout_seconds = 8  # Короткий таймаут
-                max_retries = 2
-                
-                for retry in range(max_retries):
-                    retry_start = time.time()
+                if hasattr(current_exchange, 'get_raw_positions'):
+                    # Общий снимок позиций: все страницы уже собраны, отдельная пагинация не нужна
                     try:
-                        # Устанавливаем короткий таймаут на уровне клиента
-                        old_timeout = getattr(current_exchange.client, 'timeout', None)
-                        current_exchange.client.timeout = timeout_seconds
+                        positions_response = {
+                            'retCode': 0,
+                            'result': {'list': current_exchange.get_raw_positions(), 'nextPageCursor': ''}
+                        }
+                    except Exception as e:
+                        logger.error(f"[SYNC_EXCHANGE] ❌ Не удалось получить позиции: {e}")
+                        return False
+                else:
+                    # 🔥 УПРОЩЕННЫЙ ПОДХОД: быстрый таймаут на уровне SDK
+                    positions_response = None
+                    timeout_seconds = 8  # Короткий таймаут
+                    max_retries = 2
+                
+                    for retry in range(max_retries):
+                        retry_start = time.time()
+                        try:
+                            # Устанавливаем короткий таймаут на уровне клиента
+                            old_timeout = getattr(current_exchange.client, 'timeout', None)
+                            current_exchange.client.timeout = timeout_seconds
                         
-                        positions_response = current_exchange.client.get_positions(**params)
+                            positions_response = current_exchange.client.get_positions(**params)
                         
-                        # Восстанавливаем таймаут
-                        if old_timeout is not None:
-                            current_exchange.client.timeout = old_timeout
+                            # Восстанавливаем таймаут
+                            if old_timeout is not None:
+                                current_exchange.client.timeout = old_timeout
                         
-                        break  # Успех!
+                            break  # Успех!
                         
-                    except Exception as e:
-                        pass
-                        if retry < max_retries - 1:
-                            time.sleep(2)
-                        else:
-                            logger.error(f"[SYNC_EXCHANGE] ❌ Все попытки провалились")
-                            return False
+                        except Exception as e:
+                            pass
+                            if retry < max_retries - 1:
+                                time.sleep(2)
+                            else:
+                                logger.error(f"[SYNC_EXCHANGE] ❌ Все попытки провалились")
+                                return False
+                
                 
                 # Проверяем что получили ответ
                 if positions_response is None:
@@ -421,9 +421,10 @@ def positions_monitor_worker():
                     from bots_modules.imports_and_globals import bots_data, bots_data_lock, coins_rsi_data
                     from bots_modules.bot_class import NewTradingBot
 
-                    # ✅ Блокировка только до первой загрузки: проверки по RSI — только после first_round_complete; далее не ждём
+                    # ✅ Блокировка только до первой загрузки: проверки по RSI — после first_round_complete
+                    # или тёплого старта из БД (warm_start_complete: позиции защищены до первого раунда); далее не ждём
                     rsi_data_available = (
-                        coins_rsi_data.get('first_round_complete') and
+                        (coins_rsi_data.get('first_round_complete') or coins_rsi_data.get('warm_start_complete')) and
                         coins_rsi_data.get('coins') is not None and
                         len(coins_rsi_data.get('coins', {})) > 0
                     )
@@ -131,6 +131,7 @@ DATABASE_BACKUP = {                        # Настройки фонового
     'BACKUP_DIR': None,
     'MAX_RETRIES': 3,
     'KEEP_LAST_N': 5,
+    'FULL_EVERY_N': 6,           # Каждый 6-й бэкап полный, между ними — разностные (1 = всегда полный)
 }
 TIME_SYNC = {                              # Синхронизация времени с NTP (только Windows)
     'ENABLED': False,            # Включить автоматическую синхронизацию времени
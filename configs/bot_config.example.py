@@ -337,6 +337,8 @@ class SystemConfig:
     INACTIVE_BOT_TIMEOUT = 60               # Таймаут неактивного бота, сек
     STOP_LOSS_SETUP_INTERVAL = 10           # Интервал установки стоп-лоссов, сек
     POSITION_SYNC_INTERVAL = 2              # Интервал синхронизации позиций с биржей, сек
+    WARM_START_ENABLED = True               # Тёплый старт: свечи/RSI из БД, защита позиций до первого раунда
+    WARM_START_MAX_STALE_CANDLES = 2        # Монета из БД свежая, если последняя свеча не старше N интервалов ТФ
     MINI_CHART_UPDATE_INTERVAL = 30         # Интервал обновления мини-графиков, сек
     SMART_RSI_UPDATE = True                 # Включить умное обновление RSI
     RSI_CANDLE_CHECK_INTERVAL = 300         # Интервал проверки свечей RSI, сек
@@ -366,6 +368,30 @@ class SystemConfig:
     # Bybit: режим маржи — auto (следовать бирже), cross, isolated
     BYBIT_MARGIN_MODE = 'auto'
 
+    # Планировщик запросов к бирже: ордера/стопы > синхронизация позиций > свечи позиций > массовая загрузка
+    EXCHANGE_REQUESTS_PER_SEC = 20          # Общий бюджет запросов, запросов/сек
+    EXCHANGE_REQUEST_BURST = 20             # Запас токенов для всплеска запросов
+    EXCHANGE_RESERVED_TOKENS = 5            # Токены, которые массовая загрузка свечей не расходует
+    EXCHANGE_DISCOVERY_MAX_WAIT = 10        # Сколько запрос массовой загрузки ждёт допуска, сек (потом — пропуск)
+    EXCHANGE_RATE_RESTORE_COOLDOWN = 60     # После rate limit темп не восстанавливается раньше, сек
+    EXCHANGE_RATE_RESTORE_SUCCESSES = 20    # ...и не раньше стольких успешных запросов подряд
+    SLOW_PATH_LOG_MS = 2000                 # Путь входа (сигнал → ордер) дольше N мс пишется в лог деревом этапов; 0 — выкл
+    RECENT_CLOSURES_PER_SYMBOL = 20         # Глубина индекса последних закрытий по монете (защита от повторных входов)
+    RECENT_CLOSURES_REFRESH_SEC = 30        # Как часто подтягивать новые закрытия ботов и биржи из БД, сек
+    RECENT_CLOSURES_EXCHANGE_SEED_ROWS = 5000  # При старте читать столько последних строк closed_pnl_history, а не всю таблицу
+    POSITION_SNAPSHOT_TTL = 1.0             # Сколько секунд снимок позиций биржи общий для всех ботов (наши ордера сбрасывают его)
+    ORDER_PREFLIGHT_PRICE_MAX_AGE = 2.0     # place_order берёт цену из кэша, если она не старше N сек (иначе запрос тикера)
+    ORDER_PREFLIGHT_ACCOUNT_TTL = 600       # Сколько секунд доверять кэшу плеча и режима маржи по монете
+    ORDER_PREFLIGHT_INSTRUMENT_TTL = 3600   # Сколько секунд доверять кэшу параметров инструмента и макс. плеча
+    ORDER_PREFLIGHT_WARM_INTERVAL = 1800    # Интервал фонового прогрева кэша pre-flight, сек; 0 — выкл
+    TICKER_SNAPSHOT_MAX_AGE = 2.0           # Возраст снимка тикеров всех монет, после которого он запрашивается заново, сек
+    TICKER_SNAPSHOT_REFRESH_SEC = 0         # Фоновое обновление снимка тикеров, сек; 0 — только по запросу
+    TRADING_STOP_HYSTERESIS_TICKS = 2       # SL/TP на бирже меняются, только если сдвиг не меньше N шагов цены (tickSize)
+    TRADING_STOP_MAX_ATTEMPTS = 3           # Попыток отправить изменение SL/TP, после — отбрасывается до следующего расчёта
+    TRADING_STOP_RETRY_DELAY = 2.0          # Пауза перед повтором неудачного изменения SL/TP, сек (удваивается)
+    CLOSED_PNL_SYNC_OVERLAP_SEC = 300       # Перекрытие окна синхронизации closed PnL с курсором (запоздавшие записи биржи), сек
+    CLOSED_PNL_SYNC_INITIAL_DAYS = 547      # Глубина первой загрузки closed PnL, если курсора и данных в БД ещё нет, дней
+
     # ========================================================================
     # КОНСТАНТЫ ДЛЯ INDICATORS И AI (fallback для индикаторов и ИИ; автобот использует AutoBotConfig)
     # ========================================================================
@@ -410,6 +436,12 @@ class SystemConfig:
     AI_CPU_PCT = 30                         # Макс. % CPU для ИИ
     AI_GPU_MEMORY_FRACTION = 0.3            # Доля памяти GPU для ИИ (0–1)
 
+    # ========================================================================
+    # ПЕРЕДАЧА СВЕЧЕЙ bots.py → ai.py ЧЕРЕЗ SHARED MEMORY
+    # ========================================================================
+    CANDLES_SHARED_MEMORY_ENABLED = True    # bots.py публикует свечи, ai.py читает их без БД и биржи
+    CANDLES_SHM_MAX_AGE_SEC = 900           # Старше — считаются устаревшими (bots.py остановлен), сек
+
     # Трейсинг (для отладки зависаний)
     ENABLE_CODE_TRACING = False             # Включить трейсинг кода
     TRACE_INCLUDE_KEYWORDS = [              # Модули для включения в трейс
@@ -557,6 +589,9 @@ class AIConfig:
     AI_AUTO_RETRAIN = True                  # Автопереобучение
     AI_RETRAIN_INTERVAL = 604800            # Интервал переобучения, сек (7 дней)
     AI_RETRAIN_HOUR = 3                     # Час запуска переобучения
+    AI_DRIFT_DETECTION_ENABLED = True       # Переобучение при дрифте данных (скетчи свечей всех монет)
+    AI_DRIFT_WINDOW_DAYS = 7                # Текущее окно для сравнения с reference, дней
+    AI_TRAINING_WORKER_ENABLED = True       # Обучать модели в постоянном процессе (False = скрипты через subprocess)
 
     # Самообучение AI в реальном времени
     AI_SELF_LEARNING_ENABLED = True         # Включить самообучение в реальном времени
@@ -586,3 +621,8 @@ class AIConfig:
     AI_SIMULATIONS_PER_COIN = 20            # Симуляций на монету
     AI_SAVE_BEST_PARAMS_MIN_WIN_RATE = 0.90 # Мин. винрейт для сохранения лучших параметров
     AI_USE_SAVED_SETTINGS_AS_BASE = True    # Использовать сохранённые настройки как базу
+    AI_OPTIMIZER_WORKERS = 0                # Процессов для параллельной оптимизации монет (0 = CPU-1)
+    AI_PARALLEL_OPTIMIZE_ON_TRAINING = True # Оптимизировать параметры всех монет в пуле процессов перед обучением на истории
+    AI_BACKTEST_CACHE_SIZE = 5000           # Записей в памяти кэша результатов бэктестов (LRU)
+    AI_TRAINING_CHUNK_SIZE = 5000           # Сделок в пачке при потоковом чтении обучающей выборки из БД
+    AI_TRAINING_MAX_IN_MEMORY_SAMPLES = 200000  # Больше — инкрементальное обучение (partial_fit) по пачкам
@@ -0,0 +1,589 @@
+"""
+ШАБЛОН (только дефолтные значения). НЕ подставляйте сюда свои ключи и рабочие настройки!
+
+   Скопируйте в configs/bot_config.py только при первом запуске (если bot_config.py нет).
+   Рабочий конфиг с вашими настройками — configs/bot_config.py; его не перезаписывайте из этого файла.
+
+📝 ОСНОВНЫЕ НАСТРОЙКИ:
+   - leverage: Кредитное плечо (1-125x) — устанавливается автоматически перед входом в позицию
+   - default_position_size: Размер позиции в USDT или процентах
+   - rsi_long_threshold / rsi_short_threshold: Пороги RSI для входа в позицию
+   - max_loss_percent: Максимальный убыток в % (стоп-лосс)
+
+📐 КАК УСТРОЕНО:
+   • Вся логика и дефолты — в классах DefaultAutoBotConfig и AutoBotConfig (атрибуты В ВЕРХНЕМ РЕГИСТРЕ, с комментариями).
+   • DefaultAutoBotConfig — шаблон для «Сбросить к стандарту». AutoBotConfig — рабочие настройки (в шаблоне совпадают с дефолтами).
+"""
+
+# ==================== БЛОК 1: AUTO BOT — ДЕФОЛТЫ (шаблон для кнопки «Сбросить к стандарту») ====================
+class DefaultAutoBotConfig:
+    """
+    Дефолтная конфигурация автобота. Шаблон для «Сбросить к стандарту».
+    Атрибуты в ВЕРХНЕМ РЕГИСТРЕ; при экспорте ключи приводятся к нижнему регистру.
+    """
+
+    # --- Включение и лимиты ---
+    ENABLED = True                          # Включить автобота
+    MAX_CONCURRENT = 50                     # Максимальное число одновременных позиций
+    RISK_CAP_PERCENT = 10                   # Лимит риска в процентах от депозита
+    SCOPE = 'all'                           # Область: all | whitelist | blacklist
+    WHITELIST = []                          # Список монет для торговли (при scope=whitelist)
+    BLACKLIST = []                          # Список исключённых монет (при scope=blacklist)
+
+    # --- RSI: пороги входа и выхода ---
+    RSI_LONG_THRESHOLD = 29                 # Вход в LONG при RSI <= этого значения
+    RSI_SHORT_THRESHOLD = 71                # Вход в SHORT при RSI >= этого значения
+    RSI_EXIT_LONG_WITH_TREND = 65           # Выход из LONG по тренду при RSI >=
+    RSI_EXIT_LONG_AGAINST_TREND = 60        # Выход из LONG против тренда при RSI <=
+    RSI_EXIT_SHORT_WITH_TREND = 35          # Выход из SHORT по тренду при RSI <=
+    RSI_EXIT_SHORT_AGAINST_TREND = 40       # Выход из SHORT против тренда при RSI >=
+    RSI_EXIT_MIN_CANDLES = 0                # Минимум свечей до выхода по RSI (0=выкл.)
+    RSI_EXIT_MIN_MINUTES = 0                # Если > 0: мин. время в минутах (адаптивно по ТФ). Приоритет над MIN_CANDLES.
+    RSI_EXIT_MIN_MOVE_PERCENT = 0           # Если > 0: разрешить выход по RSI раньше, когда цена сдвинулась на этот % от входа.
+
+    # --- Размер позиции и плечо ---
+    DEFAULT_POSITION_SIZE = 5               # Базовый размер позиции (в единицах mode)
+    DEFAULT_POSITION_MODE = 'percent'       # Режим размера: usdt | percent
+    LEVERAGE = 10                           # Кредитное плечо (1–125)
+
+    # --- Интервалы проверки ---
+    CHECK_INTERVAL = 180                    # Интервал проверки сигналов, сек
+    MONITORING_INTERVAL = 10                # Интервал мониторинга активных ботов, сек
+
+    # --- Торговля ---
+    TRADING_ENABLED = True                  # Включить реальную торговлю
+    USE_TEST_SERVER = False                 # Использовать тестовый сервер биржи
+    MAX_LOSS_PERCENT = 15                   # Максимальный убыток в % (стоп-лосс)
+    TAKE_PROFIT_PERCENT = 5.0                # Закрывать позицию при достижении этого % прибыли по монете (0 = отключено)
+    CLOSE_AT_PROFIT_ENABLED = True          # Включить выход по достижении % прибыли (выключатель)
+    TRAILING_STOP_ACTIVATION = 10           # % прибыли для активации трейлинг-стопа
+    TRAILING_STOP_DISTANCE = 5              # Дистанция трейлинг-стопа от макс. цены, %
+    TRAILING_TAKE_DISTANCE = 0.5            # Резервный трейлинг-тейк, %
+    TRAILING_UPDATE_INTERVAL = 3            # Минимальный интервал обновления стопов, сек
+    MAX_POSITION_HOURS = 0                  # Макс. время удержания позиции, ч (0 = выкл.)
+    BREAK_EVEN_PROTECTION = True            # Включить защиту безубыточности
+    BREAK_EVEN_TRIGGER = 20                 # Триггер break even, %
+    BREAK_EVEN_TRIGGER_PERCENT = 5          # Доп. порог break even, %
+
+    # --- Тренд ---
+    TREND_DETECTION_ENABLED = True           # Включить определение тренда
+    AVOID_DOWN_TREND = False                # Не входить в LONG при нисходящем тренде
+    AVOID_UP_TREND = False                  # Не входить в SHORT при восходящем тренде
+    TREND_ANALYSIS_PERIOD = 30              # Количество свечей для анализа тренда
+    TREND_PRICE_CHANGE_THRESHOLD = 7        # % изменения цены для определения тренда
+    TREND_CANDLES_THRESHOLD = 70            # % свечей в одну сторону для тренда
+
+    # --- Зрелость монет ---
+    ENABLE_MATURITY_CHECK = True             # Включить проверку зрелости монет
+    MIN_CANDLES_FOR_MATURITY = 400          # Минимум свечей для зрелой монеты
+    MIN_RSI_LOW = 35                        # Минимальный достигнутый RSI для зрелости
+    MAX_RSI_HIGH = 65                       # Максимальный достигнутый RSI для зрелости
+
+    # --- RSI временной фильтр ---
+    RSI_TIME_FILTER_ENABLED = True           # Включить временной фильтр RSI-сигналов
+    RSI_TIME_FILTER_CANDLES = 7             # Минимум свечей с последнего экстремума
+    RSI_TIME_FILTER_UPPER = 65              # Верхняя граница зоны фильтра
+    RSI_TIME_FILTER_LOWER = 35              # Нижняя граница зоны фильтра
+
+    # --- Лимитные ордера (набор позиции) ---
+    LIMIT_ORDERS_ENTRY_ENABLED = False      # Набор позиции лимитными ордерами
+    LIMIT_ORDERS_PERCENT_STEPS = [0, 0.5, 1, 1.5, 2]   # Шаги в % от цены входа
+    LIMIT_ORDERS_MARGIN_AMOUNTS = [5, 5, 5, 5, 5]      # Объём маржи на каждый ордер, USDT
+
+    # --- Exit Scam фильтр ---
+    EXIT_SCAM_ENABLED = True                # Включить фильтр резких движений (pump/dump)
+    EXIT_SCAM_AUTO_LEARN_ENABLED = False    # Автоподбор порогов по истории монеты
+    EXIT_SCAM_CANDLES = 8                   # Количество свечей для проверки
+    EXIT_SCAM_SINGLE_CANDLE_PERCENT = 15    # Макс. % изменения одной свечи
+    EXIT_SCAM_MULTI_CANDLE_COUNT = 4        # Количество свечей для суммарного анализа
+    EXIT_SCAM_MULTI_CANDLE_PERCENT = 50     # Макс. суммарный % за N свечей
+
+    # --- ИИ (премиум) ---
+    AI_OPTIMAL_ENTRY_ENABLED = False        # ИИ оптимальная точка входа
+    AI_ENABLED = True                       # Включить подтверждение сигналов ИИ
+    AI_MIN_CONFIDENCE = 0.7                # Минимальная уверенность ИИ (0.0–1.0)
+    AI_OVERRIDE_ORIGINAL = True             # ИИ может блокировать решение скрипта
+    ANOMALY_BLOCK_THRESHOLD = 0.7           # Порог блокировки по аномалии
+    ANOMALY_DETECTION_ENABLED = True        # Включить детекцию аномалий
+    ANOMALY_LOG_ENABLED = True              # Логировать аномалии
+    AUTO_TRAIN_ENABLED = True               # Включить автоматическое обучение ИИ
+    RETRAIN_INTERVAL = 604800               # Интервал переобучения, сек (7 дней)
+    RETRAIN_HOUR = 3                        # Час запуска переобучения (ночью)
+    ENHANCED_RSI_ENABLED = True             # Включить расширенный RSI
+    ENHANCED_RSI_REQUIRE_DIVERGENCE_CONFIRMATION = True   # Требовать подтверждение дивергенцией
+    ENHANCED_RSI_REQUIRE_VOLUME_CONFIRMATION = True      # Требовать подтверждение объёмом
+    ENHANCED_RSI_USE_STOCH_RSI = True       # Использовать Stochastic RSI
+    LSTM_ENABLED = True                     # Включить LSTM-предсказание
+    LSTM_MIN_CONFIDENCE = 0.6               # Минимальная уверенность LSTM
+    LSTM_WEIGHT = 1.5                       # Вес LSTM в решении
+    PATTERN_ENABLED = True                  # Включить распознавание паттернов
+    PATTERN_MIN_CONFIDENCE = 0.6            # Минимальная уверенность паттерна
+    PATTERN_WEIGHT = 1.2                    # Вес паттерна в решении
+    LOG_PREDICTIONS = True                  # Логировать предсказания ИИ
+    LOG_ANOMALIES = True                    # Логировать аномалии
+    LOG_PATTERNS = True                     # Логировать паттерны
+    RISK_MANAGEMENT_ENABLED = True          # Включить умный риск-менеджмент ИИ
+    SELF_LEARNING_ENABLED = False           # Включить самообучение ИИ в реальном времени
+
+    # --- Системные интервалы ---
+    REFRESH_INTERVAL = 2                   # Интервал обновления данных, сек
+    RSI_UPDATE_INTERVAL = 30                # Интервал обновления RSI, сек
+    RISK_UPDATE_INTERVAL = 300              # Интервал обновления рисков, сек
+    DATA_UPDATE_INTERVAL = 86400            # Интервал обновления исторических данных, сек
+    AUTO_UPDATE_DATA = True                 # Автообновление данных
+    AUTO_REFRESH_UI = True                  # Автообновление UI
+    AUTO_RETRAIN = True                     # Автопереобучение ИИ
+    AUTO_SAVE_INTERVAL = 30                 # Интервал автосохранения, сек
+    DEBUG_MODE = False                      # Режим отладки
+    INACTIVE_BOT_CLEANUP_INTERVAL = 600     # Интервал очистки неактивных ботов, сек
+    INACTIVE_BOT_TIMEOUT = 60               # Таймаут неактивного бота, сек
+    POSITION_SYNC_INTERVAL = 10             # Интервал синхронизации позиций с биржей, сек
+    STOP_LOSS_SETUP_INTERVAL = 10           # Интервал установки стоп-лоссов, сек
+    MINI_CHART_UPDATE_INTERVAL = 30          # Интервал обновления мини-графиков, сек
+
+    # --- Защита от повторного входа после убытка ---
+    LOSS_REENTRY_PROTECTION = True          # Защита от повторного входа после убытка
+    LOSS_REENTRY_CANDLES = 3                # Минимум свечей до повторного входа
+    LOSS_REENTRY_COUNT = 1                  # Допустимое число убыточных подряд
+    MIN_VOLATILITY_THRESHOLD = 0.05         # Минимальный порог волатильности (5%)
+
+    # --- Enhanced RSI (расширенные параметры) ---
+    RSI_DIVERGENCE_LOOKBACK = 10            # Глубина поиска дивергенции, свечей
+    RSI_EXTREME_OVERSOLD = 20               # Экстремальная перепроданность RSI
+    RSI_EXTREME_OVERBOUGHT = 80             # Экстремальная перекупленность RSI
+    RSI_EXTREME_ZONE_TIMEOUT = 3            # Таймаут в экстремальной зоне, свечей
+    RSI_VOLUME_CONFIRMATION_MULTIPLIER = 1.2   # Множитель объёма для подтверждения
+
+    # --- Таймфрейм системы ---
+    SYSTEM_TIMEFRAME = '6h'                 # Таймфрейм свечей (в шаблоне 6h)
+
+    # --- Smart Money Concepts ---
+    SMC_ENABLED = True                      # Включить Smart Money Concepts (OB, FVG, BOS/CHoCH)
+
+
+# ==================== БЛОК 2: AUTO BOT — РАБОЧИЕ НАСТРОЙКИ ====================
+class AutoBotConfig:
+    """
+    Рабочие настройки автобота. В шаблоне совпадают с DefaultAutoBotConfig.
+    Атрибуты в ВЕРХНЕМ РЕГИСТРЕ; при экспорте ключи — в нижнем.
+    """
+
+    # --- Включение и лимиты ---
+    ENABLED = True                          # Включить автобота
+    MAX_CONCURRENT = 50                     # Максимальное число одновременных позиций
+    RISK_CAP_PERCENT = 10                   # Лимит риска в процентах от депозита
+    SCOPE = 'all'                           # Область: all | whitelist | blacklist
+    WHITELIST = []                          # Список монет для торговли (при scope=whitelist)
+    BLACKLIST = []                          # Список исключённых монет (при scope=blacklist)
+
+    # --- RSI: пороги входа и выхода ---
+    RSI_LONG_THRESHOLD = 29                 # Вход в LONG при RSI <= этого значения
+    RSI_SHORT_THRESHOLD = 71                # Вход в SHORT при RSI >= этого значения
+    RSI_EXIT_LONG_WITH_TREND = 65           # Выход из LONG по тренду при RSI >=
+    RSI_EXIT_LONG_AGAINST_TREND = 60        # Выход из LONG против тренда при RSI <=
+    RSI_EXIT_SHORT_WITH_TREND = 35          # Выход из SHORT по тренду при RSI <=
+    RSI_EXIT_SHORT_AGAINST_TREND = 40       # Выход из SHORT против тренда при RSI >=
+    RSI_EXIT_MIN_CANDLES = 0                # Минимум свечей до выхода по RSI (0=выкл.)
+    RSI_EXIT_MIN_MINUTES = 0                # Если > 0: мин. время в минутах (адаптивно по ТФ). Приоритет над MIN_CANDLES.
+    RSI_EXIT_MIN_MOVE_PERCENT = 0           # Если > 0: разрешить выход по RSI раньше, когда цена сдвинулась на этот % от входа.
+
+    # --- Размер позиции и плечо ---
+    DEFAULT_POSITION_SIZE = 5               # Базовый размер позиции (в единицах mode)
+    DEFAULT_POSITION_MODE = 'percent'       # Режим размера: usdt | percent
+    LEVERAGE = 10                           # Кредитное плечо (1–125)
+
+    # --- Интервалы проверки ---
+    CHECK_INTERVAL = 180                    # Интервал проверки сигналов, сек
+    MONITORING_INTERVAL = 10                # Интервал мониторинга активных ботов, сек
+
+    # --- Торговля ---
+    TRADING_ENABLED = True                  # Включить реальную торговлю
+    USE_TEST_SERVER = False                 # Использовать тестовый сервер биржи
+    MAX_LOSS_PERCENT = 15                   # Максимальный убыток в % (стоп-лосс)
+    TAKE_PROFIT_PERCENT = 5.0                # Закрывать позицию при достижении этого % прибыли по монете (0 = отключено)
+    CLOSE_AT_PROFIT_ENABLED = True          # Включить выход по достижении % прибыли (выключатель)
+    TRAILING_STOP_ACTIVATION = 10           # % прибыли для активации трейлинг-стопа
+    TRAILING_STOP_DISTANCE = 5              # Дистанция трейлинг-стопа от макс. цены, %
+    TRAILING_TAKE_DISTANCE = 0.5            # Резервный трейлинг-тейк, %
+    TRAILING_UPDATE_INTERVAL = 3            # Минимальный интервал обновления стопов, сек
+    MAX_POSITION_HOURS = 0                  # Макс. время удержания позиции, ч (0 = выкл.)
+    BREAK_EVEN_PROTECTION = True            # Включить защиту безубыточности
+    BREAK_EVEN_TRIGGER = 20                 # Триггер break even, %
+    BREAK_EVEN_TRIGGER_PERCENT = 5          # Доп. порог break even, %
+
+    # --- Тренд ---
+    TREND_DETECTION_ENABLED = True           # Включить определение тренда
+    AVOID_DOWN_TREND = False                # Не входить в LONG при нисходящем тренде
+    AVOID_UP_TREND = False                  # Не входить в SHORT при восходящем тренде
+    TREND_ANALYSIS_PERIOD = 30              # Количество свечей для анализа тренда
+    TREND_PRICE_CHANGE_THRESHOLD = 7        # % изменения цены для определения тренда
+    TREND_CANDLES_THRESHOLD = 70            # % свечей в одну сторону для тренда
+
+    # --- Зрелость монет ---
+    ENABLE_MATURITY_CHECK = True             # Включить проверку зрелости монет
+    MIN_CANDLES_FOR_MATURITY = 400          # Минимум свечей для зрелой монеты
+    MIN_RSI_LOW = 35                        # Минимальный достигнутый RSI для зрелости
+    MAX_RSI_HIGH = 65                       # Максимальный достигнутый RSI для зрелости
+
+    # --- RSI временной фильтр ---
+    RSI_TIME_FILTER_ENABLED = True           # Включить временной фильтр RSI-сигналов
+    RSI_TIME_FILTER_CANDLES = 7             # Минимум свечей с последнего экстремума
+    RSI_TIME_FILTER_UPPER = 65              # Верхняя граница зоны фильтра
+    RSI_TIME_FILTER_LOWER = 35              # Нижняя граница зоны фильтра
+
+    # --- Лимитные ордера (набор позиции) ---
+    LIMIT_ORDERS_ENTRY_ENABLED = False      # Набор позиции лимитными ордерами
+    LIMIT_ORDERS_PERCENT_STEPS = [0, 0.5, 1, 1.5, 2]   # Шаги в % от цены входа
+    LIMIT_ORDERS_MARGIN_AMOUNTS = [5, 5, 5, 5, 5]      # Объём маржи на каждый ордер, USDT
+
+    # --- Exit Scam фильтр ---
+    EXIT_SCAM_ENABLED = True                # Включить фильтр резких движений (pump/dump)
+    EXIT_SCAM_AUTO_LEARN_ENABLED = False    # Автоподбор порогов по истории монеты
+    EXIT_SCAM_CANDLES = 8                   # Количество свечей для проверки
+    EXIT_SCAM_SINGLE_CANDLE_PERCENT = 15    # Макс. % изменения одной свечи
+    EXIT_SCAM_MULTI_CANDLE_COUNT = 4        # Количество свечей для суммарного анализа
+    EXIT_SCAM_MULTI_CANDLE_PERCENT = 50     # Макс. суммарный % за N свечей
+
+    # --- ИИ (премиум) ---
+    AI_OPTIMAL_ENTRY_ENABLED = False        # ИИ оптимальная точка входа
+    AI_ENABLED = True                       # Включить подтверждение сигналов ИИ
+    AI_MIN_CONFIDENCE = 0.7                 # Минимальная уверенность ИИ (0.0–1.0)
+    AI_OVERRIDE_ORIGINAL = True             # ИИ может блокировать решение скрипта
+    ANOMALY_BLOCK_THRESHOLD = 0.7           # Порог блокировки по аномалии
+    ANOMALY_DETECTION_ENABLED = True        # Включить детекцию аномалий
+    ANOMALY_LOG_ENABLED = True              # Логировать аномалии
+    AUTO_TRAIN_ENABLED = True               # Включить автоматическое обучение ИИ
+    RETRAIN_INTERVAL = 604800               # Интервал переобучения, сек (7 дней)
+    RETRAIN_HOUR = 3                        # Час запуска переобучения (ночью)
+    ENHANCED_RSI_ENABLED = True             # Включить расширенный RSI
+    ENHANCED_RSI_REQUIRE_DIVERGENCE_CONFIRMATION = True   # Требовать подтверждение дивергенцией
+    ENHANCED_RSI_REQUIRE_VOLUME_CONFIRMATION = True      # Требовать подтверждение объёмом
+    ENHANCED_RSI_USE_STOCH_RSI = True       # Использовать Stochastic RSI
+    LSTM_ENABLED = True                     # Включить LSTM-предсказание
+    LSTM_MIN_CONFIDENCE = 0.6               # Минимальная уверенность LSTM
+    LSTM_WEIGHT = 1.5                       # Вес LSTM в решении
+    PATTERN_ENABLED = True                  # Включить распознавание паттернов
+    PATTERN_MIN_CONFIDENCE = 0.6            # Минимальная уверенность паттерна
+    PATTERN_WEIGHT = 1.2                    # Вес паттерна в решении
+    LOG_PREDICTIONS = True                  # Логировать предсказания ИИ
+    LOG_ANOMALIES = True                    # Логировать аномалии
+    LOG_PATTERNS = True                     # Логировать паттерны
+    RISK_MANAGEMENT_ENABLED = True          # Включить умный риск-менеджмент ИИ
+    SELF_LEARNING_ENABLED = False           # Включить самообучение ИИ в реальном времени
+
+    # --- Системные интервалы ---
+    REFRESH_INTERVAL = 2                   # Интервал обновления данных, сек
+    RSI_UPDATE_INTERVAL = 30               # Интервал обновления RSI, сек
+    RISK_UPDATE_INTERVAL = 300             # Интервал обновления рисков, сек
+    DATA_UPDATE_INTERVAL = 86400           # Интервал обновления исторических данных, сек
+    AUTO_UPDATE_DATA = True                # Автообновление данных
+    AUTO_REFRESH_UI = True                 # Автообновление UI
+    AUTO_RETRAIN = True                    # Автопереобучение ИИ
+    AUTO_SAVE_INTERVAL = 30                # Интервал автосохранения, сек
+    DEBUG_MODE = False                     # Режим отладки
+    INACTIVE_BOT_CLEANUP_INTERVAL = 600    # Интервал очистки неактивных ботов, сек
+    INACTIVE_BOT_TIMEOUT = 60              # Таймаут неактивного бота, сек
+    POSITION_SYNC_INTERVAL = 10            # Интервал синхронизации позиций с биржей, сек
+    STOP_LOSS_SETUP_INTERVAL = 10          # Интервал установки стоп-лоссов, сек
+    MINI_CHART_UPDATE_INTERVAL = 30         # Интервал обновления мини-графиков, сек
+
+    # --- Защита от повторного входа после убытка ---
+    LOSS_REENTRY_PROTECTION = True          # Защита от повторного входа после убытка
+    LOSS_REENTRY_CANDLES = 3                # Минимум свечей до повторного входа
+    LOSS_REENTRY_COUNT = 1                  # Допустимое число убыточных подряд
+    MIN_VOLATILITY_THRESHOLD = 0.05         # Минимальный порог волатильности (5%)
+
+    # --- Enhanced RSI (расширенные параметры) ---
+    RSI_DIVERGENCE_LOOKBACK = 10            # Глубина поиска дивергенции, свечей
+    RSI_EXTREME_OVERSOLD = 20               # Экстремальная перепроданность RSI
+    RSI_EXTREME_OVERBOUGHT = 80             # Экстремальная перекупленность RSI
+    RSI_EXTREME_ZONE_TIMEOUT = 3            # Таймаут в экстремальной зоне, свечей
+    RSI_VOLUME_CONFIRMATION_MULTIPLIER = 1.2   # Множитель объёма для подтверждения
+
+    # --- Таймфрейм системы ---
+    SYSTEM_TIMEFRAME = '6h'                 # Таймфрейм свечей (в шаблоне 6h)
+
+    # --- Smart Money Concepts ---
+    SMC_ENABLED = True                      # Включить Smart Money Concepts (OB, FVG, BOS/CHoCH)
+
+
+# ==================== БЛОК 8: ОТДЕЛЬНЫЙ БОТ (дефолт) ====================
+class DefaultBotConfig:
+    """
+    Дефолтные настройки для одного бота (объём, статус, стоп-лосс, плечо).
+    Атрибуты в ВЕРХНЕМ РЕГИСТРЕ; при экспорте ключи — в нижнем.
+    """
+    VOLUME_MODE = 'fixed_usdt'              # Режим объёма: fixed_usdt | percent и т.д.
+    VOLUME_VALUE = 5.0                      # Значение объёма (USDT или %)
+    STATUS = 'IDLE'                         # Статус бота: IDLE | ACTIVE | ...
+    AUTO_MANAGED = False                    # Управляется ли бот автоботом
+    MAX_LOSS_PERCENT = 2.0                  # Максимальная потеря в % для стоп-лосса
+    LEVERAGE = 10                           # Кредитное плечо по умолчанию
+
+
+# ==================== БЛОК 3: SYSTEM CONFIG (интервалы и fallback-значения для кода) ====================
+class SystemConfig:
+    """
+    Системные интервалы обновления и fallback-значения для кода.
+    Реальные значения для автобота берутся из AutoBotConfig / загруженного конфига.
+    """
+    # Интервалы обновления (в секундах)
+    RSI_UPDATE_INTERVAL = 10                # Интервал обновления RSI, сек
+    ACCOUNT_UPDATE_INTERVAL = 5             # Интервал обновления счёта, сек
+    UI_REFRESH_INTERVAL = 2                 # Интервал обновления UI, сек
+    AUTO_SAVE_INTERVAL = 30                 # Интервал автосохранения, сек
+    BOT_STATUS_UPDATE_INTERVAL = 1          # Интервал обновления статуса ботов, сек
+    INACTIVE_BOT_CLEANUP_INTERVAL = 60      # Интервал очистки неактивных ботов, сек
+    INACTIVE_BOT_TIMEOUT = 60               # Таймаут неактивного бота, сек
+    STOP_LOSS_SETUP_INTERVAL = 10           # Интервал установки стоп-лоссов, сек
+    POSITION_SYNC_INTERVAL = 2              # Интервал синхронизации позиций с биржей, сек
+    MINI_CHART_UPDATE_INTERVAL = 30         # Интервал обновления мини-графиков, сек
+    SMART_RSI_UPDATE = True                 # Включить умное обновление RSI
+    RSI_CANDLE_CHECK_INTERVAL = 300         # Интервал проверки свечей RSI, сек
+    ENHANCED_RSI_ENABLED = True             # Включить расширенный RSI
+    ENHANCED_RSI_REQUIRE_VOLUME_CONFIRMATION = True   # Требовать подтверждение объёмом
+    ENHANCED_RSI_REQUIRE_DIVERGENCE_CONFIRMATION = False  # Требовать подтверждение дивергенцией
+    ENHANCED_RSI_USE_STOCH_RSI = True       # Использовать Stochastic RSI
+    # Fallback для кода (реальные значения — в AutoBotConfig)
+    RSI_OVERSOLD = 29                       # Порог перепроданности RSI
+    RSI_OVERBOUGHT = 71                     # Порог перекупленности RSI
+    RSI_EXIT_LONG_WITH_TREND = 65           # Выход из LONG по тренду при RSI >=
+    RSI_EXIT_SHORT_WITH_TREND = 35          # Выход из SHORT по тренду при RSI <=
+    RSI_EXIT_LONG_AGAINST_TREND = 60        # Выход из LONG против тренда при RSI <=
+    RSI_EXIT_SHORT_AGAINST_TREND = 40       # Выход из SHORT против тренда при RSI >=
+    RSI_EXTREME_ZONE_TIMEOUT = 3            # Таймаут в экстремальной зоне, свечей
+    RSI_EXTREME_OVERSOLD = 20               # Экстремальная перепроданность RSI
+    RSI_EXTREME_OVERBOUGHT = 80             # Экстремальная перекупленность RSI
+    RSI_VOLUME_CONFIRMATION_MULTIPLIER = 1.2   # Множитель объёма для подтверждения
+    RSI_DIVERGENCE_LOOKBACK = 10            # Глубина поиска дивергенции, свечей
+    SYSTEM_TIMEFRAME = '6h'                 # Fallback таймфрейм (реальный — в AutoBotConfig)
+    TREND_CONFIRMATION_BARS = 3             # Свечей для подтверждения тренда
+    TREND_MIN_CONFIRMATIONS = 2             # Минимум подтверждений тренда
+    TREND_REQUIRE_SLOPE = False             # Требовать наклон для тренда
+    TREND_REQUIRE_PRICE = True              # Учитывать цену в тренде
+    TREND_REQUIRE_CANDLES = True            # Учитывать свечи в тренде
+
+    # Bybit: режим маржи — auto (следовать бирже), cross, isolated
+    BYBIT_MARGIN_MODE = 'auto'
+
+    # ========================================================================
+    # КОНСТАНТЫ ДЛЯ INDICATORS И AI (fallback для индикаторов и ИИ; автобот использует AutoBotConfig)
+    # ========================================================================
+    RSI_PERIOD = 14                         # Период RSI, свечей
+    RSI_VOLATILITY_THRESHOLD_HIGH = 1.5     # Верхний порог волатильности для RSI
+    RSI_VOLATILITY_THRESHOLD_LOW = 0.7      # Нижний порог волатильности для RSI
+    RSI_STOCH_PERIOD = 14                   # Период Stochastic RSI, свечей
+    EMA_FAST = 50                           # Период быстрой EMA, свечей
+    EMA_SLOW = 200                          # Период медленной EMA, свечей
+
+    # Константы для фильтрации зрелости монет
+    MIN_CANDLES_FOR_MATURITY = 400          # Минимум свечей для зрелой монеты
+    MIN_RSI_LOW = 35                        # Минимальный RSI для зрелости
+    MAX_RSI_HIGH = 65                       # Максимальный RSI для зрелости
+    MIN_VOLATILITY_THRESHOLD = 0.05         # Минимальный порог волатильности (5%)
+    
+    # Настройки API
+    BOTS_SERVICE_PORT = 5001                # Порт сервиса ботов
+    BOTS_SERVICE_HOST = '0.0.0.0'           # Хост сервиса ботов
+    MAIN_APP_PORT = 5000                    # Порт основного приложения
+    MAIN_APP_HOST = '127.0.0.1'             # Хост основного приложения
+    REQUEST_TIMEOUT = 30                    # Таймаут запросов, сек
+    
+    # Настройки UI
+    AUTO_REFRESH_UI = True                  # Автообновление UI
+    PRESERVE_FILTERS = True                 # Сохранять фильтры при обновлении
+    TOAST_DURATION = 3000                   # Длительность уведомлений, мс
+    
+    # Отладка
+    DEBUG_MODE = False                      # Режим отладки
+    
+    # ========================================================================
+    # НАСТРОЙКИ УРОВНЕЙ ЛОГИРОВАНИЯ В КОНСОЛИ
+    # ========================================================================
+    CONSOLE_LOG_LEVELS = []                 # Список уровней для вывода в консоль
+
+    # ========================================================================
+    # ОГРАНИЧЕНИЕ ОЗУ ДЛЯ AI (ai.py)
+    # ========================================================================
+    AI_MEMORY_PCT = 30                      # Макс. % ОЗУ для ИИ
+    AI_MEMORY_LIMIT_MB = 4096               # Лимит ОЗУ для ИИ, МБ
+    AI_CPU_PCT = 30                         # Макс. % CPU для ИИ
+    AI_GPU_MEMORY_FRACTION = 0.3            # Доля памяти GPU для ИИ (0–1)
+
+    # Трейсинг (для отладки зависаний)
+    ENABLE_CODE_TRACING = False             # Включить трейсинг кода
+    TRACE_INCLUDE_KEYWORDS = [              # Модули для включения в трейс
+        'bots_modules',
+        'bot_engine',
+        'InfoBot',
+        'exchanges',
+        'scripts',
+        'launcher',
+    ]
+    TRACE_SKIP_KEYWORDS = [                 # Модули для исключения из трейса
+        'logging',
+        'threading',
+        'queue',
+        'socket',
+        'ssl',
+        'http',
+        'urllib',
+        'json',
+        'datetime',
+        'traceback',
+        'site-packages',
+        'AppData',
+        'Python3',
+    ]
+    TRACE_WRITE_TO_FILE = True              # Писать трейс в файл
+    TRACE_LOG_FILE = 'logs/trace.log'       # Путь к файлу трейса
+    TRACE_MAX_LINE_LENGTH = 200             # Макс. длина строки в трейсе, символов
+
+
+def _patch_system_config_ai_memory():
+    """Патч обратной совместимости для старых копий конфига."""
+    if not hasattr(SystemConfig, 'AI_MEMORY_PCT'):
+        SystemConfig.AI_MEMORY_PCT = 30
+    if not hasattr(SystemConfig, 'AI_MEMORY_LIMIT_MB'):
+        SystemConfig.AI_MEMORY_LIMIT_MB = 4096
+    if not hasattr(SystemConfig, 'AI_CPU_PCT'):
+        SystemConfig.AI_CPU_PCT = 30
+    if not hasattr(SystemConfig, 'AI_GPU_MEMORY_FRACTION'):
+        SystemConfig.AI_GPU_MEMORY_FRACTION = 0.3
+
+
+_patch_system_config_ai_memory()
+
+
+# ==================== БЛОК 10: RISK ====================
+class RiskConfig:
+    """Стоп-лосс, трейлинг и ограничения риска."""
+    STOP_LOSS_PERCENT = 15.0                # Стоп-лосс в %
+    TRAILING_STOP_ACTIVATION = 20.0         # % прибыли для активации трейлинг-стопа
+    TRAILING_STOP_DISTANCE = 150.0          # Дистанция трейлинг-стопа
+    MAX_POSITION_TIME_HOURS = 48            # Макс. время удержания позиции, ч
+    SECURITY_PROTECTION = True              # Включить защиту по просадке
+    SECURITY_TRIGGER_PERCENT = 100.0        # Порог срабатывания защиты, %
+    PRICE_SLIPPAGE_BUFFER = 5.0             # Буфер проскальзывания цены, %
+    MAX_CONCURRENT_POSITIONS = 10           # Макс. число одновременных позиций
+    MAX_RISK_PERCENT = 20.0                 # Макс. риск в %
+    STOP_ANALYSIS_ENABLED = True            # Анализ стоп-лоссов
+    BACKTEST_ENABLED = True                 # Включить бэктест
+    SMART_RISK_MANAGEMENT = True            # Умный риск-менеджмент
+    AI_OPTIMAL_ENTRY_ENABLED = True         # ИИ оптимальная точка входа
+
+
+# ==================== БЛОК 11: FILTER ====================
+class FilterConfig:
+    """Списки монет и RSI/тренд фильтры."""
+    WHITELIST = []                          # Список разрешённых монет
+    BLACKLIST = []                          # Список запрещённых монет
+    MIN_RSI = 0                             # Минимальный RSI для фильтра
+    MAX_RSI = 100                           # Максимальный RSI для фильтра
+    ALLOWED_TRENDS = ['UP', 'DOWN', 'NEUTRAL']   # Допустимые направления тренда
+
+
+# ==================== БЛОК 12: EXCHANGE ====================
+class ExchangeConfig:
+    """Биржа по умолчанию и поддержка."""
+    DEFAULT_EXCHANGE = 'bybit'              # Биржа по умолчанию
+    SUPPORTED_EXCHANGES = ['bybit', 'binance', 'okx']   # Поддерживаемые биржи
+    FUTURES_ONLY = True                     # Только фьючерсы
+
+
+# ==================== БЛОК 13: AI ====================
+class AIConfig:
+    """
+    Настройки ИИ модулей
+    
+    ИИ функции являются премиум дополнением и требуют лицензии.
+    Для активации лицензии: python scripts/activate_premium.py
+    """
+    
+    # Общие настройки
+    AI_ENABLED = True                       # Включить ИИ
+    AI_CONFIDENCE_THRESHOLD = 0.65          # Минимальная уверенность для рекомендации ИИ (0.0–1.0)
+
+    # Anomaly Detection — обнаружение аномалий (pump/dump)
+    AI_ANOMALY_DETECTION_ENABLED = True     # Включить детекцию аномалий
+    AI_ANOMALY_MODEL_PATH = 'data/ai/models/anomaly_detector.pkl'   # Путь к модели аномалий
+    AI_ANOMALY_SCALER_PATH = 'data/ai/models/anomaly_scaler.pkl'    # Путь к скалеру
+    AI_ANOMALY_BLOCK_THRESHOLD = 0.7        # Порог блокировки по аномалии
+
+    # LSTM Predictor — предсказание движения цены
+    AI_LSTM_ENABLED = True                  # Включить LSTM-предсказание
+    AI_LSTM_MODEL_PATH = 'data/ai/models/lstm_predictor.keras'  # Путь к модели LSTM (Keras 3)
+    AI_LSTM_SCALER_PATH = 'data/ai/models/lstm_scaler.pkl'      # Путь к скалеру LSTM
+    AI_LSTM_WEIGHT = 1.5                    # Вес LSTM в решении
+    AI_LSTM_MIN_CONFIDENCE = 0.6            # Минимальная уверенность LSTM
+
+    # Pattern Recognition — распознавание графических паттернов
+    AI_PATTERN_ENABLED = True               # Включить распознавание паттернов
+    AI_PATTERN_MODEL_PATH = 'data/ai/models/pattern_detector.pkl'   # Путь к модели паттернов
+    AI_PATTERN_SCALER_PATH = 'data/ai/models/pattern_scaler.pkl'    # Путь к скалеру
+    AI_PATTERN_WEIGHT = 1.2                 # Вес паттерна в решении
+    AI_PATTERN_MIN_CONFIDENCE = 0.6         # Минимальная уверенность паттерна
+
+    # Parameter Quality / ML Risk (sklearn)
+    AI_PARAMETER_QUALITY_ENABLED = True     # Включить оценку качества параметров
+    AI_ML_RISK_ENABLED = True               # Включить ML риск-менеджмент
+
+    # Dynamic Risk Management — умный SL/TP
+    AI_RISK_MANAGEMENT_ENABLED = True       # Включить умный риск-менеджмент ИИ
+    AI_RISK_MODEL_PATH = 'data/ai/models/risk_manager.h5'   # Путь к модели риска
+    AI_RISK_UPDATE_INTERVAL = 300           # Интервал обновления модели риска, сек
+    
+    # Кэширование предсказаний
+    AI_CACHE_PREDICTIONS = True             # Кэшировать предсказания ИИ
+    AI_CACHE_TTL = 300                      # Время жизни кэша, сек
+    
+    # Логирование ИИ решений
+    AI_LOG_PREDICTIONS = True               # Логировать предсказания
+    AI_LOG_ANOMALIES = True                 # Логировать аномалии
+    AI_LOG_PATTERNS = True                  # Логировать паттерны
+
+    # Smart Money Concepts (Order Blocks, FVG, BOS/CHoCH)
+    AI_SMC_ENABLED = True                   # Включить Smart Money Concepts
+    
+    # ==========================================
+    # АВТОМАТИЧЕСКОЕ ОБУЧЕНИЕ
+    # ==========================================
+    AI_AUTO_TRAIN_ENABLED = True            # Включить автообучение
+    AI_AUTO_TRAIN_ON_STARTUP = True         # Обучать при запуске
+    AI_AUTO_UPDATE_DATA = True              # Автообновление данных для ИИ
+    AI_DATA_UPDATE_INTERVAL = 86400         # Интервал обновления данных, сек (1 сут)
+    AI_UPDATE_COINS_COUNT = 0               # Кол-во монет для обновления (0 = все)
+    AI_INITIAL_COINS_COUNT = 0              # Начальное кол-во монет для обучения
+    AI_AUTO_RETRAIN = True                  # Автопереобучение
+    AI_RETRAIN_INTERVAL = 604800            # Интервал переобучения, сек (7 дней)
+    AI_RETRAIN_HOUR = 3                     # Час запуска переобучения
+
+    # Самообучение AI в реальном времени
+    AI_SELF_LEARNING_ENABLED = True         # Включить самообучение в реальном времени
+    AI_SELF_LEARNING_BUFFER_SIZE = 50       # Размер буфера для самообучения
+    AI_ADAPTATION_THRESHOLD = 0.1           # Порог адаптации
+    AI_PERFORMANCE_WINDOW = 50              # Окно для оценки эффективности
+
+    # Триггеры остановки непрерывного обучения
+    AI_STOP_TRAINING_ON_HIGH_ACCURACY = True    # Останавливать при высокой точности
+    AI_HIGH_ACCURACY_THRESHOLD = 0.90           # Порог высокой точности
+    AI_STOP_TRAINING_ON_DEGRADATION = True      # Останавливать при деградации
+    AI_DEGRADATION_THRESHOLD = 0.05             # Порог деградации
+    AI_MIN_TRAINING_ATTEMPTS = 3                # Минимум попыток обучения
+
+    # Триггеры переобучения при ухудшении на реальных сделках
+    AI_RETRAIN_ON_REAL_PERFORMANCE_DEGRADATION = True   # Переобучать при ухудшении на реальных сделках
+    AI_REAL_WIN_RATE_THRESHOLD = 0.40       # Порог винрейта для переобучения
+    AI_REAL_AVG_PNL_THRESHOLD = -10.0       # Порог среднего PnL для переобучения
+    AI_REAL_VS_SIMULATED_DIFF_THRESHOLD = 0.30   # Порог разницы реаль/симуляция
+    AI_REAL_PERFORMANCE_WINDOW = 20         # Окно для оценки реальной эффективности
+
+    # Обучение на симуляциях с оптимизацией параметров
+    AI_TRAIN_ON_SIMULATIONS = True          # Обучать на симуляциях
+    AI_SIMULATIONS_TARGET_WIN_RATE = 0.90   # Целевой винрейт в симуляциях
+    AI_SIMULATIONS_MAX_ITERATIONS = 1000    # Макс. итераций оптимизации
+    AI_USE_SIMULATIONS_WHEN_REAL_LOW = True # Использовать симуляции при малых реальных данных
+    AI_SIMULATIONS_PER_COIN = 20            # Симуляций на монету
+    AI_SAVE_BEST_PARAMS_MIN_WIN_RATE = 0.90 # Мин. винрейт для сохранения лучших параметров
+    AI_USE_SAVED_SETTINGS_AS_BASE = True    # Использовать сохранённые настройки как базу
+    AI_OPTIMIZER_WORKERS = 0                # Процессов для параллельной оптимизации монет (0 = CPU-1)
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+import math
 import time
 import signal
+import threading
 from functools import wraps
 
 def timeout_handler(signum, frame):
@@ -11,18 +13,25 @@ def with_timeout(timeout_seconds=30):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Устанавливаем таймаут только для Unix систем
-            if hasattr(signal, 'SIGALRM'):
+            # Устанавливаем таймаут только для Unix систем (SIGALRM доступен лишь в главном потоке)
+            if hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread():
+                started = time.time()
                 old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-                signal.alarm(timeout_seconds)
+                outer_remaining = signal.alarm(timeout_seconds)
+                if outer_remaining and outer_remaining < timeout_seconds:
+                    # Вложенный вызов: внешний таймаут наступает раньше — оставляем его
+                    signal.alarm(outer_remaining)
                 try:
                     result = func(*args, **kwargs)
                     return result
                 finally:
                     signal.alarm(0)
                     signal.signal(signal.SIGALRM, old_handler)
+                    if outer_remaining:
+                        # Восстанавливаем остаток таймаута внешнего вызова
+                        signal.alarm(max(1, math.ceil(outer_remaining - (time.time() - started))))
             else:
-                # Для Windows используем простую проверку времени
+                # Для Windows и фоновых потоков используем простую проверку времени
                 start_time = time.time()
                 result = func(*args, **kwargs)
                 elapsed = time.time() - start_time
@@ -3,7 +3,6 @@ from .base_exchange import BaseExchange
 from datetime import datetime, timedelta
 import time
 import traceback
-import pandas as pd
 import numpy as np
 import logging
 
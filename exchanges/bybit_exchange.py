@@ -1,10 +1,20 @@
 from pybit.unified_trading import HTTP
 from .base_exchange import BaseExchange, with_timeout
+from utils.latency_tracing import traced
+from .request_scheduler import (
+    ScheduledClient, RequestRejected, get_request_scheduler, current_priority, request_priority,
+    PRIORITY_POSITION_CANDLES, PRIORITY_DISCOVERY,
+)
+from .position_snapshot import PositionSnapshotCache, configured_ttl, normalize_symbol
+from .order_preflight import OrderPreflightState
+from .ticker_snapshot import TickerSnapshot, configured_max_age
+from .trading_stop_reconciler import TradingStopReconciler
 from http.client import IncompleteRead, RemoteDisconnected
 import requests.exceptions
 import requests
 import time
 import math
+import threading
 from datetime import datetime, timedelta
 import sys
 try:
@@ -18,7 +28,6 @@ except ImportError:  # pragma: no cover - fallback для статическог
     HIGH_ROI_THRESHOLD = 100.0
     HIGH_LOSS_THRESHOLD = -40.0
 import numpy as np
-import pandas as pd
 import logging
 from typing import Any, Dict
 
@@ -118,6 +127,74 @@ def clean_symbol(symbol):
     """Удаляет 'USDT' из названия символа"""
     return symbol.replace('USDT', '')
 
+
+def _closed_pnl_float(value, default=None):
+    try:
+        if value in (None, ''):
+            return default
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _ms_to_iso(ts_ms):
+    try:
+        if ts_ms is None:
+            return None
+        ts_ms = int(ts_ms)
+        return datetime.fromtimestamp(ts_ms / 1000).strftime('%Y-%m-%d %H:%M:%S')
+    except Exception:
+        return None
+
+
+def _build_closed_pnl_record(pos: Dict[str, Any]) -> Dict[str, Any]:
+    """Запись get_closed_pnl Bybit -> формат closed PnL приложения"""
+    close_ts = int(pos.get('updatedTime', time.time() * 1000))
+    created_ts = pos.get('createdTime')
+    created_ts = int(created_ts) if created_ts else None
+
+    entry_price = _closed_pnl_float(pos.get('avgEntryPrice'), 0.0) or 0.0
+    exit_price = _closed_pnl_float(pos.get('avgExitPrice'), 0.0) or 0.0
+    qty = _closed_pnl_float(pos.get('qty'))
+    if qty is None or qty == 0:
+        qty = _closed_pnl_float(pos.get('closedSize'))
+    if qty is None or qty == 0:
+        qty = _closed_pnl_float(pos.get('size'), 0.0)
+    qty = abs(qty or 0.0)
+
+    position_value = _closed_pnl_float(pos.get('cumEntryValue'))
+    if position_value is None and entry_price and qty:
+        position_value = abs(entry_price * qty)
+
+    leverage = _closed_pnl_float(pos.get('leverage'))
+
+    return {
+        'symbol': clean_symbol(pos['symbol']),
+        'symbol_raw': pos.get('symbol'),
+        'order_id': pos.get('orderId'),
+        'qty': qty,
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'closed_pnl': _closed_pnl_float(pos.get('closedPnl'), 0.0) or 0.0,
+        'close_time': _ms_to_iso(close_ts),
+        'close_timestamp': close_ts,
+        'created_time': _ms_to_iso(created_ts),
+        'created_timestamp': created_ts,
+        'exchange': 'bybit',
+        'side': pos.get('side'),
+        'order_type': pos.get('orderType'),
+        'position_value': position_value,
+        'position_value_entry': _closed_pnl_float(pos.get('cumEntryValue')),
+        'position_value_exit': _closed_pnl_float(pos.get('cumExitValue')),
+        'leverage': leverage,
+        'raw_record': {
+            'qty': pos.get('qty'),
+            'closedSize': pos.get('closedSize'),
+            'positionSize': pos.get('size')
+        }
+    }
+
+
 class BybitExchange(BaseExchange):
     def __init__(self, api_key, api_secret, test_server=False, position_mode='Hedge', limit_order_offset=0.1, margin_mode='auto'):
         super().__init__(api_key, api_secret)
@@ -125,13 +202,26 @@ class BybitExchange(BaseExchange):
         # Настраиваем пул соединений для requests и pybit
         self._setup_connection_pool()
         
-        self.client = HTTP(
+        # Все вызовы API идут через общий планировщик: ордера и стопы — вперёд массовой загрузки свечей
+        self.request_scheduler = get_request_scheduler()
+        # Снимок позиций общий для всех ботов и синхронизаций; наши ордера его сбрасывают
+        self.position_snapshot = PositionSnapshotCache(self._fetch_raw_positions, ttl=configured_ttl())
+        self._processed_positions = None  # (снимок, обработанные позиции, быстрый рост)
+        self._processed_positions_lock = threading.Lock()
+        # Плечо, режим маржи, параметры инструментов и цена для place_order (без лишних запросов перед входом)
+        self.preflight = OrderPreflightState()
+        self._preflight_warmup_thread = None
+        # Тикеры всех линейных инструментов одним запросом (get_ticker/get_price/get_prices)
+        self.ticker_snapshot = TickerSnapshot(self._fetch_all_tickers, max_age=configured_max_age())
+        # Подтверждённые биржей SL/TP позиций: правки стопов только при реальном изменении
+        self.trading_stops = TradingStopReconciler(self)
+        self.client = ScheduledClient(HTTP(
             api_key=api_key,
             api_secret=api_secret,
             testnet=test_server,
             timeout=60,  # 60s — запросы свечей для проверки зрелости часто >30s (CHILLGUY, ALICE, API3 и др.)
             recv_window=20000
-        )
+        ), self.request_scheduler, on_order_request=lambda _method: self.position_snapshot.invalidate())
         # Синхронизация времени с Bybit при старте (снижает ErrCode 10002 при рассинхроне часов)
         try:
             r = self.client.get_server_time()
@@ -241,6 +331,7 @@ class BybitExchange(BaseExchange):
         if self.current_request_delay != self.base_request_delay:
             logger.info(f"🔄 Сброс задержки запросов: {self.current_request_delay:.3f}с → {self.base_request_delay:.3f}с")
             self.current_request_delay = self.base_request_delay
+        self.request_scheduler.restore()
         if now - self.last_rate_limit_time > 30:
             self.rate_limit_error_count = 0
         return True
@@ -277,6 +368,7 @@ class BybitExchange(BaseExchange):
         old_delay = self.current_request_delay
         new_delay = min(old_delay + self.DELAY_INCREMENT, self.max_request_delay)
         self.current_request_delay = new_delay
+        self.request_scheduler.backoff()
 
         if new_delay > old_delay:
             logger.warning(
@@ -297,169 +389,213 @@ class BybitExchange(BaseExchange):
             self.daily_pnl[symbol] = float(position['unrealisedPnl'])
         self.last_reset_day = datetime.now().date()
 
-    def get_positions(self):
-        try:
-            retries = 3
-            retry_delay = 5
+    def _fetch_raw_positions(self):
+        """
+        Постраничная загрузка активных позиций (сырые записи Bybit, size > 0).
 
-            for attempt in range(retries):
-                # Не ждём глобальную паузу: работа ботов (позиции, синк) не должна останавливаться.
-                try:
-                    all_positions = []
-                    cursor = None
-                    rapid_growth_positions = []
-                    
-                    while True:
-                        params = {
-                            "category": "linear",
-                            "settleCoin": "USDT",
-                            "limit": 100
-                        }
-                        if cursor:
-                            params["cursor"] = cursor
-                        
-                        try:
-                            response = self.client.get_positions(**params)
-                            positions = response['result']['list']
-                            
-                            active_positions = [p for p in positions if abs(float(p['size'])) > 0]
-                            all_positions.extend(active_positions)
-                            
-                            cursor = response['result'].get('nextPageCursor')
-                            if not cursor:
-                                break
-                                
-                        except (ConnectionError, IncompleteRead, RemoteDisconnected, requests.exceptions.ConnectionError) as e:
-                            logger.error("Connection error on attempt {}: {}".format(attempt + 1, str(e)))
-                            if attempt < retries - 1:
-                                time.sleep(retry_delay)
-                                continue
-                            raise
-                    
-                    if not all_positions:
-                        # Нет активных позиций - это нормально, не логируем
-                        return [], []
+        Повторы при сетевых ошибках и 403/rate limit; после последней неудачи — исключение
+        (в снимок позиций ошибка не попадает).
+        """
+        retries = 3
+        retry_delay = 5
 
-                    if self.last_reset_day is None or datetime.now().date() != self.last_reset_day:
-                        self.reset_daily_pnl(all_positions)
-                    
-                    processed_positions = []
-                    for position in all_positions:
-                        symbol = clean_symbol(position['symbol'])
-                        current_pnl = float(position['unrealisedPnl'])
-                        position_size = abs(float(position['size']))
-                        avg_price = float(position.get('avgPrice', 0) or 0)
-                        leverage = float(position.get('leverage', 1) or 1)
-                        
-                        # ROI рассчитывается от ИЗНАЧАЛЬНОЙ маржи (залога), которую вложили при входе
-                        # В Bybit API v5:
-                        # - positionValue = стоимость позиции в USDT (размер * текущая цена)
-                        # - positionIM = текущая изолированная маржа (может меняться из-за изменения цены)
-                        # - leverage = плечо
-                        # 
-                        # ИЗНАЧАЛЬНАЯ маржа = positionValue / leverage (стоимость позиции / плечо)
-                        # Это маржа, которую вложили при открытии позиции
-                        
-                        # Рассчитываем изначальную маржу
-                        # В Bybit API positionValue может содержать либо стоимость позиции, либо маржу
-                        # Сначала рассчитываем маржу из размера и цены входа
-                        
-                        position_value_calc = avg_price * position_size  # Стоимость позиции из размера и цены
-                        
-                        # ИЗНАЧАЛЬНАЯ маржа = стоимость позиции / плечо
-                        if leverage > 0:
-                            margin = position_value_calc / leverage
-                        else:
-                            margin = position_value_calc
-                        
-                        # Проверяем positionValue из API
-                        position_value = float(position.get('positionValue', 0))
-                        if position_value > 0:
-                            # Если positionValue в разумных пределах для маржи (1-1000 USDT),
-                            # используем его напрямую как маржу (в Bybit API positionValue часто уже содержит маржу)
-                            if 1.0 <= position_value <= 1000.0:
-                                margin = position_value
-                            # Если positionValue значительно больше (вероятно стоимость позиции), делим на leverage
-                            elif position_value > 1000.0 and leverage > 0:
-                                margin = position_value / leverage
-                        
-                        # Если маржа все еще 0 или очень маленькая, используем минимум для расчёта ROI
-                        if margin == 0 or margin < 0.01:
-                            margin = 1.0  # Минимальная маржа для избежания деления на ноль
-                        
-                        roi = (current_pnl / margin * 100) if margin > 0 else 0
-                        
-                        # Логирование ROI убрано (слишком много логов)
-                        # if current_pnl != 0:
-                        #     logger.info(f"[BYBIT ROI] {symbol}: PnL={current_pnl:.4f} USDT, margin={margin:.4f} USDT, ROI={roi:.2f}%, positionValue={position.get('positionValue')}, leverage={leverage}, calculated={position_value / leverage if position_value > 0 and leverage > 0 else 'N/A'}")
-                        
-                        if current_pnl > 0:
-                            if symbol not in self.max_profit_values or current_pnl > self.max_profit_values[symbol]:
-                                self.max_profit_values[symbol] = current_pnl
-                        else:
-                            if symbol not in self.max_loss_values or current_pnl < self.max_loss_values[symbol]:
-                                self.max_loss_values[symbol] = current_pnl
-                        
-                        mark_price = float(position.get('markPrice', 0) or 0)
+        for attempt in range(retries):
+            # Не ждём глобальную паузу: работа ботов (позиции, синк) не должна останавливаться.
+            try:
+                all_positions = []
+                cursor = None
 
-                        position_info = {
-                            'symbol': symbol,
-                            'pnl': current_pnl,
-                            'max_profit': self.max_profit_values.get(symbol, 0),
-                            'max_loss': self.max_loss_values.get(symbol, 0),
-                            'roi': roi,
-                            'high_roi': roi > HIGH_ROI_THRESHOLD,
-                            'high_loss': current_pnl < HIGH_LOSS_THRESHOLD,
-                            'side': 'Long' if position['side'] == 'Buy' else 'Short',
-                            'size': position_size,
-                            'take_profit': position.get('takeProfit', ''),
-                            'stop_loss': position.get('stopLoss', ''),
-                            'mark_price': mark_price,
-                            'avg_price': avg_price,
-                            'entry_price': avg_price,
-                            'current_price': mark_price,
-                            'realized_pnl': float(position.get('cumRealisedPnl', 0)),
-                            'leverage': float(position.get('leverage', 1))
-                        }
-                        
-                        processed_positions.append(position_info)
-                        
-                        if symbol in self.daily_pnl:
-                            start_pnl = self.daily_pnl[symbol]
-                            if start_pnl > 0 and current_pnl > 0:
-                                growth_ratio = current_pnl / start_pnl
-                                if growth_ratio >= GROWTH_MULTIPLIER:
-                                    rapid_growth_positions.append({
-                                        'symbol': symbol,
-                                        'start_pnl': start_pnl,
-                                        'current_pnl': current_pnl,
-                                        'growth_ratio': growth_ratio
-                                    })
-                        else:
-                            self.daily_pnl[symbol] = current_pnl
-                    
-                    return processed_positions, rapid_growth_positions
-                    
-                except Exception as e:
-                    err_str = str(e).lower()
-                    is_403_or_block = (
-                        '403' in err_str or 'ip rate limit' in err_str or 'from the usa' in err_str
-                        or 'rate limit' in err_str or 'too many' in err_str or '10006' in err_str
-                    )
-                    if is_403_or_block:
-                        self._set_api_cooldown(self._API_COOLDOWN_FULL, "Bybit 403/IP rate limit или блок по региону")
-                        logger.warning(f"⏳ get_positions: пауза {self._API_COOLDOWN_FULL}с, затем повтор...")
-                        time.sleep(self._API_COOLDOWN_FULL)
-                    if attempt < retries - 1:
-                        if not is_403_or_block:
-                            logger.warning("Attempt {} failed: {}, retrying in {} seconds...".format(attempt + 1, str(e), retry_delay))
+                while True:
+                    params = {
+                        "category": "linear",
+                        "settleCoin": "USDT",
+                        "limit": 100
+                    }
+                    if cursor:
+                        params["cursor"] = cursor
+
+                    try:
+                        response = self.client.get_positions(**params)
+                        positions = response['result']['list']
+
+                        active_positions = [p for p in positions if abs(float(p['size'])) > 0]
+                        all_positions.extend(active_positions)
+
+                        cursor = response['result'].get('nextPageCursor')
+                        if not cursor:
+                            break
+
+                    except (ConnectionError, IncompleteRead, RemoteDisconnected, requests.exceptions.ConnectionError) as e:
+                        logger.error("Connection error on attempt {}: {}".format(attempt + 1, str(e)))
+                        if attempt < retries - 1:
                             time.sleep(retry_delay)
-                        continue
-                    raise
-                    
+                            continue
+                        raise
+
+                self.preflight.update_from_position_records(all_positions)
+                return all_positions
+
+            except Exception as e:
+                err_str = str(e).lower()
+                is_403_or_block = (
+                    '403' in err_str or 'ip rate limit' in err_str or 'from the usa' in err_str
+                    or 'rate limit' in err_str or 'too many' in err_str or '10006' in err_str
+                )
+                if is_403_or_block:
+                    self._set_api_cooldown(self._API_COOLDOWN_FULL, "Bybit 403/IP rate limit или блок по региону")
+                    logger.warning(f"⏳ get_positions: пауза {self._API_COOLDOWN_FULL}с, затем повтор...")
+                    time.sleep(self._API_COOLDOWN_FULL)
+                if attempt < retries - 1:
+                    if not is_403_or_block:
+                        logger.warning("Attempt {} failed: {}, retrying in {} seconds...".format(attempt + 1, str(e), retry_delay))
+                        time.sleep(retry_delay)
+                    continue
+                raise
+        return []
+
+    def _process_positions(self, all_positions):
+        """Сырые позиции -> формат get_positions (ROI, max profit/loss, быстрый рост PnL)"""
+        rapid_growth_positions = []
+        if not all_positions:
+            # Нет активных позиций - это нормально, не логируем
+            return [], []
+
+        if self.last_reset_day is None or datetime.now().date() != self.last_reset_day:
+            self.reset_daily_pnl(all_positions)
+        
+        processed_positions = []
+        for position in all_positions:
+            symbol = clean_symbol(position['symbol'])
+            current_pnl = float(position['unrealisedPnl'])
+            position_size = abs(float(position['size']))
+            avg_price = float(position.get('avgPrice', 0) or 0)
+            leverage = float(position.get('leverage', 1) or 1)
+            
+            # ROI рассчитывается от ИЗНАЧАЛЬНОЙ маржи (залога), которую вложили при входе
+            # В Bybit API v5:
+            # - positionValue = стоимость позиции в USDT (размер * текущая цена)
+            # - positionIM = текущая изолированная маржа (может меняться из-за изменения цены)
+            # - leverage = плечо
+            # 
+            # ИЗНАЧАЛЬНАЯ маржа = positionValue / leverage (стоимость позиции / плечо)
+            # Это маржа, которую вложили при открытии позиции
+            
+            # Рассчитываем изначальную маржу
+            # В Bybit API positionValue может содержать либо стоимость позиции, либо маржу
+            # Сначала рассчитываем маржу из размера и цены входа
+            
+            position_value_calc = avg_price * position_size  # Стоимость позиции из размера и цены
+            
+            # ИЗНАЧАЛЬНАЯ маржа = стоимость позиции / плечо
+            if leverage > 0:
+                margin = position_value_calc / leverage
+            else:
+                margin = position_value_calc
+            
+            # Проверяем positionValue из API
+            position_value = float(position.get('positionValue', 0))
+            if position_value > 0:
+                # Если positionValue в разумных пределах для маржи (1-1000 USDT),
+                # используем его напрямую как маржу (в Bybit API positionValue часто уже содержит маржу)
+                if 1.0 <= position_value <= 1000.0:
+                    margin = position_value
+                # Если positionValue значительно больше (вероятно стоимость позиции), делим на leverage
+                elif position_value > 1000.0 and leverage > 0:
+                    margin = position_value / leverage
+            
+            # Если маржа все еще 0 или очень маленькая, используем минимум для расчёта ROI
+            if margin == 0 or margin < 0.01:
+                margin = 1.0  # Минимальная маржа для избежания деления на ноль
+            
+            roi = (current_pnl / margin * 100) if margin > 0 else 0
+            
+            # Логирование ROI убрано (слишком много логов)
+            # if current_pnl != 0:
+            #     logger.info(f"[BYBIT ROI] {symbol}: PnL={current_pnl:.4f} USDT, margin={margin:.4f} USDT, ROI={roi:.2f}%, positionValue={position.get('positionValue')}, leverage={leverage}, calculated={position_value / leverage if position_value > 0 and leverage > 0 else 'N/A'}")
+            
+            if current_pnl > 0:
+                if symbol not in self.max_profit_values or current_pnl > self.max_profit_values[symbol]:
+                    self.max_profit_values[symbol] = current_pnl
+            else:
+                if symbol not in self.max_loss_values or current_pnl < self.max_loss_values[symbol]:
+                    self.max_loss_values[symbol] = current_pnl
+            
+            mark_price = float(position.get('markPrice', 0) or 0)
+
+            position_info = {
+                'symbol': symbol,
+                'pnl': current_pnl,
+                'max_profit': self.max_profit_values.get(symbol, 0),
+                'max_loss': self.max_loss_values.get(symbol, 0),
+                'roi': roi,
+                'high_roi': roi > HIGH_ROI_THRESHOLD,
+                'high_loss': current_pnl < HIGH_LOSS_THRESHOLD,
+                'side': 'Long' if position['side'] == 'Buy' else 'Short',
+                'size': position_size,
+                'take_profit': position.get('takeProfit', ''),
+                'stop_loss': position.get('stopLoss', ''),
+                'mark_price': mark_price,
+                'avg_price': avg_price,
+                'entry_price': avg_price,
+                'current_price': mark_price,
+                'realized_pnl': float(position.get('cumRealisedPnl', 0)),
+                'leverage': float(position.get('leverage', 1))
+            }
+            
+            processed_positions.append(position_info)
+            
+            if symbol in self.daily_pnl:
+                start_pnl = self.daily_pnl[symbol]
+                if start_pnl > 0 and current_pnl > 0:
+                    growth_ratio = current_pnl / start_pnl
+                    if growth_ratio >= GROWTH_MULTIPLIER:
+                        rapid_growth_positions.append({
+                            'symbol': symbol,
+                            'start_pnl': start_pnl,
+                            'current_pnl': current_pnl,
+                            'growth_ratio': growth_ratio
+                        })
+            else:
+                self.daily_pnl[symbol] = current_pnl
+        
+        return processed_positions, rapid_growth_positions
+
+    def get_raw_positions(self, symbol=None, max_age=None):
+        """
+        Сырые активные позиции из общего снимка (формат Bybit: symbol, side, size, avgPrice,
+        unrealisedPnl, stopLoss, takeProfit, markPrice, ...). Ошибка биржи — исключение.
+
+        Args:
+            symbol: только позиции этого символа (BTC или BTCUSDT)
+            max_age: допустимый возраст снимка, сек (по умолчанию POSITION_SNAPSHOT_TTL)
+        """
+        positions = self.position_snapshot.get(max_age=max_age)
+        if symbol:
+            target = normalize_symbol(symbol)
+            return [dict(p) for p in positions if p.get('symbol') == target]
+        return [dict(p) for p in positions]
+
+    def get_position(self, symbol, side=None):
+        """Обработанная позиция символа (как в get_positions) или None; side — 'Long'/'Short'"""
+        positions, _ = self.get_positions()
+        target = clean_symbol(normalize_symbol(symbol))
+        for position in positions:
+            if position['symbol'] == target and (side is None or position['side'] == side):
+                return position
+        return None
+
+    def get_positions(self):
+        try:
+            raw_positions = self.position_snapshot.get()
+            # Обработка (max profit/loss, дневной PnL) — один раз на снимок, остальным — копии
+            with self._processed_positions_lock:
+                if self._processed_positions is None or self._processed_positions[0] is not raw_positions:
+                    self._processed_positions = (raw_positions,) + self._process_positions(raw_positions)
+                _, processed, rapid = self._processed_positions
+            return [dict(p) for p in processed], [dict(p) for p in rapid]
         except Exception as e:
             # Логируем ошибку через logger, не через print
-            # print("Error getting positions: {}".format(str(e)))
+            logger.debug(f"get_positions: {e}")
             return [], []
 
     def get_closed_pnl(self, sort_by='time', period='all', start_date=None, end_date=None):
@@ -474,68 +610,6 @@ class BybitExchange(BaseExchange):
         try:
             all_closed_pnl = []
             
-            def safe_float(value, default=None):
-                try:
-                    if value in (None, ''):
-                        return default
-                    return float(value)
-                except (TypeError, ValueError):
-                    return default
-            
-            def timestamp_to_iso(ts_ms):
-                try:
-                    if ts_ms is None:
-                        return None
-                    ts_ms = int(ts_ms)
-                    return datetime.fromtimestamp(ts_ms / 1000).strftime('%Y-%m-%d %H:%M:%S')
-                except Exception:
-                    return None
-            
-            def build_pnl_record(pos: Dict[str, Any]) -> Dict[str, Any]:
-                close_ts = int(pos.get('updatedTime', time.time() * 1000))
-                created_ts = pos.get('createdTime')
-                created_ts = int(created_ts) if created_ts else None
-                
-                entry_price = safe_float(pos.get('avgEntryPrice'), 0.0) or 0.0
-                exit_price = safe_float(pos.get('avgExitPrice'), 0.0) or 0.0
-                qty = safe_float(pos.get('qty'))
-                if qty is None or qty == 0:
-                    qty = safe_float(pos.get('closedSize'))
-                if qty is None or qty == 0:
-                    qty = safe_float(pos.get('size'), 0.0)
-                qty = abs(qty or 0.0)
-                
-                position_value = safe_float(pos.get('cumEntryValue'))
-                if position_value is None and entry_price and qty:
-                    position_value = abs(entry_price * qty)
-                
-                leverage = safe_float(pos.get('leverage'))
-                
-                return {
-                    'symbol': clean_symbol(pos['symbol']),
-                    'symbol_raw': pos.get('symbol'),
-                    'qty': qty,
-                    'entry_price': entry_price,
-                    'exit_price': exit_price,
-                    'closed_pnl': safe_float(pos.get('closedPnl'), 0.0) or 0.0,
-                    'close_time': timestamp_to_iso(close_ts),
-                    'close_timestamp': close_ts,
-                    'created_time': timestamp_to_iso(created_ts),
-                    'created_timestamp': created_ts,
-                    'exchange': 'bybit',
-                    'side': pos.get('side'),
-                    'order_type': pos.get('orderType'),
-                    'position_value': position_value,
-                    'position_value_entry': safe_float(pos.get('cumEntryValue')),
-                    'position_value_exit': safe_float(pos.get('cumExitValue')),
-                    'leverage': leverage,
-                    'raw_record': {
-                        'qty': pos.get('qty'),
-                        'closedSize': pos.get('closedSize'),
-                        'positionSize': pos.get('size')
-                    }
-                }
-            
             # Получаем текущее время
             end_time = int(time.time() * 1000)
             end_dt = datetime.fromtimestamp(end_time / 1000)
@@ -661,7 +735,7 @@ class BybitExchange(BaseExchange):
                                 break
                             
                             for pos in positions:
-                                all_closed_pnl.append(build_pnl_record(pos))
+                                all_closed_pnl.append(_build_closed_pnl_record(pos))
                             
                             cursor = response['result'].get('nextPageCursor')
                             if not cursor:
@@ -708,7 +782,7 @@ class BybitExchange(BaseExchange):
                             break
                         
                         for pos in positions:
-                            all_closed_pnl.append(build_pnl_record(pos))
+                            all_closed_pnl.append(_build_closed_pnl_record(pos))
                         
                         cursor = response['result'].get('nextPageCursor')
                         if not cursor:
@@ -738,6 +812,49 @@ class BybitExchange(BaseExchange):
             logger.error(f"Error in get_closed_pnl: {e}")
             return []
 
+    def get_closed_pnl_since(self, start_time_ms, end_time_ms=None):
+        """
+        Закрытые PnL с start_time_ms по end_time_ms (мс) — для инкрементальной синхронизации
+
+        В отличие от get_closed_pnl не глотает ошибки: если какая-то страница не получена,
+        исключение пробрасывается, чтобы курсор синхронизации не перескочил через пропуск.
+
+        Returns:
+            list: записи в формате get_closed_pnl (с order_id), по возрастанию close_timestamp
+        """
+        window_ms = 7 * 24 * 60 * 60 * 1000  # Bybit отдаёт closed PnL окнами не длиннее 7 дней
+        max_period_ms = 730 * 24 * 60 * 60 * 1000
+        end_time_ms = int(end_time_ms or time.time() * 1000)
+        start_time_ms = max(int(start_time_ms), end_time_ms - max_period_ms + 60 * 1000)
+        records = []
+        window_start = start_time_ms
+        while window_start < end_time_ms:
+            window_end = min(window_start + window_ms, end_time_ms)
+            cursor = None
+            while True:
+                params = {
+                    "category": "linear",
+                    "settleCoin": "USDT",
+                    "limit": 100,
+                    "startTime": str(window_start),
+                    "endTime": str(window_end)
+                }
+                if cursor:
+                    params["cursor"] = cursor
+                response = self.client.get_closed_pnl(**params)
+                if not response or response.get('retCode') != 0:
+                    raise RuntimeError(f"get_closed_pnl {window_start}-{window_end}: {(response or {}).get('retMsg')}")
+                result = response.get('result') or {}
+                for pos in result.get('list') or ():
+                    records.append(_build_closed_pnl_record(pos))
+                cursor = result.get('nextPageCursor')
+                if not cursor or not result.get('list'):
+                    break
+            window_start = window_end
+        records = [r for r in records if start_time_ms <= r.get('close_timestamp', 0) <= end_time_ms]
+        records.sort(key=lambda r: r.get('close_timestamp', 0))
+        return records
+
     def get_symbol_chart_data(self, symbol):
         """Получает исторические данные для графика"""
         try:
@@ -788,9 +905,48 @@ class BybitExchange(BaseExchange):
                 logger.error(f"Error getting SMA200 for {symbol}: {e}")
                 return None
 
+    @with_timeout(15)  # 15 секунд таймаут для запроса тикеров всех инструментов
+    def _fetch_all_tickers(self):
+        """Тикеры всех линейных инструментов одним запросом: (список, время биржи в мс)"""
+        response = self.client.get_tickers(category="linear")
+        if response.get('retCode') != 0:
+            raise RuntimeError(f"get_tickers: {response.get('retMsg', 'Unknown error')}")
+        return response.get('result', {}).get('list', []), response.get('time')
+
+    def get_price(self, symbol, max_age=None):
+        """
+        Котировка символа из снимка тикеров: {'symbol', 'last', 'bid', 'ask', 'mark', 'timestamp',
+        'age_sec', 'stale', ...} или None. max_age — допустимый возраст снимка, сек.
+        """
+        return self.ticker_snapshot.get_price(symbol, max_age=max_age)
+
+    def get_prices(self, symbols=None, max_age=None):
+        """Котировки нескольких символов одним снимком тикеров: {символ без USDT: котировка}"""
+        return self.ticker_snapshot.get_prices(symbols, max_age=max_age)
+
+    def start_ticker_refresh(self):
+        """Фоновое обновление снимка тикеров каждые TICKER_SNAPSHOT_REFRESH_SEC (0 — только по запросу)"""
+        try:
+            from bot_engine.config_loader import SystemConfig
+            interval = float(getattr(SystemConfig, 'TICKER_SNAPSHOT_REFRESH_SEC', 0))
+        except Exception:
+            interval = 0.0
+        self.ticker_snapshot.start(interval)
+
     @with_timeout(15)  # 15 секунд таймаут для получения тикера
     def get_ticker(self, symbol):
         """Получение текущих данных тикера"""
+        # Сначала общий снимок тикеров (один запрос на все монеты)
+        quote = self.ticker_snapshot.get_price(symbol)
+        if quote and not quote['stale'] and quote['last'] > 0:
+            return {
+                'symbol': symbol,
+                'last': quote['last'],
+                'bid': quote['bid'],
+                'ask': quote['ask'],
+                'timestamp': quote['timestamp']
+            }
+
         retries = 3
         base_delay = 0.1
         last_error = None
@@ -808,6 +964,7 @@ class BybitExchange(BaseExchange):
                 
                 if response['retCode'] == 0 and response['result']['list']:
                     ticker = response['result']['list'][0]
+                    self.preflight.note_price(symbol, ticker.get('lastPrice'))
                     return {
                         'symbol': symbol,
                         'last': float(ticker['lastPrice']),
@@ -833,6 +990,9 @@ class BybitExchange(BaseExchange):
 
     def get_instruments_info(self, symbol):
         """Получает информацию об торговых правилах для символа"""
+        cached = self.preflight.get(symbol, 'instrument')
+        if cached:
+            return dict(cached)
         try:
             response = self.client.get_instruments_info(
                 category="linear",
@@ -850,6 +1010,7 @@ class BybitExchange(BaseExchange):
                 # ✅ Проверяем наличие minNotionalValue (минимальная сумма ордера в USDT!)
                 if 'lotSizeFilter' in instrument and 'minNotionalValue' in instrument['lotSizeFilter']:
                     result['minNotionalValue'] = float(instrument['lotSizeFilter']['minNotionalValue'])
+                self.preflight.set(symbol, 'instrument', dict(result))
                 return result
             else:
                 logger.warning(f"[BYBIT] ❌ Не удалось получить информацию об инструменте {symbol}")
@@ -920,6 +1081,9 @@ class BybitExchange(BaseExchange):
         Returns:
             float: Максимальное кредитное плечо или None в случае ошибки
         """
+        cached = self.preflight.get(symbol, 'max_leverage')
+        if cached:
+            return cached
         try:
             full_symbol = f"{symbol}USDT"
             response = self.client.get_risk_limit(
@@ -937,6 +1101,7 @@ class BybitExchange(BaseExchange):
                         max_leverage = tier_leverage
                 
                 if max_leverage > 0:
+                    self.preflight.set(symbol, 'max_leverage', max_leverage)
                     return max_leverage
                 else:
                     logger.warning(f"[BYBIT_BOT] ⚠️ {symbol}: Не удалось определить максимальное кредитное плечо из risk limit")
@@ -949,6 +1114,56 @@ class BybitExchange(BaseExchange):
             logger.error(f"[BYBIT_BOT] ❌ {symbol}: Ошибка получения максимального кредитного плеча: {e}")
             return None
 
+    def warm_preflight(self):
+        """
+        Прогрев кэша pre-flight: параметры и максимальное плечо всех линейных инструментов
+        (постранично, одним проходом) и плечо/режим маржи открытых позиций из снимка.
+        """
+        loaded = 0
+        cursor = None
+        with request_priority(PRIORITY_DISCOVERY):
+            while True:
+                params = {"category": "linear", "limit": 1000}
+                if cursor:
+                    params["cursor"] = cursor
+                response = self.client.get_instruments_info(**params)
+                if response.get('retCode') != 0:
+                    break
+                result = response.get('result', {})
+                loaded += self.preflight.update_instruments(result.get('list', []))
+                cursor = result.get('nextPageCursor')
+                if not cursor:
+                    break
+        try:
+            self.position_snapshot.get()  # плечо и tradeMode попадают в кэш из ответа
+        except Exception:
+            pass
+        return loaded
+
+    def start_preflight_warmup(self):
+        """Фоновый прогрев кэша pre-flight каждые ORDER_PREFLIGHT_WARM_INTERVAL секунд (повторный вызов — no-op)"""
+        if self._preflight_warmup_thread is not None and self._preflight_warmup_thread.is_alive():
+            return
+        try:
+            from bot_engine.config_loader import SystemConfig
+            interval = float(getattr(SystemConfig, 'ORDER_PREFLIGHT_WARM_INTERVAL', 1800))
+        except Exception:
+            interval = 1800.0
+        if interval <= 0:
+            return
+
+        def worker():
+            while True:
+                try:
+                    loaded = self.warm_preflight()
+                    logger.debug(f"[BYBIT] Кэш pre-flight прогрет: {loaded} инструментов")
+                except Exception as e:
+                    logger.debug(f"[BYBIT] Прогрев кэша pre-flight не удался: {e}")
+                time.sleep(interval)
+
+        self._preflight_warmup_thread = threading.Thread(target=worker, name='OrderPreflightWarmup', daemon=True)
+        self._preflight_warmup_thread.start()
+
     def close_position(self, symbol, size, side, order_type="Limit"):
         try:
             # Стейбл/USDT — всегда закрываем по рынку (цена ~1, лимит не нужен, избегаем 110017)
@@ -1256,7 +1471,8 @@ class BybitExchange(BaseExchange):
         """
         # КРИТИЧНО: Ждём окончания глобальной паузы — иначе новые запросы бьют в rate limit и продлевают блокировку
         self._wait_api_cooldown()
-        if not bulk_mode:
+        # Паузой между запросами сдерживается только массовая загрузка; свечи позиций темпирует планировщик
+        if not bulk_mode and current_priority(PRIORITY_POSITION_CANDLES) >= PRIORITY_DISCOVERY:
             time.sleep(self.current_request_delay)
 
         try:
@@ -1719,6 +1935,9 @@ class BybitExchange(BaseExchange):
                     'error': f"Ошибка API: {response.get('retMsg', 'Неизвестная ошибка')}"
                 }
             
+        except RequestRejected as e:
+            # Массовая загрузка уступила бюджет срочным запросам — монета обновится в следующем раунде
+            return {'success': False, 'error': str(e), 'rejected': True}
         except KeyError as e:
             if e.args and e.args[0] == 'x-bapi-limit-reset-timestamp':
                 delay = self.increase_request_delay(reason='Rate limit (KeyError заголовка)')
@@ -2327,39 +2546,14 @@ class BybitExchange(BaseExchange):
                 "account_type": "UNIFIED"
             }
             
-            # Получаем ВСЕ открытые позиции используя ту же логику что и в get_positions()
+            # Открытые позиции — из общего снимка (тот же, что у get_positions())
             active_positions = 0
             total_position_value = 0.0
-            cursor = None
             
             try:
-                while True:
-                    params = {
-                        "category": "linear",
-                        "settleCoin": "USDT",
-                        "limit": 100
-                    }
-                    if cursor:
-                        params["cursor"] = cursor
-                    
-                    response = self.client.get_positions(**params)
-                    
-                    if response["retCode"] != 0:
-                        break
-                    
-                    positions = response['result']['list']
-                    
-                    # Считаем активные позиции на этой странице
-                    for position in positions:
-                        position_size = float(position.get("size", 0))
-                        if abs(position_size) > 0:  # Любые открытые позиции
-                            active_positions += 1
-                            total_position_value += abs(float(position.get("positionValue", 0)))
-                    
-                    # Проверяем следующую страницу
-                    cursor = response['result'].get('nextPageCursor')
-                    if not cursor:
-                        break
+                for position in self.position_snapshot.get():
+                    active_positions += 1
+                    total_position_value += abs(float(position.get("positionValue", 0)))
                 account_info["active_positions"] = active_positions
                 account_info["total_position_value"] = total_position_value
                 
@@ -2494,10 +2688,16 @@ class BybitExchange(BaseExchange):
                 cached_mode, cached_time = cache[symbol]
                 if current_time - cached_time < cache_ttl:
                     return cached_mode
+            # Режим из ответов get_positions (снимок позиций, прошлые проверки) — без запроса
+            known_mode = self.preflight.get(symbol, 'margin_mode')
+            if known_mode:
+                return known_mode
             try:
                 pos_response = self.client.get_positions(category="linear", symbol=f"{symbol}USDT")
                 if pos_response.get('retCode') == 0 and pos_response.get('result', {}).get('list'):
                     pos_list = pos_response['result']['list']
+                    # Заодно запоминаем текущее плечо — set_leverage перед входом не будет его запрашивать
+                    self.preflight.update_from_position_records(pos_list)
                     if pos_list:
                         # Bybit возвращает запись по символу даже при size=0 (data regardless of position status)
                         trade_mode = pos_list[0].get('tradeMode')
@@ -2524,6 +2724,7 @@ class BybitExchange(BaseExchange):
             logger.warning(f"[BYBIT_BOT] ⚠️ Ошибка при получении режима маржи для {symbol}: {e}")
             return 'cross'
 
+    @traced('exchange.ensure_margin_mode')
     def _ensure_margin_mode(self, symbol, leverage=None):
         """
         При желаемом margin_mode из конфига (cross/isolated) переключает режим маржи на бирже,
@@ -2572,6 +2773,8 @@ class BybitExchange(BaseExchange):
             logger.info(f"[BYBIT_BOT] ✅ {symbol}: режим маржи переключён на {desired} (плечо {lev}x)")
             if symbol in getattr(self, '_margin_mode_cache', {}):
                 self._margin_mode_cache[symbol] = (desired, time.time())
+            self.preflight.set(symbol, 'margin_mode', desired)
+            self.preflight.set(symbol, 'leverage', float(lev))
             return True
         except Exception as e:
             error_str = str(e)
@@ -2581,6 +2784,7 @@ class BybitExchange(BaseExchange):
                 logger.warning(f"[BYBIT_BOT] ⚠️ {symbol}: ошибка переключения режима маржи: {e}")
             return False
 
+    @traced('exchange.place_order')
     @with_timeout(15)  # 15 секунд таймаут для размещения ордера
     def place_order(self, symbol, side, quantity, order_type='market', price=None,
                     take_profit=None, stop_loss=None, max_loss_percent=None, quantity_is_usdt=True,
@@ -2610,18 +2814,21 @@ class BybitExchange(BaseExchange):
             logger.info(f"[BYBIT_BOT] Размещение ордера: {symbol} {side} {quantity} {unit_label} ({order_type})")
             
             # ✅ КРИТИЧНО: Получаем АКТУАЛЬНУЮ цену с биржи ПЕРЕД расчетом ордера!
-            # Цена нужна всегда, чтобы правильно рассчитать количество монет и округление
-            current_price = None
+            # Цена нужна всегда, чтобы правильно рассчитать количество монет и округление.
+            # Свежая цена из кэша (не старше ORDER_PREFLIGHT_PRICE_MAX_AGE) — без запроса тикера
+            quote = self.ticker_snapshot.peek(symbol, max_age=self.preflight.ttls['price'])
+            current_price = quote['last'] if quote and quote['last'] > 0 else self.preflight.get(symbol, 'price')
             try:
-                ticker = self.client.get_tickers(category="linear", symbol=f"{symbol}USDT")
-                if ticker.get('retCode') == 0 and ticker.get('result', {}).get('list'):
-                    current_price = float(ticker['result']['list'][0].get('lastPrice', 0))
-                    if current_price and current_price > 0:
-                        pass
+                if not current_price:
+                    ticker = self.client.get_tickers(category="linear", symbol=f"{symbol}USDT")
+                    if ticker.get('retCode') == 0 and ticker.get('result', {}).get('list'):
+                        current_price = float(ticker['result']['list'][0].get('lastPrice', 0))
+                        if current_price and current_price > 0:
+                            self.preflight.note_price(symbol, current_price)
+                        else:
+                            raise ValueError("Получена некорректная цена (0 или отрицательная)")
                     else:
-                        raise ValueError("Получена некорректная цена (0 или отрицательная)")
-                else:
-                    raise ValueError(f"Ошибка API: {ticker.get('retMsg', 'Unknown error')}")
+                        raise ValueError(f"Ошибка API: {ticker.get('retMsg', 'Unknown error')}")
             except Exception as e:
                 error_msg = f"❌ Не удалось получить актуальную цену с биржи для {symbol}: {e}"
                 logger.error(f"[BYBIT_BOT] {error_msg}")
@@ -2661,10 +2868,11 @@ class BybitExchange(BaseExchange):
                     else:
                         leverage_set_successfully = True
                         leverage_to_use = leverage_int
-                        logger.info(f"[BYBIT_BOT] ✅ {symbol}: Плечо установлено на {leverage_int}x перед входом в позицию")
-                        # Небольшая задержка, чтобы биржа успела обновить настройки
-                        import time
-                        time.sleep(0.5)
+                        if leverage_result.get('changed'):
+                            logger.info(f"[BYBIT_BOT] ✅ {symbol}: Плечо установлено на {leverage_to_use}x перед входом в позицию")
+                            # Небольшая задержка, чтобы биржа успела обновить настройки (только если плечо менялось)
+                            import time
+                            time.sleep(0.5)
                 except Exception as e:
                     logger.warning(f"[BYBIT_BOT] ⚠️ {symbol}: Ошибка установки плеча: {e}")
                          
@@ -2734,17 +2942,20 @@ class BybitExchange(BaseExchange):
                 current_leverage = float(leverage_to_use)
                 logger.info(f"[BYBIT_BOT] 📊 {symbol}: Используем установленное плечо: {current_leverage}x (не получаем с биржи)")
             else:
-                # Иначе получаем текущее плечо с биржи
-                try:
-                    pos_response = self.client.get_positions(category="linear", symbol=f"{symbol}USDT")
-                    if pos_response.get('retCode') == 0 and pos_response.get('result', {}).get('list'):
-                        # get_positions всегда возвращает leverage даже для пустых позиций!
-                        # Берем leverage из первой позиции в списке (она может быть пустой)
-                        pos_list = pos_response['result']['list']
-                        if pos_list:
-                            current_leverage = float(pos_list[0].get('leverage', 10))
-                except Exception as e:
-                    logger.warning(f"[BYBIT_BOT] ⚠️ Не удалось получить текущее плечо: {e}")
+                # Иначе текущее плечо из кэша pre-flight или с биржи
+                current_leverage = self.preflight.get(symbol, 'leverage')
+                if not current_leverage:
+                    try:
+                        pos_response = self.client.get_positions(category="linear", symbol=f"{symbol}USDT")
+                        if pos_response.get('retCode') == 0 and pos_response.get('result', {}).get('list'):
+                            # get_positions всегда возвращает leverage даже для пустых позиций!
+                            # Берем leverage из первой позиции в списке (она может быть пустой)
+                            pos_list = pos_response['result']['list']
+                            self.preflight.update_from_position_records(pos_list)
+                            if pos_list:
+                                current_leverage = float(pos_list[0].get('leverage', 10))
+                    except Exception as e:
+                        logger.warning(f"[BYBIT_BOT] ⚠️ Не удалось получить текущее плечо: {e}")
                 
                 # Если не удалось получить и не было установлено - используем дефолтное 10x
                 if not current_leverage:
@@ -2901,6 +3112,7 @@ class BybitExchange(BaseExchange):
                 if '110013' in error_str or 'maxLeverage' in error_str.lower():
                     logger.warning(f"[BYBIT_BOT] ⚠️ {symbol}: Обнаружена ошибка превышения максимального кредитного плеча (110013)")
                     # Пытаемся получить максимальное кредитное плечо и установить его
+                    self.preflight.invalidate(symbol, 'max_leverage')  # биржа отклонила плечо — кэш максимума устарел
                     max_leverage = self.get_max_leverage(symbol)
                     current_leverage = leverage_to_use if leverage_to_use else (original_leverage if original_leverage else None)
                     if max_leverage and current_leverage and current_leverage > max_leverage:
@@ -2957,6 +3169,7 @@ class BybitExchange(BaseExchange):
                 if error_code == 110013 or 'maxLeverage' in error_msg.lower():
                     logger.warning(f"[BYBIT_BOT] ⚠️ {symbol}: Ошибка превышения максимального кредитного плеча (110013)")
                     # Пытаемся получить максимальное кредитное плечо и установить его
+                    self.preflight.invalidate(symbol, 'max_leverage')  # биржа отклонила плечо — кэш максимума устарел
                     max_leverage = self.get_max_leverage(symbol)
                     current_leverage = leverage_to_use if leverage_to_use else (original_leverage if original_leverage else None)
                     if max_leverage and current_leverage and current_leverage > max_leverage:
@@ -3032,6 +3245,7 @@ class BybitExchange(BaseExchange):
             if error_code == '110013' or '110013' in error_str or 'maxLeverage' in error_str.lower():
                 logger.warning(f"[BYBIT_BOT] ⚠️ {symbol}: Обнаружена ошибка превышения максимального кредитного плеча (110013) в исключении")
                 # Пытаемся получить максимальное кредитное плечо и установить его
+                self.preflight.invalidate(symbol, 'max_leverage')  # биржа отклонила плечо — кэш максимума устарел
                 max_leverage = self.get_max_leverage(symbol)
                 current_leverage = leverage_to_use if leverage_to_use else (original_leverage if original_leverage else None)
                 if max_leverage and current_leverage and current_leverage > max_leverage:
@@ -3079,6 +3293,7 @@ class BybitExchange(BaseExchange):
                 'error_code': error_code  # Добавляем код ошибки для проверки делистинга
             }
     
+    @traced('exchange.update_take_profit')
     @with_timeout(15)  # 15 секунд таймаут для обновления TP
     def update_take_profit(self, symbol, take_profit_price, position_side=None):
         """
@@ -3095,9 +3310,9 @@ class BybitExchange(BaseExchange):
         try:
             # ✅ Bybit: для Long (Buy) TP должен быть выше текущей цены, для Short (Sell) — ниже
             try:
-                ticker = self.client.get_tickers(category="linear", symbol=f"{symbol}USDT")
-                if ticker.get('retCode') == 0 and ticker.get('result', {}).get('list'):
-                    last_price = float(ticker['result']['list'][0].get('lastPrice', 0) or 0)
+                ticker = self.get_ticker(symbol)
+                if ticker:
+                    last_price = float(ticker.get('last', 0) or 0)
                     if last_price > 0:
                         side_upper = (position_side or 'LONG').upper()
                         if side_upper == 'LONG' and take_profit_price <= last_price:
@@ -3130,6 +3345,7 @@ class BybitExchange(BaseExchange):
             try:
                 response = self.client.set_trading_stop(**tp_params)
                 if response['retCode'] == 0:
+                    self.trading_stops.acknowledge(symbol, position_side, take_profit=take_profit_price)
                     return {
                         'success': True,
                         'message': f'Take Profit обновлен: {take_profit_price:.6f}',
@@ -3143,6 +3359,7 @@ class BybitExchange(BaseExchange):
             except Exception as e:
                 error_str = str(e)
                 if "34040" in error_str or "not modified" in error_str:
+                    self.trading_stops.acknowledge(symbol, position_side, take_profit=take_profit_price)
                     return {
                         'success': True,
                         'message': f'Take Profit уже установлен: {take_profit_price:.6f}',
@@ -3201,6 +3418,7 @@ class BybitExchange(BaseExchange):
             logger.error(f"[BYBIT_BOT] Ошибка place_stop_loss: {exc}")
             return {'success': False, 'message': str(exc)}
 
+    @traced('exchange.update_stop_loss')
     @with_timeout(15)  # 15 секунд таймаут для обновления SL
     def update_stop_loss(self, symbol, stop_loss_price, position_side=None):
         """
@@ -3246,6 +3464,7 @@ class BybitExchange(BaseExchange):
             try:
                 response = self.client.set_trading_stop(**sl_params)
                 if response['retCode'] == 0:
+                    self.trading_stops.acknowledge(symbol, position_side, stop_loss=stop_loss_price)
                     return {
                         'success': True,
                         'message': f'Stop Loss обновлен: {stop_loss_price:.6f}',
@@ -3261,6 +3480,7 @@ class BybitExchange(BaseExchange):
                 # 34040 (not modified) — SL уже установлен
                 if "34040" in error_str or "not modified" in error_str:
                     logger.info(f"[BYBIT_BOT] ✅ SL уже установлен на {stop_loss_price:.6f}")
+                    self.trading_stops.acknowledge(symbol, position_side, stop_loss=stop_loss_price)
                     return {
                         'success': True,
                         'message': f'Stop Loss уже установлен: {stop_loss_price:.6f}',
@@ -3297,6 +3517,82 @@ class BybitExchange(BaseExchange):
                 'message': f"Ошибка обновления SL: {str(e)}"
             }
     
+    @traced('exchange.update_trading_stop')
+    @with_timeout(15)
+    def update_trading_stop(self, symbol, stop_loss_price=None, take_profit_price=None, position_side=None):
+        """
+        Обновляет Stop Loss и Take Profit позиции одним запросом set_trading_stop
+
+        Args:
+            symbol (str): Символ торговой пары (например, 'BTC')
+            stop_loss_price (float, optional): Новая цена Stop Loss (None — не менять)
+            take_profit_price (float, optional): Новая цена Take Profit (None — не менять)
+            position_side (str, optional): Направление позиции ('LONG' или 'SHORT')
+
+        Returns:
+            dict: success, stop_loss / take_profit — применённые цены (None — поле не менялось)
+        """
+        side_upper = (position_side or 'LONG').upper()
+        # TP, который уже «позади» текущей цены, биржа отклонит (как в update_take_profit) — не отправляем
+        if take_profit_price is not None:
+            try:
+                ticker = self.get_ticker(symbol)
+                last_price = float((ticker or {}).get('last', 0) or 0)
+                if last_price > 0 and (
+                    (side_upper == 'LONG' and take_profit_price <= last_price)
+                    or (side_upper == 'SHORT' and take_profit_price >= last_price)
+                ):
+                    take_profit_price = None
+            except Exception:
+                pass
+        if stop_loss_price is None and take_profit_price is None:
+            return {'success': True, 'message': 'SL/TP не требуют обновления', 'stop_loss': None, 'take_profit': None}
+        if stop_loss_price is None:
+            return dict(self.update_take_profit(symbol, take_profit_price, position_side) or {}, stop_loss=None)
+        if take_profit_price is None:
+            return dict(self.update_stop_loss(symbol, stop_loss_price, position_side) or {}, take_profit=None)
+
+        try:
+            position_mode = self._get_position_mode(symbol)
+            if position_mode == 'One-Way' or not position_side:
+                position_idx = 0
+            else:
+                position_idx = 1 if side_upper == 'LONG' else 2
+            params = {
+                "category": "linear",
+                "symbol": f"{symbol}USDT",
+                "stopLoss": str(round(stop_loss_price, 6)),
+                "takeProfit": str(round(take_profit_price, 6)),
+                "positionIdx": position_idx
+            }
+            logger.info(f"[BYBIT_BOT] Обновление SL/TP: {symbol} → SL {stop_loss_price:.6f}, TP {take_profit_price:.6f} (side: {position_side})")
+            try:
+                response = self.client.set_trading_stop(**params)
+            except Exception as e:
+                error_str = str(e)
+                if "34040" in error_str or "not modified" in error_str:
+                    response = {'retCode': 0}
+                elif "zero position" in error_str.lower():
+                    return {'success': False, 'message': 'Позиция уже закрыта на бирже (zero position)', 'zero_position': True}
+                elif "10001" in error_str or "base_price" in error_str:
+                    # TP не прошёл проверку относительно цены — ставим хотя бы стоп
+                    result = self.update_stop_loss(symbol, stop_loss_price, position_side)
+                    return dict(result, take_profit=None)
+                else:
+                    raise
+            if response.get('retCode') == 0:
+                self.trading_stops.acknowledge(symbol, position_side, stop_loss=stop_loss_price, take_profit=take_profit_price)
+                return {
+                    'success': True,
+                    'message': f'SL/TP обновлены: {stop_loss_price:.6f} / {take_profit_price:.6f}',
+                    'stop_loss': stop_loss_price,
+                    'take_profit': take_profit_price
+                }
+            return {'success': False, 'message': f"Ошибка обновления SL/TP: {response.get('retMsg')}"}
+        except Exception as e:
+            logger.error(f"[BYBIT_BOT] Ошибка обновления SL/TP: {e}")
+            return {'success': False, 'message': f"Ошибка обновления SL/TP: {e}"}
+
     @with_timeout(15)  # 15 секунд таймаут для установки SL по ROI
     def update_stop_loss_by_roi(self, symbol, roi_percent, position_side=None):
         """
@@ -3434,6 +3730,7 @@ class BybitExchange(BaseExchange):
             logger.error(f"[BYBIT_BOT] ❌ Ошибка получения открытых ордеров для {symbol}: {e}")
             return []
     
+    @traced('exchange.set_leverage')
     def set_leverage(self, symbol, leverage):
         """
         Устанавливает кредитное плечо для символа
@@ -3466,16 +3763,18 @@ class BybitExchange(BaseExchange):
                 leverage = int(max_leverage)
                 logger.warning(f"[BYBIT_BOT] ⚠️ {symbol}: Запрошенное плечо {original_leverage}x превышает максимум {max_leverage}x. Ограничиваем до {leverage}x")
             
-            # Получаем текущее плечо
-            current_leverage = None
-            try:
-                pos_response = self.client.get_positions(category="linear", symbol=f"{symbol}USDT")
-                if pos_response.get('retCode') == 0 and pos_response.get('result', {}).get('list'):
-                    pos_list = pos_response['result']['list']
-                    if pos_list:
-                        current_leverage = float(pos_list[0].get('leverage', 10))
-            except Exception as e:
-                logger.warning(f"[BYBIT_BOT] ⚠️ Не удалось получить текущее плечо: {e}")
+            # Получаем текущее плечо (из кэша pre-flight, иначе с биржи)
+            current_leverage = self.preflight.get(symbol, 'leverage')
+            if current_leverage is None:
+                try:
+                    pos_response = self.client.get_positions(category="linear", symbol=f"{symbol}USDT")
+                    if pos_response.get('retCode') == 0 and pos_response.get('result', {}).get('list'):
+                        pos_list = pos_response['result']['list']
+                        self.preflight.update_from_position_records(pos_list)
+                        if pos_list:
+                            current_leverage = float(pos_list[0].get('leverage', 10))
+                except Exception as e:
+                    logger.warning(f"[BYBIT_BOT] ⚠️ Не удалось получить текущее плечо: {e}")
             
             # Если плечо уже установлено на нужное значение, пропускаем
             if current_leverage and int(current_leverage) == leverage:
@@ -3497,8 +3796,10 @@ class BybitExchange(BaseExchange):
             
             if response.get('retCode') == 0:
                 logger.info(f"[BYBIT_BOT] ✅ {symbol}: Плечо установлено на {leverage}x")
+                self.preflight.set(symbol, 'leverage', float(leverage))
                 result = {
                     'success': True,
+                    'changed': True,
                     'message': f'Плечо успешно установлено на {leverage}x'
                 }
                 if leverage != original_leverage:
@@ -3508,11 +3809,14 @@ class BybitExchange(BaseExchange):
             else:
                 error_msg = response.get('retMsg', 'Unknown error')
                 error_code = response.get('retCode', '')
+                # Кэш плеча мог разойтись с биржей — при следующем вызове перечитаем
+                self.preflight.invalidate(symbol, 'leverage')
                 
                 # ✅ Обрабатываем ошибку превышения максимального кредитного плеча (110013)
                 if error_code == 110013 or 'maxLeverage' in error_msg.lower():
                     # Пытаемся получить максимальное кредитное плечо и установить его
                     if not max_leverage:
+                        self.preflight.invalidate(symbol, 'max_leverage')  # биржа отклонила плечо — кэш максимума устарел
                         max_leverage = self.get_max_leverage(symbol)
                     
                     if max_leverage and max_leverage < leverage:
@@ -3534,9 +3838,11 @@ class BybitExchange(BaseExchange):
                 
         except Exception as e:
             error_str = str(e)
+            self.preflight.invalidate(symbol, 'leverage')
             # ✅ Обрабатываем ошибку превышения максимального кредитного плеча в исключении
             if '110013' in error_str or 'maxLeverage' in error_str.lower():
                 logger.warning(f"[BYBIT_BOT] ⚠️ {symbol}: Обнаружена ошибка превышения максимального кредитного плеча. Пытаемся получить и установить максимум...")
+                self.preflight.invalidate(symbol, 'max_leverage')  # биржа отклонила плечо — кэш максимума устарел
                 max_leverage = self.get_max_leverage(symbol)
                 if max_leverage and max_leverage < leverage:
                     logger.warning(f"[BYBIT_BOT] ⚠️ {symbol}: Пытаемся установить максимальное кредитное плечо {max_leverage}x вместо {leverage}x")
@@ -3,7 +3,6 @@ import ccxt
 from datetime import datetime, timedelta
 import time
 import traceback
-import pandas as pd
 import math
 import numpy as np
 import logging
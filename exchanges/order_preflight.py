@@ -0,0 +1,162 @@
+"""
+Кэш состояния аккаунта по символам для подготовки ордера (pre-flight).
+
+Перед каждым входом place_order раньше запрашивал тикер, режим маржи, текущее плечо,
+risk limit (максимальное плечо), параметры инструмента и ждал 0.5 с после set_leverage.
+Теперь эти данные берутся из OrderPreflightState, а запросы уходят только если
+значение неизвестно, устарело или действительно отличается от нужного:
+
+- плечо и режим маржи (tradeMode) обновляются из любых ответов get_positions
+  (снимок позиций, проверки по символу) и после наших set_leverage / switch_margin_mode;
+- параметры инструментов (qtyStep, minOrderQty, minNotionalValue, tickSize) и
+  максимальное плечо меняются редко — живут ORDER_PREFLIGHT_INSTRUMENT_TTL секунд
+  и прогреваются в фоне одним постраничным запросом get_instruments_info;
+- последняя цена берётся из кэша, если она не старше ORDER_PREFLIGHT_PRICE_MAX_AGE секунд.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger('OrderPreflight')
+
+DEFAULT_ACCOUNT_TTL = 600.0      # плечо, режим маржи
+DEFAULT_INSTRUMENT_TTL = 3600.0  # параметры инструмента, максимальное плечо
+DEFAULT_PRICE_MAX_AGE = 2.0
+
+# Поле -> класс времени жизни
+_FIELD_TTL_CLASS = {
+    'leverage': 'account',
+    'margin_mode': 'account',
+    'instrument': 'instrument',
+    'max_leverage': 'instrument',
+    'price': 'price',
+}
+
+
+def _clean(symbol):
+    symbol = (symbol or '').upper()
+    return symbol[:-4] if symbol.endswith('USDT') else symbol
+
+
+def instrument_filters(instrument):
+    """Запись get_instruments_info Bybit -> формат BybitExchange.get_instruments_info"""
+    lot_filter = instrument.get('lotSizeFilter') or {}
+    result = {
+        'minOrderQty': lot_filter.get('minOrderQty'),
+        'qtyStep': lot_filter.get('qtyStep'),
+        'tickSize': (instrument.get('priceFilter') or {}).get('tickSize'),
+        'status': instrument.get('status', 'Unknown'),
+    }
+    if 'minNotionalValue' in lot_filter:
+        result['minNotionalValue'] = float(lot_filter['minNotionalValue'])
+    return result
+
+
+def _load_ttls():
+    try:
+        from bot_engine.config_loader import SystemConfig
+    except Exception:
+        SystemConfig = None
+    return {
+        'account': float(getattr(SystemConfig, 'ORDER_PREFLIGHT_ACCOUNT_TTL', DEFAULT_ACCOUNT_TTL)),
+        'instrument': float(getattr(SystemConfig, 'ORDER_PREFLIGHT_INSTRUMENT_TTL', DEFAULT_INSTRUMENT_TTL)),
+        'price': float(getattr(SystemConfig, 'ORDER_PREFLIGHT_PRICE_MAX_AGE', DEFAULT_PRICE_MAX_AGE)),
+    }
+
+
+class OrderPreflightState:
+    """Плечо, режим маржи, параметры инструмента и последняя цена по символам"""
+
+    def __init__(self, ttls=None):
+        self.ttls = ttls or _load_ttls()
+        self._lock = threading.Lock()
+        self._state = {}  # символ без USDT -> {поле: (значение, время)}
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, symbol, field, max_age=None):
+        """Значение поля, если оно известно и не старше max_age (по умолчанию — TTL поля), иначе None"""
+        if max_age is None:
+            max_age = self.ttls.get(_FIELD_TTL_CLASS.get(field, 'account'), DEFAULT_ACCOUNT_TTL)
+        with self._lock:
+            entry = self._state.get(_clean(symbol), {}).get(field)
+            if entry is not None and time.monotonic() - entry[1] < max_age:
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+            return None
+
+    def set(self, symbol, field, value):
+        if value is None:
+            return
+        with self._lock:
+            self._state.setdefault(_clean(symbol), {})[field] = (value, time.monotonic())
+
+    def invalidate(self, symbol, field=None):
+        with self._lock:
+            fields = self._state.get(_clean(symbol))
+            if not fields:
+                return
+            if field is None:
+                fields.clear()
+            else:
+                fields.pop(field, None)
+
+    def note_price(self, symbol, price):
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return
+        if price > 0:
+            self.set(symbol, 'price', price)
+
+    def update_from_position_records(self, records):
+        """Плечо и режим маржи из записей get_positions (в т.ч. с нулевым размером)"""
+        now = time.monotonic()
+        with self._lock:
+            for record in records or ():
+                symbol = _clean(record.get('symbol'))
+                if not symbol:
+                    continue
+                fields = self._state.setdefault(symbol, {})
+                leverage = record.get('leverage')
+                try:
+                    if leverage not in (None, ''):
+                        fields['leverage'] = (float(leverage), now)
+                except (TypeError, ValueError):
+                    pass
+                try:
+                    trade_mode = record.get('tradeMode')
+                    if trade_mode not in (None, ''):
+                        fields['margin_mode'] = ('isolated' if int(trade_mode) == 1 else 'cross', now)
+                except (TypeError, ValueError):
+                    pass
+
+    def update_instruments(self, instruments):
+        """Параметры инструментов из ответа get_instruments_info (список инструментов)"""
+        now = time.monotonic()
+        count = 0
+        with self._lock:
+            for instrument in instruments or ():
+                symbol = instrument.get('symbol')
+                if not symbol or not symbol.endswith('USDT'):
+                    continue
+                fields = self._state.setdefault(_clean(symbol), {})
+                try:
+                    fields['instrument'] = (instrument_filters(instrument), now)
+                    max_leverage = (instrument.get('leverageFilter') or {}).get('maxLeverage')
+                    if max_leverage:
+                        fields['max_leverage'] = (float(max_leverage), now)
+                    count += 1
+                except Exception:
+                    continue
+        return count
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'symbols': len(self._state),
+                'hits': self._hits,
+                'misses': self._misses,
+            }
@@ -0,0 +1,135 @@
+"""
+Снимок позиций биржи, общий для всех потребителей (боты, синхронизация, проверка стопов, app.py).
+
+Вместо того чтобы каждый модуль сам постранично читал get_positions, BybitExchange держит
+один PositionSnapshotCache:
+
+- один постраничный запрос на окно POSITION_SNAPSHOT_TTL секунд;
+- если запрос уже идёт, остальные потоки ждут его результат, а не шлют свой (coalescing);
+- invalidate() вызывается после наших ордеров (открытие/закрытие, SL/TP, плечо) —
+  следующий get() гарантированно получит данные, запрошенные после этого события;
+- неудачный запрос не кэшируется: ошибка пробрасывается всем, кто ждал этот запрос.
+
+Снимок хранит «сырые» позиции Bybit (как в response['result']['list'], только size > 0);
+обработанный вид (get_positions) строится поверх него в BybitExchange.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger('PositionSnapshot')
+
+DEFAULT_TTL = 1.0
+
+
+def configured_ttl():
+    try:
+        from bot_engine.config_loader import SystemConfig
+        return float(getattr(SystemConfig, 'POSITION_SNAPSHOT_TTL', DEFAULT_TTL))
+    except Exception:
+        return DEFAULT_TTL
+
+
+def normalize_symbol(symbol):
+    """BTC, BTCUSDT -> BTCUSDT"""
+    symbol = (symbol or '').upper()
+    return symbol if symbol.endswith('USDT') else f"{symbol}USDT"
+
+
+class PositionSnapshotCache:
+    """Кэш списка активных позиций с объединением одновременных запросов"""
+
+    def __init__(self, fetch_func, ttl=DEFAULT_TTL):
+        self._fetch_func = fetch_func
+        self.ttl = float(ttl)
+        self._cond = threading.Condition()
+        self._positions = None
+        self._fetched_at = 0.0
+        self._fetched_generation = -1  # поколение, в котором стартовал запрос текущего снимка
+        self._generation = 0           # растёт при invalidate()
+        self._in_flight = False
+        self._in_flight_generation = -1
+        self._last_error = None
+        self._error_seq = 0
+        self.version = 0               # номер снимка (меняется при каждом успешном запросе)
+        self._fetches = 0
+        self._hits = 0
+        self._coalesced = 0
+
+    def _is_fresh(self, now, ttl):
+        return (
+            self._positions is not None
+            and self._fetched_generation >= self._generation
+            and now - self._fetched_at < ttl
+        )
+
+    def get(self, max_age=None):
+        """
+        Список сырых активных позиций (общий — не изменять).
+
+        Args:
+            max_age: допустимый возраст снимка в секундах (по умолчанию ttl; 0 — всегда новый запрос)
+        """
+        ttl = self.ttl if max_age is None else max_age
+        with self._cond:
+            while True:
+                if self._is_fresh(time.monotonic(), ttl):
+                    self._hits += 1
+                    return self._positions
+                if not self._in_flight:
+                    break
+                # Запрос начат после последней инвалидации — его результат подходит и нам
+                joined = self._in_flight_generation >= self._generation
+                error_seq = self._error_seq
+                while self._in_flight:
+                    self._cond.wait()
+                if joined:
+                    self._coalesced += 1
+                    if self._error_seq != error_seq:
+                        raise self._last_error
+                    if self._positions is not None and self._fetched_generation >= self._generation:
+                        return self._positions
+                # Иначе (результат устарел из-за invalidate) — проверяем заново и при необходимости запрашиваем сами
+            self._in_flight = True
+            self._in_flight_generation = self._generation
+            generation = self._generation
+
+        positions = None
+        error = None
+        try:
+            positions = self._fetch_func()
+        except Exception as e:
+            error = e
+        with self._cond:
+            self._in_flight = False
+            self._fetches += 1
+            if error is None:
+                self._positions = list(positions or [])
+                self._fetched_at = time.monotonic()
+                self._fetched_generation = generation
+                self.version += 1
+            else:
+                self._last_error = error
+                self._error_seq += 1
+            self._cond.notify_all()
+            if error is not None:
+                raise error
+            return self._positions
+
+    def invalidate(self):
+        """Наш ордер изменил позиции: следующий get() запросит биржу заново"""
+        with self._cond:
+            self._generation += 1
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                'ttl': self.ttl,
+                'version': self.version,
+                'fetches': self._fetches,
+                'hits': self._hits,
+                'coalesced': self._coalesced,
+                'positions': len(self._positions) if self._positions is not None else None,
+                'age_sec': round(time.monotonic() - self._fetched_at, 3) if self._positions is not None else None,
+            }
@@ -0,0 +1,295 @@
+"""
+Центральный планировщик запросов к бирже с классами приоритета.
+
+Все запросы BybitExchange (через ScheduledClient) берут токен из общего бюджета
+(token bucket: EXCHANGE_REQUESTS_PER_SEC, запас EXCHANGE_REQUEST_BURST). Токен выдаётся
+по приоритету:
+
+    PRIORITY_ORDER            — ордера, закрытие, стопы/тейки, плечо
+    PRIORITY_POSITION         — синхронизация позиций, баланс, открытые ордера
+    PRIORITY_POSITION_CANDLES — свечи/тикеры монет в позиции (по умолчанию для свечей)
+    PRIORITY_DISCOVERY        — массовая загрузка свечей всех монет
+
+- пока ждёт запрос более высокого класса, низкий класс токен не получает;
+- массовая загрузка (admission control) не трогает последние EXCHANGE_RESERVED_TOKENS
+  токенов и отказывает (RequestRejected) после EXCHANGE_DISCOVERY_MAX_WAIT секунд ожидания;
+- батчи массовой загрузки перед запуском вызывают wait_for_headroom() и уступают,
+  пока бюджет занят срочными запросами;
+- при rate limit биржи темп снижается (backoff) и восстанавливается только после
+  EXCHANGE_RATE_RESTORE_SUCCESSES успешных запросов подряд и не раньше
+  EXCHANGE_RATE_RESTORE_COOLDOWN секунд с последнего backoff.
+
+Класс запроса задаётся контекстом потока: with request_priority(PRIORITY_DISCOVERY): ...
+Без контекста используется класс по методу API (см. _METHOD_PRIORITY).
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.latency_tracing import current_span, span
+
+logger = logging.getLogger('ExchangeScheduler')
+
+PRIORITY_ORDER = 0
+PRIORITY_POSITION = 1
+PRIORITY_POSITION_CANDLES = 2
+PRIORITY_DISCOVERY = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_ORDER: 'order',
+    PRIORITY_POSITION: 'position',
+    PRIORITY_POSITION_CANDLES: 'position_candles',
+    PRIORITY_DISCOVERY: 'discovery',
+}
+
+# Класс по методу pybit HTTP, если поток не задал request_priority()
+_METHOD_PRIORITY = {
+    'place_order': PRIORITY_ORDER,
+    'amend_order': PRIORITY_ORDER,
+    'cancel_order': PRIORITY_ORDER,
+    'cancel_all_orders': PRIORITY_ORDER,
+    'set_trading_stop': PRIORITY_ORDER,
+    'set_leverage': PRIORITY_ORDER,
+    'switch_margin_mode': PRIORITY_ORDER,
+    'switch_position_mode': PRIORITY_ORDER,
+    'get_positions': PRIORITY_POSITION,
+    'get_wallet_balance': PRIORITY_POSITION,
+    'get_open_orders': PRIORITY_POSITION,
+    'get_kline': PRIORITY_POSITION_CANDLES,
+    'get_tickers': PRIORITY_POSITION_CANDLES,
+}
+# Служебные запросы без ограничения (синхронизация времени)
+_UNSCHEDULED_METHODS = frozenset({'get_server_time'})
+
+
+class RequestRejected(Exception):
+    """Запрос низкого приоритета не допущен: бюджет занят более срочными запросами"""
+
+
+_context = threading.local()
+
+
+@contextmanager
+def request_priority(priority):
+    """Задаёт класс приоритета запросов к бирже для текущего потока"""
+    previous = getattr(_context, 'priority', None)
+    _context.priority = priority
+    try:
+        yield
+    finally:
+        _context.priority = previous
+
+
+def current_priority(default=None):
+    priority = getattr(_context, 'priority', None)
+    return default if priority is None else priority
+
+
+class RequestScheduler:
+    """Token bucket с выдачей токенов по классам приоритета"""
+
+    def __init__(self, rate_per_sec=20.0, burst=20, reserved_tokens=5, discovery_max_wait=10.0,
+                 restore_cooldown=60.0, restore_after_successes=20):
+        self.base_rate = float(rate_per_sec)
+        self.rate = float(rate_per_sec)
+        self.burst = float(max(1, burst))
+        self.reserved_tokens = float(min(max(0, reserved_tokens), self.burst - 1))
+        self.discovery_max_wait = discovery_max_wait
+        self.restore_cooldown = float(max(0.0, restore_cooldown))
+        self.restore_after_successes = max(1, int(restore_after_successes))
+        self._last_backoff = None
+        self._successes = 0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiting = [0] * (PRIORITY_DISCOVERY + 1)
+        self._granted = [0] * (PRIORITY_DISCOVERY + 1)
+        self._rejected = [0] * (PRIORITY_DISCOVERY + 1)
+        self._wait_time = [0.0] * (PRIORITY_DISCOVERY + 1)
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def _floor(self, priority):
+        # Массовая загрузка не расходует запас, оставленный для срочных запросов
+        return self.reserved_tokens if priority >= PRIORITY_DISCOVERY else 0.0
+
+    def _higher_waiting(self, priority):
+        return any(self._waiting[p] for p in range(priority))
+
+    def acquire(self, priority=PRIORITY_POSITION, timeout=None):
+        """
+        Ждёт токен для запроса класса priority.
+
+        Returns:
+            True — токен получен; False — истёк timeout
+        """
+        priority = min(max(int(priority), PRIORITY_ORDER), PRIORITY_DISCOVERY)
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    need = 1.0 + self._floor(priority)
+                    if self._tokens >= need and not self._higher_waiting(priority):
+                        self._tokens -= 1.0
+                        self._granted[priority] += 1
+                        self._wait_time[priority] += now - started
+                        return True
+                    if deadline is not None and now >= deadline:
+                        self._rejected[priority] += 1
+                        return False
+                    wait = max(0.005, (need - self._tokens) / self.rate) if self._tokens < need else 0.05
+                    if deadline is not None:
+                        wait = min(wait, max(0.0, deadline - now))
+                    self._cond.wait(wait)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def should_yield(self, priority=PRIORITY_DISCOVERY):
+        """True, если ждут запросы выше классом или бюджет опустился до резерва"""
+        with self._cond:
+            self._refill(time.monotonic())
+            return self._higher_waiting(priority) or self._tokens < 1.0 + self._floor(priority)
+
+    def wait_for_headroom(self, priority=PRIORITY_DISCOVERY, timeout=10.0):
+        """Вытеснение батчей: ждёт, пока срочные запросы не освободят бюджет (не дольше timeout)"""
+        deadline = time.monotonic() + timeout
+        yielded = False
+        while self.should_yield(priority) and time.monotonic() < deadline:
+            yielded = True
+            time.sleep(0.05)
+        return yielded
+
+    def backoff(self, factor=0.5):
+        """Rate limit биржи: снижает темп выдачи токенов (не ниже 1 запроса в секунду)"""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(1.0, self.rate * factor)
+            self._last_backoff = now
+            self._successes = 0
+
+    def restore(self):
+        """
+        Успешный запрос: базовый темп возвращается только после restore_after_successes
+        успехов подряд и не раньше restore_cooldown секунд с последнего backoff.
+
+        Returns:
+            True — темп восстановлен (или уже базовый)
+        """
+        if self.rate == self.base_rate:
+            return True
+        with self._cond:
+            now = time.monotonic()
+            self._successes += 1
+            if self._successes < self.restore_after_successes:
+                return False
+            if self._last_backoff is not None and now - self._last_backoff < self.restore_cooldown:
+                return False
+            self._refill(now)
+            self.rate = self.base_rate
+            self._successes = 0
+            self._cond.notify_all()
+            logger.info(f"🔄 Темп запросов к бирже восстановлен: {self.base_rate:g} запросов/сек")
+            return True
+
+    def get_stats(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                'rate_per_sec': self.rate,
+                'tokens': round(self._tokens, 2),
+                'classes': {
+                    name: {
+                        'waiting': self._waiting[p],
+                        'granted': self._granted[p],
+                        'rejected': self._rejected[p],
+                        'avg_wait_ms': round(self._wait_time[p] * 1000 / self._granted[p], 1) if self._granted[p] else 0.0,
+                    }
+                    for p, name in PRIORITY_NAMES.items()
+                },
+            }
+
+
+class ScheduledClient:
+    """
+    Обёртка HTTP-клиента биржи: каждый вызов API проходит через RequestScheduler.
+
+    on_order_request — вызывается после каждого запроса класса ORDER (успешного или нет):
+    ордер мог изменить позиции, например, для сброса снимка позиций.
+    """
+
+    def __init__(self, client, scheduler, on_order_request=None):
+        object.__setattr__(self, '_client', client)
+        object.__setattr__(self, '_scheduler', scheduler)
+        object.__setattr__(self, '_on_order_request', on_order_request)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith('_') or name in _UNSCHEDULED_METHODS:
+            return attr
+        scheduler = self._scheduler
+        method_priority = _METHOD_PRIORITY.get(name, PRIORITY_POSITION)
+        on_order_request = self._on_order_request if method_priority == PRIORITY_ORDER else None
+
+        def call(priority, *args, **kwargs):
+            timeout = scheduler.discovery_max_wait if priority >= PRIORITY_DISCOVERY else None
+            if not scheduler.acquire(priority, timeout=timeout):
+                raise RequestRejected(f"{name}: бюджет запросов занят более срочными запросами")
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                if on_order_request is not None:
+                    try:
+                        on_order_request(name)
+                    except Exception:
+                        pass
+
+        def scheduled_call(*args, **kwargs):
+            # Ордера и стопы никогда не понижаются контекстом потока
+            priority = method_priority if method_priority == PRIORITY_ORDER else current_priority(method_priority)
+            if current_span() is None:
+                return call(priority, *args, **kwargs)
+            # Внутри трассируемого пути — отдельный этап на каждый вызов API (ожидание бюджета + запрос)
+            with span(f'api.{name}', priority=PRIORITY_NAMES.get(priority, priority)):
+                return call(priority, *args, **kwargs)
+
+        return scheduled_call
+
+    def __setattr__(self, name, value):
+        setattr(self._client, name, value)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_request_scheduler():
+    """Общий для процесса планировщик (бюджет запросов общий для аккаунта/IP)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                try:
+                    from bot_engine.config_loader import SystemConfig
+                except Exception:
+                    SystemConfig = None
+                _scheduler = RequestScheduler(
+                    rate_per_sec=getattr(SystemConfig, 'EXCHANGE_REQUESTS_PER_SEC', 20),
+                    burst=getattr(SystemConfig, 'EXCHANGE_REQUEST_BURST', 20),
+                    reserved_tokens=getattr(SystemConfig, 'EXCHANGE_RESERVED_TOKENS', 5),
+                    discovery_max_wait=getattr(SystemConfig, 'EXCHANGE_DISCOVERY_MAX_WAIT', 10),
+                    restore_cooldown=getattr(SystemConfig, 'EXCHANGE_RATE_RESTORE_COOLDOWN', 60),
+                    restore_after_successes=getattr(SystemConfig, 'EXCHANGE_RATE_RESTORE_SUCCESSES', 20),
+                )
+    return _scheduler
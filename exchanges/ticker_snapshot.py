@@ -0,0 +1,177 @@
+"""
+Снимок тикеров всех линейных инструментов одним запросом.
+
+Bybit get_tickers(category="linear") без symbol возвращает все инструменты сразу,
+поэтому вместо запроса на каждую монету (app.py /api/ticker, цены ботов, мониторинг
+позиций) BybitExchange держит один TickerSnapshot:
+
+    quote = exchange.get_price('BTC')          # {'last', 'bid', 'ask', 'mark', 'age_sec', 'stale', ...}
+    quotes = exchange.get_prices(['BTC', 'ETH'])
+
+- снимок обновляется, когда он старше max_age (TICKER_SNAPSHOT_MAX_AGE), или в фоне
+  с интервалом start(interval); одновременные обновления объединяются в один запрос;
+- если обновить не удалось, отдаётся последнее известное значение с stale=True;
+- peek() читает снимок без запроса к бирже (для пути ордера: берём цену, только если свежая).
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger('TickerSnapshot')
+
+DEFAULT_MAX_AGE = 2.0
+
+
+def configured_max_age():
+    try:
+        from bot_engine.config_loader import SystemConfig
+        return float(getattr(SystemConfig, 'TICKER_SNAPSHOT_MAX_AGE', DEFAULT_MAX_AGE))
+    except Exception:
+        return DEFAULT_MAX_AGE
+
+
+def _clean(symbol):
+    symbol = (symbol or '').upper()
+    return symbol[:-4] if symbol.endswith('USDT') else symbol
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TickerSnapshot:
+    """Тикеры всех инструментов: символ без USDT -> котировка"""
+
+    def __init__(self, fetch_func, max_age=DEFAULT_MAX_AGE):
+        self._fetch_func = fetch_func  # -> (список тикеров Bybit, время биржи в мс)
+        self.max_age = float(max_age)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._quotes = {}
+        self._fetched_at = 0.0
+        self._attempted_at = 0.0
+        self._exchange_time = None
+        self._last_error = None
+        self._refresh_thread = None
+        self._fetches = 0
+        self._failures = 0
+
+    def _age(self):
+        return time.monotonic() - self._fetched_at if self._fetched_at else None
+
+    def refresh(self):
+        """Полный запрос тикеров; True — снимок обновлён"""
+        self._attempted_at = time.monotonic()
+        try:
+            tickers, exchange_time = self._fetch_func()
+        except Exception as e:
+            with self._lock:
+                self._failures += 1
+                self._last_error = str(e)
+            logger.debug(f"Не удалось обновить тикеры: {e}")
+            return False
+        quotes = {}
+        for ticker in tickers or ():
+            symbol = ticker.get('symbol') or ''
+            if not symbol.endswith('USDT'):
+                continue
+            quotes[_clean(symbol)] = {
+                'last': _float(ticker.get('lastPrice')),
+                'bid': _float(ticker.get('bid1Price')),
+                'ask': _float(ticker.get('ask1Price')),
+                'mark': _float(ticker.get('markPrice')),
+                'change_24h': _float(ticker.get('price24hPcnt')),
+                'volume_24h': _float(ticker.get('volume24h')),
+                'turnover_24h': _float(ticker.get('turnover24h')),
+            }
+        with self._lock:
+            self._quotes = quotes
+            self._fetched_at = time.monotonic()
+            self._exchange_time = exchange_time
+            self._last_error = None
+            self._fetches += 1
+        return True
+
+    def _needs_refresh(self, max_age):
+        age = self._age()
+        if age is not None and age < max_age:
+            return False
+        # После неудачного запроса не повторяем чаще раза в max_age — отдаём последнее известное (stale)
+        return time.monotonic() - self._attempted_at >= max_age
+
+    def _ensure_fresh(self, max_age):
+        if not self._needs_refresh(max_age):
+            return
+        # Обновляет один поток; остальные ждут его и берут результат
+        with self._refresh_lock:
+            if self._needs_refresh(max_age):
+                self.refresh()
+
+    def _quote(self, symbol, max_age):
+        quote = self._quotes.get(_clean(symbol))
+        if quote is None:
+            return None
+        age = self._age()
+        result = dict(quote)
+        result['symbol'] = _clean(symbol)
+        result['timestamp'] = self._exchange_time
+        result['age_sec'] = round(age, 3) if age is not None else None
+        result['stale'] = age is None or age >= max_age
+        return result
+
+    def get_price(self, symbol, max_age=None):
+        """Котировка символа (None — символа нет в снимке); при необходимости обновляет снимок"""
+        max_age = self.max_age if max_age is None else max_age
+        self._ensure_fresh(max_age)
+        with self._lock:
+            return self._quote(symbol, max_age)
+
+    def get_prices(self, symbols=None, max_age=None):
+        """Котировки нескольких символов одним снимком (symbols=None — все)"""
+        max_age = self.max_age if max_age is None else max_age
+        self._ensure_fresh(max_age)
+        with self._lock:
+            if symbols is None:
+                symbols = list(self._quotes)
+            result = {}
+            for symbol in symbols:
+                quote = self._quote(symbol, max_age)
+                if quote is not None:
+                    result[_clean(symbol)] = quote
+            return result
+
+    def peek(self, symbol, max_age=None):
+        """Котировка из текущего снимка без запроса; None, если нет или старше max_age"""
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            quote = self._quote(symbol, max_age)
+        return quote if quote is not None and not quote['stale'] else None
+
+    def start(self, interval):
+        """Фоновое обновление снимка каждые interval секунд (повторный вызов — no-op)"""
+        if interval <= 0 or (self._refresh_thread is not None and self._refresh_thread.is_alive()):
+            return
+
+        def worker():
+            while True:
+                with self._refresh_lock:
+                    self.refresh()
+                time.sleep(interval)
+
+        self._refresh_thread = threading.Thread(target=worker, name='TickerSnapshot', daemon=True)
+        self._refresh_thread.start()
+
+    def get_stats(self):
+        with self._lock:
+            age = self._age()
+            return {
+                'symbols': len(self._quotes),
+                'age_sec': round(age, 3) if age is not None else None,
+                'fetches': self._fetches,
+                'failures': self._failures,
+                'last_error': self._last_error,
+            }
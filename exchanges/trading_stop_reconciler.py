@@ -0,0 +1,326 @@
+"""
+Синхронизация стоп-лоссов и тейк-профитов позиций по разнице «нужно / подтверждено биржей».
+
+check_missing_stop_losses раньше на каждом проходе сравнивал нужный SL/TP с ценой из
+снимка позиций с допуском 1e-6 и слал отдельный set_trading_stop на SL и на TP каждого бота.
+При трейлинге на волатильном рынке это давало поток мелких правок и упиралось в rate limit.
+TradingStopReconciler:
+
+- помнит последние подтверждённые биржей SL/TP по позиции (symbol, side): из снимка позиций
+  (observe) и из успешных ответов на наши запросы (acknowledge);
+- округляет нужную цену до tickSize инструмента и ставит изменение в очередь, только если
+  оно не меньше TRADING_STOP_HYSTERESIS_TICKS шагов цены в сторону подтягивания стопа;
+- повторная постановка того же значения — no-op, новое значение заменяет ожидающее (coalescing);
+- flush() отправляет SL и TP позиции одним запросом (update_trading_stop), сначала позиции
+  без стопа, затем с наибольшим сдвигом; при исчерпании бюджета запросов остаток ждёт
+  следующего flush(), неудачные изменения повторяются с экспоненциальной паузой.
+"""
+
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger('TradingStopReconciler')
+
+DEFAULT_HYSTERESIS_TICKS = 2
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY = 2.0
+_FALLBACK_TOLERANCE = 1e-6  # без tickSize — прежний допуск сравнения цен
+
+_FIELDS = ('stop_loss', 'take_profit')
+
+
+def _clean(symbol):
+    symbol = (symbol or '').upper()
+    return symbol[:-4] if symbol.endswith('USDT') else symbol
+
+
+def _price(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def _load_settings():
+    try:
+        from bot_engine.config_loader import SystemConfig
+    except Exception:
+        SystemConfig = None
+    return {
+        'hysteresis_ticks': float(getattr(SystemConfig, 'TRADING_STOP_HYSTERESIS_TICKS', DEFAULT_HYSTERESIS_TICKS)),
+        'max_attempts': int(getattr(SystemConfig, 'TRADING_STOP_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)),
+        'retry_delay': float(getattr(SystemConfig, 'TRADING_STOP_RETRY_DELAY', DEFAULT_RETRY_DELAY)),
+    }
+
+
+def round_to_tick(price, tick, mode='nearest'):
+    """Цена, кратная tick (mode: nearest / down / up)"""
+    if not tick:
+        return price
+    steps = price / tick
+    if mode == 'down':
+        steps = math.floor(steps + 1e-9)
+    elif mode == 'up':
+        steps = math.ceil(steps - 1e-9)
+    else:
+        steps = round(steps)
+    decimals = max(0, -int(math.floor(math.log10(tick)))) if tick < 1 else 0
+    return round(steps * tick, decimals + 2)
+
+
+class TradingStopReconciler:
+    """Подтверждённые SL/TP по позициям и очередь изменений к бирже"""
+
+    def __init__(self, exchange, hysteresis_ticks=None, max_attempts=None, retry_delay=None):
+        settings = _load_settings()
+        self.exchange = exchange
+        self.hysteresis_ticks = settings['hysteresis_ticks'] if hysteresis_ticks is None else float(hysteresis_ticks)
+        self.max_attempts = settings['max_attempts'] if max_attempts is None else int(max_attempts)
+        self.retry_delay = settings['retry_delay'] if retry_delay is None else float(retry_delay)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._acked = {}    # (symbol, side) -> {'stop_loss': цена, 'take_profit': цена}
+        self._pending = {}  # (symbol, side) -> {'stop_loss', 'take_profit', 'attempts', 'next_at', 'missing'}
+        self._ticks = {}
+        self._submitted = 0
+        self._skipped = 0
+        self._requests = 0
+        self._failures = 0
+
+    # ==================== ПОДТВЕРЖДЁННОЕ СОСТОЯНИЕ ====================
+
+    def observe(self, symbol, side, stop_loss=None, take_profit=None):
+        """SL/TP позиции по данным биржи (снимок позиций): пустое значение — на бирже нет"""
+        with self._lock:
+            self._acked[(_clean(symbol), (side or '').upper())] = {
+                'stop_loss': _price(stop_loss),
+                'take_profit': _price(take_profit),
+            }
+
+    def acknowledge(self, symbol, side, stop_loss=None, take_profit=None):
+        """Биржа приняла наш SL и/или TP (None — поле не менялось)"""
+        key = (_clean(symbol), (side or '').upper())
+        with self._lock:
+            acked = self._acked.setdefault(key, {'stop_loss': None, 'take_profit': None})
+            pending = self._pending.get(key)
+            for field, value in (('stop_loss', stop_loss), ('take_profit', take_profit)):
+                value = _price(value)
+                if value is None:
+                    continue
+                acked[field] = value
+                if pending and pending.get(field) is not None and abs(pending[field] - value) < 1e-12:
+                    pending[field] = None
+            if pending and pending['stop_loss'] is None and pending['take_profit'] is None:
+                del self._pending[key]
+
+    def forget(self, symbol, side=None):
+        """Позиция закрыта: забываем подтверждённые значения и ожидающие изменения"""
+        symbol = _clean(symbol)
+        with self._lock:
+            for store in (self._acked, self._pending):
+                for key in [k for k in store if k[0] == symbol and (side is None or k[1] == side.upper())]:
+                    del store[key]
+
+    def acknowledged(self, symbol, side):
+        with self._lock:
+            return dict(self._acked.get((_clean(symbol), (side or '').upper()), {}))
+
+    # ==================== РАЗНИЦА ====================
+
+    def tick_size(self, symbol):
+        symbol = _clean(symbol)
+        tick = self._ticks.get(symbol)
+        if tick is None:
+            try:
+                info = self.exchange.get_instruments_info(f"{symbol}USDT") or {}
+                tick = _price(info.get('tickSize')) or 0.0
+            except Exception:
+                tick = 0.0
+            self._ticks[symbol] = tick
+        return tick or None
+
+    def _round(self, field, side, price, tick):
+        if field == 'stop_loss':
+            # Стоп округляем от цены, чтобы округление не подвинуло его к текущей цене
+            return round_to_tick(price, tick, 'down' if side == 'LONG' else 'up')
+        return round_to_tick(price, tick)
+
+    def needs_change(self, side, desired, acked, tick=None):
+        """Нужно ли менять ордер: сдвиг в сторону подтягивания не меньше гистерезиса (в шагах цены)"""
+        if desired is None:
+            return False
+        if acked is None:
+            return True
+        tolerance = max(tick * (self.hysteresis_ticks - 1e-6), _FALLBACK_TOLERANCE) if tick else _FALLBACK_TOLERANCE
+        if (side or '').upper() == 'LONG':
+            return desired > acked + tolerance
+        return desired < acked - tolerance
+
+    def submit(self, symbol, side, stop_loss=None, take_profit=None):
+        """
+        Ставит в очередь нужные SL/TP позиции (None — поле не трогаем).
+
+        Returns:
+            bool: есть ли для позиции изменения к отправке
+        """
+        symbol = _clean(symbol)
+        side = (side or '').upper()
+        key = (symbol, side)
+        desired = {'stop_loss': _price(stop_loss), 'take_profit': _price(take_profit)}
+        tick = self.tick_size(symbol) if any(desired.values()) else None
+        with self._lock:
+            acked = self._acked.get(key, {})
+            changes = {}
+            for field in _FIELDS:
+                if desired[field] is None:
+                    continue
+                price = self._round(field, side, desired[field], tick)
+                if self.needs_change(side, price, acked.get(field), tick):
+                    changes[field] = price
+            pending = self._pending.get(key)
+            if not changes:
+                self._skipped += 1
+                return pending is not None
+            if pending is None:
+                pending = {'stop_loss': None, 'take_profit': None, 'attempts': 0, 'next_at': 0.0}
+                self._pending[key] = pending
+            elif all(pending.get(field) == price for field, price in changes.items()):
+                return True  # то же изменение уже ждёт отправки
+            pending.update(changes)
+            pending['missing'] = acked.get('stop_loss') is None and pending['stop_loss'] is not None
+            pending['shift'] = max(
+                (abs(price - (acked.get(field) or price)) / tick if tick else 0.0)
+                for field, price in changes.items()
+            )
+            self._submitted += 1
+            return True
+
+    # ==================== ОТПРАВКА ====================
+
+    def _send(self, symbol, side, stop_loss, take_profit):
+        """Один запрос на SL и TP позиции (если биржа умеет), иначе — по запросу на поле"""
+        self._requests += 1
+        combined = getattr(self.exchange, 'update_trading_stop', None)
+        if callable(combined):
+            return combined(symbol, stop_loss_price=stop_loss, take_profit_price=take_profit, position_side=side)
+        result = {'success': True}
+        if stop_loss is not None:
+            response = self.exchange.update_stop_loss(symbol, stop_loss, side) or {}
+            if not response.get('success'):
+                return response
+            result['stop_loss'] = stop_loss
+        if take_profit is not None:
+            if stop_loss is not None:
+                self._requests += 1
+            response = self.exchange.update_take_profit(symbol, take_profit, side) or {}
+            if not response.get('success'):
+                return dict(response, stop_loss=result.get('stop_loss'))
+            result['take_profit'] = take_profit
+        return result
+
+    def _budget_exhausted(self):
+        scheduler = getattr(self.exchange, 'request_scheduler', None)
+        if scheduler is None:
+            return False
+        try:
+            from exchanges.request_scheduler import PRIORITY_POSITION
+            # Уступаем, если токенов не осталось даже для синхронизации позиций
+            return scheduler.should_yield(PRIORITY_POSITION)
+        except Exception:
+            return False
+
+    def flush(self):
+        """
+        Отправляет ожидающие изменения.
+
+        Returns:
+            dict: (symbol, side) -> {'stop_loss': цена|None, 'take_profit': цена|None,
+                  'zero_position': bool, 'failed': bool, 'deferred': bool}
+        """
+        results = {}
+        with self._flush_lock:
+            now = time.monotonic()
+            with self._lock:
+                due = sorted(
+                    ((key, dict(item)) for key, item in self._pending.items() if item['next_at'] <= now),
+                    key=lambda entry: (not entry[1].get('missing'), -entry[1].get('shift', 0.0)),
+                )
+            for index, (key, item) in enumerate(due):
+                if index and self._budget_exhausted():
+                    for deferred_key, _ in due[index:]:
+                        results[deferred_key] = {'stop_loss': None, 'take_profit': None, 'deferred': True}
+                    logger.info(f" ⏳ Бюджет запросов исчерпан: {len(due) - index} изменений SL/TP отложено")
+                    break
+                results[key] = self._apply(key, item)
+        return results
+
+    def _apply(self, key, item):
+        symbol, side = key
+        stop_loss, take_profit = item['stop_loss'], item['take_profit']
+        result = {'stop_loss': None, 'take_profit': None, 'zero_position': False, 'failed': False}
+        try:
+            response = self._send(symbol, side, stop_loss, take_profit) or {}
+        except Exception as e:
+            response = {'success': False, 'message': str(e)}
+
+        if response.get('zero_position'):
+            self.forget(symbol, side)
+            result['zero_position'] = True
+            return result
+
+        if response.get('success'):
+            applied_sl = response.get('stop_loss', stop_loss)
+            applied_tp = response.get('take_profit', take_profit)
+            self.acknowledge(symbol, side, stop_loss=applied_sl, take_profit=applied_tp)
+            with self._lock:
+                pending = self._pending.get(key)
+                # Пока шёл запрос, могло прийти новое значение — его не трогаем
+                if pending is not None and pending['stop_loss'] == stop_loss and pending['take_profit'] == take_profit:
+                    del self._pending[key]
+            result['stop_loss'] = _price(applied_sl)
+            result['take_profit'] = _price(applied_tp)
+            return result
+
+        if response.get('stop_loss') is not None:
+            self.acknowledge(symbol, side, stop_loss=response['stop_loss'])
+            result['stop_loss'] = response['stop_loss']
+        result['failed'] = True
+        result['message'] = response.get('message')
+        with self._lock:
+            self._failures += 1
+            pending = self._pending.get(key)
+            if pending is None:
+                return result
+            pending['attempts'] += 1
+            if pending['attempts'] >= self.max_attempts:
+                del self._pending[key]
+                logger.error(f" ❌ {symbol} {side}: SL/TP не обновлены после {self.max_attempts} попыток: {response.get('message')}")
+            else:
+                pending['next_at'] = time.monotonic() + self.retry_delay * (2 ** (pending['attempts'] - 1))
+        return result
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'positions': len(self._acked),
+                'pending': len(self._pending),
+                'submitted': self._submitted,
+                'skipped': self._skipped,
+                'requests': self._requests,
+                'failures': self._failures,
+            }
+
+
+def get_trading_stop_reconciler(exchange):
+    """Reconciler биржи (BybitExchange создаёт свой; для остальных — по требованию)"""
+    reconciler = getattr(exchange, 'trading_stops', None)
+    if reconciler is None:
+        reconciler = TradingStopReconciler(exchange)
+        try:
+            exchange.trading_stops = reconciler
+        except Exception:
+            pass
+    return reconciler
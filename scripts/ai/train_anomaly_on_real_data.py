@@ -6,6 +6,7 @@
 
 import sys
 from pathlib import Path
+from typing import Optional
 
 # Добавляем корневую директорию проекта в путь (устойчиво к запуску из любого cwd)
 project_root = Path(__file__).parent.parent.parent
@@ -98,34 +99,14 @@ def load_historical_data(timeframe: str = '6h', window_size: int = 50, step: int
     return training_data
 
 
-def train_on_real_data():
-    """Обучает Anomaly Detector на реальных данных"""
-    
-    print("=" * 60)
-    print("TRAINING ANOMALY DETECTOR ON REAL DATA")
-    print("=" * 60)
-    print()
-    
-    # Загружаем данные
-    print("Step 1/4: Loading historical data...")
-    print("-" * 60)
-    training_data = load_historical_data(timeframe='6h')
-    
-    if not training_data:
-        print("[ERROR] No training data found!")
-        print()
-        print("Please run first:")
-        print("  python scripts/ai/collect_historical_data.py --limit 20")
-        return
-    
-    # Подсчитываем общее количество свечей
-    total_candles = sum(len(candles) for candles in training_data)
-    
-    print()
-    print(f"[OK] Loaded {len(training_data)} training examples")
-    print(f"[OK] Total candles: {total_candles:,}")
-    print()
+def train_and_save(training_data) -> Optional[AnomalyDetector]:
+    """
+    Обучает Anomaly Detector на подготовленных окнах свечей и сохраняет модель
+    в пути из AIConfig. Используется скриптом и процессом обучения (training_worker).
     
+    Returns:
+        Обученный детектор или None при ошибке
+    """
     # Создаем детектор
     print("Step 2/4: Creating detector...")
     print("-" * 60)
@@ -149,7 +130,7 @@ def train_on_real_data():
     
     if not success:
         print("[ERROR] Training failed!")
-        return
+        return None
     
     print()
     print(f"[OK] Training completed in {train_time:.1f} seconds")
@@ -173,9 +154,44 @@ def train_on_real_data():
         print(f"[OK] Scaler saved: {scaler_path} ({scaler_size:.1f} KB)")
     else:
         print("[ERROR] Failed to save files!")
+        return None
+    
+    print()
+    
+    return detector
+
+
+def train_on_real_data():
+    """Обучает Anomaly Detector на реальных данных"""
+    
+    print("=" * 60)
+    print("TRAINING ANOMALY DETECTOR ON REAL DATA")
+    print("=" * 60)
+    print()
+    
+    # Загружаем данные
+    print("Step 1/4: Loading historical data...")
+    print("-" * 60)
+    training_data = load_historical_data(timeframe='6h')
+    
+    if not training_data:
+        print("[ERROR] No training data found!")
+        print()
+        print("Please run first:")
+        print("  python scripts/ai/collect_historical_data.py --limit 20")
         return
     
+    # Подсчитываем общее количество свечей
+    total_candles = sum(len(candles) for candles in training_data)
+    
     print()
+    print(f"[OK] Loaded {len(training_data)} training examples")
+    print(f"[OK] Total candles: {total_candles:,}")
+    print()
+    
+    detector = train_and_save(training_data)
+    if detector is None:
+        return
     
     # Тестирование на реальных данных
     print("Testing model...")
@@ -351,6 +351,46 @@ def load_all_historical_data(
     return all_training_data
 
 
+def train_and_save(training_data, epochs: int = 50, batch_size: int = 32) -> dict:
+    """
+    Обучает новый LSTM предиктор на подготовленных данных и атомарно заменяет
+    файлы модели (через временные *_new). Используется скриптом и процессом
+    обучения (training_worker).
+    
+    Returns:
+        Результат LSTMPredictor.train()
+    """
+    # Создаем новый предиктор БЕЗ загрузки существующей модели
+    predictor = LSTMPredictor(
+        model_path="data/ai/models/lstm_predictor_new.keras",  # ✅ Временный путь в Keras 3 формате
+        scaler_path="data/ai/models/lstm_scaler_new.pkl"
+    )
+    
+    # Обучаем модель (она сама нормализует данные внутри)
+    print("\nTraining neural network...")
+    print(f"Training samples: {len(training_data)}")
+    
+    result = predictor.train(
+        training_data=training_data,  # Передаем ненормализованные данные
+        validation_split=0.2,
+        epochs=epochs,
+        batch_size=batch_size
+    )
+    
+    # Переименовываем модель в финальную версию
+    if result.get('success'):
+        import shutil
+        final_model = "data/ai/models/lstm_predictor.keras"  # ✅ Keras 3 формат
+        final_scaler = "data/ai/models/lstm_scaler.pkl"
+        
+        if os.path.exists("data/ai/models/lstm_predictor_new.keras"):
+            shutil.move("data/ai/models/lstm_predictor_new.keras", final_model)
+        if os.path.exists("data/ai/models/lstm_scaler_new.pkl"):
+            shutil.move("data/ai/models/lstm_scaler_new.pkl", final_scaler)
+    
+    return result
+
+
 def main():
     """Основная функция обучения"""
     default_batch = 32
@@ -417,33 +457,7 @@ def main():
     print("STARTING TRAINING")
     print("=" * 60)
     
-    # Создаем новый предиктор БЕЗ загрузки существующей модели
-    predictor = LSTMPredictor(
-        model_path="data/ai/models/lstm_predictor_new.keras",  # ✅ Временный путь в Keras 3 формате
-        scaler_path="data/ai/models/lstm_scaler_new.pkl"
-    )
-    
-    # Обучаем модель (она сама нормализует данные внутри)
-    print("\nTraining neural network...")
-    print(f"Training samples: {len(training_data)}")
-    
-    result = predictor.train(
-        training_data=training_data,  # Передаем ненормализованные данные
-        validation_split=0.2,
-        epochs=args.epochs,
-        batch_size=args.batch_size
-    )
-    
-    # Переименовываем модель в финальную версию
-    if result.get('success'):
-        import shutil
-        final_model = "data/ai/models/lstm_predictor.keras"  # ✅ Keras 3 формат
-        final_scaler = "data/ai/models/lstm_scaler.pkl"
-        
-        if os.path.exists("data/ai/models/lstm_predictor_new.keras"):
-            shutil.move("data/ai/models/lstm_predictor_new.keras", final_model)
-        if os.path.exists("data/ai/models/lstm_scaler_new.pkl"):
-            shutil.move("data/ai/models/lstm_scaler_new.pkl", final_scaler)
+    result = train_and_save(training_data, epochs=args.epochs, batch_size=args.batch_size)
     
     # Выводим результаты
     print("\n" + "=" * 60)
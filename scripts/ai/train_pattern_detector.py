@@ -382,6 +382,27 @@ def load_all_historical_data(
     return all_training_data
 
 
+def train_and_save(training_data) -> dict:
+    """
+    Обучает Pattern Detector на подготовленных данных (модель сохраняется в
+    PatternDetector.train). Используется скриптом и процессом обучения (training_worker).
+    
+    Returns:
+        Результат PatternDetector.train()
+    """
+    detector = PatternDetector()
+    
+    print("\nTraining pattern recognition model...")
+    print(f"Training samples: {len(training_data)}")
+    
+    result = detector.train(
+        training_data=training_data,
+        validation_split=0.2
+    )
+    
+    return result
+
+
 def main():
     """Основная функция обучения"""
     parser = argparse.ArgumentParser(description='Обучение Pattern Detector')
@@ -413,15 +434,7 @@ def main():
     print("STARTING TRAINING")
     print("=" * 60)
     
-    detector = PatternDetector()
-    
-    print("\nTraining pattern recognition model...")
-    print(f"Training samples: {len(training_data)}")
-    
-    result = detector.train(
-        training_data=training_data,
-        validation_split=0.2
-    )
+    result = train_and_save(training_data)
     
     # Выводим результаты
     print("\n" + "=" * 60)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Инкрементальная запись свечей в AIDatabase: пишутся только свечи новее водяного
+знака (последняя обновляется на месте), более старые только дописываются в пропуски,
+обрезка старых строк и групповое чтение.
+"""
+
+from bot_engine.ai.ai_database import AIDatabase
+
+
+def _candles(start, count, close=1.0):
+    return [
+        {'time': (start + i) * 1000, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': close, 'volume': 10.0}
+        for i in range(count)
+    ]
+
+
+def test_incremental_save_updates_last_candle(tmp_path):
+    db = AIDatabase(str(tmp_path / 'ai_data.db'))
+    assert db.save_candles('AAAUSDT', _candles(0, 10)) == 10
+
+    # Повторная загрузка того же окна + одна новая свеча: записываются только последняя и новая
+    refreshed = _candles(0, 11, close=3.0)
+    assert db.save_candles('AAAUSDT', refreshed) == 2
+
+    candles = db.get_candles('AAAUSDT')
+    assert len(candles) == 11
+    assert candles[8]['close'] == 1.0
+    assert candles[9]['close'] == 3.0
+    assert candles[10]['close'] == 3.0
+
+    saved = db.save_candles_batch({'AAAUSDT': _candles(10, 2), 'BBBUSDT': _candles(0, 3), 'CCCUSDT': []})
+    assert saved == {'AAAUSDT': 2, 'BBBUSDT': 3, 'CCCUSDT': 0}
+
+
+def test_backfill_older_than_watermark_inserts_missing_only(tmp_path):
+    db = AIDatabase(str(tmp_path / 'ai_data.db'))
+    db.save_candles('AAAUSDT', _candles(5, 5))
+
+    # Дозагрузка истории: свечи 0..4 отсутствуют, 5..9 уже есть (не переписываются)
+    assert db.save_candles('AAAUSDT', _candles(0, 10, close=2.0)) == 5 + 1
+    candles = db.get_candles('AAAUSDT')
+    assert [c['time'] for c in candles] == [i * 1000 for i in range(10)]
+    assert [c['close'] for c in candles] == [2.0] * 5 + [1.0] * 4 + [2.0]
+
+
+def test_trim_and_bulk_read(tmp_path):
+    db = AIDatabase(str(tmp_path / 'ai_data.db'))
+    db.save_candles_batch({'AAAUSDT': _candles(0, 30), 'BBBUSDT': _candles(0, 5), 'CCCUSDT': _candles(0, 7)})
+
+    assert db.trim_candles_history(max_candles_per_symbol=20, batch_size=4) == 10
+    assert db.count_candles('AAAUSDT') == 20
+    assert db.count_candles('BBBUSDT') == 5
+
+    tails = db.get_all_candles_dict(max_symbols=2, max_candles_per_symbol=4)
+    assert list(tails) == ['AAAUSDT', 'BBBUSDT']
+    assert [c['time'] for c in tails['AAAUSDT']] == [26000, 27000, 28000, 29000]
+    assert len(db.get_all_candles_dict(max_symbols=0)['CCCUSDT']) == 7
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Потоковое чтение обучающей выборки из AIDatabase: пачки не превышают
+chunk_size и в сумме дают те же сделки, что и списочные методы; источники
+читаются страницами по id, соединение с БД не удерживается между пачками.
+"""
+
+import contextlib
+
+from bot_engine.ai.ai_database import AIDatabase
+
+
+def _make_trades(count):
+    trades = []
+    for i in range(count):
+        pnl = 1.5 if i % 3 else -2.0
+        trades.append({
+            'symbol': 'AAAUSDT' if i % 2 else 'BBBUSDT',
+            'direction': 'LONG' if i % 2 else 'SHORT',
+            'entry_price': 100.0 + i,
+            'exit_price': 101.0 + i,
+            'entry_time': f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}",
+            'exit_time': f"2026-01-02T00:{i // 60:02d}:{i % 60:02d}",
+            'entry_rsi': 25.0,
+            'entry_trend': 'UP',
+            'entry_volatility': 0.5,
+            'entry_volume_ratio': 1.2,
+            'pnl': pnl,
+            'pnl_pct': pnl,
+            'is_successful': pnl > 0,
+            'exit_reason': 'TAKE_PROFIT',
+            'rsi_params': {'oversold': 29, 'overbought': 71},
+            'risk_params': {'max_loss_percent': 15.0},
+        })
+    return trades
+
+
+def test_iter_simulated_trades_matches_list(tmp_path):
+    db = AIDatabase(str(tmp_path / 'ai_data.db'))
+    assert db.save_simulated_trades(_make_trades(23)) == 23
+
+    chunks = list(db.iter_simulated_trades(chunk_size=5))
+    assert [len(c) for c in chunks] == [5, 5, 5, 5, 3]
+
+    streamed = [t for chunk in chunks for t in chunk]
+    listed = db.get_simulated_trades()
+    assert [t['id'] for t in streamed] == [t['id'] for t in listed]
+    assert streamed[0]['rsi_params']['oversold'] == 29
+    assert streamed[0]['risk_params']['max_loss_percent'] == 15.0
+
+
+def test_iter_trades_for_training_chunks(tmp_path):
+    db = AIDatabase(str(tmp_path / 'ai_data.db'))
+    db.save_simulated_trades(_make_trades(12))
+
+    chunks = list(db.iter_trades_for_training(include_real=False, include_exchange=False, chunk_size=4))
+    assert [len(c) for c in chunks] == [4, 4, 4]
+    assert all(t['source'] == 'SIMULATED' for chunk in chunks for t in chunk)
+
+    listed = db.get_trades_for_training(include_real=False, include_exchange=False, min_trades=0)
+    assert sorted(t['timestamp'] for chunk in chunks for t in chunk) == sorted(t['timestamp'] for t in listed)
+
+
+class FakeBotsDatabase:
+    def __init__(self, trades):
+        self.trades = trades
+        self.calls = []
+
+    def get_bot_trades_history(self, status=None, after_id=None, limit=None, **kwargs):
+        self.calls.append((after_id, limit))
+        return [t for t in self.trades if t['id'] > after_id][:limit]
+
+
+def test_iter_trades_for_training_pages_without_open_connection(tmp_path, monkeypatch):
+    db = AIDatabase(str(tmp_path / 'ai_data.db'))
+    db.save_simulated_trades(_make_trades(7))
+    history = [{'id': i, 'symbol': 'CCCUSDT', 'pnl': 1.0, 'is_simulated': i % 4 == 0, 'entry_rsi': 30.0}
+               for i in range(1, 11)]
+    bots_db = FakeBotsDatabase(history)
+    monkeypatch.setattr('bot_engine.bots_database.get_bots_database', lambda: bots_db)
+
+    open_connections = []
+    original = db._get_connection
+
+    @contextlib.contextmanager
+    def tracked(*args, **kwargs):
+        with original(*args, **kwargs) as conn:
+            open_connections.append(conn)
+            try:
+                yield conn
+            finally:
+                open_connections.remove(conn)
+
+    monkeypatch.setattr(db, '_get_connection', tracked)
+    chunks = []
+    for chunk in db.iter_trades_for_training(include_exchange=False, chunk_size=3):
+        assert open_connections == []
+        chunks.append(chunk)
+
+    simulated = [t for c in chunks for t in c if t['source'] == 'SIMULATED']
+    assert len(simulated) == 7 and 'id' not in simulated[0]
+    assert len([t for c in chunks for t in c if t['source'] == 'BOTS_HISTORY']) == 8
+    assert bots_db.calls == [(0, 3), (3, 3), (6, 3), (9, 3)]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ai_inference.predict_signals: одна матрица признаков на раунд даёт те же результаты,
+что predict_signal по одной строке; после неё predict_signal модель не вызывает.
+"""
+
+import os
+import random
+import tempfile
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from bot_engine.ai import ai_inference
+
+
+def _load_trained_models(monkeypatch):
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(400, 7))
+    labels = (features[:, 0] + features[:, 5] > 0).astype(int)
+    scaler = StandardScaler().fit(features)
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(scaler.transform(features), labels)
+    models_dir = tempfile.mkdtemp()
+    joblib.dump(model, os.path.join(models_dir, 'signal_predictor.pkl'))
+    joblib.dump(scaler, os.path.join(models_dir, 'scaler.pkl'))
+    monkeypatch.setattr(ai_inference, '_models_dir', models_dir)
+    monkeypatch.setattr(ai_inference, '_signal_predictor', None)
+    monkeypatch.setattr(ai_inference, '_scaler', None)
+    monkeypatch.setattr(ai_inference, '_expected_features', None)
+    assert ai_inference._load_models()
+
+
+def _batch(count):
+    rng = random.Random(1)
+    return {
+        f'C{i}': {
+            'rsi': rng.uniform(10, 90),
+            'trend': rng.choice(['UP', 'DOWN', 'NEUTRAL']),
+            'price': rng.choice([0, rng.uniform(0.001, 70000)]),
+            'direction': rng.choice(['LONG', 'SHORT']),
+        }
+        for i in range(count)
+    }
+
+
+def test_batch_matches_single_row_predictions(monkeypatch):
+    _load_trained_models(monkeypatch)
+    batch = _batch(200)
+    expected = {symbol: ai_inference.predict_signal(symbol, md) for symbol, md in batch.items()}
+    results = ai_inference.predict_signals(batch)
+    assert set(results) == set(batch)
+    for symbol, result in results.items():
+        assert result['signal'] == expected[symbol]['signal']
+        assert abs(result['confidence'] - expected[symbol]['confidence']) < 1e-9
+
+
+def test_single_prediction_reuses_round_batch(monkeypatch):
+    _load_trained_models(monkeypatch)
+    batch = _batch(20)
+    results = ai_inference.predict_signals(batch)
+
+    calls = []
+    predictor = ai_inference._signal_predictor
+    original = predictor.predict_proba
+    monkeypatch.setattr(predictor, 'predict_proba', lambda x: calls.append(len(x)) or original(x))
+
+    for symbol, md in batch.items():
+        assert ai_inference.predict_signal(symbol, dict(md)) == results[symbol]
+    assert calls == []
+    # Другие признаки — обычный расчёт
+    ai_inference.predict_signal('C0', dict(batch['C0'], rsi=55.5))
+    assert calls == [1]
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Мониторинг предсказаний: кольцевой буфер не растёт сверх max_records,
+результат сопоставляется с последним неразрешённым предсказанием символа, дневные
+агрегаты совпадают с пересчётом и восстанавливаются после перезапуска.
+"""
+
+from datetime import datetime
+
+from bot_engine.ai.drift_detector import ModelPerformanceMonitor
+from bot_engine.ai.monitoring import AIPerformanceMonitor
+
+
+def test_ring_buffer_and_daily_rollups(tmp_path):
+    monitor = AIPerformanceMonitor(max_records=5, save_path=str(tmp_path))
+    for i in range(8):
+        monitor.track_prediction('AAAUSDT', {'direction': 1, 'change_percent': 1.0, 'confidence': 60 + i}, model='lstm')
+    records = monitor.predictions
+    assert len(records) == 5
+    assert [r.confidence for r in records] == [63, 64, 65, 66, 67]
+
+    # Результат сопоставляется с самым новым неразрешённым предсказанием символа:
+    # второй результат достаётся следующему по новизне
+    monitor.track_actual_result('AAAUSDT', 1, 3.0)
+    monitor.track_actual_result('AAAUSDT', -1, -1.0)
+    monitor.track_prediction('BBBUSDT', {'direction': -1, 'change_percent': -2.0, 'confidence': 80}, model='pattern')
+    monitor.track_actual_result('BBBUSDT', 1, 1.0)
+    monitor.track_actual_result('CCCUSDT', 1, 1.0)
+
+    resolved = [r for r in monitor.predictions if r.is_correct is not None]
+    assert [(r.symbol, r.confidence, r.is_correct) for r in resolved] == [
+        ('AAAUSDT', 66, False), ('AAAUSDT', 67, True), ('BBBUSDT', 80, False)
+    ]
+
+    metrics = monitor.get_daily_metrics()
+    assert metrics['total_predictions'] == 3
+    assert abs(metrics['direction_accuracy'] - 1 / 3) < 1e-6
+    assert abs(metrics['avg_confidence'] - 71.0) < 1e-6
+    assert abs(metrics['mae'] - 7 / 3) < 1e-6
+    assert metrics['by_model'] == {'lstm': {'total': 2, 'accuracy': 0.5}, 'pattern': {'total': 1, 'accuracy': 0.0}}
+
+    restored = AIPerformanceMonitor(max_records=5, save_path=str(tmp_path))
+    assert restored.get_daily_metrics() == metrics
+    assert restored.get_daily_metrics(datetime(2000, 1, 1).strftime('%Y-%m-%d'))['total_predictions'] == 0
+
+
+def test_model_performance_monitor_window():
+    monitor = ModelPerformanceMonitor(window_size=20)
+    for i in range(30):
+        direction = 1 if i % 2 else -1
+        monitor.log_prediction({'direction': direction, 'change_percent': 1.0, 'confidence': 0.5})
+        monitor.log_actual_result({'direction': direction if i >= 10 else -direction, 'change_percent': 2.0})
+
+    assert len(monitor.predictions) == 20
+    metrics = monitor.get_metrics()
+    assert metrics.total_predictions == 20
+    assert metrics.direction_accuracy == 1.0
+    assert metrics.mae == 1.0
+    assert metrics.calibration_error == 0.5
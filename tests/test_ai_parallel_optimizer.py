@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверяет упаковку свечей в shared memory для параллельного оптимизатора:
+каждая монета восстанавливается из общей матрицы без потерь и в порядке времени;
+обучение на истории отдаёт оптимизатору все доступные монеты;
+воркер пула ограничивает уже загруженный BLAS одним потоком.
+"""
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from bot_engine.ai import parallel_optimizer
+from bot_engine.ai.parallel_optimizer import SharedCandleStore, candles_from_matrix
+
+
+class TestSharedCandleStore(unittest.TestCase):
+    """Round-trip свечей через SharedCandleStore."""
+
+    def test_round_trip_per_symbol(self):
+        candles_by_symbol = {
+            'AAAUSDT': [
+                {'time': 3000, 'open': 1.0, 'high': 1.5, 'low': 0.9, 'close': 1.2, 'volume': 10.0},
+                {'time': 1000, 'open': 0.8, 'high': 1.1, 'low': 0.7, 'close': 1.0, 'volume': 5.0},
+            ],
+            'BBBUSDT': [
+                {'time': 2000, 'open': 50.0, 'high': 55.0, 'low': 49.0, 'close': 54.0, 'volume': 1.0},
+            ],
+            'EMPTYUSDT': [],
+        }
+        store = SharedCandleStore(candles_by_symbol)
+        try:
+            self.assertNotIn('EMPTYUSDT', store.index)
+            matrix = np.ndarray(store.shape, dtype=np.float64, buffer=store._shm.buf)
+
+            restored = candles_from_matrix(matrix, *store.index['AAAUSDT'])
+            self.assertEqual([c['time'] for c in restored], [1000, 3000])
+            self.assertEqual(restored[1]['close'], 1.2)
+
+            restored = candles_from_matrix(matrix, *store.index['BBBUSDT'])
+            self.assertEqual(len(restored), 1)
+            self.assertEqual(restored[0]['high'], 55.0)
+            del matrix
+        finally:
+            store.close()
+
+
+class TestOptimizeBeforeTraining(unittest.TestCase):
+    """AITrainer передаёт в параллельный оптимизатор всю вселенную монет, без ограничения."""
+
+    def test_all_available_symbols_optimized(self):
+        from bot_engine.ai.ai_strategy_optimizer import AIStrategyOptimizer
+        from bot_engine.ai.ai_trainer import AITrainer
+
+        candle = {'time': 0, 'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 1.0}
+        candles_data = {f'C{i}USDT': {'candles': [candle] * 120} for i in range(12)}
+        candles_data['SHORTUSDT'] = {'candles': [candle] * 10}
+        available = [s for s in candles_data if s != 'C0USDT']
+
+        with mock.patch.object(AIStrategyOptimizer, '__init__', return_value=None), \
+                mock.patch.object(AIStrategyOptimizer, 'optimize_symbols_parallel', return_value={}) as parallel:
+            AITrainer._optimize_symbols_before_training(object.__new__(AITrainer), candles_data, available)
+
+        passed = parallel.call_args[0][0]
+        self.assertEqual(sorted(passed), sorted(f'C{i}USDT' for i in range(1, 12)))
+
+
+class TestPoolWorkerThreads(unittest.TestCase):
+    """Инициализатор воркера ограничивает потоки BLAS, загруженного до него."""
+
+    def test_blas_limited_after_numpy_import(self):
+        from threadpoolctl import threadpool_info
+
+        if not threadpool_info():
+            self.skipTest('нет нативных пулов потоков')
+        with mock.patch.object(parallel_optimizer, '_init_worker') as init_worker, \
+                mock.patch.dict('os.environ'):
+            parallel_optimizer._init_pool_worker('segment', (0, 6), {}, False)
+        limits = parallel_optimizer._worker_state.pop('thread_limits')
+        try:
+            init_worker.assert_called_once_with('segment', (0, 6), {}, False)
+            self.assertTrue(all(pool['num_threads'] == 1 for pool in threadpool_info()))
+        finally:
+            limits.restore_original_limits()
+
+
+if __name__ == '__main__':
+    unittest.main()
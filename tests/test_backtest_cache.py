@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверяет кэш результатов бэктестов: стабильность ключа, LRU-вытеснение
+в памяти и чтение с диска новым экземпляром; ключ оптимизатора строится по
+эффективным параметрам (SL/TP по умолчанию из конфига).
+"""
+
+import numpy as np
+
+from bot_engine.ai.backtest_cache import BacktestResultCache, fingerprint_candles, hash_params
+
+
+CANDLES = [
+    {'time': 1000 * i, 'open': 1.0 + i, 'high': 2.0 + i, 'low': 0.5, 'close': 1.5 + i, 'volume': 10.0}
+    for i in range(20)
+]
+
+
+def test_params_hash_ignores_key_order_numpy_and_volatile_fields():
+    a = {'rsi_long_threshold': 29, 'max_loss_percent': 8.0, 'optimized_at': '2025-01-01'}
+    b = {'max_loss_percent': np.float64(8.0), 'rsi_long_threshold': np.int64(29)}
+    assert hash_params(a) == hash_params(b)
+    assert hash_params(a) != hash_params({**b, 'max_loss_percent': 9.0})
+
+
+def test_candle_fingerprint_changes_with_data():
+    changed = [dict(c) for c in CANDLES]
+    changed[-1]['close'] += 0.01
+    assert fingerprint_candles(CANDLES) == fingerprint_candles([dict(c) for c in CANDLES])
+    assert fingerprint_candles(CANDLES) != fingerprint_candles(changed)
+
+
+def test_lru_eviction_and_disk_persistence(tmp_path):
+    db_path = str(tmp_path / 'backtest_cache.db')
+    cache = BacktestResultCache(db_path=db_path, max_entries=2)
+    fp = fingerprint_candles(CANDLES)
+    keys = [cache.make_key({'p': i}, 'BTCUSDT', '6h', fp) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, [{'pnl_pct': float(i)}])
+
+    assert keys[0] not in cache._memory  # вытеснен из памяти
+    cache.flush()
+
+    reopened = BacktestResultCache(db_path=db_path, max_entries=2)
+    assert reopened.get(keys[0]) == [{'pnl_pct': 0.0}]
+    assert reopened.get(cache.make_key({'p': 99}, 'BTCUSDT', '6h', fp)) is None
+    assert reopened.stats()['hits'] == 1
+
+
+def test_optimizer_key_follows_config_defaults(monkeypatch):
+    from bot_engine import config_loader
+    from bot_engine.ai.ai_strategy_optimizer import AIStrategyOptimizer
+
+    params = {'rsi_long_threshold': 29, 'rsi_short_threshold': 71}
+    monkeypatch.setitem(config_loader.DEFAULT_AUTO_BOT_CONFIG, 'max_loss_percent', 8.0)
+    before = hash_params(AIStrategyOptimizer._resolve_simulation_params(params))
+    assert before == hash_params(AIStrategyOptimizer._resolve_simulation_params({**params, 'max_loss_percent': 8.0}))
+
+    monkeypatch.setitem(config_loader.DEFAULT_AUTO_BOT_CONFIG, 'max_loss_percent', 12.0)
+    assert hash_params(AIStrategyOptimizer._resolve_simulation_params(params)) != before
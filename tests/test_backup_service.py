@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бэкапы БД через online backup API: первый бэкап полный, следующие — разностные
+относительно него, и оба разворачиваются в копию с теми же данными.
+Сервис бэкапов AIDatabase создаётся один раз и берёт директорию из DATABASE_BACKUP.
+"""
+
+import os
+import sqlite3
+import sys
+import types
+
+from bot_engine.backup_service import DatabaseBackupService
+
+
+def _rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT id, payload FROM items ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_full_then_delta_backup_restores(tmp_path):
+    db_path = str(tmp_path / 'bots_data.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, payload TEXT)")
+    conn.executemany("INSERT INTO items (payload) VALUES (?)", [('x' * 200,) for _ in range(2000)])
+    conn.commit()
+
+    service = DatabaseBackupService(str(tmp_path / 'backups'))
+    service.BACKUP_PAGES_PER_STEP = 16
+    full = service._backup_database(db_path, 'bots_data', '20260101_000000', full_every_n=3)
+    assert full['kind'] == 'full' and full['valid']
+
+    conn.execute("UPDATE items SET payload = 'changed' WHERE id = 5")
+    conn.commit()
+    delta = service._backup_database(db_path, 'bots_data', '20260101_010000', full_every_n=3)
+    assert delta['kind'] == 'delta' and delta['base'] == full['path']
+    assert delta['size_bytes'] < full['size_bytes']
+    conn.close()
+
+    backups = service.list_backups(db_name='bots_data')
+    assert [(b['kind'], b['valid']) for b in backups] == [('delta', True), ('full', True)]
+
+    restored = str(tmp_path / 'restored.db')
+    service._restore_to_file(delta['path'], restored)
+    assert _rows(restored) == _rows(db_path)
+    service._restore_to_file(full['path'], restored)
+    assert _rows(restored)[4][1] == 'x' * 200
+
+    # Полный бэкап, от которого зависит оставляемый разностный, не удаляется
+    service.cleanup_excess_backups(keep_count=1)
+    assert os.path.exists(full['path']) and os.path.exists(delta['path'])
+
+    # Каждый третий бэкап снова полный
+    kinds = [service._backup_database(db_path, 'bots_data', f'20260101_0{i}0000', full_every_n=3)['kind']
+             for i in (2, 3)]
+    assert kinds == ['delta', 'full']
+
+
+def test_corrupted_bots_db_restored_from_db_gz(tmp_path, monkeypatch):
+    from bot_engine import bots_database
+
+    monkeypatch.setattr(bots_database, '_get_project_root', lambda: tmp_path)
+    db_path = str(tmp_path / 'data' / 'bots_data.db')
+    db = bots_database.BotsDatabase(db_path=db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, payload TEXT)")
+    conn.executemany("INSERT INTO items (payload) VALUES (?)", [('row',) for _ in range(50)])
+    conn.commit()
+    conn.close()
+    expected = _rows(db_path)
+
+    service = DatabaseBackupService(str(tmp_path / 'data' / 'backups'))
+    assert service._backup_database(db_path, 'bots_data', '20260101_000000', full_every_n=3)['kind'] == 'full'
+    assert [b['kind'] for b in db.list_backups()] == ['full']
+
+    # Повреждённый файл БД: самовосстановление находит только .db.gz и разворачивает его
+    with open(db_path, 'r+b') as f:
+        f.seek(0)
+        f.write(b'\0' * 4096)
+    assert db._repair_database()
+    assert _rows(db_path) == expected
+
+
+def test_ai_database_backup_service_cached_and_uses_configured_dir(tmp_path, monkeypatch):
+    from bot_engine.ai.ai_database import AIDatabase
+
+    backup_dir = tmp_path / 'custom_backups'
+    app_config = types.ModuleType('configs.app_config')
+    app_config.DATABASE_BACKUP = {'BACKUP_DIR': str(backup_dir)}
+    monkeypatch.setitem(sys.modules, 'configs.app_config', app_config)
+
+    db = AIDatabase.__new__(AIDatabase)
+    service = db._get_backup_service()
+    assert db._get_backup_service() is service
+    assert service.backup_dir == os.path.normpath(str(backup_dir))
+    assert backup_dir.is_dir()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверяет batch-режим BayesianOptimizer и инкрементальное обновление GP:
+- update() даёт те же предсказания, что и полный fit();
+- ask(k) возвращает k разных точек (constant liar);
+- batch-оптимизация находит оптимум простой функции.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bot_engine.ai.bayesian_optimizer import (
+    BayesianOptimizer,
+    GaussianProcessSurrogate,
+    ParameterSpace,
+)
+
+
+def _quadratic(params):
+    return -((params['x'] - 0.3) ** 2 + (params['y'] + 0.2) ** 2)
+
+
+def test_incremental_update_matches_full_fit():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 1, (12, 3))
+    y = np.sin(X).sum(axis=1)
+    X_test = rng.uniform(0, 1, (20, 3))
+
+    full = GaussianProcessSurrogate()
+    full.fit(X, y)
+
+    incremental = GaussianProcessSurrogate()
+    incremental.fit(X[:4], y[:4])
+    incremental.update(X[4:], y[4:])
+
+    mean_full, std_full = full.predict(X_test)
+    mean_inc, std_inc = incremental.predict(X_test)
+    assert np.allclose(mean_full, mean_inc, atol=1e-6)
+    assert np.allclose(std_full, std_inc, atol=1e-6)
+
+
+def test_ask_returns_distinct_batch_and_restores_gp():
+    space = [ParameterSpace('x', -1, 1), ParameterSpace('y', -1, 1)]
+    optimizer = BayesianOptimizer(space, _quadratic, n_initial_points=5, random_state=1)
+    initial = optimizer.ask(5)
+    optimizer.tell(initial, [_quadratic(p) for p in initial])
+
+    batch = optimizer.ask(4)
+    assert len(batch) == 4
+    points = {(round(p['x'], 6), round(p['y'], 6)) for p in batch}
+    assert len(points) == 4
+    # "ложные" наблюдения constant liar не остаются в GP
+    assert len(optimizer.gp.X_train) == 5
+
+
+def test_batch_optimize_with_executor_finds_optimum():
+    space = [ParameterSpace('x', -1, 1), ParameterSpace('y', -1, 1)]
+    optimizer = BayesianOptimizer(space, _quadratic, n_initial_points=6, random_state=3, batch_size=4)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        result = optimizer.optimize(n_iterations=24, verbose=False, executor=executor)
+
+    assert len(result['history']['values']) == 30
+    assert result['best_value'] > -0.05
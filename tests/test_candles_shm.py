@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Передача свечей через shared memory: читатель видит последнюю публикацию,
+переподключается после пересоздания сегмента (в том числе когда имя удалённого
+сегмента остаётся занятым, как на Windows) и не видит удалённый сегмент.
+"""
+
+import os
+import struct
+from multiprocessing import shared_memory
+
+from bot_engine.candles_shm import CandlesShmPublisher, CandlesShmReader
+
+
+def _candles(count, start=0):
+    return [
+        {'time': (start + i) * 1000, 'open': 1.0 + i, 'high': 2.0 + i, 'low': 0.5, 'close': 1.5 + i, 'volume': 10.0}
+        for i in reversed(range(count))
+    ]
+
+
+def test_publish_and_read_round_trip():
+    timeframe = f"t{os.getpid()}a"
+    publisher = CandlesShmPublisher()
+    reader = CandlesShmReader()
+    try:
+        version = publisher.publish(timeframe, {'AAAUSDT': _candles(5), 'BBBUSDT': _candles(2)})
+        assert reader.version(timeframe) == version
+
+        candles = reader.get_candles('AAAUSDT', timeframe)
+        assert [c['time'] for c in candles] == [0, 1000, 2000, 3000, 4000]
+        assert candles[-1]['close'] == 5.5
+        assert reader.get_candles('AAAUSDT', timeframe, max_candles=2)[0]['time'] == 3000
+        assert reader.get_candles('CCCUSDT', timeframe) is None
+
+        # Новая публикация больше сегмента — читатель переподключается к новому
+        big = {f"S{i}USDT": _candles(500) for i in range(300)}
+        new_version = publisher.publish(timeframe, big)
+        assert reader.version(timeframe) == new_version
+        all_candles = reader.get_all_candles(timeframe, max_symbols=3, max_candles_per_symbol=10)
+        assert len(all_candles) == 3
+        assert all(len(c) == 10 for c in all_candles.values())
+        assert reader.get_candles('AAAUSDT', timeframe) is None
+    finally:
+        publisher.close()
+
+    assert reader.get_candles('S1USDT', timeframe) is None
+    reader.close()
+
+
+def test_stale_segment_is_ignored():
+    timeframe = f"t{os.getpid()}b"
+    publisher = CandlesShmPublisher()
+    try:
+        publisher.publish(timeframe, {'AAAUSDT': _candles(3)})
+        assert CandlesShmReader(max_age_sec=60).get_candles('AAAUSDT', timeframe)
+        assert CandlesShmReader(max_age_sec=1e-9).get_candles('AAAUSDT', timeframe) is None
+    finally:
+        publisher.close()
+
+
+def test_reader_follows_segment_recreated_after_crash():
+    timeframe = f"t{os.getpid()}c"
+    first = CandlesShmPublisher()
+    first.publish(timeframe, {'AAAUSDT': _candles(3)})
+    reader = CandlesShmReader(max_age_sec=60)
+    assert reader.get_candles('AAAUSDT', timeframe)
+
+    # bots.py упал, не удалив сегменты: новый процесс продолжает указатель и помечает данные retired
+    first._segments.pop(timeframe).close()
+    first._pointers.pop(timeframe).close()
+    second = CandlesShmPublisher()
+    third = CandlesShmPublisher()
+    try:
+        version = second.publish(timeframe, {'BBBUSDT': _candles(2)})
+        assert [c['time'] for c in reader.get_candles('BBBUSDT', timeframe)] == [0, 1000]
+        assert reader.version(timeframe) == version
+
+        # Сегменты удалены без пометки retired: читатель держит старый снимок и
+        # переподключается по имени, когда тот устаревает
+        stale = second._segments.pop(timeframe)
+        struct.pack_into('<Q', stale.buf, 32, 1000)
+        stale.close()
+        stale.unlink()
+        pointer = second._pointers.pop(timeframe)
+        pointer.close()
+        pointer.unlink()
+        third.publish(timeframe, {'CCCUSDT': _candles(4)})
+        assert len(reader.get_candles('CCCUSDT', timeframe)) == 4
+    finally:
+        third.close()
+        reader.close()
+
+
+def test_segment_recreated_while_reader_attached_and_name_kept(monkeypatch):
+    timeframe = f"t{os.getpid()}d"
+    kept = []
+    original_unlink = shared_memory.SharedMemory.unlink
+    # Как на Windows: удаление не освобождает имя, пока сегмент открыт читателем
+    monkeypatch.setattr(shared_memory.SharedMemory, 'unlink', lambda shm: kept.append(shm))
+    publisher = CandlesShmPublisher()
+    reader = CandlesShmReader(max_age_sec=60)
+    try:
+        publisher.publish(timeframe, {'AAAUSDT': _candles(3)})
+        assert reader.get_candles('AAAUSDT', timeframe)
+        first_name = publisher._segments[timeframe].name
+
+        for round_no in range(2):
+            big = {f"S{i}USDT": _candles(500 + round_no) for i in range(300 * (round_no + 1))}
+            version = publisher.publish(timeframe, big)
+            assert publisher._segments[timeframe].name != first_name
+            assert len(reader.get_candles('S1USDT', timeframe)) == 500 + round_no
+            assert reader.version(timeframe) == version
+    finally:
+        publisher.close()
+        reader.close()
+        monkeypatch.undo()
+        for shm in kept:
+            try:
+                original_unlink(shm)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ClosedPnlSynchronizer: биржа запрашивается только после курсора, в БД добавляются
+только новые записи, потребители читают closed_pnl по своему курсору;
+при ошибке записи в БД курсор не сдвигается.
+"""
+
+import os
+import tempfile
+import time
+
+from bot_engine.app_database import AppDatabase
+from bot_engine.closed_pnl_sync import ClosedPnlSynchronizer
+
+
+def _record(order_id, close_ts):
+    return {
+        'symbol': 'BTC', 'side': 'Long', 'entry_price': 100.0, 'exit_price': 101.0,
+        'size': 1.0, 'closed_pnl': 1.0, 'closed_pnl_percent': 1.0, 'fee': 0.0,
+        'close_timestamp': close_ts, 'entry_timestamp': close_ts - 60000,
+        'order_id': order_id,
+    }
+
+
+class FakeExchange:
+    api_key = 'key'
+
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+        self.fail = False
+
+    def get_closed_pnl_since(self, start_ms, end_ms=None):
+        self.calls.append(start_ms)
+        if self.fail:
+            raise RuntimeError('retCode 10006')
+        return [r for r in self.records if r['close_timestamp'] >= start_ms]
+
+
+def _synchronizer(records):
+    db = AppDatabase(db_path=os.path.join(tempfile.mkdtemp(), 'app_data.db'))
+    exchange = FakeExchange(records)
+    return ClosedPnlSynchronizer(exchange, db=db, exchange_name='BYBIT', overlap_sec=300, initial_days=30), exchange
+
+
+def test_sync_fetches_after_cursor_and_inserts_only_new():
+    now_ms = int(time.time() * 1000)
+    sync, exchange = _synchronizer([_record('a', now_ms - 10000), _record('b', now_ms - 5000)])
+
+    assert [r['order_id'] for r in sync.sync()] == ['a', 'b']
+    cursor = sync.db.get_sync_cursor(sync.cursor_name)
+    assert cursor['order_id'] == 'b'
+
+    # Повтор: окно от курсора минус перекрытие, записи из перекрытия не дублируются
+    exchange.records.append(_record('c', now_ms + 1000))
+    assert [r['order_id'] for r in sync.sync()] == ['c']
+    assert exchange.calls[-1] == cursor['timestamp'] - 300 * 1000
+    assert len(sync.db.load_closed_pnl_after_id(0, exchange='BYBIT')) == 3
+
+    # Ошибка биржи не сдвигает курсор
+    before = sync.db.get_sync_cursor(sync.cursor_name)
+    exchange.fail = True
+    assert sync.sync() == []
+    assert sync.db.get_sync_cursor(sync.cursor_name) == before
+
+
+def test_consumer_reads_each_record_once_after_commit():
+    now_ms = int(time.time() * 1000)
+    sync, exchange = _synchronizer([_record('a', now_ms - 10000)])
+    sync.sync()
+
+    records, last_id = sync.read_new('trainer')
+    assert [r['order_id'] for r in records] == ['a']
+    # Без commit_read записи читаются снова
+    assert sync.read_new('trainer')[0] == records
+    sync.commit_read('trainer', last_id)
+    assert sync.read_new('trainer')[0] == []
+
+    exchange.records.append(_record('b', now_ms + 1000))
+    sync.sync()
+    assert [r['order_id'] for r in sync.read_new('trainer')[0]] == ['b']
+
+
+def test_cursor_unchanged_when_db_write_fails():
+    now_ms = int(time.time() * 1000)
+    broken = dict(_record('b', now_ms - 5000), closed_pnl=object())
+    sync, exchange = _synchronizer([_record('a', now_ms - 10000), broken])
+
+    # Ошибка записи строки откатывает всю пачку и не сдвигает курсор
+    assert sync.sync() == []
+    assert sync.db.get_sync_cursor(sync.cursor_name) is None
+    assert sync.db.load_closed_pnl_after_id(0) == []
+
+    # Следующая синхронизация запрашивает то же окно и записи не теряются
+    broken['closed_pnl'] = 1.0
+    assert [r['order_id'] for r in sync.sync()] == ['a', 'b']
+    assert exchange.calls[1] <= now_ms - 10000
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пайплайн логирования: решения фильтра кэшируются по логгеру, повторы подавляются,
+изменяемые аргументы форматируются в момент вызова, запись доходит через очередь.
+"""
+
+import logging
+
+from utils import color_logger
+from utils.color_logger import LogLevelFilter, _DuplicateSuppressor, _QueueHandler
+
+
+def _record(msg, args=(), level=logging.INFO, name='AI.Test', created=None):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    if created is not None:
+        record.created = created
+    return record
+
+
+def test_level_decisions_are_cached():
+    level_filter = LogLevelFilter(['+INFO', '-WARNING', '-DEBUG'])
+    assert level_filter.allows('AI.Test', 'INFO')
+    assert not level_filter.allows('AI.Test', 'WARNING')
+    assert not level_filter.allows('urllib3.connectionpool', 'DEBUG')
+    assert ('AI.Test', 'INFO') in level_filter._decisions
+
+    assert not level_filter.filter_content(_record('Configuring CORS for %s', ('x',)))
+    assert level_filter.filter_content(_record('Сделка %s закрыта', ('BTCUSDT',)))
+
+
+def test_duplicates_suppressed_within_window():
+    suppressor = _DuplicateSuppressor(window=5.0)
+    assert suppressor.process(_record('цена %s', (1,), created=100.0)) is not None
+    assert suppressor.process(_record('цена %s', (1,), created=101.0)) is None
+    assert suppressor.process(_record('цена %s', (1,), created=102.0)) is None
+    assert suppressor.process(_record('цена %s', (2,), created=102.0)) is not None
+
+    record = suppressor.process(_record('цена %s', (1,), created=106.0))
+    assert record.getMessage() == 'цена 1 (повторялось ещё 2 раз)'
+    assert suppressor.process(_record('авария', level=logging.CRITICAL, created=106.0)) is not None
+    assert suppressor.process(_record('авария', level=logging.CRITICAL, created=106.0)) is not None
+
+
+def test_mutable_args_formatted_at_call_time():
+    handler = _QueueHandler(None)
+    payload = {'a': 1}
+    record = handler.prepare(_record('данные %s', (payload,)))
+    payload['a'] = 2
+    assert record.getMessage() == "данные {'a': 1}"
+
+    lazy = handler.prepare(_record('символ %s', ('BTCUSDT',)))
+    assert lazy.args == ('BTCUSDT',)
+
+
+def test_records_delivered_through_listener():
+    color_logger.setup_color_logging(['+INFO', '+WARNING', '+ERROR'], enable_file_logging=False)
+    listener = color_logger._pipeline['listener']
+    captured = []
+
+    class _Capture(logging.Handler):
+        def emit(self, record):
+            captured.append(record.getMessage())
+
+    capture = _Capture()
+    listener.handlers = listener.handlers + (capture,)
+    try:
+        logger = logging.getLogger('AI.PipelineTest')
+        logger.info('первое %s', 1)
+        logger.debug('скрытое')
+        logger.warning('второе')
+        color_logger.flush_logs()
+        for _ in range(100):
+            if len(captured) >= 2:
+                break
+            color_logger.time.sleep(0.01)
+        assert captured == ['первое 1', 'второе']
+    finally:
+        listener.handlers = tuple(h for h in listener.handlers if h is not capture)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Потоковый дрифт на квантильных скетчах: KS по скетчам близок к точному,
+скетчи объединяются, монитор находит сдвиг и переживает перезапуск;
+входы инференса копятся по группам ликвидности и сравниваются с reference в другом процессе.
+"""
+
+import numpy as np
+from scipy import stats
+
+from bot_engine.ai.drift_detector import (
+    LiveInputDriftRecorder, QuantileSketch, StreamingDriftMonitor, liquidity_groups, save_symbol_groups,
+    sketch_ks_2samp,
+)
+
+DAY_MS = 86400 * 1000
+
+
+def _sketch(values):
+    sketch = QuantileSketch()
+    sketch.update(values)
+    return sketch
+
+
+def test_sketch_ks_close_to_exact():
+    rng = np.random.default_rng(1)
+    a = rng.normal(0, 1, 5000)
+    b = rng.normal(0.3, 1, 4000)
+    statistic, _ = sketch_ks_2samp(_sketch(a), _sketch(b))
+    assert abs(statistic - stats.ks_2samp(a, b).statistic) < 0.02
+
+    merged = _sketch(a[:2500]).merge(_sketch(a[2500:]))
+    assert merged.count == 5000
+    assert abs(float(merged.quantile(0.5)[0]) - float(np.median(a))) < 0.05
+    assert QuantileSketch.from_dict(merged.to_dict()).positive == merged.positive
+
+
+def _candles(rng, days, scale, start_day=0):
+    candles, price = [], 100.0
+    for i in range(days * 4):
+        change = rng.normal(0, scale)
+        close = price * (1 + change / 100)
+        candles.append({'time': start_day * DAY_MS + i * DAY_MS // 4, 'open': price, 'high': max(price, close) * 1.001,
+                        'low': min(price, close) * 0.999, 'close': close, 'volume': 1000.0})
+        price = close
+    return candles
+
+
+def test_monitor_detects_shift_and_persists(tmp_path):
+    rng = np.random.default_rng(2)
+    state_path = str(tmp_path / 'drift.json')
+    monitor = StreamingDriftMonitor(state_path=state_path, window_buckets=7)
+    calm = {f"S{i}USDT": _candles(rng, 30, 1.0) for i in range(20)}
+    assert monitor.observe_candles_batch(calm) > 0
+    # Повторная подача тех же свечей не учитывается (водяной знак)
+    assert monitor.observe_candles_batch(calm) == 0
+    monitor.set_reference()
+    assert not monitor.detect_drift().drift_detected
+    assert monitor.save()
+
+    restored = StreamingDriftMonitor(state_path=state_path, window_buckets=7)
+    assert restored.has_reference()
+    volatile = {}
+    for symbol, candles in calm.items():
+        tail = _candles(rng, 10, 5.0, start_day=30)
+        volatile[symbol] = candles + tail
+    assert restored.observe_candles_batch(volatile) > 0
+    result = restored.detect_drift()
+    assert result.drift_detected
+    assert 'return_pct' in result.drifted_features
+    assert result.psi['return_pct'] > 0.1
+
+
+def test_live_inputs_grouped_by_liquidity_and_adopted(tmp_path):
+    rng = np.random.default_rng(3)
+    candles = {f"S{i}USDT": [{'close': 100.0, 'volume': 10.0 ** (i % 3)}] * 5 for i in range(6)}
+    groups = liquidity_groups(candles, n_groups=3)
+    assert groups['S2USDT'] == 'LIQ_1' and groups['S0USDT'] == 'LIQ_3'
+    groups_path = str(tmp_path / 'groups.json')
+    assert save_symbol_groups(groups_path, groups)
+
+    # Процесс инференса: входы модели по строке на символ
+    live_path = str(tmp_path / 'live.json')
+    recorder = LiveInputDriftRecorder(live_path, groups_path, save_interval_sec=3600)
+    symbols = list(groups) * 50
+    calm = rng.normal(0, 1, size=(len(symbols), 7))
+    assert recorder.record(symbols, calm, time_ms=0) == len(symbols)
+    assert set(recorder.monitor.groups()) == {'ALL', 'LIQ_1', 'LIQ_2', 'LIQ_3'}
+    recorder.flush()
+
+    # Процесс обучения: свой reference, корзины из файла инференса
+    trainer = StreamingDriftMonitor(state_path=str(tmp_path / 'reference.json'))
+    trainer.adopt_buckets(StreamingDriftMonitor(state_path=live_path))
+    trainer.set_reference()
+    assert not trainer.detect_drift('LIQ_1').drift_detected
+
+    shifted = calm + np.where(np.isin(symbols, ['S2USDT', 'S5USDT']), 3.0, 0.0)[:, None]
+    recorder.record(symbols, shifted, time_ms=DAY_MS)
+    recorder.flush()
+    trainer.adopt_buckets(StreamingDriftMonitor(state_path=live_path))
+    assert trainer.has_reference('LIQ_1')
+    assert trainer.detect_drift('LIQ_1').drift_detected
+    assert not trainer.detect_drift('LIQ_3').drift_detected
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Кадр признаков раунда: значения совпадают с прежними расчётами фильтров,
+повторный запрос по тем же свечам возвращает тот же кадр, новые свечи — новый.
+"""
+
+import math
+
+from bot_engine.feature_frame import FeatureFrame, clear_feature_frames, get_feature_frame
+from bot_engine.filters import check_rsi_time_filter
+from bot_engine.utils.rsi_utils import calculate_rsi, calculate_rsi_history
+
+
+def _candles(count=120):
+    candles = []
+    price = 100.0
+    for i in range(count):
+        open_price = price
+        price = price * (1 + 0.03 * math.sin(i / 4.0) + 0.004 * ((i % 5) - 2))
+        candles.append({'time': 1_700_000_000_000 + i * 60_000, 'open': open_price, 'high': max(open_price, price) * 1.01,
+                        'low': min(open_price, price) * 0.99, 'close': price, 'volume': 10.0 + i % 3})
+    return candles
+
+
+def test_frame_matches_direct_calculations():
+    candles = _candles()
+    closes = [c['close'] for c in candles]
+    frame = FeatureFrame('AAA', '1m', candles)
+    assert frame.rsi_history() == calculate_rsi_history(closes, 14)
+    assert frame.rsi() == calculate_rsi(closes, 14)
+    assert frame.rsi_history(window=60) == calculate_rsi_history(closes[-60:], 14)
+    assert frame.body_percents[-1] == abs((candles[-1]['close'] - candles[-1]['open']) / candles[-1]['open']) * 100
+    assert frame.window_change_percent(5) == abs((closes[-1] - candles[-5]['open']) / candles[-5]['open']) * 100
+
+    config = {'rsi_time_filter_candles': 6, 'rsi_long_threshold': 45, 'rsi_short_threshold': 55,
+              'rsi_time_filter_upper': 50, 'rsi_time_filter_lower': 50}
+    for signal in ('ENTER_LONG', 'ENTER_SHORT'):
+        assert check_rsi_time_filter(candles, None, signal, config, frame=frame) == check_rsi_time_filter(candles, None, signal, config)
+    history = frame.rsi_history()
+    check_rsi_time_filter(candles, 1.0, 'ENTER_LONG', config, frame=frame)
+    assert frame.rsi_history() is history and history[-1] != 1.0  # фильтр не портит общую историю
+
+
+def test_frame_registry_reuses_until_candles_change():
+    clear_feature_frames()
+    candles = _candles(60)
+    frame = get_feature_frame('AAA', '1m', candles)
+    assert get_feature_frame('AAA', '1m', candles) is frame
+    assert get_feature_frame('AAA', '6h', candles) is not frame
+    candles.append(dict(candles[-1], time=candles[-1]['time'] + 60_000))
+    assert get_feature_frame('AAA', '1m', candles) is not frame
+    assert get_feature_frame('AAA', '1m', list(candles)) is not frame
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Трассировка пути входа: вложенные спаны (в том числе через пул потоков),
+гистограммы этапов в формате Prometheus и лог медленного пути (только от спанов trace_root).
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import utils.latency_tracing as tracing
+from utils.latency_tracing import propagate_context, render_prometheus, span, traced
+
+
+@traced('test.place_order')
+def _place_order():
+    return 'ok'
+
+
+def test_nested_spans_and_prometheus_histograms():
+    tracing.reset_metrics()
+    with span('test.entry', symbol='BTC') as root:
+        assert _place_order() == 'ok'
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(propagate_context(lambda: None, span_name='test.ai')).result()
+    assert [child.name for child in root.children] == ['test.place_order', 'test.ai']
+    assert root.children[1].thread != root.thread
+
+    text = render_prometheus()
+    assert 'infobot_stage_duration_seconds_count{stage="test.place_order"} 1' in text
+    assert 'infobot_stage_duration_seconds_bucket{stage="test.entry",le="+Inf"} 1' in text
+    assert 'infobot_stage_errors_total{stage="test.ai"} 0' in text
+
+
+def test_slow_path_logged_once_per_interval(monkeypatch, caplog):
+    tracing.reset_metrics()
+    monkeypatch.setattr(tracing, '_slow_path_threshold_ms', lambda: 0.000001)
+    with caplog.at_level(logging.WARNING, logger='LatencyTrace'):
+        for _ in range(3):
+            with span('test.slow_entry', trace_root=True, symbol='ETH'):
+                _place_order()
+        # Спан без родителя вне пути входа — не корень трассы
+        with span('test.round'):
+            _place_order()
+    records = [r for r in caplog.records if r.name == 'LatencyTrace']
+    assert len(records) == 1
+    assert 'test.slow_entry' in records[0].getMessage()
+    assert '└ test.place_order' in records[0].getMessage()
+    assert tracing.get_stage_stats()['test.slow_entry']['count'] == 3
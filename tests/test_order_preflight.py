@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Кэш pre-flight для place_order: плечо и режим маржи из ответов get_positions,
+параметры инструментов из get_instruments_info, свежесть цены; set_leverage не
+ходит на биржу, если нужное плечо уже известно.
+"""
+
+import threading
+
+from exchanges.bybit_exchange import BybitExchange
+from exchanges.order_preflight import OrderPreflightState
+from exchanges.position_snapshot import PositionSnapshotCache
+
+
+def test_state_from_positions_and_instruments():
+    state = OrderPreflightState(ttls={'account': 60, 'instrument': 60, 'price': 0.5})
+    state.update_from_position_records([{'symbol': 'BTCUSDT', 'leverage': '10', 'tradeMode': 1}])
+    count = state.update_instruments([{
+        'symbol': 'BTCUSDT',
+        'lotSizeFilter': {'minOrderQty': '0.001', 'qtyStep': '0.001', 'minNotionalValue': '5'},
+        'priceFilter': {'tickSize': '0.1'},
+        'leverageFilter': {'maxLeverage': '100.00'},
+        'status': 'Trading',
+    }])
+    assert count == 1
+    assert state.get('BTC', 'leverage') == 10.0
+    assert state.get('BTCUSDT', 'margin_mode') == 'isolated'
+    assert state.get('BTC', 'max_leverage') == 100.0
+    assert state.get('BTC', 'instrument')['minNotionalValue'] == 5.0
+    state.note_price('BTC', 50000)
+    assert state.get('BTC', 'price') == 50000.0
+    assert state.get('BTC', 'price', max_age=0) is None
+
+
+class _Client:
+    def __init__(self):
+        self.calls = []
+
+    def get_positions(self, **kwargs):
+        self.calls.append('get_positions')
+        return {'retCode': 0, 'result': {'list': [{'symbol': 'ETHUSDT', 'leverage': '5', 'tradeMode': 0}]}}
+
+    def set_leverage(self, **kwargs):
+        self.calls.append('set_leverage')
+        return {'retCode': 0}
+
+
+def _exchange():
+    exchange = BybitExchange.__new__(BybitExchange)
+    exchange.client = _Client()
+    exchange.preflight = OrderPreflightState()
+    exchange.preflight.set('ETH', 'max_leverage', 50.0)
+    exchange.position_snapshot = PositionSnapshotCache(lambda: [], ttl=1)
+    exchange._processed_positions = None
+    exchange._processed_positions_lock = threading.Lock()
+    return exchange
+
+
+def test_set_leverage_skips_calls_when_state_matches():
+    exchange = _exchange()
+    first = exchange.set_leverage('ETH', 5)
+    assert first['success'] and not first.get('changed')
+    assert exchange.client.calls == ['get_positions']
+
+    second = exchange.set_leverage('ETH', 5)
+    assert second['success'] and exchange.client.calls == ['get_positions']
+
+    third = exchange.set_leverage('ETH', 7)
+    assert third['changed'] and exchange.client.calls == ['get_positions', 'set_leverage']
+    assert exchange.preflight.get('ETH', 'leverage') == 7.0
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Снимок позиций биржи: одновременные запросы объединяются в один, снимок живёт TTL,
+invalidate() после нашего ордера заставляет запросить биржу заново.
+"""
+
+import threading
+import time
+
+from exchanges.position_snapshot import PositionSnapshotCache
+
+
+def test_concurrent_callers_share_one_fetch():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return [{'symbol': 'BTCUSDT', 'size': '1'}]
+
+    cache = PositionSnapshotCache(fetch, ttl=5)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert cache.get() is results[0]
+    assert len(calls) == 1
+
+
+def test_invalidate_and_failed_fetch_not_cached():
+    state = {'n': 0, 'fail': False}
+
+    def fetch():
+        state['n'] += 1
+        if state['fail']:
+            raise ConnectionError('boom')
+        return [{'symbol': 'ETHUSDT', 'size': str(state['n'])}]
+
+    cache = PositionSnapshotCache(fetch, ttl=60)
+    first = cache.get()
+    cache.invalidate()
+    second = cache.get()
+    assert state['n'] == 2 and second[0]['size'] == '2' and first is not second
+
+    cache.invalidate()
+    state['fail'] = True
+    try:
+        cache.get()
+        assert False, 'ошибка биржи должна пробрасываться'
+    except ConnectionError:
+        pass
+    state['fail'] = False
+    assert cache.get()[0]['size'] == '4'
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пакетная оценка защит: решения evaluate_protections_batch совпадают со скалярной
+evaluate_protections для каждой позиции (стоп-лосс, тейк, время, безубыток, trailing).
+"""
+
+import math
+import random
+from dataclasses import asdict
+
+from bot_engine.protections import (
+    ProtectionState,
+    evaluate_protections,
+    evaluate_protections_batch,
+)
+
+NOW = 1_800_000_000.0
+
+
+def _random_case(rng):
+    side = rng.choice(['LONG', 'SHORT', 'long', 'SHORT', 'FLAT'])
+    entry = rng.choice([100.0, 0.5, 23456.7, 0.0, None])
+    price = None if rng.random() < 0.03 else (entry or 100.0) * (1 + rng.uniform(-0.2, 0.2))
+    state = ProtectionState(
+        position_side=side,
+        entry_price=entry,
+        entry_time=rng.choice([None, NOW - rng.uniform(0, 200) * 3600]),
+        quantity=rng.choice([None, 0.0, rng.uniform(0.1, 50)]),
+        notional_usdt=rng.choice([None, rng.uniform(5, 500)]),
+        max_profit_percent=rng.choice([0.0, rng.uniform(0, 20)]),
+        break_even_activated=rng.random() < 0.3,
+        break_even_stop_price=rng.choice([None, (entry or 100.0) * rng.uniform(0.95, 1.05)]),
+        trailing_active=rng.random() < 0.4,
+        trailing_reference_price=rng.choice([None, 0.0, (entry or 100.0) * rng.uniform(0.9, 1.2)]),
+        trailing_stop_price=rng.choice([None, (entry or 100.0) * rng.uniform(0.9, 1.1)]),
+        trailing_take_profit_price=rng.choice([None, (entry or 100.0) * rng.uniform(0.9, 1.1)]),
+        trailing_last_update_ts=rng.choice([0.0, NOW - rng.uniform(0, 120)]),
+    )
+    config = {
+        'max_loss_percent': rng.choice([0, 5, 15.0, '10']),
+        'take_profit_percent': rng.choice([0, 0.5, 8, 25, None]),
+        'close_at_profit_enabled': rng.choice([True, False]),
+        'max_position_hours': rng.choice([0, 24, 96]),
+        'break_even_protection': rng.choice([True, False]),
+        'break_even_trigger_percent': rng.choice([0, 0.4, 2, 5]),
+        'trailing_stop_activation': rng.choice([0, 3, 10]),
+        'trailing_stop_distance': rng.choice([0, 1.5, 4]),
+        'trailing_take_distance': rng.choice([0, 0.5, 2]),
+        'trailing_update_interval': rng.choice([0, 30, 300]),
+    }
+    if rng.random() < 0.3:
+        config = {'stop_loss_percent': rng.choice([3, 20]), 'break_even_trigger': rng.choice([1, 3])}
+    realized = rng.choice([0.0, -rng.uniform(0, 2), rng.uniform(0, 2)])
+    return price, config, state, realized
+
+
+def _same(a, b):
+    if a is None or b is None:
+        return a is b
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-12, abs_tol=1e-12)
+    return a == b
+
+
+def test_batch_matches_scalar():
+    rng = random.Random(7)
+    cases = [_random_case(rng) for _ in range(3000)]
+    prices, configs, states, realized = zip(*cases)
+    batch = evaluate_protections_batch(prices, configs, states, realized_pnls=realized, now_ts=NOW)
+    assert len(batch) == len(cases)
+    for (price, config, state, pnl), got in zip(cases, batch):
+        expected = evaluate_protections(price, config, state, realized_pnl=pnl, now_ts=NOW)
+        assert got.should_close == expected.should_close
+        assert got.reason == expected.reason
+        assert _same(got.profit_percent, expected.profit_percent)
+        for field, value in asdict(expected.state).items():
+            assert _same(getattr(got.state, field), value), field
+    assert any(d.should_close for d in batch) and not all(d.should_close for d in batch)
+
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Индекс последних закрытий по символам: сделки ботов дополняются закрытиями с биржи,
+повторное сохранение той же сделки не создаёт дубликат, глубина ограничена;
+строки других процессов подтягиваются по id-курсору.
+"""
+
+from app import app_database
+from bot_engine import bots_database
+from bot_engine.recent_closures import RecentClosuresIndex
+
+
+def _index(per_symbol=5):
+    index = RecentClosuresIndex(per_symbol=per_symbol, refresh_interval=3600)
+    # Без БД: индекс считается загруженным
+    index._bot_loaded = True
+    index._bot_refreshed = float('inf')
+    index._exchange_loaded = True
+    index._exchange_refreshed = float('inf')
+    return index
+
+
+def test_bot_closures_filled_from_exchange():
+    index = _index()
+    index.add_bot_closure({'id': 1, 'symbol': 'AAA', 'status': 'CLOSED', 'pnl': -1.0, 'exit_timestamp': 1_700_000_100_000})
+    index.add_exchange_closures([
+        {'id': 10, 'symbol': 'AAA', 'closed_pnl': -2.0, 'close_timestamp': 1_700_000_200_000, 'entry_price': 1, 'exit_price': 0.9},
+        {'id': 11, 'symbol': 'AAA', 'closed_pnl': 3.0, 'close_timestamp': 1_700_000_000_000, 'entry_price': 1, 'exit_price': 1.1},
+        {'id': 12, 'symbol': 'BBB', 'closed_pnl': 5.0, 'close_timestamp': 1_700_000_300_000, 'entry_price': 1, 'exit_price': 1.2},
+    ])
+    closures = index.get_recent_closures('AAA', 2)
+    assert [c['pnl'] for c in closures] == [-2.0, -1.0]
+    assert closures[0]['exit_timestamp'] == 1_700_000_200
+    assert index.get_recent_closures('AAA', 1)[0]['pnl'] == -1.0  # сделки ботов в приоритете
+    assert index.get_recent_closures('CCC', 3) == []
+    assert index._exchange_cursor == 12
+
+
+def test_duplicates_and_depth():
+    index = _index(per_symbol=3)
+    for i in range(5):
+        index.add_bot_closure({'id': i, 'symbol': 'AAA', 'status': 'CLOSED', 'pnl': -1.0, 'exit_timestamp': 1000 + i})
+    index.add_bot_closure({'id': 4, 'symbol': 'AAA', 'status': 'CLOSED', 'pnl': 2.0, 'exit_timestamp': 1004})
+    index.add_bot_closure({'id': 9, 'symbol': 'AAA', 'status': 'OPEN', 'pnl': None})
+    assert [c['id'] for c in index.get_recent_closures('AAA', 3)] == [4, 3, 2]
+    assert index.get_recent_closures('AAA', 1)[0]['pnl'] == 2.0
+
+    record = {'symbol': 'BBB', 'closed_pnl': -1.0, 'close_timestamp': 5000, 'entry_price': 1, 'exit_price': 0.9}
+    index.add_exchange_closures([record])
+    index.add_exchange_closures([dict(record, id=7, entry_price=1.0)])  # та же запись, прочитанная из БД
+    assert len(index.get_recent_closures('BBB', 3)) == 1
+
+
+class _FakeBotsDb:
+    def __init__(self):
+        self.rows = []
+        self.after_calls = []
+
+    def get_max_trade_history_id(self):
+        return max((r['id'] for r in self.rows), default=0)
+
+    def get_recent_closed_trades_by_symbol(self, per_symbol):
+        return list(self.rows)
+
+    def get_closed_trades_after_id(self, last_id=0):
+        self.after_calls.append(last_id)
+        return [r for r in self.rows if r['id'] > last_id]
+
+
+class _FakeAppDb:
+    def __init__(self, count):
+        self.rows = [
+            {'id': i, 'symbol': 'BBB', 'closed_pnl': -1.0, 'close_timestamp': 1000 + i, 'entry_price': 1, 'exit_price': i}
+            for i in range(1, count + 1)
+        ]
+        self.after_calls = []
+
+    def get_max_closed_pnl_id(self):
+        return len(self.rows)
+
+    def load_closed_pnl_after_id(self, last_id=0):
+        self.after_calls.append(last_id)
+        return [r for r in self.rows if r['id'] > last_id]
+
+
+def test_rows_from_other_processes_picked_up_by_cursor(monkeypatch):
+    bots_db, app_db = _FakeBotsDb(), _FakeAppDb(100)
+    monkeypatch.setattr(bots_database, 'get_bots_database', lambda: bots_db)
+    monkeypatch.setattr(app_database, 'get_app_database', lambda: app_db)
+    bots_db.rows.append({'id': 1, 'symbol': 'AAA', 'status': 'CLOSED', 'pnl': -1.0, 'exit_timestamp': 1000})
+    index = RecentClosuresIndex(per_symbol=3, refresh_interval=0, exchange_seed_rows=10)
+
+    assert [c['id'] for c in index.get_recent_closures('AAA', 1)] == [1]
+    # Сделка, сохранённая другим процессом
+    bots_db.rows.append({'id': 2, 'symbol': 'AAA', 'status': 'CLOSED', 'pnl': -2.0, 'exit_timestamp': 2000})
+    assert [c['id'] for c in index.get_recent_closures('AAA', 1)] == [2]
+    assert bots_db.after_calls == [1]
+    assert index._bot_cursor == 2
+
+    # Биржа: первая загрузка читает только окно последних строк
+    assert len(index.get_recent_closures('BBB', 3)) == 3
+    assert app_db.after_calls == [90]
+    assert index._exchange_cursor == 100
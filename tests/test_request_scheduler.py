@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Планировщик запросов к бирже: срочные классы получают бюджет раньше массовой
+загрузки, массовая загрузка не расходует резерв и получает отказ по таймауту.
+Сниженный после rate limit темп не возвращается первым же успешным запросом.
+"""
+
+import threading
+import time
+
+import pytest
+
+from exchanges.request_scheduler import (
+    PRIORITY_DISCOVERY, PRIORITY_ORDER,
+    RequestRejected, RequestScheduler, ScheduledClient, request_priority,
+)
+
+
+def test_higher_priority_served_first():
+    scheduler = RequestScheduler(rate_per_sec=20, burst=1, reserved_tokens=0)
+    assert scheduler.acquire(PRIORITY_DISCOVERY, timeout=1)  # бюджет исчерпан
+    order = []
+
+    def worker(priority, name):
+        scheduler.acquire(priority, timeout=5)
+        order.append(name)
+
+    threads = [threading.Thread(target=worker, args=(PRIORITY_DISCOVERY, f'discovery{i}')) for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.01)
+    stop = threading.Thread(target=worker, args=(PRIORITY_ORDER, 'stop_loss'))
+    stop.start()
+    for t in threads + [stop]:
+        t.join(5)
+    assert order[0] == 'stop_loss'
+
+
+def test_discovery_keeps_reserve_and_is_rejected():
+    scheduler = RequestScheduler(rate_per_sec=1, burst=3, reserved_tokens=2)
+    assert scheduler.acquire(PRIORITY_DISCOVERY, timeout=0.1)
+    # Остались 2 резервных токена — массовая загрузка их не трогает
+    assert not scheduler.acquire(PRIORITY_DISCOVERY, timeout=0.05)
+    assert scheduler.should_yield(PRIORITY_DISCOVERY)
+    assert scheduler.acquire(PRIORITY_ORDER, timeout=0.05)
+    assert scheduler.get_stats()['classes']['discovery']['rejected'] == 1
+
+
+def test_scheduled_client_uses_thread_priority():
+    class FakeHTTP:
+        timeout = 60
+
+        def get_kline(self, **kwargs):
+            return {'retCode': 0}
+
+    scheduler = RequestScheduler(rate_per_sec=1, burst=3, reserved_tokens=2, discovery_max_wait=0.05)
+    client = ScheduledClient(FakeHTTP(), scheduler)
+    client.timeout = 5
+    assert client.timeout == 5
+    assert client.get_kline(symbol='AUSDT')['retCode'] == 0  # по умолчанию — свечи позиций
+    with request_priority(PRIORITY_DISCOVERY):
+        with pytest.raises(RequestRejected):
+            client.get_kline(symbol='BUSDT')
+    stats = scheduler.get_stats()['classes']
+    assert stats['position_candles']['granted'] == 1
+    assert stats['discovery']['rejected'] == 1
+
+
+def test_backoff_survives_until_cooldown_and_consecutive_successes():
+    scheduler = RequestScheduler(rate_per_sec=20, restore_cooldown=0.1, restore_after_successes=3)
+    scheduler.backoff()
+    assert scheduler.rate == 10
+    # Успехи сразу после backoff темп не возвращают
+    assert not scheduler.restore()
+    assert not scheduler.restore()
+    assert not scheduler.restore()
+    assert scheduler.rate == 10
+    time.sleep(0.15)
+    # Новый rate limit сбрасывает счётчик успехов
+    scheduler.backoff()
+    time.sleep(0.15)
+    assert not scheduler.restore()
+    assert not scheduler.restore()
+    assert scheduler.restore()
+    assert scheduler.rate == 20
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+get_smc_signal: колонки OHLCV из общего кадра признаков дают тот же сигнал, что
+pd.DataFrame(candles); до новой свечи (symbol, timeframe) сигнал берётся из кэша.
+"""
+
+import random
+
+import pandas as pd
+
+from bot_engine.ai import ai_integration
+from bot_engine.ai.smart_money_features import SmartMoneyFeatures
+
+
+def _candles(count, seed):
+    rng = random.Random(seed)
+    price = 100.0
+    candles = []
+    for i in range(count):
+        open_price = price
+        price = max(1.0, price * (1 + rng.uniform(-0.03, 0.03)))
+        candles.append({
+            'time': 1_700_000_000_000 + i * 3_600_000,
+            'open': open_price,
+            'high': max(open_price, price) * (1 + rng.uniform(0, 0.01)),
+            'low': min(open_price, price) * (1 - rng.uniform(0, 0.01)),
+            'close': price,
+            'volume': rng.uniform(100, 1000),
+        })
+    return candles
+
+
+def test_columnar_signal_matches_dataframe_signal():
+    smc = SmartMoneyFeatures()
+    for seed in range(8):
+        candles = _candles(200, seed)
+        expected = smc.get_smc_signal(pd.DataFrame(candles))
+        assert ai_integration.get_smc_signal(candles) == expected
+        assert ai_integration.get_smc_signal(candles, symbol=f'C{seed}', timeframe='1h') == expected
+
+
+def test_signal_cached_until_new_candle(monkeypatch):
+    smc = ai_integration.get_smc_features()
+    calls = []
+    original = smc.get_smc_signal
+    monkeypatch.setattr(smc, 'get_smc_signal', lambda df: calls.append(len(df)) or original(df))
+
+    candles = _candles(120, 1)
+    first = ai_integration.get_smc_signal(candles, symbol='CACHE', timeframe='1h')
+    first['reasons'].append('changed by caller')
+    # Тот же набор свечей (в т.ч. новым списком) — без пересчёта, кэш не испорчен вызывающим
+    second = ai_integration.get_smc_signal(list(candles), symbol='CACHE', timeframe='1h')
+    assert calls == [120]
+    assert 'changed by caller' not in second['reasons']
+
+    # Незакрытая свеча обновилась, затем пришла новая свеча — пересчёт
+    candles[-1] = dict(candles[-1], close=candles[-1]['close'] * 1.01)
+    ai_integration.get_smc_signal(candles, symbol='CACHE', timeframe='1h')
+    candles = candles[1:] + _candles(1, 2)
+    candles[-1]['time'] = candles[-2]['time'] + 3_600_000
+    ai_integration.get_smc_signal(candles, symbol='CACHE', timeframe='1h')
+    assert calls == [120, 120, 120]
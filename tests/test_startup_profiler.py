@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Профилирование запуска: замер времени импортов (собственное время без вложенных),
+шаги инициализации и отложенные задачи, выполняемые по порядку в фоне.
+"""
+
+import importlib
+import sys
+
+from utils.startup_profiler import (
+    StartupProfiler, defer_startup_task, init_startup_profiler, wait_deferred_startup_tasks,
+)
+
+
+def test_import_and_step_timing(tmp_path, monkeypatch):
+    (tmp_path / 'startup_prof_child.py').write_text("import time\ntime.sleep(0.05)\n")
+    (tmp_path / 'startup_prof_parent.py').write_text("import startup_prof_child\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    profiler = StartupProfiler()
+    profiler.enable()
+    try:
+        with profiler.step('импорт'):
+            importlib.import_module('startup_prof_parent')
+    finally:
+        profiler.disable()
+        sys.modules.pop('startup_prof_parent', None)
+        sys.modules.pop('startup_prof_child', None)
+
+    child_self, child_total = profiler.imports['startup_prof_child']
+    parent_self, parent_total = profiler.imports['startup_prof_parent']
+    assert child_self >= 0.04
+    assert parent_total >= child_total and parent_self < 0.04
+    assert [name for name, _, _ in profiler.steps] == ['импорт']
+    assert 'startup_prof_child' in profiler.format_report()
+
+
+def test_flag_is_removed_from_argv():
+    argv = ['bots.py', '--profile-startup', '--other']
+    profiler = init_startup_profiler(argv)
+    try:
+        assert argv == ['bots.py', '--other']
+        assert profiler.enabled
+    finally:
+        profiler.disable()
+        profiler.enabled = False
+
+
+def test_deferred_tasks_run_in_order():
+    calls = []
+    for i in range(3):
+        defer_startup_task(f'task{i}', lambda i=i: calls.append(i))
+    defer_startup_task('failing', lambda: 1 / 0)
+    defer_startup_task('after', lambda: calls.append('after'))
+    assert wait_deferred_startup_tasks(timeout=5)
+    assert calls == [0, 1, 2, 'after']
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Снимок тикеров: один запрос на все монеты, объединение одновременных обновлений,
+последнее известное значение со stale=True при ошибке биржи; таймаут get_ticker
+сохраняется, когда внутри него выполняется запрос снимка со своим таймаутом.
+"""
+
+import signal
+import threading
+import time
+
+import pytest
+
+from exchanges.base_exchange import with_timeout
+from exchanges.ticker_snapshot import TickerSnapshot
+
+
+def _tickers(price):
+    return [
+        {'symbol': 'BTCUSDT', 'lastPrice': str(price), 'bid1Price': str(price - 1), 'ask1Price': str(price + 1), 'markPrice': str(price)},
+        {'symbol': 'ETHUSDT', 'lastPrice': '3000', 'bid1Price': '2999', 'ask1Price': '3001', 'markPrice': '3000'},
+        {'symbol': 'BTCPERP', 'lastPrice': '1'},
+    ]
+
+
+def test_one_fetch_for_all_symbols_and_threads():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return _tickers(50000), 1_700_000_000_000
+
+    snapshot = TickerSnapshot(fetch, max_age=10)
+    threads = [threading.Thread(target=snapshot.get_price, args=('BTC',)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    prices = snapshot.get_prices(['BTCUSDT', 'ETH', 'XRP'])
+    assert len(calls) == 1
+    assert sorted(prices) == ['BTC', 'ETH']
+    assert prices['BTC']['last'] == 50000.0 and prices['BTC']['bid'] == 49999.0
+    assert prices['ETH']['stale'] is False and prices['ETH']['timestamp'] == 1_700_000_000_000
+    assert snapshot.peek('BTC')['ask'] == 50001.0
+
+
+def test_failed_refresh_serves_stale_quote():
+    state = {'fail': False}
+
+    def fetch():
+        if state['fail']:
+            raise ConnectionError('timeout')
+        return _tickers(100), None
+
+    snapshot = TickerSnapshot(fetch, max_age=0.05)
+    assert snapshot.get_price('BTC')['stale'] is False
+    state['fail'] = True
+    time.sleep(0.06)
+    quote = snapshot.get_price('BTC')
+    assert quote['last'] == 100.0 and quote['stale'] is True
+    assert snapshot.peek('BTC') is None
+    assert snapshot.get_stats()['failures'] == 1
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGALRM'), reason='SIGALRM только на Unix')
+def test_nested_timeout_keeps_outer_deadline():
+    @with_timeout(1)
+    def fetch_all():
+        return []
+
+    @with_timeout(1)
+    def get_ticker():
+        fetch_all()
+        time.sleep(3)
+
+    with pytest.raises(TimeoutError):
+        get_ticker()
+    assert signal.alarm(0) == 0
+
+    # В фоновом потоке (обновление снимка) SIGALRM недоступен — вызов не падает
+    results = []
+    thread = threading.Thread(target=lambda: results.append(fetch_all()))
+    thread.start()
+    thread.join()
+    assert results == [[]]
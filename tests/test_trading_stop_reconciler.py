@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TradingStopReconciler: SL/TP отправляются только при сдвиге не меньше гистерезиса
+(в шагах цены), SL и TP позиции — одним запросом, неудачные изменения повторяются.
+"""
+
+from exchanges.trading_stop_reconciler import TradingStopReconciler
+
+
+class FakeExchange:
+    request_scheduler = None
+
+    def __init__(self, fail=0):
+        self.calls = []
+        self.fail = fail
+
+    def get_instruments_info(self, symbol):
+        return {'tickSize': '0.01'}
+
+    def update_trading_stop(self, symbol, stop_loss_price=None, take_profit_price=None, position_side=None):
+        self.calls.append((symbol, stop_loss_price, take_profit_price, position_side))
+        if self.fail:
+            self.fail -= 1
+            return {'success': False, 'message': 'timeout'}
+        return {'success': True, 'stop_loss': stop_loss_price, 'take_profit': take_profit_price}
+
+
+def test_hysteresis_and_combined_request():
+    exchange = FakeExchange()
+    reconciler = TradingStopReconciler(exchange, hysteresis_ticks=2, max_attempts=3, retry_delay=0)
+    reconciler.observe('BTC', 'LONG', stop_loss='100.00', take_profit='')
+
+    # Сдвиг на 1 шаг цены — меньше гистерезиса, TP не нужен
+    assert reconciler.submit('BTC', 'LONG', stop_loss=100.011) is False
+    assert reconciler.flush() == {}
+
+    # Стоп подтягивается на 5 шагов и нужен TP — один запрос, цены кратны шагу
+    assert reconciler.submit('BTC', 'LONG', stop_loss=100.049, take_profit=110.0)
+    assert reconciler.submit('BTC', 'LONG', stop_loss=100.049, take_profit=110.0)  # то же — no-op
+    result = reconciler.flush()[('BTC', 'LONG')]
+    assert exchange.calls == [('BTC', 100.04, 110.0, 'LONG')]
+    assert result['stop_loss'] == 100.04 and result['take_profit'] == 110.0
+
+    # Повтор того же расчёта после подтверждения — запросов нет
+    assert reconciler.submit('BTC', 'LONG', stop_loss=100.049, take_profit=110.0) is False
+    assert reconciler.flush() == {}
+    assert len(exchange.calls) == 1
+    assert reconciler.get_stats()['pending'] == 0
+
+
+def test_failed_update_is_retried():
+    exchange = FakeExchange(fail=1)
+    reconciler = TradingStopReconciler(exchange, hysteresis_ticks=1, max_attempts=3, retry_delay=0)
+    reconciler.observe('ETH', 'SHORT')
+
+    reconciler.submit('ETH', 'SHORT', stop_loss=2000.004)
+    assert reconciler.flush()[('ETH', 'SHORT')]['failed'] is True
+    result = reconciler.flush()[('ETH', 'SHORT')]
+    assert result['stop_loss'] == 2000.01  # стоп SHORT округляется вверх, от цены
+    assert [call[1] for call in exchange.calls] == [2000.01, 2000.01]
+    assert reconciler.acknowledged('ETH', 'SHORT')['stop_loss'] == 2000.01
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Процесс обучения: задания выполняются в долгоживущем процессе, ошибки
+возвращаются результатом; горячая подмена сохраняет объект предиктора;
+дочерний процесс не выполняет заново верхний уровень главного скрипта;
+незагрузившаяся модель не подменяет рабочую.
+"""
+
+import multiprocessing
+import sys
+import threading
+import time
+import types
+
+from bot_engine.ai.training_worker import (
+    TrainingWorker, get_model_version, guarded_by_model_lock, hot_swap_model,
+)
+from utils.spawn_main import spawn_main_module
+
+
+class _Predictor:
+    def __init__(self, weights):
+        self.weights = weights
+        self.scaler = weights
+        self._model_lock = threading.RLock()
+
+    def predict(self):
+        return self.weights
+
+    @guarded_by_model_lock
+    def predict_pair(self):
+        model = self.weights
+        time.sleep(0.05)
+        return model, self.scaler
+
+
+def test_hot_swap_keeps_identity():
+    live = _Predictor([1, 2])
+    holder = {'predictor': live}
+    version = hot_swap_model('test_predictor', live, _Predictor([3, 4]))
+
+    assert holder['predictor'] is live
+    assert live.predict() == [3, 4]
+    assert live.model_version_loaded == version == get_model_version('test_predictor')
+    assert hot_swap_model('test_predictor', live, _Predictor([5])) == version + 1
+
+
+def test_hot_swap_waits_for_running_prediction():
+    live = _Predictor('old')
+    lock = live._model_lock
+    results = []
+    reader = threading.Thread(target=lambda: results.append(live.predict_pair()))
+    reader.start()
+    time.sleep(0.01)
+    hot_swap_model('test_pair_predictor', live, _Predictor('new'))
+    reader.join()
+
+    assert results == [('old', 'old')]
+    assert live.predict_pair() == ('new', 'new')
+    assert live._model_lock is lock
+
+
+def test_worker_process_is_reused(tmp_path):
+    worker = TrainingWorker(log_path=str(tmp_path / 'worker.log'))
+    try:
+        first = worker.run('unknown', timeout=60)
+        assert first['success'] is False
+        assert 'unknown' in first['error']
+        pid = worker._process.pid
+
+        second = worker.run('unknown', timeout=60)
+        assert second['success'] is False
+        assert worker._process.pid == pid
+    finally:
+        worker.stop()
+    assert not worker.is_alive()
+
+
+def test_spawned_child_skips_main_script_top_level(tmp_path, monkeypatch):
+    marker = tmp_path / 'main_ran.txt'
+    script = tmp_path / 'fake_ai.py'
+    script.write_text(f"open({str(marker)!r}, 'a').write('x')\n", encoding='utf-8')
+    fake_main = types.ModuleType('__main__')
+    fake_main.__file__ = str(script)
+    fake_main.__spec__ = None
+    monkeypatch.setitem(sys.modules, '__main__', fake_main)
+    ctx = multiprocessing.get_context('spawn')
+
+    # Без подмены ребёнок выполняет верхний уровень главного скрипта
+    process = ctx.Process(target=time.sleep, args=(0,))
+    process.start()
+    process.join(60)
+    assert marker.read_text() == 'x'
+
+    with spawn_main_module('bot_engine.ai.training_worker'):
+        process = ctx.Process(target=time.sleep, args=(0,))
+        process.start()
+    process.join(60)
+    assert process.exitcode == 0
+    assert marker.read_text() == 'x'
+    assert sys.modules['__main__'] is fake_main
+
+
+def test_failed_load_does_not_replace_working_model(tmp_path):
+    from bot_engine.ai.auto_trainer import AutoTrainer
+    from bot_engine.ai.pattern_detector import PatternDetector
+
+    model_path = tmp_path / 'pattern.pkl'
+    model_path.write_bytes(b'not a pickle')
+    live = PatternDetector(model_path=str(model_path), scaler_path=str(tmp_path / 'scaler.pkl'))
+    assert live.model_loaded is False
+    working = live.model = object()
+
+    swapped = AutoTrainer._swap_in_fresh_model(None, 'test_pattern', live, AutoTrainer._load_fresh_pattern_detector)
+    assert swapped is False
+    assert live.model is working
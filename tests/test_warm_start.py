@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тёплый старт загрузчика: свежесть кэша свечей из БД проверяется по каждой монете,
+RSI пересчитывается по свечам, сигнал до первого раунда всегда WAIT.
+"""
+
+from bots_modules.continuous_data_loader import build_warm_coin, split_fresh_candles
+
+
+def _candles(count, last_open_sec, step_sec=60, in_ms=True):
+    candles = []
+    for i in range(count):
+        t = last_open_sec - (count - 1 - i) * step_sec
+        close = 100.0 + (i % 7) - (i % 3)
+        candles.append({'time': t * 1000 if in_ms else t, 'open': close, 'high': close + 1,
+                        'low': close - 1, 'close': close, 'volume': 10.0})
+    return candles
+
+
+def test_split_fresh_candles_per_symbol():
+    now = 1_800_000_000
+    stored = {
+        'FRESH': {'timeframe': '1m', 'candles': _candles(30, now - 30)},
+        'FRESH_SEC': {'timeframe': '1m', 'candles': _candles(30, now - 90, in_ms=False)},
+        'OLD': {'timeframe': '1m', 'candles': _candles(30, now - 600)},
+        'OTHER_TF': {'timeframe': '6h', 'candles': _candles(30, now - 30)},
+        'SHORT': {'timeframe': '1m', 'candles': _candles(5, now - 30)},
+    }
+    fresh, stale = split_fresh_candles(stored, '1m', now=now, max_stale_candles=2)
+    assert sorted(fresh) == ['FRESH', 'FRESH_SEC']
+    assert sorted(stale) == ['OLD', 'OTHER_TF', 'SHORT']
+
+
+def test_build_warm_coin_recalculates_rsi():
+    candles = _candles(40, 1_800_000_000)
+    stored = {'symbol': 'AAA', 'rsi1m': 99.0, 'trend1m': 'UP', 'signal': 'ENTER_SHORT', 'is_mature': True}
+    coin = build_warm_coin('AAA', candles, '1m', stored)
+    assert coin['rsi1m'] != 99.0 and 0 <= coin['rsi1m'] <= 100
+    assert coin['trend1m'] == 'UP'
+    assert coin['signal'] == 'WAIT'
+    assert coin['price'] == candles[-1]['close']
+    assert coin['is_mature'] is True
+    assert build_warm_coin('AAA', candles[:5], '1m') is None
@@ -2,10 +2,21 @@
 """
 Цветная система логирования для InfoBot
 """
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import re
 import sys
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 
+DUPLICATE_WINDOW_SEC = 5.0
+
+
 class LogLevelFilter(logging.Filter):
     """
     Фильтр для управления уровнями логирования в консоли.
@@ -67,6 +78,8 @@ class LogLevelFilter(logging.Filter):
         self.enabled_levels = set()
         # По умолчанию DEBUG не включен (скрываем шумные логи от библиотек)
         self.debug_enabled = False
+        self._decisions = {}
+        self._EXTERNAL_PREFIXES = tuple(self.EXTERNAL_LOGGERS)
         
         # Проверяем, что настройки не None и не пустые
         if level_settings is not None and level_settings != []:
@@ -143,105 +156,92 @@ class LogLevelFilter(logging.Filter):
             self.enabled_levels = all_levels
             self.debug_enabled = True
     
-    def filter(self, record):
+    def allows(self, logger_name, level_name):
         """
-        Фильтрует записи логов на основе настроек уровней
-        
-        Returns:
-            True если запись должна быть показана, False если нужно скрыть
+        Решение по имени логгера и уровню (без разбора сообщения).
+        Вычисляется один раз на пару (логгер, уровень) и кэшируется.
+        """
+        key = (logger_name, level_name)
+        decision = self._decisions.get(key)
+        if decision is None:
+            decision = True
+            # Всегда скрываем DEBUG от внешних библиотек, если DEBUG не включен явно
+            if level_name == 'DEBUG' and not self.debug_enabled and logger_name.startswith(self._EXTERNAL_PREFIXES):
+                decision = False
+            # Если уровень не включен, скрываем
+            elif self.enabled_levels and level_name not in self.enabled_levels:
+                decision = False
+            if len(self._decisions) < 4096:
+                self._decisions[key] = decision
+        return decision
+    
+    def filter_content(self, record):
+        """
+        Проверки текста сообщения (шум внешних библиотек, неформатированные %s).
+        Работает с шаблоном record.msg — сообщение не форматируется.
         """
-        level_name = record.levelname
-        logger_name = record.name if hasattr(record, 'name') else ''
+        message = record.msg if isinstance(record.msg, str) else None
+        if not message:
+            try:
+                message = str(record.msg)
+            except Exception:
+                return True
         
-        # Скрываем неформатированные сообщения из внешних библиотек (urllib3, pybit, flask-cors)
-        # Это проблема библиотек, а не нашего кода - они используют старый стиль форматирования
         try:
-            # КРИТИЧНО: Проверяем как отформатированное сообщение, так и исходное
-            # Некоторые библиотеки передают неформатированные строки в record.msg
-            message = None
-            if hasattr(record, 'msg') and isinstance(record.msg, str):
-                message = record.msg
-            if not message or '%s' not in message:
-                # Если в исходном сообщении нет %s, проверяем отформатированное
-                try:
-                    message = record.getMessage() if hasattr(record, 'getMessage') else str(record.msg)
-                except:
-                    message = str(record.msg) if hasattr(record, 'msg') else ''
-            
-            if isinstance(message, str) and message:
-                # Агрессивная проверка: скрываем ВСЕ сообщения с множественными неформатированными %s
-                # Это типичная проблема библиотек, которые логируют до форматирования
-                import re
-                
-                # Подсчитываем количество неформатированных %s (не %d, %f и т.д.)
-                unformatted_count = len(re.findall(r'%s(?!\w)', message))
-                
-                # Скрываем если:
-                # 1. Есть типичные паттерны неформатированных сообщений
-                # 2. Или 3+ неформатированных %s (явно неформатированное сообщение)
-                # 3. Или сообщение от внешних библиотек с 2+ неформатированными %s
-                # 4. Или сообщение содержит паттерн "%s %s %s" (типичный для urllib3)
-                has_unformatted = (
-                    '%s://%s:%s' in message or 
-                    '"%s %s %s"' in message or  # urllib3 паттерн: "%s %s %s"
-                    '%s %s %s' in message or
-                    'Starting new HTTPS connection' in message or 
-                    'Starting new HTTP connection' in message or
-                    'Creating converter from' in message or
-                    ('Configuring CORS' in message and '%s' in message) or
-                    'Settings CORS headers' in message or  # CORS логи с неформатированными %s
-                    'CORS request received' in message or  # CORS логи с неформатированными %s
-                    'Origin header matches' in message or  # CORS логи с неформатированными %s
-                    'CORS have been already evaluated, skipping' in message or  # flask-cors: повторяется на каждый запрос
+            # Скрываем неформатированные сообщения из внешних библиотек (urllib3, pybit, flask-cors)
+            # Это проблема библиотек, а не нашего кода - они используют старый стиль форматирования
+            if '%s' in message:
+                unformatted_count = len(_UNFORMATTED_RE.findall(message))
+                if (
                     unformatted_count >= 3 or  # Любое сообщение с 3+ неформатированными %s
-                    (unformatted_count >= 2 and logger_name.startswith(('urllib3', 'pybit', 'flask_cors', 'requests', 'werkzeug', 'flask', 'app')))
-                )
-                if has_unformatted:
-                    # Это неформатированное сообщение из внешней библиотеки - скрываем его
+                    '%s://%s:%s' in message or
+                    '%s %s %s' in message or  # urllib3 паттерн: "%s %s %s"
+                    ('Configuring CORS' in message) or
+                    (unformatted_count >= 2 and record.name.startswith(_UNFORMATTED_NOISY_LOGGERS)) or
+                    message.strip() in ('cache_hits: %s', 'cache_misses: %s')  # шум PyTorch
+                ):
                     return False
-        except:
-            pass  # Если не удалось проверить, пропускаем
-        
-        # Скрываем несущественные SSL ошибки при получении сетевого времени (DEBUG уровень)
-        # Это не критичные ошибки, которые не должны засорять логи
-        try:
-            message = record.getMessage() if hasattr(record, 'getMessage') else str(record.msg)
-            if isinstance(message, str) and level_name == 'DEBUG':
+            if _NOISE_RE.search(message):
+                return False
+            
+            # Скрываем несущественные SSL ошибки при получении сетевого времени (DEBUG уровень)
+            if record.levelno == logging.DEBUG:
                 message_lower = message.lower()
-                # Проверяем, является ли это SSL ошибкой при получении сетевого времени
-                if ('worldtimeapi' in message_lower or 'сетевое время' in message_lower or 'network time' in message_lower) and \
-                   ('ssl' in message_lower or 'sslerror' in message_lower or 'unexpected_eof' in message_lower or 'ssl: unexpected_eof' in message_lower):
-                    # Это несущественная SSL ошибка - скрываем её
-                    return False
+                if any(k in message_lower for k in ('worldtimeapi', 'сетевое время', 'network time')):
+                    try:
+                        message_lower = record.getMessage().lower()
+                    except Exception:
+                        pass
+                    if 'ssl' in message_lower or 'unexpected_eof' in message_lower:
+                        return False
         except Exception:
             pass  # Если не удалось проверить, пропускаем
-
-        # Скрываем шум PyTorch: FakeTensor cache stats, cache_hits/cache_misses (неформатированные %s)
-        try:
-            msg = (record.msg if hasattr(record, 'msg') and isinstance(record.msg, str) else None) or (record.getMessage() if hasattr(record, 'getMessage') else str(record.msg))
-            if isinstance(msg, str) and (
-                'FakeTensor cache stats' in msg or msg.strip() in ('cache_hits: %s', 'cache_misses: %s')
-            ):
-                return False
-        except Exception:
-            pass
-
-        # Всегда скрываем DEBUG от внешних библиотек, если DEBUG не включен явно
-        if level_name == 'DEBUG' and not self.debug_enabled:
-            for external_logger in self.EXTERNAL_LOGGERS:
-                if logger_name.startswith(external_logger):
-                    return False
-        
-        # Если уровни не настроены, разрешаем все (кроме уже отфильтрованных выше)
-        if not self.enabled_levels:
-            return True
-        
-        # КРИТИЧНО: Проверяем уровень записи
-        # Если уровень не включен, скрываем
-        if level_name not in self.enabled_levels:
-            return False
         
         return True
+    
+    def filter(self, record):
+        """
+        Фильтрует записи логов на основе настроек уровней
+        
+        Returns:
+            True если запись должна быть показана, False если нужно скрыть
+        """
+        return self.allows(record.name, record.levelname) and self.filter_content(record)
+
+
+# Предкомпилированные правила фильтра (раньше собирались на каждую запись)
+_UNFORMATTED_RE = re.compile(r'%s(?!\w)')
+_UNFORMATTED_NOISY_LOGGERS = ('urllib3', 'pybit', 'flask_cors', 'requests', 'werkzeug', 'flask', 'app')
+_NOISE_RE = re.compile('|'.join(re.escape(p) for p in (
+    'Starting new HTTPS connection',
+    'Starting new HTTP connection',
+    'Creating converter from',
+    'Settings CORS headers',  # CORS логи с неформатированными %s
+    'CORS request received',
+    'Origin header matches',
+    'CORS have been already evaluated, skipping',  # flask-cors: повторяется на каждый запрос
+    'FakeTensor cache stats',  # шум PyTorch
+)))
 
 
 class Colors:
@@ -319,6 +319,16 @@ def _get_timeframe_for_app_logger(logger_name):
         return ''
 
 
+_CATEGORY_RE = re.compile(r'^\[([A-Z_]+)\]\s*')
+_ANSI_CATEGORY_RE = re.compile(r'(\033\[[0-9;]*m)*\[([A-Z_]+)\]\s*')
+_NUMBER_RE = re.compile(r'(\d+\.?\d*)')
+_NUMBER_REPL = f'{Colors.BRIGHT_CYAN}\\1{Colors.RESET}'
+_SYMBOL_RE = re.compile(r'\b([A-Z]{2,10})\b')
+_SYMBOL_REPL = f'{Colors.BRIGHT_BLUE}\\1{Colors.RESET}'
+_PERCENT_RE = re.compile(r'(\d+\.?\d*%)')
+_PERCENT_REPL = f'{Colors.BRIGHT_YELLOW}\\1{Colors.RESET}'
+
+
 class FileFormatterWithTF(logging.Formatter):
     """Форматтер для файла: для логгеров BOTS, AI и APP добавляет префикс TF:X."""
     
@@ -438,17 +448,14 @@ class ColorFormatter(logging.Formatter):
         
         if isinstance(message, str):
             # Ищем категорию в формате [CATEGORY] в начале сообщения
-            import re
-            # Ищем категорию в начале сообщения (может быть с пробелами или без)
-            # Используем более точное регулярное выражение
-            match = re.search(r'^\[([A-Z_]+)\]\s*', message)
+            match = _CATEGORY_RE.match(message)
             if match:
                 category = match.group(1)
                 emoji = self.EMOJIS.get(category, '📝')
                 # Удаляем префикс категории из сообщения, чтобы избежать дубликата
                 # Удаляем [CATEGORY] и возможные пробелы после него
                 # Важно: удаляем ТОЛЬКО из начала сообщения
-                message_cleaned = re.sub(r'^\[([A-Z_]+)\]\s*', '', message, count=1).strip()
+                message_cleaned = message[match.end():].strip()
                 # Убеждаемся, что удалили именно этот префикс
                 if message_cleaned != message:
                     message = message_cleaned
@@ -469,12 +476,12 @@ class ColorFormatter(logging.Formatter):
         # ВАЖНО: Удаляем любые оставшиеся префиксы [CATEGORY] из сообщения
         # Это нужно для случаев, когда префиксы добавляются динамически
         if isinstance(message, str):
-            import re
             # Удаляем все префиксы [CATEGORY] из начала сообщения
             # (на случай, если они добавились после первоначальной обработки)
-            message = re.sub(r'^\[([A-Z_]+)\]\s*', '', message, count=1)
+            message = _CATEGORY_RE.sub('', message, count=1)
             # Также удаляем префиксы после ANSI-кодов
-            message = re.sub(r'(\033\[[0-9;]*m)*\[([A-Z_]+)\]\s*', r'\1', message, count=1)
+            if '[' in message:
+                message = _ANSI_CATEGORY_RE.sub(r'\1', message, count=1)
             
             # Специальная обработка для werkzeug логов - упрощаем формат
             if logger_name == 'werkzeug' or 'werkzeug' in logger_name.lower():
@@ -551,8 +558,7 @@ class ColorFormatter(logging.Formatter):
     def _highlight_important_parts(self, message):
         """Выделяет важные части сообщения цветом"""
         # Выделяем числа
-        import re
-        message = re.sub(r'(\d+\.?\d*)', f'{Colors.BRIGHT_CYAN}\\1{Colors.RESET}', message)
+        message = _NUMBER_RE.sub(_NUMBER_REPL, message)
         
         # Выделяем статусы
         statuses = ['running', 'idle', 'in_position_long', 'in_position_short', 'paused']
@@ -560,341 +566,335 @@ class ColorFormatter(logging.Formatter):
             message = message.replace(status, f'{Colors.BRIGHT_GREEN}{status}{Colors.RESET}')
         
         # Выделяем символы монет
-        message = re.sub(r'\b([A-Z]{2,10})\b', f'{Colors.BRIGHT_BLUE}\\1{Colors.RESET}', message)
+        message = _SYMBOL_RE.sub(_SYMBOL_REPL, message)
         
         # Выделяем проценты
-        message = re.sub(r'(\d+\.?\d*%)', f'{Colors.BRIGHT_YELLOW}\\1{Colors.RESET}', message)
+        message = _PERCENT_RE.sub(_PERCENT_REPL, message)
         
         return message
 
-def setup_color_logging(console_log_levels=None, enable_file_logging=True, log_file=None):
+class _DuplicateSuppressor:
+    """
+    Подавление повторов: одинаковое сообщение (логгер, уровень, текст) выводится
+    не чаще раза в window секунд; при следующем выводе добавляется счётчик пропущенных.
+    """
+
+    def __init__(self, window=DUPLICATE_WINDOW_SEC, max_keys=2048):
+        self.window = window
+        self.max_keys = max_keys
+        self._seen = OrderedDict()
+
+    def process(self, record):
+        """Возвращает запись для вывода или None, если это подавленный повтор."""
+        if self.window <= 0 or record.levelno >= logging.CRITICAL:
+            return record
+        try:
+            message = record.getMessage()
+        except Exception:
+            return record
+        # Сообщение уже отформатировано — форматтерам не нужно делать это повторно
+        record.msg = message
+        record.args = None
+
+        key = (record.name, record.levelno, message)
+        entry = self._seen.get(key)
+        if entry is not None and record.created - entry[0] < self.window:
+            entry[1] += 1
+            return None
+
+        suppressed = entry[1] if entry is not None else 0
+        self._seen[key] = [record.created, 0]
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_keys:
+            self._seen.popitem(last=False)
+        if suppressed:
+            record.msg = f"{message} (повторялось ещё {suppressed} раз)"
+        return record
+
+
+class _LogListener(logging.handlers.QueueListener):
+    """Поток вывода логов: проверки текста, подавление повторов, форматирование и запись."""
+
+    def __init__(self, log_queue, level_filter, suppressor, *handlers):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.level_filter = level_filter
+        self.suppressor = suppressor
+
+    def handle(self, record):
+        if not self.level_filter.filter_content(record):
+            return
+        record = self.suppressor.process(record)
+        if record is None:
+            return
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                try:
+                    handler.handle(record)
+                except Exception:
+                    handler.handleError(record)
+
+
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Корневой обработчик: в вызывающем (торговом) потоке только проверка уровня
+    по кэшу и постановка записи в очередь. Форматирование — в потоке слушателя.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.listener = None
+
+    def prepare(self, record):
+        # Изменяемые аргументы (dict/list/объекты) форматируем сразу — к моменту вывода они могут измениться
+        # (словарь-аргумент LogRecord хранит как сам args — он тоже изменяемый)
+        args = record.args
+        if args and (isinstance(args, dict) or not all(isinstance(value, _IMMUTABLE_ARG_TYPES) for value in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def emit(self, record):
+        listener = self.listener
+        if listener is not None and listener._thread is None:
+            # Слушатель остановлен (выход из процесса) — пишем синхронно
+            listener.handle(self.prepare(record))
+            return
+        super().emit(record)
+
+
+class _LevelGate(logging.Filter):
+    """Фильтр уровня для корневого обработчика — делегирует текущему LogLevelFilter пайплайна."""
+
+    def filter(self, record):
+        level_filter = _pipeline.get('level_filter')
+        return level_filter is None or level_filter.allows(record.name, record.levelname)
+
+
+class _PipelineFilter(logging.Filter):
+    """Полный фильтр для сторонних обработчиков, добавленных в логгеры напрямую."""
+
+    def filter(self, record):
+        level_filter = _pipeline.get('level_filter')
+        return level_filter is None or level_filter.filter(record)
+
+
+# Состояние пайплайна процесса: очередь, обработчик, слушатель, текущий фильтр
+_pipeline = {}
+_pipeline_lock = threading.RLock()
+
+
+def _start_listener(handlers):
+    """Создаёт очередь и поток слушателя с указанными обработчиками."""
+    log_queue = queue.SimpleQueue()
+    listener = _LogListener(log_queue, _pipeline['level_filter'], _pipeline['suppressor'], *handlers)
+    queue_handler = _pipeline.get('queue_handler')
+    if queue_handler is None:
+        queue_handler = _QueueHandler(log_queue)
+        queue_handler.addFilter(_LevelGate())
+        _pipeline['queue_handler'] = queue_handler
+    else:
+        queue_handler.queue = log_queue
+    queue_handler.listener = listener
+    _pipeline['listener'] = listener
+    listener.start()
+    return listener
+
+
+def _stop_listener():
+    listener = _pipeline.get('listener')
+    if listener is not None and listener._thread is not None:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+
+
+def _restart_listener_after_fork():
+    """В дочернем процессе (fork) поток слушателя не существует — запускаем новый."""
+    with _pipeline_lock:
+        listener = _pipeline.get('listener')
+        if listener is None:
+            return
+        listener._thread = None
+        _start_listener(listener.handlers)
+
+
+def _add_listener_handler(handler):
+    listener = _pipeline['listener']
+    listener.handlers = listener.handlers + (handler,)
+
+
+def setup_color_logging(console_log_levels=None, enable_file_logging=True, log_file=None,
+                        duplicate_window=DUPLICATE_WINDOW_SEC):
     """
     Настройка цветного логирования
     
+    Записи из всех логгеров попадают в корневой QueueHandler: в вызывающем потоке
+    выполняется только проверка уровня (кэш по имени логгера), остальное — проверки
+    текста, подавление повторов, форматирование и запись в консоль/файл —
+    в фоновом потоке слушателя.
+    
     Args:
         console_log_levels: Список настроек уровней логирования для консоли, например:
             ['+INFO', '-WARNING', '+ERROR', '-DEBUG']
             Если None - все уровни разрешены
         enable_file_logging: Включить ли файловое логирование с ротацией (по умолчанию True)
         log_file: Путь к файлу лога (по умолчанию определяется автоматически)
+        duplicate_window: Окно подавления одинаковых сообщений, сек (0 — не подавлять)
     """
-    # Явно используем глобальный sys
-    import sys as _sys
-    sys = _sys
-    
-    # Создаем логгер
     logger = logging.getLogger()
     # Устанавливаем минимальный уровень, чтобы все сообщения доходили до фильтра
     logger.setLevel(logging.DEBUG)
     
-    # КРИТИЧНО: Добавляем файловый обработчик с ротацией (10MB)
-    if enable_file_logging:
-        # Определяем файл лога автоматически на основе имени скрипта
-        if log_file is None:
-            script_name = sys.argv[0] if sys.argv else 'app'
-            if 'ai.py' in script_name or 'ai' in script_name.lower():
-                log_file = 'logs/ai.log'
-            elif 'bots.py' in script_name or 'bots' in script_name.lower():
-                log_file = 'logs/bots.log'
-            else:
-                log_file = 'logs/app.log'
-        
-        # Проверяем, нет ли уже файлового обработчика для этого файла
-        has_file_handler = False
-        for handler in logger.handlers:
-            if isinstance(handler, logging.FileHandler):
-                handler_file = getattr(handler, 'baseFilename', '')
-                if handler_file and (handler_file.endswith(log_file) or log_file in handler_file):
-                    has_file_handler = True
-                    break
-        
-        if not has_file_handler:
-            try:
-                from utils.log_rotation import RotatingFileHandlerWithSizeLimit
-                import os
-                # Создаем директорию logs если её нет
-                os.makedirs(os.path.dirname(log_file), exist_ok=True)
-                file_handler = RotatingFileHandlerWithSizeLimit(
-                    filename=log_file,
-                    max_bytes=10 * 1024 * 1024,  # 10MB
-                    backup_count=0,  # Перезаписываем файл
-                    encoding='utf-8'
-                )
-                file_handler.setLevel(logging.DEBUG)
-                # Форматтер для файла (без цветов; для BOTS добавляется префикс TF:X)
-                file_formatter = FileFormatterWithTF('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-                file_handler.setFormatter(file_formatter)
-                logger.addHandler(file_handler)
-            except Exception as e:
-                # Если не удалось добавить файловый обработчик, продолжаем без него
-                sys.stderr.write(f"[COLOR_LOGGER] ⚠️ Не удалось добавить файловый обработчик: {e}\n")
-    
-    # Проверяем, есть ли уже консольный обработчик с нашим фильтром
-    # Если есть, обновляем фильтр, но не пересоздаём обработчик
-    has_our_handler = False
-    for handler in logger.handlers:
-        if isinstance(handler, logging.StreamHandler) and handler.stream == sys.stdout:
-            # Проверяем, есть ли наш фильтр
-            for filter_obj in handler.filters:
-                if isinstance(filter_obj, LogLevelFilter):
-                    has_our_handler = True
-                    # Обновляем настройки фильтра, если они изменились
-                    # Создаём новый фильтр с новыми настройками
-                    new_filter = LogLevelFilter(console_log_levels)
-                    # Заменяем старый фильтр на новый
-                    handler.removeFilter(filter_obj)
-                    handler.addFilter(new_filter)
-                    break
-    
-    # КРИТИЧНО: Даже если есть наш обработчик, нужно удалить ВСЕ другие обработчики без фильтра
-    # Это гарантирует, что все логи идут только через наш фильтр
-    for handler in logger.handlers[:]:
-        if isinstance(handler, logging.StreamHandler) and handler.stream == sys.stdout:
-            # Проверяем, есть ли наш фильтр
-            has_our_filter = any(isinstance(f, LogLevelFilter) for f in handler.filters)
-            if not has_our_filter:
-                logger.removeHandler(handler)
-    
-    # Если обработчик уже есть и фильтр обновлён, не пересоздаём обработчик
-    # КРИТИЧНО: Всё равно обновляем monkey patch callHandlers с текущим console_log_levels,
-    # иначе патч остаётся от первого вызова (например из imports_and_globals с None) и INFO показывается
-    if has_our_handler:
-        # Удаляем обработчики без фильтра из других логгеров
-        for existing_logger_name in logging.Logger.manager.loggerDict:
-            existing_logger = logging.getLogger(existing_logger_name)
+    # Старый патч callHandlers (фильтр на каждую запись в вызывающем потоке) больше не нужен
+    if hasattr(logging.Logger, '_original_callHandlers'):
+        logging.Logger.callHandlers = logging.Logger._original_callHandlers
+        del logging.Logger._original_callHandlers
+    
+    with _pipeline_lock:
+        # Новые настройки применяются ко всем обработчикам пайплайна сразу
+        _pipeline['level_filter'] = LogLevelFilter(console_log_levels)
+        suppressor = _pipeline.get('suppressor')
+        if suppressor is None:
+            _pipeline['suppressor'] = _DuplicateSuppressor(duplicate_window)
+        else:
+            suppressor.window = duplicate_window
+        
+        listener = _pipeline.get('listener')
+        if listener is None:
+            # Создаем консольный обработчик
+            # На Windows используем errors='replace' для обработки эмодзи
+            console_handler = logging.StreamHandler(sys.stdout)
+            # Устанавливаем кодировку для Windows консоли
+            if sys.platform == 'win32' and hasattr(console_handler.stream, 'reconfigure'):
+                try:
+                    console_handler.stream.reconfigure(encoding='utf-8', errors='replace')
+                except:
+                    pass  # Если не удалось, используем стандартную кодировку
+            console_handler.setLevel(logging.DEBUG)
+            console_handler.setFormatter(ColorFormatter())
+            
+            listener = _start_listener((console_handler,))
+            atexit.register(_stop_listener)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=_restart_listener_after_fork)
+        else:
+            listener.level_filter = _pipeline['level_filter']
+        
+        # КРИТИЧНО: Добавляем файловый обработчик с ротацией (10MB)
+        if enable_file_logging:
+            # Определяем файл лога автоматически на основе имени скрипта
+            if log_file is None:
+                script_name = sys.argv[0] if sys.argv else 'app'
+                if 'ai.py' in script_name or 'ai' in script_name.lower():
+                    log_file = 'logs/ai.log'
+                elif 'bots.py' in script_name or 'bots' in script_name.lower():
+                    log_file = 'logs/bots.log'
+                else:
+                    log_file = 'logs/app.log'
+            
+            # Проверяем, нет ли уже файлового обработчика для этого файла
+            has_file_handler = False
+            for handler in tuple(listener.handlers) + tuple(logger.handlers):
+                if isinstance(handler, logging.FileHandler):
+                    handler_file = getattr(handler, 'baseFilename', '')
+                    if handler_file and (handler_file.endswith(log_file) or log_file in handler_file):
+                        has_file_handler = True
+                        break
+            
+            if not has_file_handler:
+                try:
+                    from utils.log_rotation import RotatingFileHandlerWithSizeLimit
+                    # Создаем директорию logs если её нет
+                    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+                    file_handler = RotatingFileHandlerWithSizeLimit(
+                        filename=log_file,
+                        max_bytes=10 * 1024 * 1024,  # 10MB
+                        backup_count=0,  # Перезаписываем файл
+                        encoding='utf-8'
+                    )
+                    file_handler.setLevel(logging.DEBUG)
+                    # Форматтер для файла (без цветов; для BOTS добавляется префикс TF:X)
+                    file_formatter = FileFormatterWithTF('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+                    file_handler.setFormatter(file_formatter)
+                    # Файл пишется первым, как и раньше (до консоли)
+                    listener.handlers = (file_handler,) + tuple(listener.handlers)
+                except Exception as e:
+                    # Если не удалось добавить файловый обработчик, продолжаем без него
+                    sys.stderr.write(f"[COLOR_LOGGER] ⚠️ Не удалось добавить файловый обработчик: {e}\n")
+        
+        queue_handler = _pipeline['queue_handler']
+        if queue_handler not in logger.handlers:
+            logger.addHandler(queue_handler)
+    
+    # КРИТИЧНО: Удаляем консольные обработчики из ВСЕХ логгеров (включая корневой):
+    # в консоль пишет только слушатель пайплайна. Остальным обработчикам добавляем фильтр уровней.
+    for existing_logger in [logger] + [logging.getLogger(name) for name in list(logging.Logger.manager.loggerDict)]:
+        try:
             for handler in existing_logger.handlers[:]:
-                if isinstance(handler, logging.StreamHandler) and handler.stream == sys.stdout:
-                    has_our_filter = any(isinstance(f, LogLevelFilter) for f in handler.filters)
-                    if not has_our_filter:
-                        existing_logger.removeHandler(handler)
-            existing_logger.propagate = True
-            existing_logger.setLevel(logging.DEBUG)
-        # Обновляем патч callHandlers, чтобы использовались текущие console_log_levels
-        def _patched_callHandlers_existing(self, record):
-            level_filter = LogLevelFilter(console_log_levels)
-            if not level_filter.filter(record):
-                return
-            return logging.Logger._original_callHandlers(self, record)
-        if hasattr(logging.Logger, '_original_callHandlers'):
-            logging.Logger.callHandlers = _patched_callHandlers_existing
-        return logger
-    
-    # КРИТИЧНО: Удаляем ВСЕ консольные обработчики БЕЗ нашего фильтра из ВСЕХ логгеров
-    # Это нужно, чтобы гарантировать, что все логи проходят через наш фильтр
-    for handler in logger.handlers[:]:
-        if isinstance(handler, logging.StreamHandler) and handler.stream == sys.stdout:
-            # Проверяем, есть ли наш фильтр
-            has_our_filter = any(isinstance(f, LogLevelFilter) for f in handler.filters)
-            if not has_our_filter:
-                logger.removeHandler(handler)
-    
-    # КРИТИЧНО: Удаляем консольные обработчики из ВСЕХ существующих логгеров
-    # Это гарантирует, что все логи идут через корневой логгер с нашим фильтром
-    for existing_logger_name in logging.Logger.manager.loggerDict:
-        existing_logger = logging.getLogger(existing_logger_name)
-        # Удаляем все StreamHandler'ы без нашего фильтра
-        for handler in existing_logger.handlers[:]:
-            if isinstance(handler, logging.StreamHandler) and handler.stream == sys.stdout:
-                has_our_filter = any(isinstance(f, LogLevelFilter) for f in handler.filters)
-                if not has_our_filter:
+                if handler is _pipeline['queue_handler']:
+                    continue
+                if isinstance(handler, logging.StreamHandler) and getattr(handler, 'stream', None) in (sys.stdout, sys.stderr):
                     existing_logger.removeHandler(handler)
-        # Убеждаемся, что все логгеры пропагируют в корневой
-        existing_logger.propagate = True
-        existing_logger.setLevel(logging.DEBUG)
-    
-    # Создаем консольный обработчик
-    # На Windows используем errors='replace' для обработки эмодзи
-    console_handler = logging.StreamHandler(sys.stdout)
-    # Устанавливаем кодировку для Windows консоли
-    if sys.platform == 'win32' and hasattr(console_handler.stream, 'reconfigure'):
-        try:
-            console_handler.stream.reconfigure(encoding='utf-8', errors='replace')
-        except:
-            pass  # Если не удалось, используем стандартную кодировку
-    console_handler.setLevel(logging.DEBUG)  # Устанавливаем минимальный уровень для обработчика
-    
-    # Применяем фильтр уровней
-    # Создаем фильтр всегда (даже для пустого списка или None - это означает "все уровни разрешены")
-    level_filter = LogLevelFilter(console_log_levels)
-    console_handler.addFilter(level_filter)
-    
-    # Устанавливаем цветной форматтер
-    formatter = ColorFormatter()
-    console_handler.setFormatter(formatter)
-    
-    # Добавляем обработчик к логгеру
-    logger.addHandler(console_handler)
-    
-    # ОТЛАДКА: Проверяем, что обработчик добавлен (только для отладки, можно убрать)
-    # sys.stderr.write(f"[COLOR_LOGGER] Обработчик добавлен, всего handlers: {len(logger.handlers)}\n")
-    # sys.stderr.write(f"[COLOR_LOGGER] enabled_levels: {level_filter.enabled_levels}\n")
-    # sys.stderr.write(f"[COLOR_LOGGER] debug_enabled: {level_filter.debug_enabled}\n")
-    
-    # Настраиваем уровни для внешних логгеров, чтобы они не шумели
-    # Определяем, какие уровни разрешены
-    allowed_levels = set()
-    if level_filter and level_filter.enabled_levels:
-        allowed_levels = level_filter.enabled_levels
-    else:
-        # Если фильтр не настроен, разрешаем все уровни
-        allowed_levels = {'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'}
-    
-    # Настраиваем уровни для внешних библиотек
-    external_loggers = [
-        'urllib3',
-        'urllib3.connectionpool',
-        'urllib3.util',
-        'urllib3.poolmanager',
-        'pybit',
-        'pybit._http_manager',
-        'requests',
-        'requests.packages.urllib3',
-        'httpcore',
-        'httpx',
-        'tensorflow',
-        'tensorflow.python',
-        'tensorflow.core',
-        'tensorflow._api',
-        'pandas',
-        'pandas.io',
-        'pandas.core',
-        'pandas.core.dtypes',
-        'pandas.core.dtypes.cast',
-        'flask_cors',
-        'flask_cors.core',
-        'werkzeug',
-        'flask',
-        'flask.app',
-    ]
-    
-    # Определяем минимальный разрешенный уровень
-    level_priority = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40, 'CRITICAL': 50}
-    min_level = min([level_priority.get(level, 50) for level in allowed_levels], default=50)
-    
-    # Устанавливаем уровень для внешних логгеров
-    for logger_name in external_loggers:
-        external_logger = logging.getLogger(logger_name)
-        # НЕ устанавливаем уровень здесь - оставляем DEBUG, чтобы сообщения доходили до фильтра
-        # Фильтрация происходит через LogLevelFilter в обработчике
-        # Убеждаемся, что они используют корневой логгер (propagate=True)
-        external_logger.propagate = True
-        # Удаляем все обработчики из внешних логгеров, чтобы они шли только через корневой логгер с фильтром
-        for handler in external_logger.handlers[:]:
-            external_logger.removeHandler(handler)
-    
-    # Также настраиваем уровни для наших логгеров
-    our_loggers = [
-        'exchanges.exchange_factory',
-        'exchanges',
-        'root',
-        'app',
-        'BotsService',
-        'API.AI',
-        'AI.Main',
-        'bot_engine.bot_history',
-    ]
+                elif not any(isinstance(f, _PipelineFilter) for f in handler.filters):
+                    handler.addFilter(_PipelineFilter())
+            if existing_logger is not logger:
+                # Убеждаемся, что все логгеры пропагируют в корневой
+                existing_logger.propagate = True
+                existing_logger.setLevel(logging.DEBUG)
+        except Exception:
+            pass  # Игнорируем ошибки при удалении обработчиков
     
-    for logger_name in our_loggers:
+    # Наши логгеры и логгеры внешних библиотек: DEBUG и propagate=True, чтобы сообщения
+    # доходили до корневого обработчика. Фильтрация — через LogLevelFilter пайплайна.
+    for logger_name in ('exchanges.exchange_factory', 'exchanges', 'root', 'app', 'BotsService',
+                        'API.AI', 'AI.Main', 'bot_engine.bot_history'):
         our_logger = logging.getLogger(logger_name)
-        # НЕ удаляем обработчики - пусть они остаются, если есть
-        # НЕ устанавливаем уровень здесь - оставляем DEBUG, чтобы сообщения доходили до фильтра
-        # Фильтрация происходит через LogLevelFilter в обработчике
-        # КРИТИЧНО: propagate=True, чтобы сообщения шли в корневой логгер с фильтром
         our_logger.propagate = True
         our_logger.setLevel(logging.DEBUG)
     
-    # НЕ устанавливаем уровень корневого логгера на min_level,
-    # так как это предотвратит создание сообщений ниже этого уровня,
-    # и фильтр не сможет их обработать.
-    # Фильтрация происходит через LogLevelFilter в обработчике.
-    
     # КРИТИЧНО: Перехватываем создание новых обработчиков через monkey patching
-    # Это гарантирует, что все новые обработчики будут проверяться на наличие нашего фильтра
-    # Сохраняем оригинальную функцию только один раз (если еще не сохранена)
+    # Консольные обработчики не добавляются (консоль — только через пайплайн),
+    # остальным добавляется фильтр уровней
     if not hasattr(logging.Logger, '_original_add_handler'):
         logging.Logger._original_add_handler = logging.Logger.addHandler
     
     def _patched_add_handler(self, handler):
-        """Перехватывает добавление обработчиков и удаляет те, что без нашего фильтра"""
-        # Если это StreamHandler для stdout без нашего фильтра - не добавляем его
+        """Перехватывает добавление обработчиков"""
         if isinstance(handler, logging.StreamHandler):
-            # Проверяем, что это stdout или stderr (оба идут в консоль)
             stream = getattr(handler, 'stream', None)
             if stream in (sys.stdout, sys.stderr):
                 has_our_filter = any(isinstance(f, LogLevelFilter) for f in handler.filters)
                 if not has_our_filter:
                     # Не добавляем обработчик без нашего фильтра
                     return
-        # Иначе добавляем как обычно
+        if not isinstance(handler, _QueueHandler) and not any(isinstance(f, _PipelineFilter) for f in handler.filters):
+            handler.addFilter(_PipelineFilter())
         return logging.Logger._original_add_handler(self, handler)
     
-    # Применяем monkey patch только если еще не применен
-    if logging.Logger.addHandler != _patched_add_handler:
-        logging.Logger.addHandler = _patched_add_handler
-    
-    # КРИТИЧНО: Также перехватываем callHandlers для дополнительной защиты
-    if not hasattr(logging.Logger, '_original_callHandlers'):
-        logging.Logger._original_callHandlers = logging.Logger.callHandlers
-    
-    def _patched_callHandlers(self, record):
-        """Перехватывает вызов обработчиков и фильтрует записи без нашего фильтра"""
-        # КРИТИЧНО: Создаем фильтр один раз для всех проверок
-        level_filter = LogLevelFilter(console_log_levels)
-        
-        # Проверяем, есть ли хотя бы один обработчик с нашим фильтром
-        has_our_handler = False
-        handlers_to_remove = []
-        
-        for handler in self.handlers:
-            if isinstance(handler, logging.StreamHandler):
-                stream = getattr(handler, 'stream', None)
-                if stream in (sys.stdout, sys.stderr):
-                    has_our_filter = any(isinstance(f, LogLevelFilter) for f in handler.filters)
-                    if has_our_filter:
-                        has_our_handler = True
-                    else:
-                        # Обработчик без нашего фильтра - помечаем для удаления
-                        handlers_to_remove.append(handler)
-        
-        # Удаляем обработчики без нашего фильтра
-        for handler in handlers_to_remove:
-            try:
-                self.removeHandler(handler)
-            except:
-                pass
-        
-        # КРИТИЧНО: Фильтруем запись ПЕРЕД вызовом обработчиков
-        if not level_filter.filter(record):
-            # Запись отфильтрована - не вызываем обработчики
-            return
-        
-        # Если есть наш обработчик, вызываем оригинальный метод (он применит фильтры)
-        if has_our_handler:
-            return logging.Logger._original_callHandlers(self, record)
-        else:
-            # Если нет нашего обработчика, но запись прошла фильтр, вызываем оригинальный метод
-            return logging.Logger._original_callHandlers(self, record)
-    
-    # Применяем monkey patch для callHandlers
-    if logging.Logger.callHandlers != _patched_callHandlers:
-        logging.Logger.callHandlers = _patched_callHandlers
+    logging.Logger.addHandler = _patched_add_handler
     
-    # Финальная проверка: удаляем все обработчики без фильтра еще раз
-    # (на случай если они были созданы между проверками)
-    for existing_logger_name in list(logging.Logger.manager.loggerDict.keys()):
+    return logger
+
+
+def flush_logs(timeout=5.0):
+    """Дожидается вывода всех записей из очереди (для тестов и перед завершением)."""
+    listener = _pipeline.get('listener')
+    if listener is None or listener._thread is None:
+        return
+    deadline = time.time() + timeout
+    log_queue = listener.queue
+    while not log_queue.empty() and time.time() < deadline:
+        time.sleep(0.005)
+    for handler in listener.handlers:
         try:
-            existing_logger = logging.getLogger(existing_logger_name)
-            for handler in existing_logger.handlers[:]:
-                if isinstance(handler, logging.StreamHandler):
-                    stream = getattr(handler, 'stream', None)
-                    if stream in (sys.stdout, sys.stderr):
-                        has_our_filter = any(isinstance(f, LogLevelFilter) for f in handler.filters)
-                        if not has_our_filter:
-                            existing_logger.removeHandler(handler)
+            handler.flush()
         except Exception:
-            pass  # Игнорируем ошибки при удалении обработчиков
-    
-    return logger
+            pass
+
 
 if __name__ == "__main__":
     # Тест цветного логирования
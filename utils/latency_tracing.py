@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+Трассировка задержек пути входа в позицию: вложенные спаны, гистограммы по этапам,
+лог медленных путей.
+
+    with span('auto_bot.entry', trace_root=True, symbol=symbol):
+        ...
+
+    @traced('exchange.place_order')
+    def place_order(...): ...
+
+- текущий спан хранится в contextvars: вложенные вызовы в одном потоке становятся
+  дочерними автоматически; для передачи в пул потоков — propagate_context(func);
+- длительность каждого спана попадает в гистограмму своего этапа
+  (render_prometheus() — текстовый формат Prometheus для /api/bots/metrics);
+- спан, помеченный trace_root=True (путь входа), дольше SLOW_PATH_LOG_MS пишется
+  в лог 'LatencyTrace' деревом этапов (одинаковые дочерние этапы агрегируются);
+  спаны без родителя без этой пометки (вызовы вне пути входа) попадают только в гистограммы.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger('LatencyTrace')
+
+# Границы корзин гистограммы, секунды
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_SLOW_PATH_MS = 2000
+# Один и тот же медленный путь (этап + символ) пишется в лог не чаще раза в интервал
+SLOW_PATH_LOG_INTERVAL = 60.0
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('latency_span', default=None)
+
+
+class Span:
+    """Замер одного этапа: имя, атрибуты, длительность, дочерние этапы"""
+
+    __slots__ = ('name', 'attrs', 'parent', 'children', 'started', 'duration', 'error', 'thread', 'trace_root', '_lock')
+
+    def __init__(self, name: str, parent: Optional['Span'], attrs: Dict[str, Any], trace_root: bool):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.children: List['Span'] = []
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+        self.trace_root = trace_root
+        self._lock = threading.Lock()
+
+    def add_child(self, child: 'Span') -> None:
+        with self._lock:
+            self.children.append(child)
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count', 'errors')
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool) -> None:
+        index = len(HISTOGRAM_BUCKETS)
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.total += seconds
+        self.count += 1
+        if error:
+            self.errors += 1
+
+
+_histograms: Dict[str, _Histogram] = {}
+_histograms_lock = threading.Lock()
+_slow_logged: Dict[tuple, list] = {}  # (этап, символ) -> [время последней записи, пропущено]
+
+
+def _slow_path_threshold_ms() -> float:
+    try:
+        from bot_engine.config_loader import SystemConfig
+        return float(getattr(SystemConfig, 'SLOW_PATH_LOG_MS', DEFAULT_SLOW_PATH_MS))
+    except Exception:
+        return DEFAULT_SLOW_PATH_MS
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, trace_root: bool = False, **attrs):
+    """Замер этапа; вложенные span() в этом контексте становятся дочерними"""
+    parent = _current_span.get()
+    current = Span(name, parent, attrs, trace_root)
+    if parent is not None:
+        parent.add_child(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        current.duration = time.perf_counter() - current.started
+        _observe(current)
+
+
+def traced(name: str):
+    """Декоратор: весь вызов функции — спан с именем name"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate_context(func: Callable, span_name: Optional[str] = None) -> Callable:
+    """
+    Оборачивает func для запуска в другом потоке с текущим спаном в качестве родителя
+    (контекст копируется на каждый вызов — одна обёртка безопасна в нескольких потоках).
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        if span_name:
+            def call():
+                with span(span_name):
+                    return func(*args, **kwargs)
+        else:
+            def call():
+                return func(*args, **kwargs)
+        return context.copy().run(call)
+
+    return run
+
+
+def _observe(finished: Span) -> None:
+    with _histograms_lock:
+        histogram = _histograms.get(finished.name)
+        if histogram is None:
+            histogram = _histograms[finished.name] = _Histogram()
+        histogram.observe(finished.duration, finished.error is not None)
+    if finished.trace_root:
+        threshold_ms = _slow_path_threshold_ms()
+        if threshold_ms > 0 and finished.duration * 1000 >= threshold_ms:
+            key = (finished.name, finished.attrs.get('symbol'))
+            now = time.monotonic()
+            with _histograms_lock:
+                state = _slow_logged.setdefault(key, [0.0, 0])
+                if now - state[0] < SLOW_PATH_LOG_INTERVAL:
+                    state[1] += 1
+                    return
+                suppressed, state[0], state[1] = state[1], now, 0
+            try:
+                text = format_span_tree(finished)
+                if suppressed:
+                    text += f"\n  (ещё {suppressed} медленных повторов за последние {SLOW_PATH_LOG_INTERVAL:.0f}с не показаны)"
+                logger.warning(text)
+            except Exception:
+                pass
+
+
+def format_span_tree(root: Span, max_depth: int = 6) -> str:
+    """Дерево этапов медленного пути; одноимённые дочерние этапы агрегируются (N×, сумма, максимум)"""
+    attrs = ' '.join(f"{k}={v}" for k, v in root.attrs.items())
+    lines = [f"🐢 Медленный путь {root.name} {attrs}: {root.duration * 1000:.0f} мс".rstrip()]
+
+    def walk(node: Span, depth: int) -> None:
+        if depth > max_depth:
+            return
+        with node._lock:
+            children = list(node.children)
+        groups: Dict[str, List[Span]] = {}
+        for child in children:
+            groups.setdefault(child.name, []).append(child)
+        for name, spans in groups.items():
+            done = [s.duration for s in spans if s.duration is not None]
+            total_ms = sum(done) * 1000
+            errors = sum(1 for s in spans if s.error)
+            note = f" ошибок={errors}" if errors else ''
+            if len(spans) == 1:
+                child = spans[0]
+                child_attrs = ' '.join(f"{k}={v}" for k, v in child.attrs.items())
+                thread_note = f" [{child.thread}]" if child.thread != node.thread else ''
+                duration = f"{total_ms:.0f} мс" if done else 'не завершён'
+                lines.append(f"{'  ' * depth}└ {name} {duration}{note}{thread_note} {child_attrs}".rstrip())
+            else:
+                max_ms = max(done) * 1000 if done else 0.0
+                lines.append(f"{'  ' * depth}└ {name} {len(spans)}× сумма {total_ms:.0f} мс, макс {max_ms:.0f} мс{note}")
+            if len(spans) == 1:
+                walk(spans[0], depth + 1)
+
+    walk(root, 1)
+    return "\n".join(lines)
+
+
+def get_stage_stats() -> Dict[str, Dict[str, Any]]:
+    """Сводка по этапам: число вызовов, ошибок, среднее, корзины"""
+    with _histograms_lock:
+        return {
+            name: {
+                'count': h.count,
+                'errors': h.errors,
+                'avg_ms': round(h.total * 1000 / h.count, 2) if h.count else 0.0,
+                'buckets': list(h.counts),
+            }
+            for name, h in _histograms.items()
+        }
+
+
+def reset_metrics() -> None:
+    with _histograms_lock:
+        _histograms.clear()
+        _slow_logged.clear()
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def render_prometheus(extra_lines: Optional[List[str]] = None) -> str:
+    """Гистограммы этапов в текстовом формате Prometheus (exposition format 0.0.4)"""
+    with _histograms_lock:
+        snapshot = {name: (list(h.counts), h.total, h.count, h.errors) for name, h in _histograms.items()}
+    lines = [
+        '# HELP infobot_stage_duration_seconds Длительность этапов пути входа в позицию',
+        '# TYPE infobot_stage_duration_seconds histogram',
+    ]
+    for name in sorted(snapshot):
+        counts, total, count, _errors = snapshot[name]
+        cumulative = 0
+        for bound, bucket_count in zip(HISTOGRAM_BUCKETS, counts):
+            cumulative += bucket_count
+            lines.append(f'infobot_stage_duration_seconds_bucket{{stage="{name}",le="{_format_bound(bound)}"}} {cumulative}')
+        lines.append(f'infobot_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+        lines.append(f'infobot_stage_duration_seconds_sum{{stage="{name}"}} {total:.6f}')
+        lines.append(f'infobot_stage_duration_seconds_count{{stage="{name}"}} {count}')
+    lines.append('# HELP infobot_stage_errors_total Этапы, завершившиеся исключением')
+    lines.append('# TYPE infobot_stage_errors_total counter')
+    for name in sorted(snapshot):
+        lines.append(f'infobot_stage_errors_total{{stage="{name}"}} {snapshot[name][3]}')
+    if extra_lines:
+        lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
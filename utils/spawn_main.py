@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Запуск spawn-процессов без повторного выполнения главного скрипта.
+
+При start_method='spawn' (на Windows — всегда) дочерний процесс заново выполняет
+верхний уровень главного скрипта (ai.py, bots.py) как __mp_main__: проверку
+PyTorch, фоновые задания запуска, настройку логирования, лицензионный модуль.
+Пока активен spawn_main_module(name), главным модулем для запускаемых дочерних
+процессов считается лёгкий модуль name — ребёнок импортирует только его.
+
+    with spawn_main_module('bot_engine.ai.training_worker'):
+        process.start()
+"""
+from __future__ import annotations
+
+import importlib
+import sys
+import threading
+from contextlib import contextmanager
+
+_main_lock = threading.RLock()
+
+
+@contextmanager
+def spawn_main_module(module_name: str):
+    """Подменяет __main__ на module_name на время запуска дочерних процессов"""
+    module = importlib.import_module(module_name)
+    with _main_lock:
+        original = sys.modules.get('__main__')
+        sys.modules['__main__'] = module
+        try:
+            yield module
+        finally:
+            if original is not None:
+                sys.modules['__main__'] = original
+            else:
+                sys.modules.pop('__main__', None)
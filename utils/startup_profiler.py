@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Профилирование запуска bots.py / ai.py и отложенные задачи старта.
+
+Запуск с флагом --profile-startup (или INFOBOT_PROFILE_STARTUP=1) включает замер:
+- времени импорта каждого модуля (собственное и суммарное, как python -X importtime);
+- длительности шагов инициализации (profiler.step('...')).
+Отчёт печатается в stderr вызовом report_startup_profile().
+
+defer_startup_task() выполняет некритичные задачи старта (git, установка хуков,
+инициализация AI) в фоновом потоке, чтобы сервис и мониторинг позиций
+запускались без ожидания.
+"""
+from __future__ import annotations
+
+import importlib.machinery
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+PROFILE_FLAG = '--profile-startup'
+PROFILE_ENV = 'INFOBOT_PROFILE_STARTUP'
+
+# Классы загрузчиков, чей exec_module оборачивается таймером
+_TIMED_LOADERS = (
+    importlib.machinery.SourceFileLoader,
+    importlib.machinery.SourcelessFileLoader,
+    importlib.machinery.ExtensionFileLoader,
+)
+
+
+class StartupProfiler:
+    """Замер времени импортов и шагов инициализации процесса"""
+
+    def __init__(self):
+        self.enabled = False
+        self.started_at = time.perf_counter()
+        self.imports: Dict[str, Tuple[float, float]] = {}  # модуль -> (собственное, суммарное) в секундах
+        self.steps: List[Tuple[str, float, str]] = []  # (шаг, секунды, поток)
+        self._original_exec: Dict[type, Callable] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def enable(self) -> None:
+        """Включает замер импортов (патчит exec_module стандартных загрузчиков)"""
+        if self.enabled:
+            return
+        self.enabled = True
+        for loader_cls in _TIMED_LOADERS:
+            original = loader_cls.exec_module
+            self._original_exec[loader_cls] = original
+            loader_cls.exec_module = self._timed_exec(original)
+
+    def disable(self) -> None:
+        """Снимает замер импортов (шаги продолжают записываться, пока enabled)"""
+        for loader_cls, original in self._original_exec.items():
+            loader_cls.exec_module = original
+        self._original_exec.clear()
+
+    def _timed_exec(self, original: Callable) -> Callable:
+        profiler = self
+
+        def exec_module(loader, module):
+            stack = getattr(profiler._local, 'stack', None)
+            if stack is None:
+                stack = profiler._local.stack = []
+            frame = [time.perf_counter(), 0.0]  # начало, время вложенных импортов
+            stack.append(frame)
+            try:
+                return original(loader, module)
+            finally:
+                stack.pop()
+                total = time.perf_counter() - frame[0]
+                if stack:
+                    stack[-1][1] += total
+                with profiler._lock:
+                    profiler.imports[module.__name__] = (total - frame[1], total)
+
+        return exec_module
+
+    @contextmanager
+    def step(self, name: str):
+        """Замер шага инициализации: with profiler.step('...'): ..."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.steps.append((name, time.perf_counter() - started, threading.current_thread().name))
+
+    def format_report(self, top_n: int = 30) -> str:
+        with self._lock:
+            imports = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+            steps = list(self.steps)
+        elapsed = time.perf_counter() - self.started_at
+        lines = [
+            "=" * 80,
+            f"⏱️ ПРОФИЛЬ ЗАПУСКА: {elapsed:.2f}с с начала замера, модулей импортировано: {len(imports)}",
+            "=" * 80,
+            f"Шаги инициализации ({len(steps)}):",
+        ]
+        for name, seconds, thread_name in steps:
+            thread_note = '' if thread_name == 'MainThread' else f"  [{thread_name}]"
+            lines.append(f"  {seconds * 1000:9.1f} мс  {name}{thread_note}")
+        lines.append(f"Самые медленные импорты (собственное / суммарное время), топ-{top_n}:")
+        for name, (self_time, total) in imports[:top_n]:
+            lines.append(f"  {self_time * 1000:9.1f} мс / {total * 1000:9.1f} мс  {name}")
+        lines.append("=" * 80)
+        return "\n".join(lines)
+
+    def report(self, top_n: int = 30) -> None:
+        """Печатает отчёт в stderr (один раз за процесс)"""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        try:
+            sys.stderr.write(self.format_report(top_n) + "\n")
+        except Exception:
+            pass
+
+
+_profiler = StartupProfiler()
+
+
+def get_startup_profiler() -> StartupProfiler:
+    return _profiler
+
+
+def init_startup_profiler(argv: Optional[List[str]] = None) -> StartupProfiler:
+    """
+    Включает профилирование, если передан --profile-startup или INFOBOT_PROFILE_STARTUP=1.
+    Флаг убирается из argv, чтобы его не видели разборщики аргументов дальше по коду.
+    """
+    argv = sys.argv if argv is None else argv
+    enabled = os.environ.get(PROFILE_ENV, '').strip().lower() in ('1', 'true', 'yes')
+    if PROFILE_FLAG in argv:
+        enabled = True
+        while PROFILE_FLAG in argv:
+            argv.remove(PROFILE_FLAG)
+    if enabled:
+        _profiler.enable()
+    return _profiler
+
+
+def report_startup_profile(top_n: int = 30) -> None:
+    _profiler.report(top_n)
+
+
+_deferred_tasks: List[Tuple[str, Callable[[], None]]] = []
+_deferred_lock = threading.Lock()
+_deferred_thread: Optional[threading.Thread] = None
+
+
+def _run_deferred_tasks() -> None:
+    global _deferred_thread
+    while True:
+        with _deferred_lock:
+            if not _deferred_tasks:
+                _deferred_thread = None
+                return
+            name, func = _deferred_tasks.pop(0)
+        with _profiler.step(f"отложено: {name}"):
+            try:
+                func()
+            except Exception as e:
+                try:
+                    sys.stderr.write(f"[WARNING] Отложенная задача старта '{name}' завершилась с ошибкой: {e}\n")
+                except Exception:
+                    pass
+
+
+def defer_startup_task(name: str, func: Callable[[], None]) -> None:
+    """Ставит некритичную задачу старта в очередь фонового потока (выполняются по порядку)"""
+    global _deferred_thread
+    with _deferred_lock:
+        _deferred_tasks.append((name, func))
+        if _deferred_thread is None:
+            _deferred_thread = threading.Thread(target=_run_deferred_tasks, name='StartupDeferred', daemon=True)
+            _deferred_thread.start()
+
+
+def wait_deferred_startup_tasks(timeout: Optional[float] = None) -> bool:
+    """Ждёт завершения отложенных задач (True — все выполнены)"""
+    thread = _deferred_thread
+    if thread is not None:
+        thread.join(timeout)
+        return not thread.is_alive()
+    return True